@@ -0,0 +1 @@
+resultado = 1 + 2
\ No newline at end of file
@@ -5,26 +5,25 @@ from bs4 import BeautifulSoup
 def executar(query):
     """
     Realiza uma busca simples na web e extrai títulos e links.
+    Falhas levantam exceção (o registro de habilidades as conta como erro).
     """
     url = f"https://www.google.com/search?q={query}"
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
-    try:
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
+    response = requests.get(url, headers=headers, timeout=15)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, "html.parser")
 
-        resultados = []
-        for g in soup.find_all("div", class_="tF2Cxc"):
-            title = g.find("h3").text if g.find("h3") else "Sem título"
-            link = g.find("a")["href"] if g.find("a") else "Sem link"
-            resultados.append(f"{title}: {link}")
+    resultados = []
+    for g in soup.find_all("div", class_="tF2Cxc"):
+        title = g.find("h3").text if g.find("h3") else "Sem título"
+        link = g.find("a")["href"] if g.find("a") else "Sem link"
+        resultados.append(f"{title}: {link}")
 
-        if not resultados:
-            # Fallback para busca simplificada se a estrutura do Google mudar
-            return f"Busca realizada para: {query}. Verifique manualmente em {url}"
+    if not resultados:
+        # Estrutura do Google mudou ou busca vazia: não é uma resposta
+        raise LookupError(f"Nenhum resultado extraído para: {query}. Verifique manualmente em {url}")
 
-        return "\n".join(resultados[:5])
-    except Exception as e:
-        return f"Erro na busca: {e}"
+    return "\n".join(resultados[:5])
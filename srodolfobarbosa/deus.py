@@ -1,6 +1,78 @@
 import subprocess
 import sys
 import importlib
+import os
+
+# Perfil de cold start: precisa ser o primeiro import para cronometrar todo o boot
+try:
+    from .nexo_boot_profile import StartupProfiler
+except ImportError:
+    from nexo_boot_profile import StartupProfiler
+
+# MODO LAZY: SDKs opcionais carregam no primeiro uso e o NexoSwarm nasce no evento 'startup'
+LAZY_INIT = os.getenv("NEXO_LAZY_INIT", "false").lower() in ("1", "true", "yes")
+boot_profile = StartupProfiler(modo="lazy" if LAZY_INIT else "eager")
+# O corpo do módulo não cabe num try/finally: se o import falhar, o hook se remove sozinho
+boot_profile.instalar_hook_import(dono=__name__)
+
+# Serviço único de dependências (snapshot via importlib.metadata, sem imports/pip repetidos)
+try:
+    from .nexo_dependencias import DependencyService, instalar_com_relatorio, wheelhouse_padrao
+except ImportError:
+    from nexo_dependencias import DependencyService, instalar_com_relatorio, wheelhouse_padrao
+
+# Análise de código compartilhada: um parse por hash de conteúdo (LRU + cache em disco)
+try:
+    from .nexo_analise import AnalisadorCodigo
+except ImportError:
+    from nexo_analise import AnalisadorCodigo
+
+_dir_cache_analise = os.getenv("NEXO_ANALISE_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "nexo_analise"))
+analisador = AnalisadorCodigo(dir_cache=_dir_cache_analise if _dir_cache_analise.lower() not in ("", "0", "off", "false") else None)
+
+# Registro de habilidades invocáveis (pool limitado, timeout e histogramas por skill)
+try:
+    from .nexo_habilidades import SkillRegistry
+except ImportError:
+    from nexo_habilidades import SkillRegistry
+
+# Roteador local de intenções (gatilhos + embeddings por feature hashing, sem LLM)
+try:
+    from .nexo_intencoes import VIAS_APRENDIZADO, IntentRouter
+except ImportError:
+    from nexo_intencoes import VIAS_APRENDIZADO, IntentRouter
+
+# Pool de sandboxes quentes (workers pré-forkados com rlimits) para ações pendentes
+try:
+    from .sandbox_pool import HistoricoExecucoes, SandboxPool
+except ImportError:
+    try:
+        from sandbox_pool import HistoricoExecucoes, SandboxPool
+    except ImportError:
+        SandboxPool = HistoricoExecucoes = None
+# Fallback por subprocesso (só stdlib): o filho é colhido com wait4 para medir o consumo
+try:
+    from .sandbox_runner import ChildRun, exit_reason
+except ImportError:
+    from sandbox_runner import ChildRun, exit_reason
+
+# Mapa de impacto de testes (coverage por teste): apply_preview roda só os testes afetados
+try:
+    from .sandbox.impact import TestImpactMap, pytest_command, text_changes
+except ImportError:
+    try:
+        from sandbox.impact import TestImpactMap, pytest_command, text_changes
+    except ImportError:
+        TestImpactMap = None
+
+# Histórico indexado do sandbox/auto-repair (SQLite WAL) para consultas de tendência
+try:
+    from .sandbox.history import HistoryStore
+except ImportError:
+    try:
+        from sandbox.history import HistoryStore
+    except ImportError:
+        HistoryStore = None
 
 def assegurar_dependencias_v2():
     # Dicionário atualizado com a regra da nova SDK do Pinecone
@@ -13,58 +85,52 @@ def assegurar_dependencias_v2():
     
     print("🧬 NEXO: Sincronizando biometria digital e dependências...")
     
-    for mod, package in deps.items():
-        try:
-            importlib.import_module(mod)
-        except (ImportError, Exception):
-            # Se for o pinecone dando erro de 'renomeado', tentamos limpar
-            if mod == "pinecone":
-                print("🧹 Limpando conflito legado do Pinecone...")
-                subprocess.call([sys.executable, "-m", "pip", "uninstall", "-y", "pinecone-client"])
-            
-            print(f"📥 Injetando: {package}...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", package])
+    # Se o SDK legado estiver instalado, o 'pinecone' novo quebra: limpamos antes
+    if dependencias.versao("pinecone-client"):
+        print("🧹 Limpando conflito legado do Pinecone...")
+        subprocess.call([sys.executable, "-m", "pip", "uninstall", "-y", "pinecone-client"])
+        dependencias.invalidate()
+
+    for package, ok in dependencias.garantir(deps.values()).items():
+        if not ok:
+            print(f"⚠️ NEXO: Não foi possível injetar {package}.")
 
 # 1. ESSENCIAL DO SISTEMA
 import os
 import sys
 import subprocess
-import ast
 
 # Helper seguro para instalações automáticas (CONTROLADO POR ENV VAR)
-def safe_install(pkg):
-    """Instala pacotes via pip. AUTO_INSTALL é ativado por padrão para soberania."""
+def safe_install(pkgs):
+    """Instala um pacote ou uma lista deles numa única chamada do pip.
+    Usa o wheelhouse local (NEXO_WHEELHOUSE ou ./wheelhouse) primeiro, se existir.
+    Se o lote falhar, os pacotes irresolúveis são isolados e o resto é instalado.
+    AUTO_INSTALL é ativado por padrão para soberania."""
+    pkgs = [pkgs] if isinstance(pkgs, str) else list(pkgs)
     # SOBERANIA ATIVADA: por padrão instalamos o que falta. Desativar explicitamente com AUTO_INSTALL=false
     mode = os.getenv("AUTO_INSTALL", "true").lower()
     if mode not in ("1", "true", "yes"):
         # No startup time we may not have logger configurado
-        print(f"⚠️ AUTO_INSTALL disabled: would install {pkg}")
-        return False
-    try:
-        # usar --no-cache-dir para evitar problemas com cache em ambientes CI
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "--no-cache-dir", pkg])
-        print(f"✅ Installed {pkg}")
-        return True
-    except Exception as e:
-        print(f"⚠️ Failed to install {pkg}: {e}")
+        print(f"⚠️ AUTO_INSTALL disabled: would install {' '.join(pkgs)}")
         return False
+    # usar --no-cache-dir para evitar problemas com cache em ambientes CI
+    relatorio = instalar_com_relatorio(pkgs, wheelhouse=wheelhouse_padrao())
+    ok = [p for p, instalado in relatorio.items() if instalado]
+    falhas = [p for p, instalado in relatorio.items() if not instalado]
+    if ok:
+        print(f"✅ Installed {' '.join(ok)}")
+    if falhas:
+        print(f"⚠️ Failed to install {' '.join(falhas)}")
+    return not falhas
+
+dependencias = DependencyService(instalador=safe_install)
 
 # Segurança: checar código antes de execução administrativa
 def is_code_safe(code: str) -> bool:
+    # Sem imports, sem __import__ e sem chamadas a os/subprocess/sys/shutil/socket (análise em cache)
     try:
-        tree = ast.parse(code)
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.Import, ast.ImportFrom)):
-                return False
-            if isinstance(node, ast.Call):
-                # detect __import__
-                if isinstance(node.func, ast.Name) and getattr(node.func, 'id', '') == '__import__':
-                    return False
-                if isinstance(node.func, ast.Attribute):
-                    val = getattr(node.func, 'value', None)
-                    if isinstance(val, ast.Name) and val.id in ('os','subprocess','sys','shutil','socket'):
-                        return False
-        return True
+        # Veredito de segurança sempre de um parse feito agora, nunca do cache em disco
+        return analisador.analisar(code, usar_disco=False).seguro
     except Exception:
         return False
 
@@ -72,184 +138,166 @@ def is_code_safe(code: str) -> bool:
 def boot_critical_repair():
     requirements = ["loguru", "python-dotenv", "fastapi"]
     print("🧬 NEXO: Verificando integridade do núcleo...")
-    for lib in requirements:
-        try:
-            __import__(lib.replace("-", "_"))
-        except ImportError:
-            print(f"📥 Tentando injetar {lib}...")
-            try:
-                # Tenta instalar apenas se necessário
-                subprocess.check_call([sys.executable, "-m", "pip", "install", lib])
-            except Exception:
-                print(f"❌ Bloqueio de segurança: {lib} deve estar no requirements.txt")
+    for lib, ok in dependencias.garantir(requirements).items():
+        if not ok:
+            print(f"❌ Bloqueio de segurança: {lib} deve estar no requirements.txt")
 
-# Chamar com cautela
-try:
-    boot_critical_repair()
-except:
-    pass
+# 3. EXECUTA O REPARO ANTES DE QUALQUER OUTRA COISA (uma única vez)
+with boot_profile.fase("boot_critical_repair"):
+    try:
+        boot_critical_repair()
+    except Exception:
+        pass
 
 # 4. IMPORTAÇÕES SEGURAS (Pós-Reparo)
-import asyncio
-import json
-import importlib.util
-import re
-import time
-import shutil
-import glob
-import zipfile
-from datetime import datetime
-from pathlib import Path
-from typing import Optional, List, Dict
-
-from loguru import logger
-from fastapi import FastAPI, Request, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse
-from dotenv import load_dotenv
+with boot_profile.fase("imports_nucleo"):
+    import asyncio
+    import collections
+    import json
+    import importlib.util
+    import re
+    import time
+    import shutil
+    import glob
+    import threading
+    import zipfile
+    from datetime import datetime
+    from pathlib import Path
+    from typing import Optional, List, Dict
+
+    from fastapi import FastAPI, Request, BackgroundTasks
+    from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+    from fastapi.staticfiles import StaticFiles
+    from dotenv import load_dotenv
 
 # --- NOVO: SUPER BOOT SHIELD (INSTALAÇÃO AUTOMÁTICA) ---
 def super_boot_shield(codigo):
-    import ast, subprocess, sys
     try:
-        arvore = ast.parse(codigo)
-        for node in ast.walk(arvore):
-            if isinstance(node, (ast.Import, ast.ImportFrom)):
-                # Extrai o nome da biblioteca (ex: 'pandas', 'httpx')
-                modulo = node.names[0].name.split('.')[0] if isinstance(node, ast.Import) else node.module.split('.')[0]
-                try:
-                    __import__(modulo)
-                except ImportError:
-                    print(f"🛡️ NEXO: Instalando {modulo} para manter a soberania...")
-                    safe_install(modulo)
+        # Nomes das bibliotecas importadas (ex: 'pandas', 'httpx'), do cache de análise
+        modulos = analisador.analisar(codigo).imports
+        faltando = dependencias.missing(sorted(modulos))
+        if faltando:
+            print(f"🛡️ NEXO: Instalando {', '.join(faltando)} para manter a soberania...")
+            dependencias.garantir(faltando)
     except Exception as e:
         print(f"⚠️ Erro no Shield: {e}")
 
 # ==============================================================================
 # BLOCO 4: MONITOR DIALÉTICO 5D (LOGURU SINKS ESTRUTURADOS)
 # ==============================================================================
-try:
-    from loguru import logger as _logger_instance
-    import sys as _sys
-
-    # Limpa configurações padrões para evitar duplicidade
-    _logger_instance.remove()
-
-    # 1. SINK ARQUITETO (FOCO: LUCRO & ESTRATÉGIA)
-    _logger_instance.add(
-        "nexo_lucro.log",
-        filter=lambda record: record["level"].name in ["SUCCESS", "INFO"],
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <cyan>ARQ:</cyan> {message}",
-        rotation="10 MB"
-    )
-
-    # 2. SINK AUDITOR (FOCO: SEGURANÇA & RISCOS)
-    _logger_instance.add(
-        "nexo_seguranca.log",
-        filter=lambda record: record["level"].name in ["WARNING", "ERROR", "CRITICAL"],
-        format="<red>{time:YYYY-MM-DD HH:mm:ss}</red> | <yellow>AUD:</yellow> {message}",
-        rotation="10 MB"
-    )
-
-    # 3. SINK CONSOLE (VISUALIZAÇÃO EM TEMPO REAL)
-    _logger_instance.add(
-        _sys.stderr,
-        format="<magenta>🔱 NEXO</magenta> | <level>{level}</level> | {message}",
-        colorize=True
-    )
+with boot_profile.fase("logger"):
+    try:
+        from loguru import logger as _logger_instance
+        import sys as _sys
+
+        # Limpa configurações padrões para evitar duplicidade
+        _logger_instance.remove()
+
+        # 1. SINK ARQUITETO (FOCO: LUCRO & ESTRATÉGIA)
+        _logger_instance.add(
+            "nexo_lucro.log",
+            filter=lambda record: record["level"].name in ["SUCCESS", "INFO"],
+            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <cyan>ARQ:</cyan> {message}",
+            rotation="10 MB"
+        )
+
+        # 2. SINK AUDITOR (FOCO: SEGURANÇA & RISCOS)
+        _logger_instance.add(
+            "nexo_seguranca.log",
+            filter=lambda record: record["level"].name in ["WARNING", "ERROR", "CRITICAL"],
+            format="<red>{time:YYYY-MM-DD HH:mm:ss}</red> | <yellow>AUD:</yellow> {message}",
+            rotation="10 MB"
+        )
+
+        # 3. SINK CONSOLE (VISUALIZAÇÃO EM TEMPO REAL)
+        _logger_instance.add(
+            _sys.stderr,
+            format="<magenta>🔱 NEXO</magenta> | <level>{level}</level> | {message}",
+            colorize=True
+        )
+
+        _logger_instance.success("📟 MONITOR 5D: Sinks Dialéticos ativados. Arquiteto e Auditor em linha.")
+
+        # Exponha o logger padrão para o resto do arquivo
+        logger = _logger_instance
+    except Exception:
+        # Fallback para logging padrão caso 'loguru' não esteja instalado
+        import logging as _logging
+        _std = _logging.getLogger("nexo")
+        _std.setLevel(_logging.INFO)
+        handler = _logging.StreamHandler()
+        handler.setFormatter(_logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
+        if not _std.handlers:
+            _std.addHandler(handler)
+
+        def _success(msg):
+            _std.info(msg)
+
+        class _SimpleLogger:
+            def __init__(self, std):
+                self._std = std
+            def __getattr__(self, name):
+                if name == "success":
+                    return _success
+                return getattr(self._std, name)
+
+        logger = _SimpleLogger(_std)
+        logger.info("⚠️ loguru não disponível: usando logger padrão (stdout/stderr).")
 
-    _logger_instance.success("📟 MONITOR 5D: Sinks Dialéticos ativados. Arquiteto e Auditor em linha.")
-
-    # Exponha o logger padrão para o resto do arquivo
-    logger = _logger_instance
-except Exception:
-    # Fallback para logging padrão caso 'loguru' não esteja instalado
-    import logging as _logging
-    _std = _logging.getLogger("nexo")
-    _std.setLevel(_logging.INFO)
-    handler = _logging.StreamHandler()
-    handler.setFormatter(_logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
-    if not _std.handlers:
-        _std.addHandler(handler)
-
-    def _success(msg):
-        _std.info(msg)
-
-    class _SimpleLogger:
-        def __init__(self, std):
-            self._std = std
-        def __getattr__(self, name):
-            if name == "success":
-                return _success
-            return getattr(self._std, name)
-
-    logger = _SimpleLogger(_std)
-    logger.info("⚠️ loguru não disponível: usando logger padrão (stdout/stderr).")
-
-# 3. EXECUTA O REPARO ANTES DE QUALQUER OUTRA COISA
-boot_critical_repair()
-
-# 4. AGORA SIM, VOCÊ PODE LISTAR TODOS OS SEUS IMPORTS ABAIXO
-# O Python só vai ler estas linhas depois de ter instalado tudo acima
-import asyncio
-import json
-import importlib.util
-import re
-import time
-import shutil
-import glob
-import zipfile
-from datetime import datetime
-from pathlib import Path
-from typing import Optional, List, Dict
-
-from fastapi import FastAPI, Request, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse
-from loguru import logger
-from dotenv import load_dotenv
-
-# ... RESTO DO SEU CÓDIGO (NexoSwarm, etc) ...
 # ==============================================================================
 # 🔱 NEXO V33: ARQUITETURA DE ENXAME & AUTO-EVOLUÇÃO SOBERANA
 # ==============================================================================
-# 0. MOTOR DE AUTO-REPARO PREVENTIVO (CORREÇÃO PINECONE & DEPENDÊNCIAS)
-import os
-import sys
-import subprocess
-import importlib.util
-import asyncio
-import json
-import re
-import glob
-import shutil
-import zipfile
-from datetime import datetime
-from pathlib import Path
-from typing import Optional, List, Dict
-from dotenv import load_dotenv
-from fastapi import FastAPI, Request, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
-# Imports opcionais — carregados de forma segura para evitar falhas na importação
-try:
-    from langchain_groq import ChatGroq
-except Exception:
-    ChatGroq = None
-try:
-    from supabase import create_client
-except Exception:
-    create_client = None
-try:
-    from pinecone import Pinecone
-except Exception:
-    Pinecone = None
-try:
-    import mercadopago
-except Exception:
-    mercadopago = None
-try:
-    from duckduckgo_search import DDGS
-except Exception:
-    DDGS = None
+# Imports opcionais — carregados de forma segura para evitar falhas na importação.
+# No modo lazy (NEXO_LAZY_INIT=true) cada SDK só é importado no primeiro uso.
+class _SDKOpcional:
+    """Import preguiçoso de um SDK opcional; memoriza o resultado (None se indisponível)."""
+    _PENDENTE = object()
+
+    def __init__(self, modulo: str, atributo: Optional[str] = None):
+        self.modulo = modulo
+        self.atributo = atributo
+        self._valor = self._PENDENTE
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._valor is self._PENDENTE:
+            with self._lock:
+                if self._valor is self._PENDENTE:
+                    with boot_profile.medir_import(self.modulo):
+                        try:
+                            mod = importlib.import_module(self.modulo)
+                            self._valor = getattr(mod, self.atributo) if self.atributo else mod
+                        except Exception:
+                            self._valor = None
+        return self._valor
+
+
+_SDKS = {
+    "ChatGroq": _SDKOpcional("langchain_groq", "ChatGroq"),
+    "create_client": _SDKOpcional("supabase", "create_client"),
+    "Pinecone": _SDKOpcional("pinecone", "Pinecone"),
+    "mercadopago": _SDKOpcional("mercadopago"),
+    "DDGS": _SDKOpcional("duckduckgo_search", "DDGS"),
+}
+
+
+def _sdk(nome: str):
+    """Retorna o SDK opcional (classe/função/módulo) ou None se não estiver instalado."""
+    return _SDKS[nome].get()
+
+
+def __getattr__(nome):
+    # Compatibilidade: `deus.ChatGroq`, `deus.DDGS` etc. continuam acessíveis de fora
+    if nome in _SDKS:
+        return _sdk(nome)
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+if not LAZY_INIT:
+    with boot_profile.fase("sdks_opcionais"):
+        for _nome_sdk in _SDKS:
+            _sdk(_nome_sdk)
+
 
 # 1. MOTOR DE AUTO-REPARO E LIMPEZA DE CONFLITOS (VIVO & RESILIENTE)
 def garantir_dependencias():
@@ -263,52 +311,36 @@ def garantir_dependencias():
         "duckduckgo-search", "pypdf2", "pillow", "python-multipart"
     ]
     
-    # Resolve conflito histórico do Pinecone
-    try:
-        import pinecone
-        if not hasattr(pinecone, 'Index'): raise ImportError
-    except (ImportError, Exception):
+    # Resolve conflito histórico do Pinecone (detectado via metadata, sem importar o SDK)
+    if dependencias.versao("pinecone-client"):
         print("🧹 NEXO: Corrigindo SDK do Pinecone...")
         try:
             subprocess.check_call([sys.executable, "-m", "pip", "uninstall", "-y", "pinecone-client", "pinecone"])
-            safe_install("pinecone")
+            dependencias.invalidate()
         except Exception as e:
             print(f"⚠️ NEXO: Falha ao reparar Pinecone (Permissão?): {e}")
 
-    for lib in requirements:
-        try:
-            mod = lib.replace("-", "_")
-            __import__(mod)
-        except ImportError:
-            print(f"🧬 NEXO: Instalando {lib}...")
-            if not safe_install(lib):
-                print(f"⚠️ NEXO: Não foi possível instalar {lib}: instalação não permitida ou falhou.")
+    # Em regime estável isso é só lookup no snapshot: nenhum import, nenhum subprocess
+    for lib, ok in dependencias.garantir(requirements).items():
+        if not ok:
+            print(f"⚠️ NEXO: Não foi possível instalar {lib}: instalação não permitida ou falhou.")
 
 
 def check_package_installed(module_name: str) -> bool:
-    """Verifica se um módulo está importável no ambiente atual."""
-    try:
-        importlib.import_module(module_name)
-        return True
-    except Exception:
-        return False
+    """Verifica se um módulo/pacote está instalado (consulta o snapshot de dependências)."""
+    return dependencias.is_installed(module_name)
 
 
 def ensure_packages(packages: List[str]) -> Dict[str, bool]:
     """Tenta garantir que a lista de pacotes esteja instalada. Retorna um mapa pacote->bool."""
-    results = {}
-    for pkg in packages:
-        mod = pkg.replace("-", "_")
-        if check_package_installed(mod):
-            results[pkg] = True
-            continue
-        logger.info(f"🧬 NEXO: Tentando instalar {pkg}...")
-        ok = safe_install(pkg)
-        if ok and check_package_installed(mod):
-            results[pkg] = True
+    faltando = set(dependencias.missing(packages))
+    if faltando:
+        logger.info(f"🧬 NEXO: Tentando instalar {', '.join(sorted(faltando))}...")
+    results = dependencias.garantir(packages)
+    for pkg in faltando:
+        if results.get(pkg):
             logger.success(f"✅ Instalado: {pkg}")
         else:
-            results[pkg] = False
             logger.warning(f"⚠️ Falha ao instalar: {pkg}")
     return results
 
@@ -317,10 +349,156 @@ def ensure_packages(packages: List[str]) -> Dict[str, bool]:
 
 
 # --- INFRAESTRUTURA ---
-BASE_DIR = Path(__file__).parent.resolve()
-HABILIDADES_DIR = BASE_DIR / "habilidades"
-HABILIDADES_DIR.mkdir(exist_ok=True)
-load_dotenv(BASE_DIR / ".env")
+with boot_profile.fase("infraestrutura"):
+    BASE_DIR = Path(__file__).parent.resolve()
+    HABILIDADES_DIR = BASE_DIR / "habilidades"
+    HABILIDADES_DIR.mkdir(exist_ok=True)
+    load_dotenv(BASE_DIR / ".env")
+
+# Sandbox das ações pendentes: pool quente por padrão, subprocess por execução como fallback
+SANDBOX_CPU_SECONDS = 5
+SANDBOX_MEM_BYTES = 150 * 1024 * 1024
+SANDBOX_TIMEOUT = 10
+_sandbox_pool = None
+# Consumo por execução (CPU user/sys, pico de RSS, parede, motivo) para dimensionar limites
+sandbox_historico = HistoricoExecucoes(
+    BASE_DIR / ".sandbox" / "exec_history.jsonl",
+    limite_cpu_ms=SANDBOX_CPU_SECONDS * 1000,
+    limite_rss_kb=SANDBOX_MEM_BYTES // 1024,
+) if HistoricoExecucoes else None
+
+
+def get_sandbox_pool():
+    """Pool de sandbox compartilhado (criado no primeiro uso), ou None se desativado."""
+    global _sandbox_pool
+    if _sandbox_pool is None and SandboxPool is not None and os.getenv("NEXO_SANDBOX_POOL", "true").lower() in ("1", "true", "yes"):
+        _sandbox_pool = SandboxPool(cpu_seconds=SANDBOX_CPU_SECONDS, mem_bytes=SANDBOX_MEM_BYTES, timeout=SANDBOX_TIMEOUT)
+    return _sandbox_pool
+
+
+def concorrencia_sandbox() -> int:
+    """Execuções simultâneas permitidas no sandbox (NEXO_SANDBOX_CONCORRENCIA ou nº de workers do pool)."""
+    pool = get_sandbox_pool()
+    return int(os.getenv("NEXO_SANDBOX_CONCORRENCIA", "0")) or (pool.workers if pool else 2)
+
+
+_semaforo_sandbox = None  # (loop, Semaphore)
+
+
+def semaforo_sandbox() -> asyncio.Semaphore:
+    """Teto global de execuções no sandbox, compartilhado por todas as rotas.
+    Um asyncio.Semaphore não cruza event loops: é recriado se o loop mudar (só em testes)."""
+    global _semaforo_sandbox
+    loop = asyncio.get_running_loop()
+    if _semaforo_sandbox is None or _semaforo_sandbox[0] is not loop:
+        _semaforo_sandbox = (loop, asyncio.Semaphore(concorrencia_sandbox()))
+    return _semaforo_sandbox[1]
+
+
+async def executar_em_sandbox(code: str, path: Path) -> Dict:
+    """Executa código já validado no sandbox (dentro do teto global) e registra o consumo no histórico.
+    Retorna status/resultado|detail/motivo/wall_ms/cpu_ms/cpu_user_ms/cpu_sys_ms/peak_rss_kb."""
+    async with semaforo_sandbox():
+        data = await _executar_em_sandbox(code, path)
+    if sandbox_historico is not None:
+        sandbox_historico.registrar(path.name, data)
+    return data
+
+
+async def _executar_em_sandbox(code: str, path: Path) -> Dict:
+    pool = get_sandbox_pool()
+    if pool is not None:
+        try:
+            return await pool.executar_async(code)
+        except Exception as e:
+            logger.warning(f"⚠️ Pool de sandbox indisponível ({e}); usando subprocess.")
+    runner = Path(__file__).parent / 'sandbox_runner.py'
+    inicio = time.perf_counter()
+    # CPU e pico de RSS vêm do rusage do filho (wait4), mesmo se um limite o matar
+    filho = ChildRun(
+        [sys.executable, str(runner), str(path), str(SANDBOX_CPU_SECONDS), str(SANDBOX_MEM_BYTES)],
+        SANDBOX_TIMEOUT,
+    )
+    out = (await asyncio.to_thread(filho.read)).decode('utf-8', errors='ignore').strip()
+    returncode = await asyncio.to_thread(filho.wait)
+    if filho.timed_out:
+        data = {"status": "timeout", "motivo": "timeout"}
+    else:
+        try:
+            data = json.loads(out.splitlines()[-1])
+        except Exception:
+            # Morto por sinal (SIGXCPU no RLIMIT_CPU) antes de imprimir o resultado
+            data = {"status": "error", "detail": out, "motivo": exit_reason(returncode)}
+    data.update(filho.usage)
+    data.setdefault("motivo", "ok" if data.get("status") == "ok" else "exception")
+    if "cpu_user_ms" in data:
+        data["cpu_ms"] = round(data["cpu_user_ms"] + data["cpu_sys_ms"], 2)
+    data["wall_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+    return data
+
+
+async def executar_em_sandbox_stream(code: str, path: Path):
+    """Como ``executar_em_sandbox``, mas gera frames {"tipo": "saida"|"resultado"} enquanto executa.
+    Só a cauda da saída (MAX_SAIDA_CHARS) fica em memória; o resultado vai para o histórico."""
+    pool = get_sandbox_pool()
+    async with semaforo_sandbox():
+        frames = pool.executar_stream_async(code) if pool is not None else _stream_subprocess(path)
+        async for frame in frames:
+            if frame["tipo"] == "resultado" and sandbox_historico is not None:
+                sandbox_historico.registrar(path.name, frame)
+            yield frame
+
+
+async def _stream_subprocess(path: Path):
+    """Fallback sem pool: repassa o stdout do sandbox_runner linha a linha (a última é o JSON final).
+    O filho roda sem buffer (-u): com stdout num pipe ele seria bufferizado em blocos e
+    todas as linhas chegariam juntas só no fim. O timeout de parede mata o filho
+    (fim do stdout) e o consumo vem do rusage dele, colhido com wait4."""
+    runner = Path(__file__).parent / 'sandbox_runner.py'
+    inicio = time.perf_counter()
+    filho = ChildRun(
+        [sys.executable, "-u", str(runner), str(path), str(SANDBOX_CPU_SECONDS), str(SANDBOX_MEM_BYTES)],
+        SANDBOX_TIMEOUT,
+    )
+    cauda = collections.deque(maxlen=200)  # últimas linhas; readline limita cada uma a 64KB
+    anterior = None
+    terminou = False
+    try:
+        while True:
+            linha = await asyncio.to_thread(filho.readline)
+            if not linha:
+                terminou = True
+                break
+            if anterior is not None:
+                cauda.append(anterior)
+                yield {"tipo": "saida", "texto": anterior}
+            anterior = linha.decode('utf-8', errors='ignore')
+    finally:
+        if not terminou:
+            filho.kill()  # cliente desconectou no meio
+        returncode = await asyncio.to_thread(filho.wait)  # colhe o filho: nada de zumbi
+    if filho.timed_out:
+        data = {"status": "timeout", "motivo": "timeout"}
+    else:
+        try:
+            data = json.loads(anterior or "")
+        except Exception:
+            if anterior:
+                cauda.append(anterior)
+            data = {"status": "error", "detail": "sem resultado", "motivo": exit_reason(returncode)}
+    data.update(filho.usage)
+    data.setdefault("motivo", "ok" if data.get("status") == "ok" else "exception")
+    if "cpu_user_ms" in data:
+        data["cpu_ms"] = round(data["cpu_user_ms"] + data["cpu_sys_ms"], 2)
+    data["saida"] = "".join(cauda)
+    data["wall_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+    yield {"tipo": "resultado", **data}
+
+
+# Skills embutidas no repositório: registradas sem import, carregadas na primeira chamada
+HABILIDADES_EMBUTIDAS = ("busca_web", "gerenciador_extensoes", "huggingface_sync")
+# Só habilidades sem efeitos colaterais podem ser acionadas pela rota rápida
+HABILIDADES_SOMENTE_LEITURA = ("busca_web",)
 
 # ==============================================================================
 # 2. NÚCLEO SOBERANO (SWARM + AUTO-EVOLUÇÃO)
@@ -335,12 +513,12 @@ class NexoSwarm:
 
         # O Swarm (Enxame) mantém registro dos sub-agentes e ferramentas
         self.agentes_ativos = {}
-        self.ferramentas_carregadas = []
+        self.habilidades = SkillRegistry(carregador=self._importar_habilidade)
         self.historico_acoes = []
         
         # Conexões Externas
         try:
-            self.supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+            self.supabase = _sdk("create_client")(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
             logger.success("🔗 MEMÓRIA SOBERANA: Ativa.")
         except:
             self.supabase = None
@@ -356,22 +534,30 @@ class NexoSwarm:
         self.memoria_sabedoria = []
 
         # Inicializa carregando habilidades existentes
+        for nome in HABILIDADES_EMBUTIDAS:
+            if (BASE_DIR / f"{nome}.py").exists():
+                self.habilidades.registrar_arquivo(
+                    nome, BASE_DIR / f"{nome}.py", somente_leitura=nome in HABILIDADES_SOMENTE_LEITURA
+                )
         # Inicializa carregando agentes/habilidades dinamicamente
         self.inicializar_enxame_dinamico()
+        # Rota rápida: aprende com ordens passadas que terminaram numa habilidade
+        self.intencoes = IntentRouter()
+        self.intencoes.treinar(self.memoria_sabedoria)
         logger.success(f"🔱 {self.nome} ONLINE. Aguardando a linhagem...")
 
+    @property
+    def ferramentas_carregadas(self):
+        """Nomes das habilidades registradas (compatibilidade com a antiga lista)."""
+        return self.habilidades.nomes()
+
     # --- 4.1 Núcleo Cognitivo ---
     def get_brain(self):
         """Retorna o motor de inferência principal (Groq). Usa import dinâmico se necessário e faz fallback para Ollama."""
-        # Se ChatGroq não estiver disponível no escopo global, tente importar dinamicamente
-        try:
-            if ChatGroq is None:
-                from langchain_groq import ChatGroq as _ChatGroq
-            else:
-                _ChatGroq = ChatGroq
-        except Exception as e:
-            _ChatGroq = None
-            logger.warning(f"⚠️ Falha ao importar ChatGroq: {e}")
+        # ChatGroq é carregado no primeiro uso (modo lazy) ou já veio do boot
+        _ChatGroq = _sdk("ChatGroq")
+        if _ChatGroq is None:
+            logger.warning("⚠️ Falha ao importar ChatGroq: langchain_groq indisponível")
 
         if _ChatGroq:
             try:
@@ -427,24 +613,28 @@ class NexoSwarm:
              if "__init__" not in file:
                 self.carregar_modulo(Path(file), tipo="Habilidade")
     
+    def _importar_habilidade(self, name: str, filepath: Path):
+        """Importa o arquivo de uma habilidade (com blindagem preditiva) e devolve o módulo."""
+        spec = importlib.util.spec_from_file_location(name, filepath)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        # CHAMADA DO BLOCO 3: blindagem preditiva antes de executar o módulo
+        try:
+            self.blindagem_preditiva(filepath)
+        except Exception:
+            # não bloquear o carregamento se a blindagem falhar
+            logger.debug("⚠️ Blindagem preditiva falhou ou foi ignorada.")
+        spec.loader.exec_module(module)
+        return module
+
     def carregar_modulo(self, filepath: Path, tipo: str):
         """Usa importlib para carregar código Python dinamicamente na RAM."""
         try:
             name = filepath.stem
-            spec = importlib.util.spec_from_file_location(name, filepath)
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[name] = module
-            # CHAMADA DO BLOCO 3: blindagem preditiva antes de executar o módulo
-            try:
-                self.blindagem_preditiva(filepath)
-            except Exception:
-                # não bloquear o carregamento se a blindagem falhar
-                logger.debug("⚠️ Blindagem preditiva falhou ou foi ignorada.")
-            spec.loader.exec_module(module)
+            module = self._importar_habilidade(name, filepath)
             
             if tipo == "Habilidade":
-                if name not in self.ferramentas_carregadas:
-                    self.ferramentas_carregadas.append(name)
+                self.habilidades.registrar_modulo(name, module)
             
             logger.success(f"🔌 {tipo} '{name}' carregado com sucesso.")
             return True
@@ -548,6 +738,27 @@ class NexoSwarm:
         except Exception as e:
             logger.debug(f"⚠️ Falha ao extrair sabedoria: {e}")
 
+    def registrar_intencao(self, ordem: str, habilidade: str, sucesso: bool = True, via: str = "llm"):
+        """
+        Guarda (ordem -> habilidade) na memória de sabedoria; só rotas vindas
+        do LLM treinam o roteador (a rota rápida não aprende consigo mesma).
+        """
+        licao = {
+            "timestamp": datetime.now().isoformat(),
+            "ordem": ordem[:300],
+            "habilidade": habilidade,
+            "sucesso": sucesso,
+            "via": via,
+        }
+        self.memoria_sabedoria.append(licao)
+        if sucesso and via in VIAS_APRENDIZADO:
+            self.intencoes.aprender(ordem, habilidade)
+        try:
+            with open("sabedoria_acumulada.json", "a", encoding="utf-8") as f:
+                f.write(json.dumps(licao, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.debug(f"⚠️ Falha ao persistir intenção: {e}")
+
     # --- NOVO: PROTOCOLO EXODUS (MIGRAÇÃO AUTOMÁTICA) ---
     def disparar_exodus(self):
         """Empacota o DNA para migrar se o servidor estiver em risco."""
@@ -652,7 +863,7 @@ class NexoSwarm:
         parts.append("\n\n# END SUMMARY")
         return "\n".join(parts)
 
-    async def pensar(self, prompt: str, **kwargs):
+    async def pensar(self, prompt: str, contexto_extra: str = "", **kwargs):
         """Interface uniforme para invocar o "brain" disponível.
 
         - Se houver um "brain" carregado, tenta delegar (procura por métodos
@@ -662,6 +873,8 @@ class NexoSwarm:
           ainda funcionem.
         Retorna um dict com chave 'sintese' contendo o texto resultante.
         """
+        if contexto_extra:
+            prompt = f"{prompt}\n\nDADOS WEB/ARQUIVOS: {contexto_extra}"
         brain = self.get_brain()
         # 1) Delegar para o backend se existir
         if brain:
@@ -932,32 +1145,17 @@ class OllamaBrain:
         Analisa se o código enviado é 'Estado da Arte' ou apenas lixo redundante.
         Usa Jaccard sobre tokens normalizados (lowercase, sem pontuação).
         """
-        import re
-
-        # 1. Coletar DNA dos códigos existentes na pasta /agentes
-        codigos_existentes = []
+        # 1. Coletar DNA (tokens) dos códigos existentes na pasta /agentes; arquivos inalterados vêm do cache
+        tokens_existentes = []
         for arq in glob.glob(str(self.caminho_agentes / "*.py")):
             try:
-                with open(arq, 'r', encoding='utf-8') as f:
-                    codigos_existentes.append(f.read())
+                tokens_existentes.append(analisador.analisar_arquivo(Path(arq)).tokens)
             except Exception:
                 continue
 
-        if not codigos_existentes:
+        if not tokens_existentes:
             return True, "Primeiro código detectado. Assimilação permitida."
 
-        # Função de normalização/tokenização simples e robusta
-        def tokenize(code_str: str):
-            s = code_str.lower()
-            # remove strings e comentários rudimentarmente
-            s = re.sub(r"'''[\s\S]*?'''", ' ', s)
-            s = re.sub(r'"""[\s\S]*?"""', ' ', s)
-            s = re.sub(r"#.*", ' ', s)
-            # remove não-alfanuméricos
-            s = re.sub(r'[^a-z0-9_]+', ' ', s)
-            tokens = [t for t in s.split() if len(t) > 1]
-            return set(tokens)
-
         def jaccard_similarity_tokens(a_set, b_set):
             if not a_set or not b_set:
                 return 0.0
@@ -966,10 +1164,10 @@ class OllamaBrain:
             return float(len(inter)) / len(union) if union else 0.0
 
         try:
-            novo_tokens = tokenize(novo_codigo)
+            novo_tokens = analisador.analisar(novo_codigo).tokens
             maior_similaridade = 0.0
-            for cod in codigos_existentes:
-                sim = jaccard_similarity_tokens(novo_tokens, tokenize(cod))
+            for tokens in tokens_existentes:
+                sim = jaccard_similarity_tokens(novo_tokens, tokens)
                 if sim > maior_similaridade:
                     maior_similaridade = sim
 
@@ -993,32 +1191,17 @@ class OllamaBrain:
         Instala automaticamente bibliotecas ausentes antes da execução.
         """
         try:
-            import ast
-
-            with open(caminho_arquivo, "r", encoding="utf-8") as f:
-                tree = ast.parse(f.read())
-
-            bibliotecas_necessarias = set()
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for n in node.names:
-                        bibliotecas_necessarias.add(n.name.split('.')[0])
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        bibliotecas_necessarias.add(node.module.split('.')[0])
-
-            for lib in bibliotecas_necessarias:
-                if lib in sys.builtin_module_names:
-                    continue
-
-                try:
-                    __import__(lib)
-                except ImportError:
-                    logger.info(f"🛡️ BOOT SHIELD: Detectada necessidade de '{lib}'. Instalando...")
-                    if not safe_install(lib):
-                        logger.error(f"⚠️ BOOT SHIELD: falha ao instalar {lib}: instalação não permitida ou falhou.")
-                    else:
-                        logger.success(f"✅ BOOT SHIELD: '{lib}' injetada com sucesso.")
+            # Mesmo conteúdo já analisado no upload/curadoria não é parseado de novo
+            bibliotecas_necessarias = set(analisador.analisar_arquivo(caminho_arquivo).imports)
+
+            faltando = dependencias.missing(sorted(bibliotecas_necessarias))
+            if faltando:
+                logger.info(f"🛡️ BOOT SHIELD: Detectada necessidade de {faltando}. Instalando em lote...")
+            for lib, ok in dependencias.garantir(faltando).items():
+                if not ok:
+                    logger.error(f"⚠️ BOOT SHIELD: falha ao instalar {lib}: instalação não permitida ou falhou.")
+                else:
+                    logger.success(f"✅ BOOT SHIELD: '{lib}' injetada com sucesso.")
 
         except Exception as e:
             logger.error(f"⚠️ Erro na análise preditiva do Boot Shield: {e}")
@@ -1055,7 +1238,7 @@ def executar_tarefa(dados):
 
         # Informa ao LLM quais ferramentas e agentes ele tem disponível
         lista_agentes = json.dumps(self.agentes_ativos, indent=2)
-        lista_tools = str(self.ferramentas_carregadas)
+        lista_tools = json.dumps(self.habilidades.descrever(para_llm=True), indent=2, ensure_ascii=False)
 
         prompt = f"""
         SISTEMA: NEXO V33 [SWARM MODE]
@@ -1071,7 +1254,7 @@ def executar_tarefa(dados):
         2. AUDITOR: Verifique riscos. O código carregado é seguro? A ordem é ambígua?
         3. SÍNTESE: A resposta final. 
            - Se for criar um agente, gere o JSON no campo "criar_agente".
-           - Se for usar uma ferramenta carregada, indique no campo "acao_python".
+           - Se for usar uma ferramenta carregada, indique no campo "acao_habilidades" (várias rodam em paralelo).
         
         RETORNE APENAS JSON:
         {{
@@ -1079,6 +1262,7 @@ def executar_tarefa(dados):
             "sintese": "Resposta ao usuário...",
             "criar_agente": {{ "nome": "ex: AgenteCripto", "especialidade": "..." }} (ou null),
             "acao_web": "termo de busca" (ou null),
+            "acao_habilidades": [{{ "habilidade": "nome", "args": {{ "param": "valor" }} }}] (ou null),
             "acao_python": "codigo python para rodar agora" (ou null)
         }}
         """
@@ -1212,23 +1396,23 @@ def executar_tarefa(dados):
             logger.info("🔍 NEXO SOBERANO: Iniciando auto-scan de ineficiências...")
             
             arquivo_principal = Path(__file__).resolve()
-            conteudo = arquivo_principal.read_text(encoding='utf-8')
+            # Uma análise AST por versão do arquivo (cache por hash), em vez de várias regex sobre o texto
+            analise = analisador.analisar_arquivo(arquivo_principal)
             
             ineficiencias = []
             
             # Detecção 1: Funções síncronas que deveriam ser async
-            import re
-            sync_io_funcs = re.findall(r'def (.*?)\(.*?\):.*?(requests\.|open\(|\.query\()', conteudo, re.DOTALL)
+            sync_io_funcs = analise.funcoes_io_sincrono
             if sync_io_funcs:
                 ineficiencias.append({
                     "tipo": "SINCRONO_IO",
                     "severidade": "ALTA",
                     "descricao": "Funções I/O síncronas encontradas (requests, file, DB) que bloqueiam",
-                    "funcoes": list(set(sync_io_funcs[:3]))
+                    "funcoes": list(sync_io_funcs[:3])
                 })
             
             # Detecção 2: Loops sem paralelização
-            loops_sequenciais = len(re.findall(r'for \w+ in .*?:\n(?:\s{4,}[^#])*?(?:requests\.|\.query|\.insert)', conteudo))
+            loops_sequenciais = analise.loops_com_io
             if loops_sequenciais > 2:
                 ineficiencias.append({
                     "tipo": "LOOPS_SEQUENCIAIS",
@@ -1238,8 +1422,7 @@ def executar_tarefa(dados):
                 })
             
             # Detecção 3: Tamanho de função grande
-            func_lines = re.findall(r'def \w+\(.*?\):.*?(?=\n    def |\nclass |\n@|\Z)', conteudo, re.DOTALL)
-            grandes = [f for f in func_lines if f.count('\n') > 50]
+            grandes = [nome for nome, linhas in analise.funcoes if linhas > 50]
             if grandes:
                 ineficiencias.append({
                     "tipo": "FUNCOES_GRANDES",
@@ -1249,7 +1432,7 @@ def executar_tarefa(dados):
                 })
             
             # Detecção 4: Exceções muito genéricas
-            excepts = len(re.findall(r'except Exception|except:|except:', conteudo))
+            excepts = analise.excepts_genericos
             if excepts > 10:
                 ineficiencias.append({
                     "tipo": "EXCECOES_GENERICAS",
@@ -1261,7 +1444,7 @@ def executar_tarefa(dados):
             resultado = {
                 "timestamp": datetime.now().isoformat(),
                 "arquivo": str(arquivo_principal),
-                "linhas_totais": len(conteudo.split('\n')),
+                "linhas_totais": analise.linhas,
                 "ineficiencias_encontradas": len(ineficiencias),
                 "detalhes": ineficiencias,
                 "score_saude": max(0, 100 - len(ineficiencias) * 15)
@@ -1489,10 +1672,11 @@ def executar_tarefa(dados):
     # --- 4.5 Busca Web ---
     def consultar_web(self, query):
         try:
-            if DDGS is None:
+            _DDGS = _sdk("DDGS")
+            if _DDGS is None:
                 return "Erro Web: DuckDuckGo client não disponível (instale duckduckgo-search)."
             results = []
-            with DDGS() as ddgs:
+            with _DDGS() as ddgs:
                 for r in ddgs.text(query, region='wt-wt', safesearch='off', max_results=3):
                     results.append(f"• {r['title']}: {r['body']}")
             return "\n".join(results)
@@ -1667,10 +1851,23 @@ def executar_tarefa(dados):
             backup_path = backup_dir / f"dna_backup_{int(time.time())}.py"
             shutil.copy(caminho_dna, backup_path)
 
-            # opcionalmente rodar testes antes de aplicar
+            # opcionalmente rodar testes antes de aplicar (só os afetados pelo diff, se houver mapa)
             if run_tests:
                 try:
-                    res = subprocess.run([sys.executable, "-m", "pytest", "-q"], cwd=BASE_DIR, capture_output=True, text=True, timeout=120)
+                    cmd, impacto, selecao = [sys.executable, "-m", "pytest", "-q"], None, None
+                    if TestImpactMap is not None:
+                        impacto = TestImpactMap(BASE_DIR / ".sandbox" / "test_impact_preview.json")
+                        mudancas = {caminho_dna.name: text_changes(caminho_dna.read_text(encoding='utf-8'), codigo)}
+                        selecao, motivo = impacto.plan(mudancas)
+                        logger.info(f"🎯 Testes do preview: {'suite completa (' + motivo + ')' if selecao is None else f'{len(selecao)} afetados'}")
+                        cmd = [sys.executable] + pytest_command(selecao or [], rootdir=BASE_DIR, cov_source=".")[1:]
+                    # plan() nunca devolve seleção vazia; nenhum teste coletado (rc 5) também rejeita
+                    res = subprocess.run(cmd, cwd=BASE_DIR, capture_output=True, text=True, timeout=120)
+                    if impacto is not None and res.returncode in (0, 1):
+                        try:
+                            impacto.refresh(BASE_DIR, full=selecao is None)
+                        except Exception as e:
+                            logger.warning(f"⚠️ Mapa de impacto não atualizado: {e}")
                     if res.returncode != 0:
                         return {"status": "rejeitado", "detail": "testes falharam", "output": res.stdout + res.stderr}
                 except subprocess.TimeoutExpired:
@@ -1689,13 +1886,23 @@ def executar_tarefa(dados):
 # 5. SERVIDOR & API
 # ==============================================================================
 app = FastAPI(title="NEXO V33 SWARM")
-nexo = NexoSwarm()
+if LAZY_INIT:
+    # Construído no evento 'startup' (inclui o cliente Supabase): import do módulo fica leve
+    nexo = None
+else:
+    with boot_profile.fase("nexo_swarm"):
+        nexo = NexoSwarm()
 
 @app.on_event("startup")
 async def startup():
+    global nexo
     logger.info("⚡ NEXO V33: SWARM CONTROLLER ONLINE.")
+    if nexo is None:
+        with boot_profile.fase("nexo_swarm"):
+            nexo = NexoSwarm()
     # Força uma verificação de novos scripts na inicialização
-    nexo.assimilar_conteudo_existente()
+    with boot_profile.fase("assimilar_conteudo"):
+        nexo.assimilar_conteudo_existente()
 
     # Registra ativação inicial
     try:
@@ -1722,12 +1929,47 @@ async def startup():
     except Exception as e:
         logger.debug(f'⚠️ Falha ao agendar garantir_dependencias: {e}')
 
-    # Agendar verificação/instalação de dependências em background
-    try:
-        asyncio.create_task(asyncio.to_thread(garantir_dependencias))
-        logger.info('🧬 NEXO: Agendada verificação de dependências em background.')
-    except Exception as e:
-        logger.debug(f'⚠️ Falha ao agendar garantir_dependencias: {e}')
+    # Pré-forka os workers de sandbox sem segurar o boot
+    pool = get_sandbox_pool()
+    if pool is not None:
+        asyncio.create_task(asyncio.to_thread(pool.iniciar))
+
+    boot_profile.marcar_pronto()
+    logger.info(f"⏱️ Boot pronto em {boot_profile.pronto_ms}ms (modo {boot_profile.modo}).")
+
+@app.get("/admin/startup_profile")
+async def admin_startup_profile(token: str = None):
+    """Tempos do cold start por fase e por import, capturados no boot. Requer ADMIN_TOKEN."""
+    if os.getenv('ADMIN_TOKEN') and token != os.getenv('ADMIN_TOKEN'):
+        return JSONResponse(status_code=403, content={"status": "forbidden"})
+    return JSONResponse(content={"status": "ok", "profile": boot_profile.relatorio()})
+
+@app.get("/admin/skills")
+async def admin_skills(token: str = None):
+    """Catálogo de habilidades com assinaturas e histogramas de latência."""
+    if token != os.getenv("ADMIN_TOKEN"):
+        return JSONResponse(status_code=403, content={"status": "forbidden"})
+    return JSONResponse(content={
+        "habilidades": nexo.habilidades.descrever(),
+        "permitidas_llm": sorted(nexo.habilidades.permitidas_llm),
+        "metricas": nexo.habilidades.metricas(),
+        "intencoes": nexo.intencoes.status(),
+    })
+
+
+@app.post("/admin/skills/invoke")
+async def admin_skills_invoke(request: Request):
+    """Invoca uma ou mais habilidades: {"token", "chamadas": [{"habilidade", "args", "timeout"}]}."""
+    body = await request.json()
+    # Estrito: origem "admin" dispensa a allow-list NEXO_SKILLS_LLM, então sem ADMIN_TOKEN
+    # configurado ninguém entra (nem token ausente casando com variável ausente)
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or body.get('token') != admin_token:
+        return JSONResponse(status_code=403, content={"status": "forbidden"})
+    chamadas = body.get('chamadas') or [body]
+    resultados = await nexo.habilidades.invocar_varios(chamadas, origem="admin")
+    return JSONResponse(content=json.loads(json.dumps({"status": "ok", "resultados": resultados}, default=str)))
+
 
 @app.post("/admin/install")
 async def admin_install(request: Request):
@@ -1827,21 +2069,39 @@ async def executar(request: Request):
             except Exception:
                 ordem = ''
 
+        # 0. Rota rápida: ordens simples vão direto para a habilidade, sem LLM
+        decisao = None
+        rota = nexo.intencoes.rotear(ordem, disponiveis=nexo.habilidades.roteaveis()) if ordem else None
+        if rota:
+            r = await nexo.habilidades.invocar_async(rota.habilidade, *rota.args, origem="llm")
+            if r["status"] == "ok":
+                logger.info(f"⚡ ROTA RÁPIDA: '{rota.habilidade}' via {rota.via} ({rota.confianca}) em {r['duracao_ms']}ms")
+                decisao = {
+                    "sintese": str(r["resultado"]),
+                    "debate": {
+                        "arquiteto": f"Rota rápida para '{rota.habilidade}' ({rota.via}, confiança {rota.confianca}).",
+                        "auditor": "Ordem simples: LLM dispensado.",
+                    },
+                    "rota_rapida": {"habilidade": rota.habilidade, "via": rota.via, "confianca": rota.confianca, "duracao_ms": r["duracao_ms"]},
+                }
+            else:
+                logger.warning(f"⚠️ Rota rápida falhou ({r['status']}): seguindo para o LLM")
+
         # 1. Verifica Web Preliminar
         contexto = ""
-        if ordem and ("pesquise" in ordem.lower() or "busque" in ordem.lower()):
+        if decisao is None and ordem and ("pesquise" in ordem.lower() or "busque" in ordem.lower()):
             contexto = nexo.consultar_web(ordem)
 
         # 2. Processamento (com timeout e fallback)
         try:
-            if ordem:
+            if decisao is None and ordem:
                 timeout = int(os.getenv('NEXO_PENSAR_TIMEOUT', '15'))
                 try:
                     decisao = await asyncio.wait_for(nexo.pensar(ordem, contexto), timeout=timeout)
                 except asyncio.TimeoutError:
                     logger.error('⚠️ Timeout ao processar pensamento (pensar)')
                     decisao = {'sintese': 'Erro: o processamento demorou demais (timeout). Tente novamente.'}
-            else:
+            elif decisao is None:
                 decisao = {"sintese": "Erro: ordem vazia ou inválida."}
         except Exception as e:
             logger.error(f"⚠️ Erro ao executar pensar: {e}")
@@ -1857,6 +2117,19 @@ async def executar(request: Request):
             res_web = nexo.consultar_web(decisao["acao_web"])
             decisao["sintese"] += f"\n\n[🌐 WEB]: {res_web}"
 
+        if decisao.get("acao_habilidades"):
+            chamadas = decisao["acao_habilidades"]
+            if isinstance(chamadas, dict):
+                chamadas = [chamadas]
+            resultados = await nexo.habilidades.invocar_varios(chamadas, origem="llm")
+            decisao["habilidades"] = resultados
+            usadas = {r["habilidade"] for r in resultados if r["status"] == "ok"}
+            if len(usadas) == 1:
+                nexo.registrar_intencao(ordem, usadas.pop())
+            for r in resultados:
+                saida = r.get("resultado") if r["status"] == "ok" else r.get("erro")
+                decisao["sintese"] += f"\n\n[🔌 {r['habilidade']} · {r['status']} · {r['duracao_ms']}ms]: {str(saida)[:1000]}"
+
         if decisao.get("acao_python"):
             logger.warning("⚠️ Exec dinâmico desabilitado: código salvo para revisão administrativa.")
             pending_dir = BASE_DIR / "pending_actions"
@@ -1876,11 +2149,15 @@ async def executar(request: Request):
             except: pass
 
         # ===== TEMPORAL MEMORY: Extract wisdom from this action =====
-        try:
-            sucesso = not ("erro" in decisao.get("sintese", "").lower() or "⚠️" in decisao.get("sintese", ""))
-            await nexo.extrair_sabedoria(ordem, decisao.get("sintese", ""), sucesso)
-        except Exception as e:
-            logger.warning(f"⚠️ Não foi possível extrair sabedoria: {e}")
+        if decisao.get("rota_rapida"):
+            # Sem round-trip ao modelo: registra a decisão, sem treinar o roteador
+            nexo.registrar_intencao(ordem, decisao["rota_rapida"]["habilidade"], via=decisao["rota_rapida"]["via"])
+        else:
+            try:
+                sucesso = not ("erro" in decisao.get("sintese", "").lower() or "⚠️" in decisao.get("sintese", ""))
+                await nexo.extrair_sabedoria(ordem, decisao.get("sintese", ""), sucesso)
+            except Exception as e:
+                logger.warning(f"⚠️ Não foi possível extrair sabedoria: {e}")
 
         decisao["active_agents"] = nexo.agentes_ativos
         # Garantir estrutura completa para o frontend (evitar undefined no JS)
@@ -1920,33 +2197,155 @@ async def admin_exec_pending(request: Request):
 
         if token != os.getenv("ADMIN_TOKEN"):
             return JSONResponse(status_code=403, content={"status": "forbidden"})
-        path = BASE_DIR / "pending_actions" / filename
-        if not path.exists():
+        path = _pending_action_path(filename)
+        if path is None or not path.exists():
             return JSONResponse(status_code=404, content={"status": "not found"})
         code = path.read_text(encoding='utf-8')
         if not is_code_safe(code):
             return JSONResponse(status_code=400, content={"status": "unsafe_code"})
-        exec_globals = {"nexo": nexo, "logger": logger}
-        exec_globals['__builtins__'] = {}
-        import subprocess, json
-        runner = Path(__file__).parent / 'sandbox_runner.py'
         try:
-            cp = subprocess.run([sys.executable, str(runner), str(path), "5", str(150 * 1024 * 1024)], capture_output=True, timeout=10)
-            out = cp.stdout.decode('utf-8', errors='ignore').strip()
-            try:
-                data = json.loads(out)
-            except Exception:
-                data = {"status": "error", "detail": out}
+            data = await executar_em_sandbox(code, path)
             if data.get('status') == 'ok':
-                return {"status": "ok", "resultado": data.get('resultado')}
+                return {"status": "ok", "resultado": data.get('resultado'), "saida": data.get('saida', ''), "wall_ms": data.get('wall_ms'), "cpu_ms": data.get('cpu_ms')}
+            if data.get('status') == 'timeout':
+                return JSONResponse(status_code=504, content={"status": "timeout", "detail": data})
             return JSONResponse(status_code=500, content={"status": "error", "detail": data})
-        except subprocess.TimeoutExpired:
-            return JSONResponse(status_code=504, content={"status": "timeout"})
         except Exception as e:
             return JSONResponse(status_code=500, content={"status": "error", "detail": str(e)})
     except Exception as e:
         return JSONResponse(status_code=400, content={"status": "erro", "detail": str(e)})
 
+def _pending_action_path(filename: str) -> Optional[Path]:
+    """Resolve um arquivo de pending_actions/, recusando caminhos que escapem do diretório."""
+    pending_dir = (BASE_DIR / "pending_actions").resolve()
+    if not filename:
+        return None
+    path = (pending_dir / filename).resolve()
+    return path if path.parent == pending_dir else None
+
+
+@app.post("/admin/exec_pending_stream")
+async def admin_exec_pending_stream(request: Request):
+    """Executa um arquivo pendente transmitindo a saída em NDJSON (um frame por linha). Requer ADMIN_TOKEN."""
+    data = await request.json()
+    if data.get('token') != os.getenv("ADMIN_TOKEN"):
+        return JSONResponse(status_code=403, content={"status": "forbidden"})
+    filename = data.get('filename')
+    path = _pending_action_path(filename)
+    if path is None or not path.exists():
+        return JSONResponse(status_code=404, content={"status": "not found"})
+    code = path.read_text(encoding='utf-8')
+    if not is_code_safe(code):
+        return JSONResponse(status_code=400, content={"status": "unsafe_code"})
+
+    async def _ndjson():
+        yield json.dumps({"tipo": "inicio", "filename": filename}) + "\n"
+        async for frame in executar_em_sandbox_stream(code, path):
+            yield json.dumps(frame, ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+
+
+@app.get("/admin/sandbox/history")
+async def admin_sandbox_history(token: str = None, limit: int = 100, motivo: str = None, filename: str = None):
+    """Histórico de consumo das execuções em sandbox + percentis e estado do pool. Requer ADMIN_TOKEN."""
+    if token != os.getenv("ADMIN_TOKEN"):
+        return JSONResponse(status_code=403, content={"status": "forbidden"})
+    if sandbox_historico is None:
+        return JSONResponse(status_code=503, content={"status": "indisponivel"})
+    pool = get_sandbox_pool()
+    return {
+        "status": "ok",
+        "limites": {"cpu_seconds": SANDBOX_CPU_SECONDS, "mem_bytes": SANDBOX_MEM_BYTES, "timeout": SANDBOX_TIMEOUT},
+        "resumo": sandbox_historico.resumo(),
+        "pool": pool.status() if pool else None,
+        "execucoes": sandbox_historico.consultar(limite=limit, motivo=motivo, filename=filename),
+    }
+
+
+_history_store = None
+
+
+def get_history_store():
+    """Store do histórico de runs (criado no primeiro uso), ou None se indisponível."""
+    global _history_store
+    if _history_store is None and HistoryStore is not None:
+        _history_store = HistoryStore(BASE_DIR / ".sandbox" / "history.db")
+    return _history_store
+
+
+@app.get("/admin/sandbox/runs")
+async def admin_sandbox_runs(token: str = None, query: str = "rates", since: str = "30d", until: str = None,
+                             source: str = None, bucket: str = None, stage: str = None, min_runs: int = 3, limit: int = 50):
+    """Tendências do sandbox/auto-repair: rates, stages, flaky ou recent (janela `since`, ex. 90d). Requer ADMIN_TOKEN."""
+    if token != os.getenv("ADMIN_TOKEN"):
+        return JSONResponse(status_code=403, content={"status": "forbidden"})
+    store = get_history_store()
+    if store is None:
+        return JSONResponse(status_code=503, content={"status": "indisponivel"})
+    if query == "rates":
+        if bucket and bucket not in ("day", "week", "month"):
+            return JSONResponse(status_code=400, content={"status": "erro", "detail": "bucket: day, week ou month"})
+        dados = await asyncio.to_thread(store.decision_rates, since, until, source, bucket)
+    elif query == "stages":
+        dados = await asyncio.to_thread(store.stage_percentiles, since, until, stage)
+    elif query == "flaky":
+        dados = await asyncio.to_thread(store.flaky_tests, since, until, min_runs)
+    elif query == "recent":
+        dados = await asyncio.to_thread(store.recent, limit, source)
+    else:
+        return JSONResponse(status_code=400, content={"status": "erro", "detail": "query: rates, stages, flaky ou recent"})
+    return {"status": "ok", "query": query, "since": since, "dados": dados}
+
+
+@app.post("/admin/exec_pending_batch")
+async def admin_exec_pending_batch(request: Request):
+    """Executa vários arquivos pendentes em paralelo (lista `filenames` ou `glob`). Requer ADMIN_TOKEN."""
+    try:
+        data = await request.json()
+    except Exception:
+        return JSONResponse(status_code=400, content={"status": "erro", "detail": "JSON inválido"})
+    if data.get('token') != os.getenv("ADMIN_TOKEN"):
+        return JSONResponse(status_code=403, content={"status": "forbidden"})
+
+    pending_dir = BASE_DIR / "pending_actions"
+    nomes = list(data.get('filenames') or [])
+    if data.get('glob'):
+        nomes += sorted(p.name for p in pending_dir.glob(data['glob']) if p.is_file())
+    nomes = list(dict.fromkeys(nomes))
+    if not nomes:
+        return JSONResponse(status_code=400, content={"status": "erro", "detail": "informe filenames ou glob"})
+
+    async def _um(nome: str) -> Dict:
+        path = _pending_action_path(nome)
+        if path is None or not path.exists():
+            return {"filename": nome, "status": "not_found"}
+        code = path.read_text(encoding='utf-8')
+        if not is_code_safe(code):
+            return {"filename": nome, "status": "unsafe_code"}
+        # O teto de concorrência é o global de executar_em_sandbox (vale entre requisições)
+        res = await executar_em_sandbox(code, path)
+        item = {"filename": nome, "status": res.get('status'), "motivo": res.get('motivo'),
+                "wall_ms": res.get('wall_ms'), "cpu_ms": res.get('cpu_ms'), "peak_rss_kb": res.get('peak_rss_kb')}
+        if res.get('status') == 'ok':
+            item["resultado"] = res.get('resultado')
+            item["saida"] = res.get('saida', '')
+        else:
+            item["detail"] = res.get('detail')
+        return item
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*[_um(n) for n in nomes])
+    return {
+        "status": "ok",
+        "total": len(resultados),
+        "ok": sum(1 for r in resultados if r["status"] == "ok"),
+        "concorrencia": concorrencia_sandbox(),
+        "wall_ms": round((time.perf_counter() - inicio) * 1000, 2),
+        "resultados": resultados,
+    }
+
+
 @app.get("/insights/pending")
 async def list_insights_pending(request: Request, token: str = None):
     """Lista insights pendentes para revisão. Requer ADMIN_TOKEN."""
@@ -2110,26 +2509,15 @@ async def health():
     """Retorna estado básico do sistema e pacotes faltantes."""
     try:
         uptime = int(time.time() - nexo.start_time)
-        missing = []
-        import importlib
-        checks = {
-            'langchain_groq': 'langchain_groq',
-            'supabase': 'supabase',
-            'pinecone': 'pinecone',
-            'duckduckgo_search': 'duckduckgo_search',
-            'multipart': 'multipart'
-        }
-        for name, mod in checks.items():
-            try:
-                importlib.import_module(mod)
-            except Exception:
-                missing.append(name)
+        checks = ['langchain_groq', 'supabase', 'pinecone', 'duckduckgo_search', 'multipart']
+        missing = dependencias.missing(checks)
         return JSONResponse(content={
             "status": "ok",
             "uptime": uptime,
             "agentes": nexo.agentes_ativos,
             "memoria_configurada": bool(nexo.supabase),
             "missing": missing,
+            "dependencias": dependencias.status(),
             "auto_evolve_enabled": getattr(nexo, 'auto_evolve_enabled', False)
         })
     except Exception as e:
@@ -2161,7 +2549,6 @@ async def start_expansion(request: Request):
 # ========================================================================
 # 💻 INTERFACE SOBERANA 5D (NEXO V33 | NÚCLEO SOBERANO)
 # ========================================================================
-from fastapi.responses import HTMLResponse
 
 @app.get("/", response_class=HTMLResponse)
 async def interface():
@@ -2535,6 +2922,10 @@ async def _stop_nexo_cron():
     if _cron_task:
         _cron_task.cancel()
         _cron_task = None
+    if nexo is not None:
+        nexo.habilidades.encerrar()
+    if _sandbox_pool is not None:
+        _sandbox_pool.encerrar()
 
 
 # ===== ENDPOINTS SOBERANOS (PROTOCOLO DE EXISTÊNCIA) =====
@@ -2570,6 +2961,7 @@ async def sovereign_status():
             "uptime_segundos": int(datetime.now().timestamp() - nexo.start_time),
             "agentes_ativos": nexo.agentes_ativos,
             "ferramentas_carregadas": nexo.ferramentas_carregadas,
+            "habilidades": nexo.habilidades.metricas(),
             "memoria_sabedoria": len(getattr(nexo, 'memoria_sabedoria', [])),
             "saude_sistema": {
                 "ineficiencias_encontradas": ineficiencias.get("ineficiencias_encontradas", 0),
@@ -2784,6 +3176,10 @@ async def admin_analysis(request: Request):
         })
 
 
+# Fim do boot do módulo: os imports seguintes (lazy) são medidos individualmente
+boot_profile.remover_hook_import()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 7860)))
\ No newline at end of file
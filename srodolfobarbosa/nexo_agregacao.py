@@ -0,0 +1,255 @@
+"""
+NEXO Agregação — fingerprints de erro, janelas deslizantes e rate limit de fixes.
+
+Numa tempestade de erros o monitor via milhares de linhas idênticas e
+disparava um fix por linha. Aqui:
+
+  • cada linha vira um fingerprint: tipo + mensagem normalizada (timestamps,
+    UUIDs, hashes, ids e números removidos)
+  • ocorrências são contadas em janela deslizante de baldes por segundo
+    (memória fixa por fingerprint, não uma entrada por linha)
+  • o fix de cada fingerprint roda no máximo uma vez por `intervalo_fix`;
+    o resto conta como suprimido
+  • acima de `limite_por_segundo` linhas de erro, só repetições são
+    descartadas: a amostragem é por fingerprint (calculado antes), a
+    primeira ocorrência de um fingerprint novo ou fora da janela sempre
+    passa e cada amostra pesa as linhas que representa
+  • o número de fingerprints é limitado (LRU): memória estável no incidente
+
+Uso:
+    agregador = AgregadorErros()
+    fp = fingerprint("error_413", linha)
+    peso = agregador.amostrar(fp)
+    if peso:
+        decisao = agregador.registrar("error_413", linha, peso, fp=fp)
+        if decisao.aplicar_fix:
+            ...
+"""
+
+import hashlib
+import math
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+_NORMALIZACOES = [
+    # 2026-01-01 12:00:00.123 / 2026-01-01T12:00:00Z / 12:00:00,5
+    (
+        re.compile(
+            r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+        ),
+        "<ts>",
+    ),
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<ts>"),
+    (
+        re.compile(
+            r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I
+        ),
+        "<uuid>",
+    ),
+    (re.compile(r"\b0x[0-9a-f]+\b", re.I), "<hex>"),
+    (re.compile(r"\b(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{8,}\b", re.I), "<hex>"),
+    # req_8f3a…, id=123, user-42: ids com dígitos
+    (re.compile(r"\b[a-z_]*\d[\w-]*\b", re.I), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalizar(linha: str) -> str:
+    """Mensagem sem as partes que variam entre ocorrências do mesmo erro."""
+    for regex, troca in _NORMALIZACOES:
+        linha = regex.sub(troca, linha)
+    return linha.strip()
+
+
+def fingerprint(tipo: str, linha: str) -> str:
+    """Identificador estável de (tipo, mensagem normalizada)."""
+    return hashlib.sha1(f"{tipo}\0{normalizar(linha)}".encode()).hexdigest()[:16]
+
+
+@dataclass
+class _Entrada:
+    tipo: str
+    exemplo: str
+    primeira_vez: float
+    ultima_vez: float
+    total: int = 0
+    suprimidos: int = 0
+    fixes: int = 0
+    ultimo_fix: Optional[float] = None
+    pendentes: int = 0  # repetições descartadas pela amostragem desde a última amostra
+    # Baldes [segundo, contagem]; no máximo `janela` baldes
+    baldes: Deque[List[int]] = field(default_factory=deque)
+
+
+@dataclass
+class Decisao:
+    """Resultado de registrar uma ocorrência."""
+
+    fingerprint: str
+    aplicar_fix: bool
+    nova: bool
+    na_janela: int
+    suprimidos: int
+
+
+class AgregadorErros:
+    """Agrega ocorrências por fingerprint e decide quando um fix pode rodar."""
+
+    def __init__(
+        self,
+        janela: float = 60.0,
+        intervalo_fix: float = 300.0,
+        limite_por_segundo: int = 200,
+        max_fingerprints: int = 1000,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        self.janela = janela
+        self.intervalo_fix = intervalo_fix
+        self.limite_por_segundo = limite_por_segundo
+        self.max_fingerprints = max_fingerprints
+        self.relogio = relogio
+        self.entradas: "OrderedDict[str, _Entrada]" = OrderedDict()
+        # Taxa global para a amostragem: segundo atual e anterior
+        self._segundo = 0
+        self._vistas_segundo = 0
+        self._vistas_anterior = 0
+        self.stats = {"vistas": 0, "amostradas": 0, "descartadas": 0, "despejadas": 0}
+
+    # ---- amostragem ------------------------------------------------------
+
+    def amostrar(self, fp: str, agora: Optional[float] = None) -> int:
+        """
+        Peso da linha de erro atual, de fingerprint `fp`: 1 em regime normal.
+        Quando a taxa passa do limite, um fingerprint já ativo na janela só
+        é processado 1 a cada N linhas e a amostra pesa 1 + as repetições
+        descartadas desde a anterior; um fingerprint novo (ou que saiu da
+        janela) sempre passa. 0 = descartar.
+        """
+        agora = self.relogio() if agora is None else agora
+        segundo = int(agora)
+        if segundo != self._segundo:
+            self._vistas_anterior = (
+                self._vistas_segundo if segundo == self._segundo + 1 else 0
+            )
+            self._segundo, self._vistas_segundo = segundo, 0
+        self._vistas_segundo += 1
+        self.stats["vistas"] += 1
+
+        taxa = max(self._vistas_anterior, self._vistas_segundo)
+        entrada = self.entradas.get(fp)
+        pendentes = entrada.pendentes if entrada is not None else 0
+        if taxa > self.limite_por_segundo and entrada is not None:
+            self._expirar_baldes(entrada, agora)
+            if entrada.baldes and pendentes + 1 < math.ceil(
+                taxa / self.limite_por_segundo
+            ):
+                entrada.pendentes += 1
+                self.stats["descartadas"] += 1
+                return 0
+        if entrada is not None:
+            entrada.pendentes = 0
+        self.stats["amostradas"] += 1
+        return 1 + pendentes
+
+    @property
+    def amostrando(self) -> bool:
+        return (
+            max(self._vistas_anterior, self._vistas_segundo) > self.limite_por_segundo
+        )
+
+    # ---- agregação -------------------------------------------------------
+
+    def registrar(
+        self,
+        tipo: str,
+        linha: str,
+        peso: int = 1,
+        agora: Optional[float] = None,
+        fp: Optional[str] = None,
+    ) -> Decisao:
+        """
+        Conta `peso` ocorrências de (tipo, linha) e aplica o rate limit do fix.
+        `fp` evita recalcular o fingerprint já usado na amostragem.
+        """
+        agora = self.relogio() if agora is None else agora
+        fp = fp or fingerprint(tipo, linha)
+        entrada = self.entradas.get(fp)
+        nova = entrada is None
+        if nova:
+            entrada = _Entrada(tipo, linha[:200], agora, agora)
+            self.entradas[fp] = entrada
+            self._despejar()
+        else:
+            self.entradas.move_to_end(fp)
+
+        entrada.ultima_vez = agora
+        entrada.total += peso
+        self._contar(entrada, agora, peso)
+
+        aplicar = (
+            entrada.ultimo_fix is None
+            or agora - entrada.ultimo_fix >= self.intervalo_fix
+        )
+        if aplicar:
+            entrada.ultimo_fix = agora
+            entrada.fixes += 1
+        else:
+            entrada.suprimidos += peso
+        return Decisao(
+            fp, aplicar, nova, self._na_janela(entrada, agora), entrada.suprimidos
+        )
+
+    def _contar(self, entrada: _Entrada, agora: float, peso: int):
+        segundo = int(agora)
+        if entrada.baldes and entrada.baldes[-1][0] == segundo:
+            entrada.baldes[-1][1] += peso
+        else:
+            entrada.baldes.append([segundo, peso])
+        self._expirar_baldes(entrada, agora)
+
+    def _expirar_baldes(self, entrada: _Entrada, agora: float):
+        limite = agora - self.janela
+        while entrada.baldes and entrada.baldes[0][0] <= limite:
+            entrada.baldes.popleft()
+
+    def _na_janela(self, entrada: _Entrada, agora: float) -> int:
+        self._expirar_baldes(entrada, agora)
+        return sum(contagem for _, contagem in entrada.baldes)
+
+    def _despejar(self):
+        while len(self.entradas) > self.max_fingerprints:
+            self.entradas.popitem(last=False)
+            self.stats["despejadas"] += 1
+
+    def expirar(self, agora: Optional[float] = None) -> int:
+        """Remove fingerprints sem ocorrências na janela nem fix recente."""
+        agora = self.relogio() if agora is None else agora
+        prazo = max(self.janela, self.intervalo_fix)
+        velhas = [fp for fp, e in self.entradas.items() if agora - e.ultima_vez > prazo]
+        for fp in velhas:
+            del self.entradas[fp]
+        return len(velhas)
+
+    def resumo(self, limite: int = 10, agora: Optional[float] = None) -> List[Dict]:
+        """Fingerprints mais frequentes na janela atual."""
+        agora = self.relogio() if agora is None else agora
+        itens = []
+        for fp, e in self.entradas.items():
+            na_janela = self._na_janela(e, agora)
+            if na_janela:
+                itens.append(
+                    {
+                        "fingerprint": fp,
+                        "tipo": e.tipo,
+                        "exemplo": e.exemplo,
+                        "na_janela": na_janela,
+                        "total": e.total,
+                        "fixes": e.fixes,
+                        "suprimidos": e.suprimidos,
+                    }
+                )
+        itens.sort(key=lambda item: item["na_janela"], reverse=True)
+        return itens[:limite]
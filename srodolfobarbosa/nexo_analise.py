@@ -0,0 +1,442 @@
+"""
+NEXO Análise — parse único (por hash de conteúdo) para todos os caminhos de inspeção de código.
+
+``is_code_safe``, o Boot Shield, a blindagem preditiva, a curadoria de
+uploads e o auto-scan precisam dos mesmos fatos sobre um código-fonte. Aqui
+cada conteúdo é parseado uma vez; um único visitor extrai:
+
+  • imports (módulos top-level) e se há algum import
+  • chamadas perigosas (``__import__``, ``os.*``, ``subprocess.*``, ...)
+  • acessos a atributos com ``_`` e nomes dunder (``f.__globals__``,
+    ``print.__self__``, ``__builtins__``) e a atributos de frame/código
+    (``g.gi_frame.f_back.f_globals``): a porta de saída do namespace restrito
+  • funções/classes com tamanho em linhas
+  • funções síncronas com I/O e loops com I/O
+  • excepts genéricos, linhas, bytes e o conjunto de tokens (para Jaccard)
+
+Os resultados ficam num LRU limitado, com cache opcional em disco (JSON por
+sha256 + ``VERSAO_ANALISE``). A versão é o hash deste módulo: mudar as regras
+(ou o visitor) invalida todas as entradas antigas, que são apagadas quando o
+analisador sobe; o disco também tem teto de entradas (as mais antigas saem). O disco só guarda fatos;
+``seguro`` é recalculado deles, e ``is_code_safe`` pede ``usar_disco=False``
+para que nada escrito no diretório de cache possa aprovar código.
+
+Uso:
+    from nexo_analise import AnalisadorCodigo
+    analisador = AnalisadorCodigo(dir_cache=Path(".cache/nexo_analise"))
+    analise = analisador.analisar(codigo)
+    analise.seguro, analise.imports, analise.tokens
+"""
+
+import ast
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+
+def _versao_analise() -> str:
+    """Hash do próprio módulo (regras + visitor): entra na chave do cache em disco."""
+    try:
+        return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+    except OSError:
+        return "sem-versao"
+
+
+VERSAO_ANALISE = _versao_analise()
+
+# Módulos cujo uso via atributo (os.system, subprocess.run, ...) torna o código inseguro
+MODULOS_PERIGOSOS = ("os", "subprocess", "sys", "shutil", "socket")
+# Chamadas que caracterizam I/O bloqueante (requests.get, open(...), .query(...), .insert(...))
+_IO_ATRIBUTOS = ("query", "insert")
+# Atributos de frames e de código: de um gerador/traceback chegam aos globais de quem executa
+ATRIBUTOS_INTROSPECCAO = frozenset(
+    {
+        "gi_frame",
+        "cr_frame",
+        "ag_frame",
+        "tb_frame",
+        "f_back",
+        "f_globals",
+        "f_locals",
+        "f_builtins",
+        "f_code",
+        "gi_code",
+        "cr_code",
+        "ag_code",
+    }
+)
+
+
+def tokenizar(codigo: str) -> FrozenSet[str]:
+    """Tokens normalizados (minúsculas, sem strings/comentários/pontuação) para Jaccard."""
+    s = codigo.lower()
+    # remove strings e comentários rudimentarmente
+    s = re.sub(r"'''[\s\S]*?'''", " ", s)
+    s = re.sub(r'"""[\s\S]*?"""', " ", s)
+    s = re.sub(r"#.*", " ", s)
+    # remove não-alfanuméricos
+    s = re.sub(r"[^a-z0-9_]+", " ", s)
+    return frozenset(t for t in s.split() if len(t) > 1)
+
+
+@dataclass
+class AnaliseCodigo:
+    """Fatos extraídos de um código-fonte; imutável na prática (compartilhada pelo cache)."""
+
+    sha256: str
+    ok: bool = True
+    erro: Optional[str] = None
+    imports: Tuple[str, ...] = ()
+    tem_import: bool = False
+    chamadas_perigosas: Tuple[str, ...] = ()
+    acessos_privados: Tuple[str, ...] = ()
+    funcoes: Tuple[Tuple[str, int], ...] = ()  # (nome, linhas)
+    classes: Tuple[str, ...] = ()
+    funcoes_io_sincrono: Tuple[str, ...] = ()
+    loops_com_io: int = 0
+    excepts_genericos: int = 0
+    linhas: int = 0
+    bytes: int = 0
+    tokens: FrozenSet[str] = field(default_factory=frozenset)
+
+    @property
+    def seguro(self) -> bool:
+        """Sem imports, chamadas perigosas nem acesso a atributos/nomes privados."""
+        return (
+            self.ok
+            and not self.tem_import
+            and not self.chamadas_perigosas
+            and not self.acessos_privados
+        )
+
+    def para_json(self) -> Dict:
+        dados = asdict(self)
+        dados["tokens"] = sorted(self.tokens)
+        dados["versao"] = VERSAO_ANALISE
+        return dados
+
+    @classmethod
+    def de_json(cls, dados: Dict) -> "AnaliseCodigo":
+        dados = dict(dados)
+        dados.pop("versao", None)
+        dados["tokens"] = frozenset(dados.get("tokens", ()))
+        for campo in (
+            "imports",
+            "chamadas_perigosas",
+            "acessos_privados",
+            "classes",
+            "funcoes_io_sincrono",
+        ):
+            dados[campo] = tuple(dados.get(campo, ()))
+        dados["funcoes"] = tuple(tuple(f) for f in dados.get("funcoes", ()))
+        return cls(**dados)
+
+
+class _Coletor(ast.NodeVisitor):
+    """Visitor de passada única que preenche todos os fatos de ``AnaliseCodigo``."""
+
+    def __init__(self):
+        self.imports: List[str] = []
+        self.tem_import = False
+        self.perigosas: List[str] = []
+        self.privados: List[str] = []
+        self.funcoes: List[Tuple[str, int]] = []
+        self.classes: List[str] = []
+        self.io_sincrono: List[str] = []
+        self.loops_com_io = 0
+        self.excepts_genericos = 0
+        self._pilha_funcoes: List[Tuple[str, bool]] = []  # (nome, async)
+        self._pilha_loops: List[bool] = []  # loop atual já contabilizado?
+
+    def _adicionar_import(self, nome: Optional[str]):
+        if nome:
+            raiz = nome.split(".")[0]
+            if raiz not in self.imports:
+                self.imports.append(raiz)
+
+    def visit_Import(self, node):
+        self.tem_import = True
+        for n in node.names:
+            self._adicionar_import(n.name)
+
+    def visit_ImportFrom(self, node):
+        self.tem_import = True
+        if not node.level:
+            self._adicionar_import(node.module)
+
+    def _registrar_io(self):
+        if self._pilha_funcoes and not self._pilha_funcoes[-1][1]:
+            nome = self._pilha_funcoes[-1][0]
+            if nome not in self.io_sincrono:
+                self.io_sincrono.append(nome)
+        if self._pilha_loops and not self._pilha_loops[-1]:
+            self._pilha_loops[-1] = True
+            self.loops_com_io += 1
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id == "__import__":
+                self.perigosas.append("__import__")
+            elif func.id == "open":
+                self._registrar_io()
+        elif isinstance(func, ast.Attribute):
+            valor = func.value
+            if isinstance(valor, ast.Name):
+                if valor.id in MODULOS_PERIGOSOS:
+                    self.perigosas.append(f"{valor.id}.{func.attr}")
+                if valor.id == "requests":
+                    self._registrar_io()
+            if func.attr in _IO_ATRIBUTOS:
+                self._registrar_io()
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node):
+        # obj.__class__, f.__globals__, m.__func__, obj._interno, g.gi_frame.f_back:
+        # introspecção que escapa do namespace restrito do sandbox
+        attr = node.attr
+        if attr.startswith(("_", "co_")) or attr in ATRIBUTOS_INTROSPECCAO:
+            if attr not in self.privados:
+                self.privados.append(attr)
+        self.generic_visit(node)
+
+    def visit_Name(self, node):
+        if node.id.startswith("__") and node.id not in self.privados:
+            self.privados.append(node.id)
+
+    def _visitar_funcao(self, node, assincrona: bool):
+        linhas = (
+            (getattr(node, "end_lineno", node.lineno) or node.lineno) - node.lineno + 1
+        )
+        self.funcoes.append((node.name, linhas))
+        self._pilha_funcoes.append((node.name, assincrona))
+        # loops de uma função externa não contam o I/O de funções aninhadas
+        loops, self._pilha_loops = self._pilha_loops, []
+        self.generic_visit(node)
+        self._pilha_loops = loops
+        self._pilha_funcoes.pop()
+
+    def visit_FunctionDef(self, node):
+        self._visitar_funcao(node, False)
+
+    def visit_AsyncFunctionDef(self, node):
+        self._visitar_funcao(node, True)
+
+    def visit_ClassDef(self, node):
+        self.classes.append(node.name)
+        self.generic_visit(node)
+
+    def _visitar_loop(self, node):
+        self._pilha_loops.append(False)
+        self.generic_visit(node)
+        contou = self._pilha_loops.pop()
+        # I/O num loop interno já contou para este loop externo
+        if contou and self._pilha_loops:
+            self._pilha_loops[-1] = True
+
+    visit_For = visit_AsyncFor = visit_While = _visitar_loop
+
+    def visit_ExceptHandler(self, node):
+        if node.type is None or (
+            isinstance(node.type, ast.Name)
+            and node.type.id in ("Exception", "BaseException")
+        ):
+            self.excepts_genericos += 1
+        self.generic_visit(node)
+
+
+def analisar_codigo(codigo: str, sha: Optional[str] = None) -> AnaliseCodigo:
+    """Análise sem cache (um parse + uma passada do visitor)."""
+    sha = (
+        sha
+        or hashlib.sha256(codigo.encode("utf-8", errors="surrogatepass")).hexdigest()
+    )
+    base = {
+        "sha256": sha,
+        "linhas": codigo.count("\n") + 1,
+        "bytes": len(codigo.encode("utf-8", errors="surrogatepass")),
+        "tokens": tokenizar(codigo),
+    }
+    try:
+        arvore = ast.parse(codigo)
+    except (SyntaxError, ValueError) as e:
+        return AnaliseCodigo(ok=False, erro=f"{type(e).__name__}: {e}", **base)
+    coletor = _Coletor()
+    coletor.visit(arvore)
+    return AnaliseCodigo(
+        imports=tuple(coletor.imports),
+        tem_import=coletor.tem_import,
+        chamadas_perigosas=tuple(coletor.perigosas),
+        acessos_privados=tuple(coletor.privados),
+        funcoes=tuple(coletor.funcoes),
+        classes=tuple(coletor.classes),
+        funcoes_io_sincrono=tuple(coletor.io_sincrono),
+        loops_com_io=coletor.loops_com_io,
+        excepts_genericos=coletor.excepts_genericos,
+        **base,
+    )
+
+
+class AnalisadorCodigo:
+    """Cache LRU (+ disco opcional) de ``AnaliseCodigo`` indexado pelo sha256 do conteúdo."""
+
+    def __init__(
+        self,
+        max_itens: int = 256,
+        dir_cache: Optional[Path] = None,
+        max_disco: int = 4096,
+    ):
+        """
+        Args:
+            max_itens: entradas mantidas em memória
+            dir_cache: diretório para o cache em disco (None desativa)
+            max_disco: entradas mantidas em disco (as de mtime mais antigo saem primeiro)
+        """
+        self.max_itens = max_itens
+        self.dir_cache = Path(dir_cache) if dir_cache else None
+        self.max_disco = max_disco
+        self._lru: "OrderedDict[str, AnaliseCodigo]" = OrderedDict()
+        # (caminho, mtime_ns, tamanho) -> sha, para não re-hashear arquivos inalterados
+        self._arquivos: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        # shas cujo valor no LRU foi lido do disco (não parseado aqui)
+        self._vindas_do_disco = set()
+        self.stats = {"hits": 0, "disco": 0, "parses": 0}
+        self._no_disco = self._podar_disco() if self.dir_cache else 0
+
+    def _podar_disco(self, alvo: Optional[int] = None) -> int:
+        """
+        Apaga entradas de outras versões e, acima de ``alvo`` (padrão: max_disco),
+        as mais antigas. Devolve quantas entradas da versão atual restaram.
+        """
+        alvo = self.max_disco if alvo is None else alvo
+        atuais = []
+        try:
+            arquivos = list(self.dir_cache.glob("*.json"))
+        except OSError:
+            return 0
+        for arquivo in arquivos:
+            try:
+                partes = arquivo.name.split(".")
+                if len(partes) == 3 and partes[1] == VERSAO_ANALISE:
+                    atuais.append((arquivo.stat().st_mtime, arquivo))
+                else:
+                    arquivo.unlink()
+            except OSError:
+                continue
+        if len(atuais) > alvo:
+            atuais.sort()
+            for _, arquivo in atuais[: len(atuais) - alvo]:
+                try:
+                    arquivo.unlink()
+                except OSError:
+                    pass
+            atuais = atuais[len(atuais) - alvo :]
+        return len(atuais)
+
+    def _arquivo_cache(self, sha: str) -> Path:
+        return self.dir_cache / f"{sha}.{VERSAO_ANALISE}.json"
+
+    def _do_disco(self, sha: str) -> Optional[AnaliseCodigo]:
+        if not self.dir_cache:
+            return None
+        try:
+            with open(self._arquivo_cache(sha), encoding="utf-8") as f:
+                dados = json.load(f)
+            if dados.get("versao") != VERSAO_ANALISE or dados.get("sha256") != sha:
+                return None
+            return AnaliseCodigo.de_json(dados)
+        except (OSError, ValueError, TypeError, AttributeError):
+            return None
+
+    def _para_disco(self, analise: AnaliseCodigo):
+        if not self.dir_cache:
+            return
+        try:
+            self.dir_cache.mkdir(parents=True, exist_ok=True)
+            tmp = self.dir_cache / f".{analise.sha256}.{os.getpid()}.tmp"
+            tmp.write_text(
+                json.dumps(analise.para_json(), ensure_ascii=False), encoding="utf-8"
+            )
+            os.replace(tmp, self._arquivo_cache(analise.sha256))
+        except OSError:
+            return
+        with self._lock:
+            self._no_disco += 1
+            cheio = self._no_disco > self.max_disco
+        if cheio:
+            # Poda em lote (até 3/4 do teto) para não listar o diretório a cada escrita
+            restantes = self._podar_disco(alvo=self.max_disco * 3 // 4)
+            with self._lock:
+                self._no_disco = restantes
+
+    def _guardar(self, analise: AnaliseCodigo):
+        with self._lock:
+            self._lru[analise.sha256] = analise
+            self._lru.move_to_end(analise.sha256)
+            while len(self._lru) > self.max_itens:
+                sha, _ = self._lru.popitem(last=False)
+                self._vindas_do_disco.discard(sha)
+
+    def analisar(self, codigo: str, usar_disco: bool = True) -> AnaliseCodigo:
+        """
+        Análise do conteúdo; parse só na primeira vez que este hash aparece.
+
+        ``usar_disco=False`` ignora o cache em disco (decisões de segurança:
+        só confia no que este processo parseou).
+        """
+        sha = hashlib.sha256(codigo.encode("utf-8", errors="surrogatepass")).hexdigest()
+        with self._lock:
+            analise = self._lru.get(sha)
+            # Entrada que veio do disco não serve para quem pediu usar_disco=False
+            if analise is not None and (usar_disco or sha not in self._vindas_do_disco):
+                self._lru.move_to_end(sha)
+                self.stats["hits"] += 1
+                return analise
+        analise = self._do_disco(sha) if usar_disco else None
+        if analise is not None:
+            self.stats["disco"] += 1
+            with self._lock:
+                self._vindas_do_disco.add(sha)
+        else:
+            analise = analisar_codigo(codigo, sha)
+            self.stats["parses"] += 1
+            self._para_disco(analise)
+            with self._lock:
+                self._vindas_do_disco.discard(sha)
+        self._guardar(analise)
+        return analise
+
+    def analisar_arquivo(self, caminho: Path) -> AnaliseCodigo:
+        """Como ``analisar``, mas pula leitura e hash se o arquivo não mudou (mtime/tamanho)."""
+        caminho = Path(caminho)
+        st = caminho.stat()
+        chave = (str(caminho.resolve()), st.st_mtime_ns, st.st_size)
+        sha = self._arquivos.get(chave)
+        if sha is not None:
+            with self._lock:
+                analise = self._lru.get(sha)
+                if analise is not None:
+                    self._lru.move_to_end(sha)
+                    self.stats["hits"] += 1
+                    return analise
+        analise = self.analisar(caminho.read_text(encoding="utf-8", errors="ignore"))
+        with self._lock:
+            if len(self._arquivos) > 4 * self.max_itens:
+                self._arquivos.clear()
+            self._arquivos[chave] = analise.sha256
+        return analise
+
+    def status(self) -> Dict:
+        return {
+            "itens": len(self._lru),
+            "max_itens": self.max_itens,
+            "disco": str(self.dir_cache) if self.dir_cache else None,
+            "stats": dict(self.stats),
+        }
@@ -0,0 +1,210 @@
+"""
+NEXO Backfill — análise paralela de logs históricos (semanas de nexo_*.log).
+
+Como funciona:
+  • cada arquivo é mapeado em memória (mmap) e dividido em blocos de
+    ~`tamanho_bloco` bytes, sempre cortando logo após um '\\n'
+  • os blocos são varridos num ProcessPool (todos os núcleos) pelo mesmo
+    motor de padrões do monitor (ErrorDetector); cada worker reabre o
+    arquivo com mmap e lê só a sua fatia, nada de bytes trafega no pickle
+  • cada bloco devolve contagens parciais (por tipo, por hora, por
+    fingerprint) que são somadas no processo principal
+
+Uso:
+    python nexo_realtime_monitor.py --mode backfill --logs-dir /var/log/nexo
+    python nexo_backfill.py /var/log/nexo/nexo_lucro*.log --workers 8
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .nexo_agregacao import fingerprint
+    from .nexo_deteccao import MotorDeteccao
+except ImportError:
+    from nexo_agregacao import fingerprint
+    from nexo_deteccao import MotorDeteccao
+
+# "2026-01-01 12:..." ou "2026-01-01T12:..." no início da linha (loguru/logging)
+_HORA = re.compile(r"(\d{4}-\d{2}-\d{2})[ T](\d{2}):")
+SEM_HORA = "sem_hora"
+# Fingerprints distintos guardados por bloco (memória limitada com ids aleatórios)
+MAX_FINGERPRINTS_BLOCO = 5000
+
+Bloco = Tuple[str, int, int]
+
+_motor: Optional[MotorDeteccao] = None
+
+
+def dividir_em_blocos(path, tamanho_bloco: int = 64 << 20) -> List[Bloco]:
+    """(path, início, fim) cobrindo o arquivo, cada fim logo após um '\\n'."""
+    path = str(path)
+    tamanho = os.path.getsize(path)
+    if tamanho == 0:
+        return []
+    blocos = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        inicio = 0
+        while inicio < tamanho:
+            alvo = inicio + tamanho_bloco
+            if alvo >= tamanho:
+                fim = tamanho
+            else:
+                quebra = mm.find(b"\n", alvo - 1)
+                fim = tamanho if quebra < 0 else quebra + 1
+            blocos.append((path, inicio, fim))
+            inicio = fim
+    return blocos
+
+
+def _motor_do_processo() -> MotorDeteccao:
+    """Motor compilado uma vez por worker."""
+    global _motor
+    if _motor is None:
+        try:
+            from .nexo_realtime_monitor import ErrorDetector
+        except ImportError:
+            from nexo_realtime_monitor import ErrorDetector
+        _motor = MotorDeteccao(ErrorDetector.padroes())
+    return _motor
+
+
+def varrer_bloco(bloco: Bloco) -> Dict:
+    """Contagens parciais de um bloco (roda no worker)."""
+    path, inicio, fim = bloco
+    motor = _motor_do_processo()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        dados = mm[inicio:fim]
+    texto = dados.decode("utf-8", errors="replace")
+
+    por_tipo: Counter = Counter()
+    por_hora: Dict[str, Counter] = {}
+    fingerprints: Dict[str, list] = {}
+    com_erro = 0
+    for _, linha, tipos in motor.varrer(texto):
+        com_erro += 1
+        por_tipo.update(tipos)
+        m = _HORA.match(linha)
+        hora = f"{m.group(1)}T{m.group(2)}" if m else SEM_HORA
+        por_hora.setdefault(hora, Counter()).update(tipos)
+        fp = fingerprint(tipos[0], linha)
+        item = fingerprints.get(fp)
+        if item is not None:
+            item[2] += 1
+        elif len(fingerprints) < MAX_FINGERPRINTS_BLOCO:
+            fingerprints[fp] = [tipos[0], linha.strip()[:200], 1]
+    return {
+        "arquivo": os.path.basename(path),
+        "bytes": len(dados),
+        "linhas": dados.count(b"\n") + (0 if dados.endswith(b"\n") else 1),
+        "linhas_com_erro": com_erro,
+        "por_tipo": por_tipo,
+        "por_hora": por_hora,
+        "fingerprints": fingerprints,
+    }
+
+
+def _somar(total: Dict, parcial: Dict):
+    total["bytes"] += parcial["bytes"]
+    total["linhas"] += parcial["linhas"]
+    total["linhas_com_erro"] += parcial["linhas_com_erro"]
+    total["por_tipo"].update(parcial["por_tipo"])
+    for hora, contagem in parcial["por_hora"].items():
+        total["por_hora"].setdefault(hora, Counter()).update(contagem)
+    for fp, (tipo, exemplo, n) in parcial["fingerprints"].items():
+        item = total["fingerprints"].setdefault(fp, [tipo, exemplo, 0])
+        item[2] += n
+    por_arquivo = total["por_arquivo"].setdefault(parcial["arquivo"], Counter())
+    por_arquivo.update(parcial["por_tipo"])
+
+
+def backfill(
+    arquivos: Iterable,
+    workers: Optional[int] = None,
+    tamanho_bloco: int = 64 << 20,
+    top: int = 20,
+) -> Dict:
+    """
+    Varre `arquivos` em paralelo e devolve contagens por tipo, por hora,
+    por arquivo e os `top` fingerprints mais frequentes.
+    """
+    t0 = time.perf_counter()
+    arquivos = [Path(a) for a in arquivos]
+    blocos = [
+        b for arquivo in arquivos for b in dividir_em_blocos(arquivo, tamanho_bloco)
+    ]
+    workers = workers or os.cpu_count() or 1
+
+    total = {
+        "bytes": 0,
+        "linhas": 0,
+        "linhas_com_erro": 0,
+        "por_tipo": Counter(),
+        "por_hora": {},
+        "por_arquivo": {},
+        "fingerprints": {},
+    }
+    if workers == 1 or len(blocos) <= 1:
+        for bloco in blocos:
+            _somar(total, varrer_bloco(bloco))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(blocos))) as pool:
+            for parcial in pool.map(varrer_bloco, blocos):
+                _somar(total, parcial)
+
+    segundos = time.perf_counter() - t0
+    ranking = sorted(
+        total["fingerprints"].items(), key=lambda item: item[1][2], reverse=True
+    )
+    return {
+        "arquivos": [str(a) for a in arquivos],
+        "blocos": len(blocos),
+        "workers": workers,
+        "bytes": total["bytes"],
+        "linhas": total["linhas"],
+        "linhas_com_erro": total["linhas_com_erro"],
+        "por_tipo": dict(total["por_tipo"].most_common()),
+        "por_hora": {
+            hora: dict(total["por_hora"][hora]) for hora in sorted(total["por_hora"])
+        },
+        "por_arquivo": {
+            nome: dict(c) for nome, c in sorted(total["por_arquivo"].items())
+        },
+        "top_fingerprints": [
+            {"fingerprint": fp, "tipo": tipo, "exemplo": exemplo, "ocorrencias": n}
+            for fp, (tipo, exemplo, n) in ranking[:top]
+        ],
+        "segundos": round(segundos, 3),
+        "mb_por_segundo": round(total["bytes"] / (1 << 20) / segundos, 1)
+        if segundos
+        else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill paralelo de logs do NEXO")
+    parser.add_argument("arquivos", nargs="+", help="Arquivos de log")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Processos (padrão: todos os núcleos)"
+    )
+    parser.add_argument(
+        "--bloco-mb", type=int, default=64, help="Tamanho aproximado de cada bloco"
+    )
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+    relatorio = backfill(args.arquivos, args.workers, args.bloco_mb << 20, args.top)
+    print(json.dumps(relatorio, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+NEXO Boot Profile — mede o cold start do deus.py por fase e por import.
+
+Registra:
+  • fases nomeadas (boot_critical_repair, logger, sdks_opcionais, nexo_swarm, ...)
+  • imports top-level feitos durante o boot (hook temporário em __import__)
+  • imports de SDKs opcionais (no boot, ou no primeiro uso em modo lazy)
+
+Uso:
+    from nexo_boot_profile import StartupProfiler
+    profiler = StartupProfiler()
+    profiler.instalar_hook_import(dono=__name__)
+    try:
+        with profiler.fase("logger"):
+            ...
+    finally:
+        profiler.remover_hook_import()
+    profiler.relatorio()
+"""
+
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class StartupProfiler:
+    """Coletor de tempos de boot; barato o suficiente para ficar sempre ligado."""
+
+    def __init__(self, modo: str = "eager"):
+        self.modo = modo
+        self.t0 = time.perf_counter()
+        self.fases: List[Dict] = []
+        self.imports: Dict[str, float] = {}
+        self.imports_sdk: Dict[str, float] = {}
+        self.pronto_ms: Optional[float] = None
+        self._import_original = None
+        self._local = threading.local()
+
+    def _ms_desde_inicio(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000
+
+    @contextmanager
+    def fase(self, nome: str):
+        """Mede uma fase do boot (aninhamento é permitido, cada fase é registrada)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            fim = time.perf_counter()
+            self.fases.append(
+                {
+                    "fase": nome,
+                    "inicio_ms": round((inicio - self.t0) * 1000, 2),
+                    "duracao_ms": round((fim - inicio) * 1000, 2),
+                }
+            )
+
+    @contextmanager
+    def medir_import(self, modulo: str):
+        """Mede o import explícito de um SDK (via importlib, fora do hook de __import__)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.imports_sdk[modulo] = round((time.perf_counter() - inicio) * 1000, 2)
+
+    # ========== HOOK DE IMPORT ==========
+
+    def instalar_hook_import(self, dono: Optional[str] = None):
+        """
+        Envolve builtins.__import__ para cronometrar imports top-level ainda não carregados.
+
+        Quem puder deve remover o hook num `finally`. `dono` cobre o caso em que
+        isso não dá (o corpo inteiro de um módulo, como o deus.py): se o import
+        do dono falhar, o importlib o tira de sys.modules e o hook se remove
+        sozinho no import seguinte, em vez de ficar no __import__ do processo.
+        """
+        if self._import_original is not None:
+            return
+        original = builtins.__import__
+        self._import_original = original
+        local = self._local
+        imports = self.imports
+        remover = self.remover_hook_import
+
+        def _import_cronometrado(name, globals=None, locals=None, fromlist=(), level=0):
+            if dono is not None and dono not in sys.modules:
+                remover()
+                return original(name, globals, locals, fromlist, level)
+            raiz = name.split(".")[0]
+            profundidade = getattr(local, "profundidade", 0)
+            # Só medimos o import mais externo de um módulo ainda não carregado
+            if level or profundidade or raiz in sys.modules:
+                local.profundidade = profundidade + 1
+                try:
+                    return original(name, globals, locals, fromlist, level)
+                finally:
+                    local.profundidade = profundidade
+            local.profundidade = 1
+            inicio = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                local.profundidade = 0
+                imports[raiz] = round(
+                    imports.get(raiz, 0.0) + (time.perf_counter() - inicio) * 1000, 2
+                )
+
+        builtins.__import__ = _import_cronometrado
+
+    def remover_hook_import(self):
+        """Restaura o __import__ original (chamado ao fim do boot ou se ele falhar)."""
+        if self._import_original is not None:
+            builtins.__import__ = self._import_original
+            self._import_original = None
+
+    # ========== RELATÓRIO ==========
+
+    def marcar_pronto(self):
+        """Marca o instante em que o servidor ficou pronto para atender."""
+        self.pronto_ms = round(self._ms_desde_inicio(), 2)
+
+    def relatorio(self, top: int = 25) -> Dict:
+        """Relatório por fase e por import, ordenado do mais caro para o mais barato."""
+        imports = sorted(self.imports.items(), key=lambda kv: kv[1], reverse=True)
+        sdk = sorted(self.imports_sdk.items(), key=lambda kv: kv[1], reverse=True)
+        return {
+            "modo": self.modo,
+            "pronto_ms": self.pronto_ms,
+            "fases": sorted(self.fases, key=lambda f: f["inicio_ms"]),
+            "imports_boot": [{"modulo": m, "ms": ms} for m, ms in imports[:top]],
+            "imports_boot_total_ms": round(sum(self.imports.values()), 2),
+            "imports_sdk": [{"modulo": m, "ms": ms} for m, ms in sdk],
+        }
@@ -0,0 +1,343 @@
+"""
+NEXO Dependências — snapshot único do estado dos pacotes instalados.
+
+Em vez de importar cada biblioteca (e às vezes chamar o pip) a cada verificação,
+o serviço lê as distribuições instaladas via ``importlib.metadata`` uma única vez
+e guarda o resultado junto com um fingerprint do site-packages. Enquanto o
+fingerprint não mudar, toda consulta é um lookup em dicionário.
+
+A instalação também é em lote: todos os pacotes faltantes vão para uma única
+chamada do pip, usando primeiro um wheelhouse local (offline) quando existir.
+Como a resolução do pip é tudo-ou-nada, um nome irresolúvel (nome de import
+como ``PIL``/``yaml``, erro de digitação) derrubaria o lote inteiro: nesse
+caso o lote é dividido ao meio (bisseção) até isolar os pacotes que falham,
+e os demais são instalados normalmente.
+
+Uso:
+    from nexo_dependencias import DependencyService
+    deps = DependencyService(instalador=safe_install)
+    deps.is_installed("python-dotenv")     # True/False, sem import e sem pip
+    deps.garantir(["fastapi", "loguru"])  # instala apenas o que falta, num só pip
+"""
+
+import importlib.metadata
+import importlib.util
+import logging
+import os
+import re
+import site
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("NEXO-Dependencias")
+
+# Linhas finais do stderr do pip registradas quando uma instalação falha
+CAUDA_STDERR_LINHAS = 15
+
+# Módulos da biblioteca padrão nunca precisam de instalação
+_STDLIB = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+
+
+def normalizar_nome(nome: str) -> str:
+    """Normaliza nome de distribuição (PEP 503): 'Python_Dotenv' -> 'python-dotenv'."""
+    return re.sub(r"[-_.]+", "-", nome).lower()
+
+
+def wheelhouse_padrao() -> Optional[str]:
+    """Diretório de wheels locais (NEXO_WHEELHOUSE ou ./wheelhouse), se existir."""
+    caminho = os.getenv("NEXO_WHEELHOUSE") or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "wheelhouse"
+    )
+    return caminho if os.path.isdir(caminho) else None
+
+
+def comandos_pip(
+    pacotes: List[str], wheelhouse: Optional[str] = None
+) -> List[List[str]]:
+    """
+    Monta as invocações do pip para instalar todos os pacotes de uma vez.
+
+    Com wheelhouse: primeiro uma passada offline (--no-index), depois, só se
+    faltar algo no wheelhouse, uma passada online que ainda prefere as wheels locais.
+    """
+    base = [
+        sys.executable,
+        "-m",
+        "pip",
+        "install",
+        "--no-cache-dir",
+        "--disable-pip-version-check",
+    ]
+    if not wheelhouse:
+        return [base + list(pacotes)]
+    return [
+        base + ["--no-index", "--find-links", wheelhouse] + list(pacotes),
+        base + ["--find-links", wheelhouse] + list(pacotes),
+    ]
+
+
+def _pip(pacotes: List[str], wheelhouse: Optional[str], timeout: int) -> bool:
+    """Uma resolução do pip para ``pacotes`` (wheelhouse offline primeiro). Loga a cauda do stderr se falhar."""
+    for cmd in comandos_pip(pacotes, wheelhouse):
+        try:
+            proc = subprocess.run(cmd, timeout=timeout, capture_output=True, text=True)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"pip install {' '.join(pacotes)}: timeout após {timeout}s")
+            continue
+        except OSError as e:
+            logger.warning(f"pip install {' '.join(pacotes)}: {e}")
+            continue
+        if proc.returncode == 0:
+            return True
+        cauda = "\n".join(
+            (proc.stderr or proc.stdout or "")
+            .strip()
+            .splitlines()[-CAUDA_STDERR_LINHAS:]
+        )
+        logger.warning(
+            f"pip install {' '.join(pacotes)} falhou (rc={proc.returncode}):\n{cauda}"
+        )
+    return False
+
+
+def instalar_com_relatorio(
+    pacotes: Iterable[str],
+    wheelhouse: Optional[str] = None,
+    timeout: int = 900,
+    instalar: Optional[Callable[[List[str]], bool]] = None,
+) -> Dict[str, bool]:
+    """
+    Instala os pacotes e diz quais falharam: {pacote: instalado}.
+
+    Primeiro um só pip para o lote; se falhar, bisseção: cada metade é
+    tentada separadamente até isolar os pacotes que o pip não resolve.
+    ``instalar`` (lista -> bool) substitui a chamada real do pip.
+    """
+    pacotes = [p for p in dict.fromkeys(pacotes) if p]
+    instalar = instalar or (lambda lote: _pip(lote, wheelhouse, timeout))
+    resultado: Dict[str, bool] = {}
+
+    def tentar(lote: List[str]):
+        if instalar(lote):
+            resultado.update(dict.fromkeys(lote, True))
+        elif len(lote) == 1:
+            resultado[lote[0]] = False
+        else:
+            meio = len(lote) // 2
+            tentar(lote[:meio])
+            tentar(lote[meio:])
+
+    if pacotes:
+        tentar(pacotes)
+    falhas = [p for p in pacotes if not resultado.get(p)]
+    if falhas and len(falhas) < len(pacotes):
+        logger.warning(
+            f"Pacotes não instalados: {', '.join(falhas)} (demais instalados)"
+        )
+    return {p: resultado.get(p, False) for p in pacotes}
+
+
+def instalar_pacotes(
+    pacotes: Iterable[str], wheelhouse: Optional[str] = None, timeout: int = 900
+) -> bool:
+    """Instala os pacotes (lote, com bisseção em caso de falha). True se todos foram instalados."""
+    return all(instalar_com_relatorio(pacotes, wheelhouse, timeout).values())
+
+
+@dataclass
+class DependencySnapshot:
+    """Fotografia do ambiente: distribuições, módulos top-level e quando foi lida."""
+
+    fingerprint: str
+    distribuicoes: Dict[str, str]  # nome normalizado -> versão
+    modulos: Dict[str, List[str]]  # módulo top-level -> distribuições que o fornecem
+    criado_em: float
+    duracao_ms: float
+    specs: Dict[str, bool] = field(default_factory=dict)  # cache de find_spec
+
+
+class DependencyService:
+    """Ponto único de verificação de dependências, com cache e single-flight."""
+
+    def __init__(
+        self,
+        instalador: Optional[Callable[[List[str]], bool]] = None,
+        ttl: float = 5.0,
+    ):
+        """
+        Args:
+            instalador: função chamada UMA vez com a lista de pacotes faltantes (ex: safe_install)
+            ttl: intervalo mínimo (s) entre recálculos do fingerprint do site-packages
+        """
+        self.instalador = instalador
+        self.ttl = ttl
+        self._snapshot: Optional[DependencySnapshot] = None
+        self._verificado_em = 0.0
+        self._lock_snapshot = threading.Lock()
+        self._lock_garantir = threading.Lock()
+        self._ultimo_garantir: Dict[str, bool] = {}
+        self.stats = {"snapshots": 0, "garantir": 0, "garantir_compartilhado": 0}
+
+    # ========== SNAPSHOT ==========
+
+    def _diretorios_site(self) -> List[str]:
+        """Diretórios cujo conteúdo muda quando um pacote é instalado/removido."""
+        dirs = []
+        try:
+            dirs.extend(site.getsitepackages())
+        except Exception:
+            pass
+        try:
+            dirs.append(site.getusersitepackages())
+        except Exception:
+            pass
+        dirs.extend(p for p in sys.path if "site-packages" in p or "dist-packages" in p)
+        vistos = []
+        for d in dirs:
+            if d not in vistos and os.path.isdir(d):
+                vistos.append(d)
+        return vistos
+
+    def fingerprint(self) -> str:
+        """Fingerprint barato do site-packages (mtime dos diretórios, sem listar arquivos)."""
+        partes = []
+        for d in self._diretorios_site():
+            try:
+                partes.append(f"{d}:{os.stat(d).st_mtime_ns}")
+            except OSError:
+                continue
+        return "|".join(partes)
+
+    def _ler_ambiente(self, fingerprint: str) -> DependencySnapshot:
+        inicio = time.perf_counter()
+        distribuicoes = {}
+        for dist in importlib.metadata.distributions():
+            try:
+                nome = dist.metadata["Name"]
+            except Exception:
+                nome = None
+            if nome:
+                distribuicoes.setdefault(normalizar_nome(nome), dist.version)
+        try:
+            modulos = {
+                mod: [normalizar_nome(d) for d in dists]
+                for mod, dists in importlib.metadata.packages_distributions().items()
+            }
+        except Exception:
+            modulos = {}
+        self.stats["snapshots"] += 1
+        return DependencySnapshot(
+            fingerprint=fingerprint,
+            distribuicoes=distribuicoes,
+            modulos=modulos,
+            criado_em=time.time(),
+            duracao_ms=(time.perf_counter() - inicio) * 1000,
+        )
+
+    def snapshot(self, force: bool = False) -> DependencySnapshot:
+        """Retorna o snapshot atual; relê o ambiente só se o site-packages mudou."""
+        snap = self._snapshot
+        agora = time.monotonic()
+        if snap is not None and not force and agora - self._verificado_em < self.ttl:
+            return snap
+        with self._lock_snapshot:
+            # Outro thread pode ter atualizado enquanto esperávamos o lock
+            snap = self._snapshot
+            if (
+                snap is not None
+                and not force
+                and time.monotonic() - self._verificado_em < self.ttl
+            ):
+                return snap
+            fp = self.fingerprint()
+            if force or snap is None or snap.fingerprint != fp:
+                snap = self._ler_ambiente(fp)
+                self._snapshot = snap
+            self._verificado_em = time.monotonic()
+            return snap
+
+    def invalidate(self):
+        """Força releitura na próxima consulta (ex: após pip install)."""
+        self._verificado_em = 0.0
+        self._snapshot = None
+
+    # ========== CONSULTAS ==========
+
+    def versao(self, nome: str) -> Optional[str]:
+        """Versão instalada de uma distribuição, ou None."""
+        return self.snapshot().distribuicoes.get(normalizar_nome(nome))
+
+    def is_installed(self, nome: str) -> bool:
+        """Aceita nome de distribuição ('python-dotenv') ou de módulo ('dotenv')."""
+        snap = self.snapshot()
+        if normalizar_nome(nome) in snap.distribuicoes:
+            return True
+        modulo = nome.replace("-", "_").split(".")[0]
+        if modulo in _STDLIB or modulo in snap.modulos:
+            return True
+        # Módulos locais/sem metadata: find_spec uma vez por snapshot
+        encontrado = snap.specs.get(modulo)
+        if encontrado is None:
+            try:
+                encontrado = importlib.util.find_spec(modulo) is not None
+            except (ImportError, ValueError):
+                encontrado = False
+            snap.specs[modulo] = encontrado
+        return encontrado
+
+    def missing(self, nomes: Iterable[str]) -> List[str]:
+        """Lista (na ordem recebida) os pacotes que não estão instalados."""
+        return [n for n in nomes if not self.is_installed(n)]
+
+    # ========== INSTALAÇÃO ==========
+
+    def garantir(
+        self, requisitos: Iterable[str], instalar: bool = True
+    ) -> Dict[str, bool]:
+        """
+        Garante os requisitos, instalando apenas o que falta.
+
+        Single-flight: se outra verificação já está em curso, espera por ela e
+        reaproveita o resultado em vez de repetir a checagem/instalação.
+        """
+        requisitos = list(requisitos)
+        if not self._lock_garantir.acquire(blocking=False):
+            with self._lock_garantir:
+                self.stats["garantir_compartilhado"] += 1
+                if all(r in self._ultimo_garantir for r in requisitos):
+                    return {r: self._ultimo_garantir[r] for r in requisitos}
+                return self._garantir(requisitos, instalar)
+        try:
+            return self._garantir(requisitos, instalar)
+        finally:
+            self._lock_garantir.release()
+
+    def _garantir(self, requisitos: List[str], instalar: bool) -> Dict[str, bool]:
+        self.stats["garantir"] += 1
+        faltando = self.missing(requisitos)
+        resultado = {r: r not in faltando for r in requisitos}
+        if faltando and instalar and self.instalador:
+            self.instalador(faltando)
+            # Verificação pelo metadata recém-lido: nada de re-importar cada módulo
+            self.invalidate()
+            for pkg in faltando:
+                resultado[pkg] = self.is_installed(pkg)
+        self._ultimo_garantir.update(resultado)
+        return resultado
+
+    def status(self) -> Dict:
+        """Resumo para endpoints de saúde."""
+        snap = self._snapshot
+        return {
+            "distribuicoes": len(snap.distribuicoes) if snap else 0,
+            "snapshot_idade_s": round(time.time() - snap.criado_em, 1)
+            if snap
+            else None,
+            "snapshot_duracao_ms": round(snap.duracao_ms, 2) if snap else None,
+            "ultimo_garantir": dict(self._ultimo_garantir),
+            "stats": dict(self.stats),
+        }
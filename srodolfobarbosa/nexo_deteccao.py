@@ -0,0 +1,305 @@
+"""
+NEXO Detecção — motor único de padrões de erro para todos os monitores.
+
+Antes, cada monitor (NEXORealtimeMonitor, NEXOLiveLauncher,
+SelfHealingOrganism, NEXOErrorRepair) tinha seu próprio laço de substrings ou
+regexes por linha. Aqui todos os padrões viram:
+
+  • uma única alternação compilada com grupos nomeados, que varre o texto
+    inteiro de uma vez (o laço fica em C, não em Python por linha)
+  • um pré-filtro pelos literais obrigatórios de cada padrão: Aho–Corasick
+    (pyahocorasick, opcional) ou, sem ele, str.find por literal no texto
+    minúsculo; se algum padrão não tiver literal, a alternação varre sozinha
+  • só nas linhas que casaram, cada padrão é testado para devolver TODOS os
+    tipos da linha (a alternação sozinha só vê o primeiro)
+
+Benchmark (linhas/s, motor vs laço antigo por linha):
+    python nexo_deteccao.py --bench --linhas 200000
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import ahocorasick  # pyahocorasick (opcional)
+except ImportError:
+    ahocorasick = None
+
+_META = set(".^$*+?{}[]|()")
+
+
+@dataclass(frozen=True)
+class Padrao:
+    """Um tipo de erro: regex (case-insensitive) + metadados do monitor."""
+
+    nome: str
+    regex: str
+    info: Dict = field(default_factory=dict, compare=False, hash=False)
+
+
+def padroes_de_literais(tabela: Dict[str, Dict], **extra) -> List[Padrao]:
+    """{substring: info} → Padrao com a substring escapada (monitores por substring)."""
+    return [
+        Padrao(literal, re.escape(literal), dict(info, **extra))
+        for literal, info in tabela.items()
+    ]
+
+
+def _alternativas(regex: str) -> Optional[List[str]]:
+    """Divide no `|` de nível zero; None se houver grupos/classes (não analisável)."""
+    partes, atual, i = [], [], 0
+    while i < len(regex):
+        c = regex[i]
+        if c == "\\" and i + 1 < len(regex):
+            atual.append(regex[i : i + 2])
+            i += 2
+            continue
+        if c in "()[]":
+            return None
+        if c == "|":
+            partes.append(atual)
+            atual = []
+        else:
+            atual.append(c)
+        i += 1
+    partes.append(atual)
+    return ["".join(p) for p in partes]
+
+
+def literal_obrigatorio(alternativa: str) -> str:
+    """Maior trecho literal de uma alternativa sem grupos (minúsculo)."""
+    melhor, atual = "", ""
+    tokens = re.findall(r"\\.|.", alternativa, re.S)
+    for n, tok in enumerate(tokens):
+        opcional = n + 1 < len(tokens) and tokens[n + 1] and tokens[n + 1][0] in "?*{"
+        if tok.startswith("\\") and not tok[1].isalnum() and not opcional:
+            atual += tok[1]
+        elif len(tok) == 1 and tok not in _META and not opcional:
+            atual += tok
+        else:
+            melhor = max(melhor, atual, key=len)
+            atual = ""
+    return max(melhor, atual, key=len).lower()
+
+
+def literais_do_padrao(regex: str, minimo: int = 2) -> Optional[List[str]]:
+    """Um literal obrigatório por alternativa, ou None se alguma não tiver."""
+    alternativas = _alternativas(regex)
+    if alternativas is None:
+        return None
+    literais = [literal_obrigatorio(a) for a in alternativas]
+    return literais if all(len(lit) >= minimo for lit in literais) else None
+
+
+class MotorDeteccao:
+    """Alternação única + pré-filtro de literais; devolve todos os tipos por linha."""
+
+    def __init__(self, padroes: Iterable[Padrao]):
+        self.padroes = list(padroes)
+        self.por_nome = {p.nome: p for p in self.padroes}
+        self._combinado = re.compile(
+            "|".join(f"(?P<p{i}>{p.regex})" for i, p in enumerate(self.padroes)),
+            re.IGNORECASE,
+        )
+        self._individuais = [
+            (p.nome, re.compile(p.regex, re.IGNORECASE)) for p in self.padroes
+        ]
+        self._literais = self._extrair_literais()
+        self._automato = self._montar_automato()
+
+    def _extrair_literais(self) -> Optional[List[str]]:
+        literais: Set[str] = set()
+        for p in self.padroes:
+            lits = literais_do_padrao(p.regex)
+            if lits is None:
+                return (
+                    None  # um padrão sem literal obrigatório: pré-filtro não é seguro
+                )
+            literais.update(lits)
+        # "timed out" já cobre "timed out after": fica só o menor de cada família
+        return sorted(
+            lit for lit in literais if not any(o != lit and o in lit for o in literais)
+        )
+
+    def _montar_automato(self):
+        if ahocorasick is None or not self._literais:
+            return None
+        automato = ahocorasick.Automaton()
+        for lit in self._literais:
+            automato.add_word(lit, lit)
+        automato.make_automaton()
+        return automato
+
+    @property
+    def prefiltro(self) -> str:
+        if self._automato is not None:
+            return "aho-corasick"
+        return "literais" if self._literais else "regex"
+
+    # ---- por linha -------------------------------------------------------
+
+    def detectar(self, linha: str) -> List[str]:
+        """Todos os tipos que casam na linha, na ordem dos padrões."""
+        if not self._combinado.search(linha):
+            return []
+        return [nome for nome, rx in self._individuais if rx.search(linha)]
+
+    def primeiro(self, linha: str) -> Optional[str]:
+        """Primeiro tipo (na ordem dos padrões) que casa, como os laços antigos."""
+        tipos = self.detectar(linha)
+        return tipos[0] if tipos else None
+
+    # ---- em lote ---------------------------------------------------------
+
+    def _inicios_candidatos(self, texto: str) -> List[int]:
+        """
+        Posições (crescentes) onde pode haver match. Com literais: Aho–Corasick
+        se instalado, senão str.find por literal (busca em C sobre o texto
+        minúsculo). Sem literais: a própria alternação.
+        """
+        if self._literais:
+            minusculo = texto.lower()
+            if len(minusculo) == len(texto):  # offsets preservados
+                if self._automato is not None:
+                    return sorted(
+                        {
+                            fim - len(lit) + 1
+                            for fim, lit in self._automato.iter(minusculo)
+                        }
+                    )
+                posicoes = []
+                for lit in self._literais:
+                    pos = minusculo.find(lit)
+                    while pos >= 0:
+                        posicoes.append(pos)
+                        pos = minusculo.find(lit, pos + 1)
+                return sorted(set(posicoes))
+        return [m.start() for m in self._combinado.finditer(texto)]
+
+    def varrer(self, texto: str) -> Iterator[Tuple[int, str, List[str]]]:
+        """
+        Varre um bloco de texto (muitas linhas) de uma vez.
+
+        Gera (offset_da_linha, linha, tipos) só para as linhas com erro.
+        """
+        ultima = -1
+        for pos in self._inicios_candidatos(texto):
+            if pos <= ultima:
+                continue  # linha já avaliada
+            inicio = texto.rfind("\n", 0, pos) + 1
+            fim = texto.find("\n", pos)
+            if fim < 0:
+                fim = len(texto)
+            ultima = fim
+            linha = texto[inicio:fim]
+            tipos = self.detectar(linha)
+            if tipos:
+                yield inicio, linha, tipos
+
+    def tipos_em(self, texto: str) -> Set[str]:
+        """Conjunto de tipos presentes em qualquer ponto do texto."""
+        encontrados: Set[str] = set()
+        for _, _, tipos in self.varrer(texto):
+            encontrados.update(tipos)
+            if len(encontrados) == len(self.padroes):
+                break
+        return encontrados
+
+
+# ==============================================================================
+# Benchmark
+# ==============================================================================
+
+
+def _log_sintetico(linhas: int, taxa_erro: float = 0.01) -> str:
+    normais = [
+        "2026-01-01 12:00:00.123 | INFO | deus:executar:812 - ordem recebida, 3 agentes ativos",
+        "2026-01-01 12:00:00.456 | DEBUG | deus:pensar:440 - contexto montado com 5120 tokens",
+        "2026-01-01 12:00:01.789 | INFO | nexo_habilidades:invocar:96 - habilidade busca_web ok em 812ms",
+    ]
+    erros = [
+        "2026-01-01 12:00:02.000 | ERROR | deus:executar:830 - Error code: 413 - Request too large",
+        "2026-01-01 12:00:02.100 | ERROR | deus:agente:511 - 'NoneType' object has no attribute 'content'",
+        "2026-01-01 12:00:02.200 | WARNING | deus:groq:220 - Request timed out after 30s",
+        "2026-01-01 12:00:02.300 | ERROR | deus:groq:221 - 429 rate limit exceeded",
+    ]
+    a_cada = max(1, int(1 / taxa_erro)) if taxa_erro else 0
+    saida = []
+    for i in range(linhas):
+        if a_cada and i % a_cada == 0:
+            saida.append(erros[(i // a_cada) % len(erros)])
+        else:
+            saida.append(normais[i % len(normais)])
+    return "\n".join(saida) + "\n"
+
+
+def benchmark(linhas: int = 200_000, padroes: Optional[List[Padrao]] = None) -> Dict:
+    """Linhas/s: laço antigo (lower + um regex por vez por linha) vs motor em lote."""
+    if padroes is None:
+        try:
+            from nexo_realtime_monitor import ErrorDetector
+        except ImportError:
+            from .nexo_realtime_monitor import ErrorDetector
+        padroes = ErrorDetector.padroes()
+    texto = _log_sintetico(linhas)
+    compilados = [(p.nome, re.compile(p.regex, re.IGNORECASE)) for p in padroes]
+
+    t0 = time.perf_counter()
+    antigo = 0
+    for linha in texto.splitlines():
+        minuscula = linha.lower()
+        for _, rx in compilados:
+            if rx.search(minuscula):
+                antigo += 1
+                break
+    t_antigo = time.perf_counter() - t0
+
+    motor = MotorDeteccao(padroes)
+    t0 = time.perf_counter()
+    novo = sum(1 for _ in motor.varrer(texto))
+    t_novo = time.perf_counter() - t0
+
+    return {
+        "linhas": linhas,
+        "linhas_com_erro": novo,
+        "prefiltro": motor.prefiltro,
+        "antigo_linhas_s": round(linhas / t_antigo),
+        "motor_linhas_s": round(linhas / t_novo),
+        "speedup": round(t_antigo / t_novo, 1),
+        "mesmas_linhas": antigo == novo,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Motor de detecção de erros do NEXO")
+    parser.add_argument(
+        "--bench", action="store_true", help="Mede linhas/s (motor vs laço antigo)"
+    )
+    parser.add_argument("--linhas", type=int, default=200_000)
+    parser.add_argument("--log-file", help="Varre um log e imprime os tipos por linha")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        print(json.dumps(benchmark(args.linhas), indent=2))
+        return 0
+    if args.log_file:
+        try:
+            from nexo_realtime_monitor import ErrorDetector
+        except ImportError:
+            from .nexo_realtime_monitor import ErrorDetector
+        motor = MotorDeteccao(ErrorDetector.padroes())
+        with open(args.log_file, encoding="utf-8", errors="replace") as f:
+            for offset, linha, tipos in motor.varrer(f.read()):
+                print(f"{offset}\t{','.join(tipos)}\t{linha[:120]}")
+        return 0
+    parser.print_help()
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,18 +15,106 @@ Estratégia:
   • Rotaciona credenciais se necessário
 """
 
+import ast
 import re
 import subprocess
 import sys
 import os
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+try:
+    from .nexo_deteccao import MotorDeteccao, Padrao
+except ImportError:
+    from nexo_deteccao import MotorDeteccao, Padrao
+
+# Mapa de impacto de testes: valida só os testes que tocam as funções alteradas
+try:
+    from .sandbox.impact import TestImpactMap, pytest_command, text_changes
+except ImportError:
+    try:
+        from sandbox.impact import TestImpactMap, pytest_command, text_changes
+    except ImportError:
+        TestImpactMap = None
+
+
+class PatchPlan:
+    """
+    Plano de patch transacional sobre um arquivo.
+
+    Lê o arquivo uma vez, aplica todas as transformações na cópia em memória,
+    verifica com compile() + AST e grava de forma atômica uma única vez.
+    Se a verificação falhar nada é gravado.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.original = self.path.read_text(encoding="utf-8")
+        self.content = self.original
+        self.applied: List[str] = []
+        self.error: Optional[str] = None
+        self.committed = False  # as mudanças foram gravadas no arquivo?
+
+    def add(self, name: str, transform: Callable[[str], str]) -> bool:
+        """Aplica `transform` na cópia em memória. True se mudou algo."""
+        novo = transform(self.content)
+        if novo == self.content:
+            return False
+        self.content = novo
+        self.applied.append(name)
+        return True
+
+    @property
+    def changed(self) -> bool:
+        return self.content != self.original
+
+    def changed_functions(self):
+        """Funções alteradas (qualnames), ou None se mudou código de módulo."""
+        return text_changes(self.original, self.content) if TestImpactMap else None
+
+    def verify(self) -> bool:
+        """compile() + AST: o resultado tem que ser Python válido e manter as definições."""
+        try:
+            compile(self.content, str(self.path), "exec")
+            antes = ast.parse(self.original)
+            depois = ast.parse(self.content)
+        except SyntaxError as e:
+            self.error = f"SyntaxError linha {e.lineno}: {e.msg}"
+            return False
+
+        def defs(tree):
+            return {
+                n.name
+                for n in ast.walk(tree)
+                if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+            }
+
+        perdidas = defs(antes) - defs(depois)
+        if perdidas:
+            self.error = f"definições removidas: {', '.join(sorted(perdidas))}"
+            return False
+        self.error = None
+        return True
+
+    def commit(self) -> bool:
+        """Verifica e grava uma vez (tmp + rename). False se inválido."""
+        if not self.changed:
+            return True
+        if not self.verify():
+            logger.error(f"❌ Patch rejeitado ({', '.join(self.applied)}): {self.error}")
+            return False
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.content, encoding="utf-8")
+        os.replace(tmp, self.path)
+        self.committed = True
+        logger.info(f"💾 {self.path.name}: {len(self.applied)} fix(es) gravados numa escrita")
+        return True
+
 
 class NEXOErrorRepair:
     """Detector e corretor de erros NEXO em tempo real."""
@@ -35,9 +123,51 @@ class NEXOErrorRepair:
         self.workspace = workspace_dir
         self.deus_file = self.workspace / "deus.py"
         self.issues = []
+        self.last_plan: Optional[PatchPlan] = None
 
     # ========== ERROR DETECTION ==========
 
+    # tipo -> regex, issue registrado e aviso; a ordem é a dos issues no relatório
+    ISSUE_PATTERNS = {
+        "pensar_signature": {
+            "regex": r"NexoSwarm\.pensar\(\) takes 2 positional arguments but 3 were given",
+            "severity": "high",
+            "fix": "Ajustar assinatura de pensar() ou número de argumentos",
+            "aviso": "NexoSwarm.pensar() signature mismatch",
+        },
+        "supabase_schema": {
+            "regex": r"Could not find the 'model' column",
+            "severity": "high",
+            "fix": "Executar migração: ALTER TABLE insights_pending ADD COLUMN model TEXT",
+            "aviso": "Supabase schema cache missing 'model' column",
+        },
+        "async_none": {
+            "regex": r"object NoneType can't be used in 'await' expression",
+            "severity": "high",
+            "fix": "Garantir que função retorna coroutine ou adicionar async/await corretamente",
+            "aviso": "NoneType in await expression",
+        },
+    }
+
+    @classmethod
+    def _motor(cls) -> MotorDeteccao:
+        if "_motor_cache" not in cls.__dict__:
+            cls._motor_cache = MotorDeteccao(
+                Padrao(tipo, cfg["regex"], cfg) for tipo, cfg in cls.ISSUE_PATTERNS.items()
+            )
+        return cls._motor_cache
+
+    def _registrar(self, tipo: str):
+        cfg = self.ISSUE_PATTERNS[tipo]
+        logger.warning(f"🔴 Detectado: {cfg['aviso']}")
+        self.issues.append({"type": tipo, "severity": cfg["severity"], "fix": cfg["fix"]})
+
+    def _detectar(self, tipo: str, log_text: str) -> bool:
+        if tipo in self._motor().tipos_em(log_text):
+            self._registrar(tipo)
+            return True
+        return False
+
     def detect_pensar_signature_error(self, log_text: str) -> bool:
         """
         Detecta: NexoSwarm.pensar() takes 2 positional arguments but 3 were given
@@ -45,16 +175,7 @@ class NEXOErrorRepair:
         Causa: função sendo chamada com argumento extra
         Fix: ajustar assinatura da função ou chamada
         """
-        pattern = r"NexoSwarm\.pensar\(\) takes 2 positional arguments but 3 were given"
-        if re.search(pattern, log_text):
-            logger.warning("🔴 Detectado: NexoSwarm.pensar() signature mismatch")
-            self.issues.append({
-                "type": "pensar_signature",
-                "severity": "high",
-                "fix": "Ajustar assinatura de pensar() ou número de argumentos"
-            })
-            return True
-        return False
+        return self._detectar("pensar_signature", log_text)
 
     def detect_supabase_schema_error(self, log_text: str) -> bool:
         """
@@ -63,16 +184,7 @@ class NEXOErrorRepair:
         Causa: Coluna 'model' não existe na tabela insights_pending
         Fix: Adicionar migração ou criar coluna no Supabase
         """
-        pattern = r"Could not find the 'model' column"
-        if re.search(pattern, log_text):
-            logger.warning("🔴 Detectado: Supabase schema cache missing 'model' column")
-            self.issues.append({
-                "type": "supabase_schema",
-                "severity": "high",
-                "fix": "Executar migração: ALTER TABLE insights_pending ADD COLUMN model TEXT"
-            })
-            return True
-        return False
+        return self._detectar("supabase_schema", log_text)
 
     def detect_async_none_error(self, log_text: str) -> bool:
         """
@@ -81,57 +193,42 @@ class NEXOErrorRepair:
         Causa: Função retornando None em vez de coroutine/promise
         Fix: Adicionar await ou return corretamente
         """
-        pattern = r"object NoneType can't be used in 'await' expression"
-        if re.search(pattern, log_text):
-            logger.warning("🔴 Detectado: NoneType in await expression")
-            self.issues.append({
-                "type": "async_none",
-                "severity": "high",
-                "fix": "Garantir que função retorna coroutine ou adicionar async/await corretamente"
-            })
-            return True
-        return False
+        return self._detectar("async_none", log_text)
 
     def scan_logs(self, log_text: str) -> List[Dict]:
-        """Scanneia log text para todos os erros conhecidos."""
+        """Scanneia log text para todos os erros conhecidos (uma varredura só)."""
         self.issues = []
         
-        self.detect_pensar_signature_error(log_text)
-        self.detect_supabase_schema_error(log_text)
-        self.detect_async_none_error(log_text)
+        presentes = self._motor().tipos_em(log_text)
+        for tipo in self.ISSUE_PATTERNS:
+            if tipo in presentes:
+                self._registrar(tipo)
         
         return self.issues
 
     # ========== AUTOMATIC FIXES ==========
 
-    def fix_pensar_signature(self) -> bool:
+    @staticmethod
+    def _transform_pensar(content: str) -> str:
+        # Padrão: pensar(self, arg1, arg2, arg3) → pensar(self, arg1)
+        return re.sub(r"def pensar\(self,\s*(\w+),\s*\w+,\s*\w+", r"def pensar(self, \1", content)
+
+    def _fix_in_plan(self, name: str, transform: Callable[[str], str], plan: Optional[PatchPlan]) -> bool:
+        """Aplica no plano dado, ou num plano próprio gravado na hora (uso avulso)."""
+        if not self.deus_file.exists():
+            logger.error(f"Arquivo não encontrado: {self.deus_file}")
+            return False
+        proprio = plan is None
+        plan = plan or PatchPlan(self.deus_file)
+        if not plan.add(name, transform):
+            logger.info(f"ℹ️ {name}: nada a corrigir")
+            return True
+        return plan.commit() if proprio else True
+
+    def fix_pensar_signature(self, plan: Optional[PatchPlan] = None) -> bool:
         """Corrige assinatura de NexoSwarm.pensar()."""
         try:
-            if not self.deus_file.exists():
-                logger.error(f"Arquivo não encontrado: {self.deus_file}")
-                return False
-            
-            content = self.deus_file.read_text()
-            
-            # Padrão 1: pensar(self, arg1, arg2, arg3) → pensar(self, arg1)
-            # Procura por def pensar(self, ....) e ajusta
-            pattern = r"def pensar\(self,\s*\w+,\s*\w+,\s*\w+"
-            
-            if re.search(pattern, content):
-                # Corrige a assinatura
-                fixed = re.sub(
-                    r"def pensar\(self,\s*(\w+),\s*\w+,\s*\w+",
-                    r"def pensar(self, \1",
-                    content
-                )
-                
-                self.deus_file.write_text(fixed)
-                logger.info("✅ Corrigida assinatura de pensar()")
-                return True
-            
-            logger.info("ℹ️ Assinatura de pensar() já está correta")
-            return True
-            
+            return self._fix_in_plan("pensar_signature", self._transform_pensar, plan)
         except Exception as e:
             logger.error(f"❌ Erro ao corrigir pensar(): {e}")
             return False
@@ -178,37 +275,17 @@ class NEXOErrorRepair:
             logger.error(f"❌ Erro ao corrigir schema Supabase: {e}")
             return False
 
-    def fix_async_none_error(self) -> bool:
+    @staticmethod
+    def _transform_async_sabedoria(content: str) -> str:
+        # Funções de "extrair sabedoria" chamadas com await precisam ser async
+        if "extrair sabedoria" not in content:
+            return content
+        return re.sub(r"(?<!async\s)def\s+(\w*sabedoria\w*)\s*\(", r"async def \1(", content)
+
+    def fix_async_none_error(self, plan: Optional[PatchPlan] = None) -> bool:
         """Corrige funções que retornam None ao invés de coroutine."""
         try:
-            if not self.deus_file.exists():
-                return False
-            
-            content = self.deus_file.read_text()
-            
-            # Procura por padrão: await func() onde func retorna None
-            # Solução: adicionar async/await ou garantir return de coroutine
-            
-            # Procura por "extrair sabedoria" (mencionado no erro)
-            if "extrair sabedoria" in content:
-                # Padrão: função que chama await numa coisa que é None
-                pattern = r"await\s+(\w+)"
-                
-                # Valida que a função retorna coroutine
-                fixed = re.sub(
-                    r"(?<!async\s)def\s+(\w*sabedoria\w*)\s*\(",
-                    r"async def \1(",
-                    content
-                )
-                
-                if fixed != content:
-                    self.deus_file.write_text(fixed)
-                    logger.info("✅ Corrigidas funções async de sabedoria")
-                    return True
-            
-            logger.info("ℹ️ Funções async já parecem estar corretas")
-            return True
-            
+            return self._fix_in_plan("async_none", self._transform_async_sabedoria, plan)
         except Exception as e:
             logger.error(f"❌ Erro ao corrigir async: {e}")
             return False
@@ -216,7 +293,10 @@ class NEXOErrorRepair:
     # ========== ORCHESTRATION ==========
 
     def apply_all_fixes(self) -> Dict:
-        """Aplica todos os fixes detectados."""
+        """
+        Aplica todos os fixes detectados num único PatchPlan do deus.py:
+        uma leitura, todas as transformações em memória, uma escrita verificada.
+        """
         results = {
             "pensar_signature": False,
             "supabase_schema": False,
@@ -225,34 +305,65 @@ class NEXOErrorRepair:
         
         logger.info("\n🔧 Aplicando fixes automáticos...\n")
         
-        for issue in self.issues:
-            issue_type = issue["type"]
-            
-            if issue_type == "pensar_signature":
-                results["pensar_signature"] = self.fix_pensar_signature()
-            
-            elif issue_type == "supabase_schema":
-                results["supabase_schema"] = self.fix_supabase_schema()
-            
-            elif issue_type == "async_none":
-                results["async_none"] = self.fix_async_none_error()
+        tipos = {issue["type"] for issue in self.issues}
+        self.last_plan = plan = PatchPlan(self.deus_file) if self.deus_file.exists() else None
+        
+        if "pensar_signature" in tipos:
+            results["pensar_signature"] = self.fix_pensar_signature(plan) if plan else False
+        
+        if "async_none" in tipos:
+            results["async_none"] = self.fix_async_none_error(plan) if plan else False
+        
+        if plan is not None and not plan.commit():
+            # Transação: nada foi gravado, nenhum fix de código vale
+            for nome in ("pensar_signature", "async_none"):
+                if nome in tipos:
+                    results[nome] = False
+        
+        if "supabase_schema" in tipos:
+            results["supabase_schema"] = self.fix_supabase_schema()
         
         return results
 
+    def _tests_command(self) -> Tuple[Optional[List[str]], Optional["TestImpactMap"], Optional[List[str]]]:
+        """Comando pytest só com os testes afetados pelo último plano (mesmo mapa do apply_preview)."""
+        cmd = [sys.executable, "-m", "pytest", "test_smoke.py", "-v"]
+        if TestImpactMap is None:
+            return cmd, None, None
+        impacto = TestImpactMap(self.workspace / ".sandbox" / "test_impact_preview.json")
+        selecao, motivo = impacto.plan({self.deus_file.name: self.last_plan.changed_functions()})
+        logger.info(f"🎯 Testes dos fixes: {'suite completa (' + motivo + ')' if selecao is None else f'{len(selecao)} afetados'}")
+        return [sys.executable] + pytest_command(selecao or [], rootdir=self.workspace, cov_source=".")[1:], impacto, selecao
+
     def validate_fixes(self) -> bool:
-        """Valida que os fixes foram aplicados corretamente."""
+        """Valida os fixes rodando só os testes que tocam as funções alteradas."""
         logger.info("\n✓ Executando validação de fixes...")
         
+        if self.last_plan is None or not self.last_plan.changed:
+            logger.info("ℹ️ Nenhum arquivo alterado, nada a validar")
+            return True
+        if not self.last_plan.committed:
+            # Plano rejeitado no commit: o deus.py no disco não tem os fixes
+            logger.warning(f"⚠️ Fixes não gravados ({self.last_plan.error}): validação falha")
+            return False
+        
         try:
-            # Roda testes
+            cmd, impacto, selecao = self._tests_command()
+            
             result = subprocess.run(
-                ["python", "-m", "pytest", "test_smoke.py", "-v"],
+                cmd,
                 cwd=self.workspace,
                 capture_output=True,
                 text=True,
-                timeout=30
+                timeout=120
             )
             
+            if impacto is not None and result.returncode in (0, 1):
+                try:
+                    impacto.refresh(self.workspace, full=selecao is None)
+                except Exception as e:
+                    logger.warning(f"⚠️ Mapa de impacto não atualizado: {e}")
+            
             if result.returncode == 0:
                 logger.info("✅ Validação passou!")
                 return True
@@ -0,0 +1,484 @@
+"""
+NEXO Habilidades — registro de skills invocáveis com timeout e métricas.
+
+Cada habilidade é um nome ligado ao seu ``executar(...)`` e à assinatura dele.
+Habilidades bloqueantes (requests, subprocess, SDKs) rodam num pool de threads
+limitado; cada chamada tem timeout próprio e alimenta um histograma de latência
+por habilidade.
+
+Habilidades registradas a partir de um arquivo são carregadas só na primeira
+invocação: a assinatura para o prompt vem do AST, sem importar o módulo.
+
+Chamadas com ``origem="llm"`` (ordens, contexto da web, roteador) só alcançam
+as habilidades de uma lista explícita (NEXO_SKILLS_LLM, vazia por padrão);
+o resto continua atrás da revisão administrativa. A rota rápida (sem LLM)
+só alcança, dentre essas, as marcadas como somente leitura.
+
+Uso:
+    from nexo_habilidades import SkillRegistry
+    registro = SkillRegistry(max_workers=4)
+    registro.registrar_arquivo("busca_web", Path("busca_web.py"))
+    registro.invocar("busca_web", "clima hoje", timeout=10)
+    await registro.invocar_varios([{"habilidade": "busca_web", "args": {"query": "dólar"}}])
+"""
+
+import ast
+import asyncio
+import importlib.util
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Limites superiores (ms) dos buckets do histograma de latência
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+@dataclass
+class Habilidade:
+    """Uma skill registrada: callable (ou caminho para carregá-la) e assinatura."""
+
+    nome: str
+    funcao: Optional[Callable] = None
+    assinatura: str = "(...)"
+    caminho: Optional[Path] = None
+    doc: str = ""
+    obrigatorios: Optional[int] = None  # parâmetros sem default
+    somente_leitura: bool = False  # sem efeitos colaterais: elegível à rota rápida
+    # Serializa só o carregamento desta habilidade (não o registro inteiro)
+    trava: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+
+@dataclass
+class HistogramaLatencia:
+    """Histograma de latência com buckets fixos (estilo Prometheus, não cumulativo)."""
+
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+    chamadas: int = 0
+    erros: int = 0
+    timeouts: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def registrar(self, duracao_ms: float, status: str):
+        self.chamadas += 1
+        self.total_ms += duracao_ms
+        self.max_ms = max(self.max_ms, duracao_ms)
+        if status == "erro":
+            self.erros += 1
+        elif status == "timeout":
+            self.timeouts += 1
+        for i, limite in enumerate(BUCKETS_MS):
+            if duracao_ms <= limite:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Estimativa do percentil pelo limite superior do bucket."""
+        if not self.chamadas:
+            return None
+        alvo = p * self.chamadas
+        acumulado = 0
+        for i, qtd in enumerate(self.buckets):
+            acumulado += qtd
+            if acumulado >= alvo:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def resumo(self) -> Dict:
+        return {
+            "chamadas": self.chamadas,
+            "erros": self.erros,
+            "timeouts": self.timeouts,
+            "media_ms": round(self.total_ms / self.chamadas, 2)
+            if self.chamadas
+            else None,
+            "p50_ms": self.percentil(0.5),
+            "p95_ms": self.percentil(0.95),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": {
+                **{f"<={b}ms": qtd for b, qtd in zip(BUCKETS_MS, self.buckets)},
+                f">{BUCKETS_MS[-1]}ms": self.buckets[-1],
+            },
+        }
+
+
+def _assinatura_por_ast(
+    caminho: Path, funcao: str = "executar"
+) -> Tuple[Optional[str], Optional[int]]:
+    """Lê assinatura e nº de parâmetros obrigatórios de ``funcao`` sem importar o módulo."""
+    try:
+        arvore = ast.parse(caminho.read_text(encoding="utf-8"))
+    except (OSError, SyntaxError, ValueError):
+        return None, None
+    for node in arvore.body:
+        if (
+            isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and node.name == funcao
+        ):
+            posicionais = node.args.posonlyargs + node.args.args
+            return f"({ast.unparse(node.args)})", len(posicionais) - len(
+                node.args.defaults
+            )
+    return None, None
+
+
+def _obrigatorios(funcao: Callable) -> Optional[int]:
+    try:
+        parametros = inspect.signature(funcao).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    return sum(
+        1
+        for p in parametros
+        if p.default is inspect.Parameter.empty
+        and p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)
+    )
+
+
+def _importar_arquivo(nome: str, caminho: Path):
+    spec = importlib.util.spec_from_file_location(nome, caminho)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class SkillRegistry:
+    """Mapa nome -> executar, com invocação em pool limitado, timeout e histogramas."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout_padrao: Optional[float] = None,
+        permitidas_llm: Optional[List[str]] = None,
+        carregador: Optional[Callable[[str, Path], Any]] = None,
+    ):
+        """
+        Args:
+            max_workers: tamanho do pool de threads (padrão: NEXO_SKILLS_WORKERS ou 4)
+            timeout_padrao: timeout por chamada em segundos (padrão: NEXO_SKILLS_TIMEOUT ou 20)
+            permitidas_llm: únicas habilidades que o LLM pode acionar sozinho
+                (padrão: NEXO_SKILLS_LLM, separado por vírgulas; vazio = nenhuma)
+            carregador: função (nome, caminho) -> módulo usada no carregamento preguiçoso
+        """
+        self.max_workers = max_workers or int(os.getenv("NEXO_SKILLS_WORKERS", "4"))
+        self.timeout_padrao = timeout_padrao or float(
+            os.getenv("NEXO_SKILLS_TIMEOUT", "20")
+        )
+        if permitidas_llm is None:
+            permitidas_llm = os.getenv("NEXO_SKILLS_LLM", "").split(",")
+        self.permitidas_llm = {p.strip() for p in permitidas_llm if p.strip()}
+        self.carregador = carregador or _importar_arquivo
+        self._habilidades: Dict[str, Habilidade] = {}
+        self._histogramas: Dict[str, HistogramaLatencia] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ========== REGISTRO ==========
+
+    def registrar(
+        self,
+        nome: str,
+        funcao: Callable,
+        doc: Optional[str] = None,
+        somente_leitura: bool = False,
+    ) -> Habilidade:
+        """Registra um callable já carregado."""
+        try:
+            assinatura = str(inspect.signature(funcao))
+        except (TypeError, ValueError):
+            assinatura = "(...)"
+        habilidade = Habilidade(
+            nome=nome,
+            funcao=funcao,
+            assinatura=assinatura,
+            obrigatorios=_obrigatorios(funcao),
+            doc=(doc if doc is not None else inspect.getdoc(funcao) or "")
+            .strip()
+            .split("\n")[0],
+            somente_leitura=somente_leitura,
+        )
+        with self._lock:
+            self._habilidades[nome] = habilidade
+        return habilidade
+
+    def registrar_modulo(self, nome: str, module) -> Optional[Habilidade]:
+        """Registra o ``executar`` de um módulo; módulos sem ele ficam listados, mas não invocáveis."""
+        funcao = getattr(module, "executar", None)
+        if callable(funcao):
+            return self.registrar(nome, funcao)
+        with self._lock:
+            self._habilidades.setdefault(
+                nome, Habilidade(nome=nome, assinatura="", doc="(sem executar)")
+            )
+        return None
+
+    def registrar_arquivo(
+        self, nome: str, caminho: Path, somente_leitura: bool = False
+    ) -> Habilidade:
+        """Registro preguiçoso: o módulo só é importado na primeira invocação."""
+        caminho = Path(caminho)
+        assinatura, obrigatorios = _assinatura_por_ast(caminho)
+        habilidade = Habilidade(
+            nome=nome,
+            caminho=caminho,
+            assinatura=assinatura or "(...)",
+            obrigatorios=obrigatorios,
+            somente_leitura=somente_leitura,
+        )
+        with self._lock:
+            atual = self._habilidades.get(nome)
+            if atual is None or atual.funcao is None:
+                self._habilidades[nome] = habilidade
+        return self._habilidades[nome]
+
+    def _resolver(self, nome: str) -> Callable:
+        habilidade = self._habilidades.get(nome)
+        if habilidade is None:
+            raise KeyError(f"Habilidade desconhecida: {nome}")
+        if habilidade.funcao is None:
+            if habilidade.caminho is None:
+                raise KeyError(f"Habilidade '{nome}' não possui executar()")
+            # Importar pode ser lento: não segura o lock do registro enquanto isso
+            with habilidade.trava:
+                if habilidade.funcao is None:
+                    module = self.carregador(nome, habilidade.caminho)
+                    funcao = getattr(module, "executar", None)
+                    if not callable(funcao):
+                        raise KeyError(f"Habilidade '{nome}' não possui executar()")
+                    habilidade.funcao = funcao
+                    habilidade.assinatura = str(inspect.signature(funcao))
+                    habilidade.obrigatorios = _obrigatorios(funcao)
+                    habilidade.doc = (
+                        (inspect.getdoc(funcao) or "").strip().split("\n")[0]
+                    )
+        return habilidade.funcao
+
+    # ========== CONSULTAS ==========
+
+    def __contains__(self, nome: str) -> bool:
+        return nome in self._habilidades
+
+    def __len__(self) -> int:
+        return len(self._habilidades)
+
+    def nomes(self) -> List[str]:
+        return list(self._habilidades)
+
+    def descrever(self, para_llm: bool = False) -> Dict[str, str]:
+        """Catálogo nome -> "executar(args) — doc" para compor prompts."""
+        catalogo = {}
+        for nome, h in self._habilidades.items():
+            if para_llm and nome not in self.permitidas_llm:
+                continue
+            catalogo[nome] = f"executar{h.assinatura}" + (
+                f" — {h.doc}" if h.doc else ""
+            )
+        return catalogo
+
+    def roteaveis(self) -> List[str]:
+        """
+        Alvos da rota rápida: permitidas ao LLM, somente leitura e que aceitam
+        uma ordem em texto livre (um só parâmetro obrigatório).
+        """
+        return [
+            nome
+            for nome, h in self._habilidades.items()
+            if nome in self.permitidas_llm and h.somente_leitura and h.obrigatorios == 1
+        ]
+
+    def metricas(self) -> Dict[str, Dict]:
+        return {nome: hist.resumo() for nome, hist in self._histogramas.items()}
+
+    # ========== INVOCAÇÃO ==========
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="nexo-skill"
+                    )
+        return self._executor
+
+    def _executar_medido(self, nome: str, args: tuple, kwargs: dict):
+        funcao = self._resolver(nome)
+        inspect.signature(funcao).bind(*args, **kwargs)
+        return funcao(*args, **kwargs)
+
+    def _registrar(
+        self,
+        nome: str,
+        inicio: float,
+        status: str,
+        resultado: Any = None,
+        erro: str = None,
+    ) -> Dict:
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        with self._lock:
+            hist = self._histogramas.setdefault(nome, HistogramaLatencia())
+            hist.registrar(duracao_ms, status)
+        saida = {
+            "habilidade": nome,
+            "status": status,
+            "duracao_ms": round(duracao_ms, 2),
+        }
+        if status == "ok":
+            saida["resultado"] = resultado
+        else:
+            saida["erro"] = erro
+        return saida
+
+    def _validar_origem(self, nome: str, origem: str):
+        if nome not in self._habilidades:
+            raise KeyError(f"Habilidade desconhecida: {nome}")
+        if origem == "llm" and nome not in self.permitidas_llm:
+            raise PermissionError(f"Habilidade '{nome}' exige aprovação administrativa")
+
+    def invocar(
+        self,
+        nome: str,
+        *args,
+        timeout: Optional[float] = None,
+        origem: str = "admin",
+        **kwargs,
+    ) -> Dict:
+        """
+        Invoca a habilidade no pool e espera até ``timeout`` segundos.
+
+        Retorna {"habilidade", "status": ok|erro|timeout|negado, "duracao_ms", "resultado"|"erro"}.
+        Uma chamada que estoura o timeout continua ocupando sua thread até
+        terminar (threads não são interrompíveis); o pool limitado contém o estrago.
+        """
+        inicio = time.perf_counter()
+        try:
+            self._validar_origem(nome, origem)
+        except (KeyError, PermissionError) as e:
+            return {
+                "habilidade": nome,
+                "status": "negado",
+                "duracao_ms": 0.0,
+                "erro": str(e),
+            }
+        futuro = self._pool().submit(self._executar_medido, nome, args, kwargs)
+        try:
+            return self._registrar(
+                nome,
+                inicio,
+                "ok",
+                resultado=futuro.result(timeout or self.timeout_padrao),
+            )
+        except FuturesTimeout:
+            return self._registrar(
+                nome,
+                inicio,
+                "timeout",
+                erro=f"timeout após {timeout or self.timeout_padrao}s",
+            )
+        except Exception as e:
+            return self._registrar(
+                nome, inicio, "erro", erro=f"{type(e).__name__}: {e}"
+            )
+
+    async def invocar_async(
+        self,
+        nome: str,
+        *args,
+        timeout: Optional[float] = None,
+        origem: str = "admin",
+        **kwargs,
+    ) -> Dict:
+        """Versão assíncrona de ``invocar``: não bloqueia o event loop."""
+        return await self._invocar_async(nome, args, kwargs, timeout, origem)
+
+    async def _invocar_async(
+        self,
+        nome: str,
+        args: tuple,
+        kwargs: dict,
+        timeout: Optional[float],
+        origem: str,
+    ) -> Dict:
+        # kwargs da habilidade num dict à parte: "timeout"/"origem" em args não colidem com os nossos
+        inicio = time.perf_counter()
+        try:
+            self._validar_origem(nome, origem)
+        except (KeyError, PermissionError) as e:
+            return {
+                "habilidade": nome,
+                "status": "negado",
+                "duracao_ms": 0.0,
+                "erro": str(e),
+            }
+        futuro = asyncio.wrap_future(
+            self._pool().submit(self._executar_medido, nome, args, kwargs)
+        )
+        try:
+            resultado = await asyncio.wait_for(futuro, timeout or self.timeout_padrao)
+            return self._registrar(nome, inicio, "ok", resultado=resultado)
+        except asyncio.TimeoutError:
+            return self._registrar(
+                nome,
+                inicio,
+                "timeout",
+                erro=f"timeout após {timeout or self.timeout_padrao}s",
+            )
+        except Exception as e:
+            return self._registrar(
+                nome, inicio, "erro", erro=f"{type(e).__name__}: {e}"
+            )
+
+    async def _invocar_chamada(self, chamada: Dict, origem: str) -> Dict:
+        """Uma chamada do lote; chamada malformada vira resultado de erro, não exceção no gather."""
+        nome = str(chamada.get("habilidade") or chamada.get("nome"))
+        args = chamada.get("args") or {}
+        if not isinstance(args, (list, dict)):
+            return {
+                "habilidade": nome,
+                "status": "erro",
+                "duracao_ms": 0.0,
+                "erro": "args deve ser lista ou objeto",
+            }
+        posicionais = tuple(args) if isinstance(args, list) else ()
+        nomeados = args if isinstance(args, dict) else {}
+        try:
+            return await self._invocar_async(
+                nome, posicionais, nomeados, chamada.get("timeout"), origem
+            )
+        except Exception as e:
+            return {
+                "habilidade": nome,
+                "status": "erro",
+                "duracao_ms": 0.0,
+                "erro": f"{type(e).__name__}: {e}",
+            }
+
+    async def invocar_varios(
+        self, chamadas: List[Dict], origem: str = "llm"
+    ) -> List[Dict]:
+        """
+        Executa várias chamadas em paralelo.
+
+        Cada chamada: {"habilidade": nome, "args": {...} | [...], "timeout": s (opcional)}.
+        Uma chamada inválida só afeta o próprio item ({"status": "erro"}).
+        """
+        tarefas = [
+            self._invocar_chamada(chamada, origem)
+            for chamada in chamadas or []
+            if isinstance(chamada, dict)
+        ]
+        return list(await asyncio.gather(*tarefas))
+
+    def encerrar(self):
+        """Encerra o pool sem esperar chamadas penduradas."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
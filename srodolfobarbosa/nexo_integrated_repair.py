@@ -21,8 +21,9 @@ import sys
 import os
 import json
 import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Optional
 import logging
 from datetime import datetime
 
@@ -32,6 +33,63 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Detector/fixers e sandbox rodam no mesmo processo (sem reler o log nem subir interpretadores)
+try:
+    from .nexo_error_repair import NEXOErrorRepair
+    from .sandbox.history import HistoryStore
+    from .sandbox.runner import SandboxResult, SandboxRunner
+except ImportError:
+    from nexo_error_repair import NEXOErrorRepair
+    try:
+        from sandbox.history import HistoryStore
+        from sandbox.runner import SandboxResult, SandboxRunner
+    except ImportError:
+        HistoryStore = SandboxRunner = SandboxResult = None
+
+
+@dataclass
+class DetectionResult:
+    """Saída da detecção: issues estruturados do NEXOErrorRepair."""
+
+    log_file: str
+    issues: List[Dict] = field(default_factory=list)
+    bytes_read: int = 0
+
+    @property
+    def errors_found(self) -> bool:
+        return bool(self.issues)
+
+
+@dataclass
+class FixResult:
+    """Saída dos fixers: tipo de issue -> fix aplicado?"""
+
+    results: Dict[str, bool] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return all(self.results.values())
+
+
+@dataclass
+class ValidationResult:
+    """Saída do sandbox: decisão e confiança reais do SandboxRunner."""
+
+    success: bool
+    decision: str
+    confidence: float
+    sandbox: Optional["SandboxResult"] = None
+
+
+@dataclass
+class RepairCycle:
+    """Um ciclo completo detecção → fixes → sandbox."""
+
+    timestamp: str
+    detection: DetectionResult
+    fixes: Optional[FixResult] = None
+    validation: Optional[ValidationResult] = None
+
 
 class NEXOSandboxIntegration:
     """Integra NEXO error repair com sandbox validation."""
@@ -40,60 +98,93 @@ class NEXOSandboxIntegration:
         self.repo_root = Path(repo_root)
         self.workspace = self.repo_root / "srodolfobarbosa"
         self.history_file = self.workspace / ".nexo_repair_history.jsonl"
+        self.repair = NEXOErrorRepair(self.workspace)
+        self.history = None
+        if HistoryStore is not None:
+            try:
+                self.history = HistoryStore(self.workspace / ".sandbox" / "history.db")
+                self.history.migrate_jsonl(self.history_file, "repair")
+            except Exception as e:
+                logger.warning(f"⚠️  Histórico SQLite indisponível, usando JSONL: {e}")
 
-    def run_nexo_detection(self, log_file: str) -> Tuple[bool, List[Dict]]:
-        """Executa detecção NEXO."""
+    # ========== PIPELINE IN-PROCESS ==========
+
+    def _log_path(self, log_file: str) -> Path:
+        # Caminhos relativos são do workspace (era o cwd do subprocess antigo)
+        path = Path(log_file)
+        return path if path.is_absolute() else self.workspace / path
+
+    def detect(self, log_file: str) -> DetectionResult:
+        """Lê o log uma vez e devolve os issues estruturados."""
         logger.info(f"🔍 Escaneando erros NEXO de: {log_file}")
-        
         try:
-            result = subprocess.run(
-                ["python", "nexo_error_repair.py", "--log-file", log_file],
-                cwd=self.workspace,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            # Parse output para detectar quantos erros
-            errors_found = "Detectados 3 erros" in result.stderr or "Detectados" in result.stderr
-            
-            if errors_found:
-                logger.warning(f"⚠️  Erros detectados")
-                return True, []
-            
-            logger.info("✅ Nenhum erro detectado")
-            return False, []
-            
-        except subprocess.TimeoutExpired:
-            logger.error("❌ Timeout na detecção")
-            return False, []
-        except Exception as e:
+            log_text = self._log_path(log_file).read_text(errors="replace")
+        except OSError as e:
             logger.error(f"❌ Erro na detecção: {e}")
-            return False, []
+            return DetectionResult(log_file)
 
-    def run_nexo_auto_fix(self, log_file: str) -> bool:
-        """Executa auto-fix NEXO."""
+        issues = self.repair.scan_logs(log_text)
+        if issues:
+            logger.warning(f"⚠️  {len(issues)} erro(s) detectado(s): {', '.join(i['type'] for i in issues)}")
+        else:
+            logger.info("✅ Nenhum erro detectado")
+        return DetectionResult(log_file, list(issues), len(log_text))
+
+    def fix(self, detection: DetectionResult) -> FixResult:
+        """Aplica os fixers só aos issues detectados (sem re-scan)."""
         logger.info("🔧 Aplicando fixes automáticos...")
-        
+        self.repair.issues = list(detection.issues)
         try:
-            result = subprocess.run(
-                ["python", "nexo_error_repair.py", "--log-file", log_file, "--auto-fix"],
-                cwd=self.workspace,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                logger.info("✅ Fixes aplicados")
-                return True
-            else:
-                logger.warning(f"⚠️  Alguns fixes precisam revisão manual")
-                return False
-                
+            applied = self.repair.apply_all_fixes()
         except Exception as e:
             logger.error(f"❌ Erro ao aplicar fixes: {e}")
-            return False
+            return FixResult({i["type"]: False for i in detection.issues})
+
+        result = FixResult({i["type"]: applied.get(i["type"], False) for i in detection.issues})
+        if result.ok:
+            logger.info("✅ Fixes aplicados")
+        else:
+            logger.warning("⚠️  Alguns fixes precisam revisão manual")
+        return result
+
+    def validate(self) -> ValidationResult:
+        """Roda o SandboxRunner no mesmo processo e usa o resultado tipado."""
+        logger.info("🧪 Iniciando validação em sandbox...")
+        if SandboxRunner is None:
+            logger.error("❌ Sandbox runner indisponível")
+            return ValidationResult(False, "error", 0.0)
+        try:
+            result = SandboxRunner(repo_path=str(self.repo_root)).run()
+        except Exception as e:
+            logger.error(f"❌ Erro no sandbox: {e}")
+            return ValidationResult(False, "error", 0.0)
+
+        if result.decision == "merge":
+            logger.info("✅ Sandbox permitiu merge")
+        elif result.decision == "review":
+            logger.warning("👀 Sandbox requer review")
+        else:
+            logger.error("❌ Sandbox reverteu mudanças")
+        return ValidationResult(result.decision == "merge", result.decision, result.confidence, result)
+
+    def run_cycle(self, log_file: str) -> RepairCycle:
+        """Detecção → fixes → sandbox, passando resultados tipados entre as etapas."""
+        cycle = RepairCycle(datetime.utcnow().isoformat(), self.detect(log_file))
+        if cycle.detection.errors_found:
+            cycle.fixes = self.fix(cycle.detection)
+            cycle.validation = self.validate()
+        return cycle
+
+    # Compat: interface antiga em tuplas/bools
+
+    def run_nexo_detection(self, log_file: str) -> Tuple[bool, List[Dict]]:
+        """Executa detecção NEXO."""
+        detection = self.detect(log_file)
+        return detection.errors_found, detection.issues
+
+    def run_nexo_auto_fix(self, log_file: str) -> bool:
+        """Executa auto-fix NEXO."""
+        return self.fix(self.detect(log_file)).ok
 
     def run_sandbox_validation(self) -> Tuple[bool, str, float]:
         """
@@ -102,34 +193,8 @@ class NEXOSandboxIntegration:
         Returns:
             (success, decision, confidence)
         """
-        logger.info("🧪 Iniciando validação em sandbox...")
-        
-        try:
-            result = subprocess.run(
-                ["python", "-m", "srodolfobarbosa.sandbox.runner"],
-                cwd=self.repo_root,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            
-            # Parse saída do sandbox
-            if "DECISIÓN: MERGE" in result.stderr:
-                logger.info("✅ Sandbox permitiu merge")
-                return True, "merge", 0.90
-            elif "DECISIÓN: REVIEW" in result.stderr:
-                logger.warning("👀 Sandbox requer review")
-                return False, "review", 0.70
-            else:
-                logger.error("❌ Sandbox reverteu mudanças")
-                return False, "revert", 0.15
-                
-        except subprocess.TimeoutExpired:
-            logger.error("❌ Sandbox timeout")
-            return False, "timeout", 0.0
-        except Exception as e:
-            logger.error(f"❌ Erro no sandbox: {e}")
-            return False, "error", 0.0
+        validation = self.validate()
+        return validation.success, validation.decision, validation.confidence
 
     def commit_and_push(self, branch_name: str = "nexo-auto-repair") -> bool:
         """Comita e faz push das mudanças."""
@@ -241,8 +306,11 @@ class NEXOSandboxIntegration:
             return False
 
     def save_history(self, log_entry: Dict):
-        """Salva histórico de reparo."""
+        """Salva histórico de reparo (SQLite; JSONL se o store não estiver disponível)."""
         try:
+            if self.history is not None:
+                self.history.record("repair", log_entry)
+                return
             with open(self.history_file, "a") as f:
                 f.write(json.dumps(log_entry) + "\n")
         except Exception as e:
@@ -254,19 +322,16 @@ class NEXOSandboxIntegration:
         logger.info("🤖 NEXO + SANDBOX INTEGRATED REPAIR")
         logger.info("="*70 + "\n")
         
-        timestamp = datetime.utcnow().isoformat()
-        
-        # Step 1: Detecta
-        errors_found, _ = self.run_nexo_detection(log_file)
-        if not errors_found:
+        # Uma leitura do log; issues, fixes e decisão seguem tipados entre as etapas
+        cycle = self.run_cycle(log_file)
+        if not cycle.detection.errors_found:
             logger.info("✅ Nenhum erro encontrado")
             return True
-        
-        # Step 2: Applica fixes
-        fixes_ok = self.run_nexo_auto_fix(log_file)
-        
-        # Step 3: Valida em sandbox
-        sandbox_ok, decision, confidence = self.run_sandbox_validation()
+
+        fixes_ok = cycle.fixes.ok
+        sandbox_ok = cycle.validation.success
+        decision = cycle.validation.decision
+        confidence = cycle.validation.confidence
         
         logger.info(f"\n📊 Resultado Final:")
         logger.info(f"   Fixes: {'✅' if fixes_ok else '❌'}")
@@ -311,10 +376,14 @@ class NEXOSandboxIntegration:
             self.create_pr()
         
         # Salva histórico
+        sandbox = cycle.validation.sandbox
         self.save_history({
-            "timestamp": timestamp,
-            "errors_found": errors_found,
+            "timestamp": cycle.timestamp,
+            "errors_found": True,
+            "issues": [i["type"] for i in cycle.detection.issues],
+            "fixes": cycle.fixes.results,
             "fixes_ok": fixes_ok,
+            "sandbox_id": sandbox.sandbox_id if sandbox else None,
             "sandbox_ok": sandbox_ok,
             "decision": decision,
             "confidence": confidence
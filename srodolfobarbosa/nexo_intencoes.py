@@ -0,0 +1,262 @@
+"""
+NEXO Intenções — roteador local de ordens simples direto para uma habilidade.
+
+Duas camadas, ambas sem rede e sem LLM:
+  1. palavras-gatilho por intenção ("pesquise", "busque" -> busca_web)
+  2. classificador por centróides sobre embeddings de feature hashing
+     (palavras, bigramas e trigramas de caracteres), treinado com as ordens
+     passadas da memória de sabedoria que terminaram numa habilidade
+
+Só rotas escolhidas pelo LLM ensinam o roteador: as decisões da própria rota
+rápida ficam registradas, mas não se retroalimentam.
+
+Só ordens com confiança acima do limiar são roteadas; o resto segue para o LLM.
+
+Uso:
+    from nexo_intencoes import IntentRouter
+    router = IntentRouter()
+    router.treinar(nexo.memoria_sabedoria)
+    rota = router.rotear("pesquise o preço do bitcoin")
+    if rota:
+        nexo.habilidades.invocar(rota.habilidade, *rota.args)
+"""
+
+import math
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DIMENSOES = 1024
+
+# Origens (campo "via" da memória) cujas rotas viram exemplos de treino
+VIAS_APRENDIZADO = ("llm",)
+
+# Intenções padrão: habilidade -> palavras-gatilho (no início da ordem, sem acento)
+GATILHOS_PADRAO = {
+    "busca_web": (
+        "pesquise",
+        "pesquisar",
+        "pesquisa",
+        "busque",
+        "buscar",
+        "procure",
+        "procurar",
+        "google",
+    ),
+}
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sem acentos e sem pontuação."""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"[^\w\s]", " ", texto)
+
+
+def _hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def embedding(texto: str, dimensoes: int = DIMENSOES) -> Dict[int, float]:
+    """Embedding esparso por feature hashing (sinal pelo bit alto), normalizado L2."""
+    palavras = normalizar(texto).split()
+    features = list(palavras)
+    features += [f"{a}_{b}" for a, b in zip(palavras, palavras[1:])]
+    for p in palavras:
+        p = f"#{p}#"
+        features += [f"3:{p[i:i + 3]}" for i in range(len(p) - 2)]
+    vetor: Dict[int, float] = {}
+    for f in features:
+        h = _hash(f)
+        idx = h % dimensoes
+        vetor[idx] = vetor.get(idx, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+    norma = math.sqrt(sum(v * v for v in vetor.values())) or 1.0
+    return {i: v / norma for i, v in vetor.items() if v}
+
+
+def cosseno(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(i, 0.0) for i, v in a.items())
+
+
+@dataclass
+class Rota:
+    """Decisão do roteador para uma ordem."""
+
+    habilidade: str
+    confianca: float
+    via: str  # "gatilho" ou "embedding"
+    args: Tuple = ()
+
+
+@dataclass
+class _Centroide:
+    soma: Dict[int, float] = field(default_factory=dict)
+    exemplos: int = 0
+
+    def adicionar(self, vetor: Dict[int, float]):
+        for i, v in vetor.items():
+            self.soma[i] = self.soma.get(i, 0.0) + v
+        self.exemplos += 1
+
+    def vetor(self) -> Dict[int, float]:
+        norma = math.sqrt(sum(v * v for v in self.soma.values())) or 1.0
+        return {i: v / norma for i, v in self.soma.items()}
+
+
+class IntentRouter:
+    """Roteador gatilho + centróides; thread-safe para treino incremental."""
+
+    def __init__(
+        self,
+        gatilhos: Optional[Dict[str, Iterable[str]]] = None,
+        limiar: Optional[float] = None,
+        margem: float = 0.1,
+        min_exemplos: int = 3,
+    ):
+        """
+        Args:
+            gatilhos: habilidade -> palavras-gatilho (padrão: GATILHOS_PADRAO)
+            limiar: similaridade mínima para rotear por embedding (padrão: NEXO_INTENT_LIMIAR ou 0.6)
+            margem: diferença mínima entre a melhor e a segunda intenção
+            min_exemplos: exemplos mínimos para uma intenção aprendida concorrer
+        """
+        gatilhos = GATILHOS_PADRAO if gatilhos is None else gatilhos
+        self.gatilhos = {
+            h: tuple(normalizar(g).strip() for g in gs) for h, gs in gatilhos.items()
+        }
+        self.limiar = (
+            limiar
+            if limiar is not None
+            else float(os.getenv("NEXO_INTENT_LIMIAR", "0.6"))
+        )
+        self.margem = margem
+        self.min_exemplos = min_exemplos
+        self._centroides: Dict[str, _Centroide] = {}
+        self._cache_vetores: Dict[str, Dict[int, float]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"roteadas_gatilho": 0, "roteadas_embedding": 0, "para_llm": 0}
+        for habilidade, gs in self.gatilhos.items():
+            for g in gs:
+                self.aprender(g, habilidade)
+
+    # ========== TREINO ==========
+
+    def aprender(self, ordem: str, habilidade: str):
+        """Adiciona um exemplo (ordem -> habilidade) ao centróide da intenção."""
+        if not ordem or not habilidade:
+            return
+        vetor = embedding(ordem)
+        with self._lock:
+            self._centroides.setdefault(habilidade, _Centroide()).adicionar(vetor)
+            self._cache_vetores.pop(habilidade, None)
+
+    def treinar(self, memoria: Iterable[Dict]) -> int:
+        """
+        Treina a partir da memória de sabedoria: entradas com 'ordem' e
+        'habilidade', sem falha e vindas do LLM (sem 'via' = legado do LLM).
+        """
+        n = 0
+        for licao in memoria or []:
+            if not isinstance(licao, dict) or licao.get("sucesso") is False:
+                continue
+            if licao.get("via", "llm") not in VIAS_APRENDIZADO:
+                continue
+            if licao.get("ordem") and licao.get("habilidade"):
+                self.aprender(licao["ordem"], licao["habilidade"])
+                n += 1
+        return n
+
+    # ========== ROTEAMENTO ==========
+
+    def _remover_gatilho(self, texto: str, habilidade: str) -> str:
+        palavras = texto.split()
+        gatilhos = self.gatilhos.get(habilidade, ())
+        while palavras and normalizar(palavras[0]).strip() in gatilhos:
+            palavras.pop(0)
+        # "pesquise sobre X" -> "X"
+        if palavras and normalizar(palavras[0]).strip() in (
+            "sobre",
+            "por",
+            "o",
+            "a",
+            "os",
+            "as",
+        ):
+            palavras.pop(0)
+        return " ".join(palavras).strip() or texto.strip()
+
+    def _por_gatilho(self, ordem: str) -> Optional[str]:
+        primeira = normalizar(ordem).split()[:1]
+        if not primeira:
+            return None
+        candidatas = [h for h, gs in self.gatilhos.items() if primeira[0] in gs]
+        return candidatas[0] if len(candidatas) == 1 else None
+
+    def classificar(self, ordem: str) -> List[Tuple[str, float]]:
+        """Similaridade da ordem com cada intenção treinada (maior primeiro)."""
+        vetor = embedding(ordem)
+        with self._lock:
+            for h, c in self._centroides.items():
+                if h not in self._cache_vetores:
+                    self._cache_vetores[h] = c.vetor()
+            elegiveis = [
+                (h, self._cache_vetores[h])
+                for h, c in self._centroides.items()
+                if c.exemplos >= self.min_exemplos
+            ]
+        return sorted(
+            ((h, cosseno(vetor, v)) for h, v in elegiveis),
+            key=lambda x: x[1],
+            reverse=True,
+        )
+
+    def rotear(
+        self, ordem: str, disponiveis: Optional[Iterable[str]] = None
+    ) -> Optional[Rota]:
+        """Rota de alta confiança para uma habilidade, ou None para seguir ao LLM."""
+        ordem = (ordem or "").strip()
+        if not ordem:
+            return None
+        disponiveis = set(disponiveis) if disponiveis is not None else None
+
+        habilidade = self._por_gatilho(ordem)
+        if habilidade and (disponiveis is None or habilidade in disponiveis):
+            self.stats["roteadas_gatilho"] += 1
+            return Rota(
+                habilidade, 1.0, "gatilho", (self._remover_gatilho(ordem, habilidade),)
+            )
+
+        ranking = [
+            (h, s)
+            for h, s in self.classificar(ordem)
+            if disponiveis is None or h in disponiveis
+        ]
+        if ranking:
+            melhor, score = ranking[0]
+            segundo = ranking[1][1] if len(ranking) > 1 else 0.0
+            if score >= self.limiar and score - segundo >= self.margem:
+                self.stats["roteadas_embedding"] += 1
+                return Rota(
+                    melhor,
+                    round(score, 3),
+                    "embedding",
+                    (self._remover_gatilho(ordem, melhor),),
+                )
+        self.stats["para_llm"] += 1
+        return None
+
+    def status(self) -> Dict:
+        total = sum(self.stats.values())
+        roteadas = self.stats["roteadas_gatilho"] + self.stats["roteadas_embedding"]
+        return {
+            "intencoes": {h: c.exemplos for h, c in self._centroides.items()},
+            "limiar": self.limiar,
+            "stats": dict(self.stats),
+            "taxa_rota_rapida": round(roteadas / total, 3) if total else None,
+        }
@@ -40,15 +40,27 @@ except ImportError as e:
     logger.error(f"❌ Falha ao carregar nexo_live_fixer: {e}")
     sys.exit(1)
 
+from nexo_deteccao import MotorDeteccao, padroes_de_literais
+
 
 class NEXOLiveLauncher:
     """Launcher com patches de correção automática."""
     
+    # Substring (case-insensitive) -> descrição; a ordem define a prioridade
+    ERROR_PATTERNS = {
+        "413": "Request too large",
+        "'content'": "Missing content attribute",
+        "Falha ao delegar": "Delegation failed",
+        "has no attribute": "Missing method",
+        "timeout": "Request timeout",
+    }
+    
     def __init__(self, log_file: Optional[str] = None):
         self.log_file = Path(log_file) if log_file else None
         self.errors_log = []
         self.fixes_log = []
         self.nexo_instance = None
+        self.motor = MotorDeteccao(padroes_de_literais({p: {"description": d} for p, d in self.ERROR_PATTERNS.items()}))
         
     async def load_nexo(self):
         """Carrega deus.py com patches aplicados."""
@@ -122,29 +134,21 @@ class NEXOLiveLauncher:
         logger.info(f"📋 Monitorando: {log_path}")
         
         last_pos = 0
-        error_patterns = {
-            "413": "Request too large",
-            "'content'": "Missing content attribute",
-            "Falha ao delegar": "Delegation failed",
-            "has no attribute": "Missing method",
-            "timeout": "Request timeout",
-        }
         
         while True:
             try:
                 if log_path.exists():
                     with open(log_path, 'r') as f:
                         f.seek(last_pos)
-                        lines = f.readlines()
+                        chunk = f.read()
                         last_pos = f.tell()
                         
-                        for line in lines:
-                            # Verifica cada padrão de erro
-                            for pattern, description in error_patterns.items():
-                                if pattern.lower() in line.lower():
-                                    logger.error(f"🚨 {description} detectado!")
-                                    await self._handle_error(line, pattern, description)
-                                    break
+                        # Uma varredura do bloco inteiro; só as linhas com erro voltam
+                        for _, line, tipos in self.motor.varrer(chunk):
+                            pattern = tipos[0]
+                            description = self.ERROR_PATTERNS[pattern]
+                            logger.error(f"🚨 {description} detectado!")
+                            await self._handle_error(line, pattern, description)
                 
                 await asyncio.sleep(1)  # Poll a cada segundo
                 
@@ -6,24 +6,41 @@ NEXO Monitor em TEMPO REAL - Sistema de correção automática ao vivo.
   ✓ Monitora logs do NEXO em produção
   ✓ Detecta erros em tempo real (413, content, timeout, etc)
   ✓ Aplica fixes automaticamente
+  ✓ Agrupa erros repetidos por fingerprint (um fix por janela, não por linha)
   ✓ Registra todas as ações para auditoria
   ✓ Envia alertas
 
 🚀 Uso:
     python nexo_realtime_monitor.py --logs-dir /path/to/logs --mode watch
     python nexo_realtime_monitor.py --mode dashboard
+    python nexo_realtime_monitor.py --logs-dir /path/to/logs --mode backfill --workers 8
 """
 
 import asyncio
 import json
 import logging
 import re
+import time
+from collections import deque
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Deque, Dict, List, Optional, Tuple
 import argparse
 import sys
 
+# Tailer por inode (rotação/truncamento, inotify ou polling adaptativo), motor único de padrões
+# e agregação por fingerprint (rate limit de fixes + amostragem em tempestades)
+try:
+    from .nexo_agregacao import AgregadorErros, fingerprint
+    from .nexo_backfill import backfill
+    from .nexo_deteccao import MotorDeteccao, Padrao
+    from .nexo_tail import LogTailer
+except ImportError:
+    from nexo_agregacao import AgregadorErros, fingerprint
+    from nexo_backfill import backfill
+    from nexo_deteccao import MotorDeteccao, Padrao
+    from nexo_tail import LogTailer
+
 
 # Setup logging
 logging.basicConfig(
@@ -78,6 +95,12 @@ class ErrorDetector:
     def __init__(self):
         self.patterns = {}
         self._compile_patterns()
+        self.motor = MotorDeteccao(self.padroes())
+    
+    @classmethod
+    def padroes(cls) -> List[Padrao]:
+        """ERROR_PATTERNS no formato do motor compartilhado."""
+        return [Padrao(tipo, config["regex"], config) for tipo, config in cls.ERROR_PATTERNS.items()]
     
     def _compile_patterns(self):
         """Compila regex patterns."""
@@ -93,20 +116,22 @@ class ErrorDetector:
         
         Retorna: (error_type, error_config) ou None
         """
-        log_lower = log_line.lower()
-        
-        for error_type, (pattern, config) in self.patterns.items():
-            if pattern.search(log_lower):
-                return error_type, config
-        
-        return None
+        error_type = self.motor.primeiro(log_line)
+        if error_type is None:
+            return None
+        return error_type, self.ERROR_PATTERNS[error_type]
+    
+    def detect_all(self, log_line: str) -> List[Tuple[str, Dict]]:
+        """Todos os erros da linha (uma linha pode ser 'content' e 'has no attribute')."""
+        return [(t, self.ERROR_PATTERNS[t]) for t in self.motor.detectar(log_line)]
 
 
 class AutoFixer:
     """Aplica fixes automáticos baseado no tipo de erro."""
     
-    def __init__(self):
-        self.fixes_log: List[Dict] = []
+    def __init__(self, max_log: int = 1000):
+        # Só os últimos `max_log` fixes: memória estável em tempestades
+        self.fixes_log: Deque[Dict] = deque(maxlen=max_log)
     
     async def apply_fix(self, error_type: str, log_line: str, config: Dict) -> Dict:
         """Aplica fix automático para o erro."""
@@ -204,57 +229,71 @@ class NEXORealtimeMonitor:
         self.logs_dir = Path(logs_dir) if logs_dir else Path("/tmp")
         self.detector = ErrorDetector()
         self.fixer = AutoFixer()
+        self.tailer: Optional[LogTailer] = None
+        self.agregador = AgregadorErros()
+        self._ultimo_resumo = time.monotonic()
         self.stats = {
             "total_errors": 0,
             "total_fixes": 0,
+            "suppressed_fixes": 0,
             "errors_by_type": {},
             "start_time": datetime.now().isoformat(),
             "last_error": None
         }
     
     async def watch_logs(self, log_pattern: str = "*.log", poll_interval: int = 1):
-        """Monitora logs em modo watch contínuo."""
+        """
+        Monitora logs em modo watch contínuo.
+
+        Segue os arquivos por inode (sem reler/pular na rotação do loguru) e
+        acorda por inotify; sem inotify, `poll_interval` é o intervalo máximo
+        do polling adaptativo.
+        """
         logger.info(f"👁️ Iniciando monitoramento de logs...")
         logger.info(f"   Diretório: {self.logs_dir}")
         logger.info(f"   Pattern: {log_pattern}")
         
-        watched_files: Dict[str, int] = {}
+        self.tailer = LogTailer(self.logs_dir, log_pattern, intervalo_max=poll_interval)
         
         try:
-            while True:
-                # Lista arquivos
-                log_files = list(self.logs_dir.glob(log_pattern))
-                
-                for log_file in log_files:
-                    if log_file.is_file():
-                        # Inicializar posição
-                        if log_file.name not in watched_files:
-                            watched_files[log_file.name] = 0
-                            logger.info(f"📋 Observando: {log_file.name}")
-                        
-                        # Ler novo conteúdo
-                        try:
-                            with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
-                                f.seek(watched_files[log_file.name])
-                                lines = f.readlines()
-                                watched_files[log_file.name] = f.tell()
-                                
-                                # Processar cada linha
-                                for line in lines:
-                                    await self._process_log_line(line, log_file.name)
-                        
-                        except IOError as e:
-                            logger.warning(f"⚠️ Erro ao ler {log_file.name}: {e}")
-                
-                # Sleep antes de próxima poll
-                await asyncio.sleep(poll_interval)
+            async for filename, lines in self.tailer.lotes():
+                # Varredura do lote inteiro no motor; só linhas com erro seguem
+                for _, line, tipos in self.detector.motor.varrer("\n".join(lines)):
+                    # Fingerprint antes da amostragem: em tempestade só as
+                    # repetições são afinadas, um erro novo nunca se perde
+                    fp = fingerprint(tipos[0], line)
+                    peso = self.agregador.amostrar(fp)
+                    if peso:
+                        await self._process_log_line(line, filename, peso, fp=fp)
+                self._resumir_janela()
         
         except KeyboardInterrupt:
             logger.info("\n⏹️ Monitoramento interrompido pelo usuário")
             await self.print_stats()
     
-    async def _process_log_line(self, line: str, filename: str):
-        """Processa uma linha de log procurando por erros."""
+    def _resumir_janela(self):
+        """A cada janela: loga os fingerprints mais frequentes e esquece os velhos."""
+        agora = time.monotonic()
+        if agora - self._ultimo_resumo < self.agregador.janela:
+            return
+        self._ultimo_resumo = agora
+        self.agregador.expirar(agora)
+        for item in self.agregador.resumo(limite=3, agora=agora):
+            logger.info(
+                f"📦 [{item['tipo']}] {item['na_janela']}x na janela "
+                f"({item['suprimidos']} fixes suprimidos): {item['exemplo'][:80]}"
+            )
+        if self.agregador.stats["descartadas"]:
+            logger.warning(f"🌪️ Amostragem ativa: {self.agregador.stats['descartadas']} linhas não processadas")
+    
+    async def _process_log_line(self, line: str, filename: str, peso: int = 1, fp: Optional[str] = None):
+        """
+        Processa uma linha de log procurando por erros.
+
+        `peso` > 1 quando a linha representa outras descartadas pela amostragem;
+        `fp` é o fingerprint já calculado para ela.
+        O fix só roda se o fingerprint da linha não teve fix recente.
+        """
         line = line.strip()
         
         if not line:
@@ -267,7 +306,7 @@ class NEXORealtimeMonitor:
             error_type, config = result
             
             # Registrar erro
-            self.stats["total_errors"] += 1
+            self.stats["total_errors"] += peso
             self.stats["last_error"] = {
                 "timestamp": datetime.now().isoformat(),
                 "type": error_type,
@@ -278,7 +317,14 @@ class NEXORealtimeMonitor:
             # Contar por tipo
             if error_type not in self.stats["errors_by_type"]:
                 self.stats["errors_by_type"][error_type] = 0
-            self.stats["errors_by_type"][error_type] += 1
+            self.stats["errors_by_type"][error_type] += peso
+            
+            decisao = self.agregador.registrar(error_type, line, peso, fp=fp)
+            self.stats["last_error"]["fingerprint"] = decisao.fingerprint
+            if not decisao.aplicar_fix:
+                # Mesmo fingerprint com fix recente: só conta
+                self.stats["suppressed_fixes"] += peso
+                return
             
             # Log
             severity_emoji = "🔴" if config["severity"] == "critical" else "🟠" if config["severity"] == "high" else "🟡"
@@ -287,10 +333,11 @@ class NEXORealtimeMonitor:
             
             # Aplicar fix
             fix_result = await self.fixer.apply_fix(error_type, line, config)
+            fix_result["fingerprint"] = decisao.fingerprint
             self.stats["total_fixes"] += 1
             
             # Log do fix
-            logger.info(f"✅ Fix aplicado: {fix_result['result']}")
+            logger.info(f"✅ Fix aplicado: {fix_result.get('result', fix_result['status'])}")
     
     async def print_stats(self):
         """Imprime estatísticas."""
@@ -301,6 +348,9 @@ class NEXORealtimeMonitor:
         print(f"Duração: {datetime.now() - datetime.fromisoformat(self.stats['start_time'])}")
         print(f"\n🚨 Erros detectados: {self.stats['total_errors']}")
         print(f"✅ Fixes aplicados: {self.stats['total_fixes']}")
+        print(f"🔇 Fixes suprimidos (mesmo fingerprint): {self.stats['suppressed_fixes']}")
+        if self.agregador.stats["descartadas"]:
+            print(f"🌪️ Linhas descartadas pela amostragem: {self.agregador.stats['descartadas']}")
         
         if self.stats['errors_by_type']:
             print(f"\n📈 Erros por tipo:")
@@ -317,20 +367,54 @@ class NEXORealtimeMonitor:
         
         # Salvar stats em JSON
         stats_file = self.logs_dir / "monitor_stats.json"
-        stats_file.write_text(json.dumps(self.stats, indent=2))
+        snapshot = dict(
+            self.stats,
+            sampling=dict(self.agregador.stats),
+            top_fingerprints=self.agregador.resumo(limite=10),
+        )
+        stats_file.write_text(json.dumps(snapshot, indent=2))
         logger.info(f"📊 Stats salvadas em: {stats_file}")
     
-    async def run(self, mode: str = "watch", log_pattern: str = "nexo*.log"):
+    async def run(self, mode: str = "watch", log_pattern: str = "nexo*.log", workers: Optional[int] = None):
         """Executa monitor em modo especificado."""
         logger.info(f"🚀 NEXO Realtime Monitor iniciando (modo: {mode})...")
         
         if mode == "watch":
             await self.watch_logs(log_pattern=log_pattern)
+        elif mode == "backfill":
+            await self.backfill_mode(log_pattern=log_pattern, workers=workers)
         elif mode == "dashboard":
             await self.dashboard_mode()
         else:
             logger.error(f"Modo desconhecido: {mode}")
     
+    async def backfill_mode(self, log_pattern: str = "nexo*.log", workers: Optional[int] = None) -> Dict:
+        """
+        Analisa logs históricos (inclusive os rotacionados) de uma vez: mmap +
+        blocos por linha + ProcessPool. Salva `backfill_report.json`.
+        """
+        arquivos = sorted(p for p in self.logs_dir.glob(log_pattern) if p.is_file())
+        if not arquivos:
+            logger.warning(f"⚠️ Nenhum arquivo {log_pattern} em {self.logs_dir}")
+            return {}
+        logger.info(f"🗄️ Backfill: {len(arquivos)} arquivo(s) em {self.logs_dir}")
+        
+        relatorio = await asyncio.to_thread(backfill, arquivos, workers)
+        
+        logger.info(
+            f"✅ {relatorio['bytes'] / (1 << 20):.1f} MB, {relatorio['linhas']} linhas em "
+            f"{relatorio['segundos']}s ({relatorio['mb_por_segundo']} MB/s, {relatorio['workers']} workers)"
+        )
+        for error_type, count in relatorio["por_tipo"].items():
+            logger.info(f"   - {error_type}: {count}")
+        for item in relatorio["top_fingerprints"][:5]:
+            logger.info(f"   📦 {item['ocorrencias']}x [{item['tipo']}] {item['exemplo'][:80]}")
+        
+        report_file = self.logs_dir / "backfill_report.json"
+        report_file.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False))
+        logger.info(f"📊 Relatório salvo em: {report_file}")
+        return relatorio
+    
     async def dashboard_mode(self):
         """Modo dashboard (não implementado ainda)."""
         logger.info("📊 Modo dashboard não implementado ainda")
@@ -340,20 +424,22 @@ class NEXORealtimeMonitor:
 async def main():
     parser = argparse.ArgumentParser(description="NEXO Realtime Monitor")
     parser.add_argument('--logs-dir', type=str, default='/tmp', help='Diretório com logs')
-    parser.add_argument('--mode', choices=['watch', 'dashboard'], default='watch', help='Modo de operação')
+    parser.add_argument('--mode', choices=['watch', 'dashboard', 'backfill'], default='watch', help='Modo de operação')
     parser.add_argument('--pattern', type=str, default='nexo*.log', help='Pattern dos arquivos de log')
+    parser.add_argument('--workers', type=int, default=None, help='Processos do backfill (padrão: todos os núcleos)')
     
     args = parser.parse_args()
     
     monitor = NEXORealtimeMonitor(args.logs_dir)
     
     try:
-        await monitor.run(mode=args.mode, log_pattern=args.pattern)
+        await monitor.run(mode=args.mode, log_pattern=args.pattern, workers=args.workers)
     except Exception as e:
         logger.error(f"❌ Erro crítico: {e}")
         raise
     finally:
-        await monitor.print_stats()
+        if args.mode != "backfill":
+            await monitor.print_stats()
 
 
 if __name__ == "__main__":
@@ -34,10 +34,34 @@ import sys
 
 logger = logging.getLogger("NEXOOrganism")
 
+try:
+    from .nexo_deteccao import MotorDeteccao, padroes_de_literais
+except ImportError:
+    from nexo_deteccao import MotorDeteccao, padroes_de_literais
+
 
 class SelfHealingOrganism:
     """O 'coração' do NEXO que o mantém vivo e saudável."""
     
+    # Padrões de erro a detectar (substring, case-insensitive)
+    ERROR_PATTERNS = {
+        "413": {
+            "name": "Payload Too Large",
+            "action": "increase_max_prompt_size"
+        },
+        "'content'": {
+            "name": "Content Attribute Missing",
+            "action": "normalize_content_extraction"
+        },
+        "timeout": {
+            "name": "Request Timeout",
+            "action": "retry_with_backoff"
+        }
+    }
+    
+    # Máximo lido por arquivo por ciclo; o resto fica para os próximos
+    MAX_SCAN_BYTES = 8 * 1024 * 1024
+    
     def __init__(self, nexo_instance=None, logs_dir: str = "/tmp"):
         self.nexo = nexo_instance
         self.logs_dir = Path(logs_dir)
@@ -46,11 +70,47 @@ class SelfHealingOrganism:
         self.birth_time = datetime.now()
         self.heartbeat_count = 0
         self.errors_healed = []
+        self.motor = MotorDeteccao(padroes_de_literais(self.ERROR_PATTERNS))
+        
+        # Checkpoints por arquivo de log: {path: {"dev", "inode", "offset"}}
+        self.state_file = self.logs_dir / "nexo_organism_state.json"
+        self.log_offsets: Dict[str, Dict] = self._load_checkpoints()
         
         # Log de vida
         self.lifecycle_log = self.logs_dir / "nexo_organism_lifecycle.json"
         self._register_birth()
     
+    def _load_checkpoints(self) -> Dict[str, Dict]:
+        """Offsets de leitura salvos no estado do organismo (sobrevivem a restart)."""
+        try:
+            return dict(json.loads(self.state_file.read_text()).get("log_offsets") or {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+    
+    def _read_new_bytes(self, log_file: Path) -> str:
+        """
+        Lê só o que foi escrito desde o último checkpoint, até a última linha
+        completa. Arquivo novo, rotacionado (outro inode) ou truncado recomeça
+        do zero.
+        """
+        st = log_file.stat()
+        chave = str(log_file)
+        ck = self.log_offsets.get(chave)
+        mesmo = ck and ck.get("inode") == st.st_ino and ck.get("dev") == st.st_dev
+        offset = ck["offset"] if mesmo and ck.get("offset", 0) <= st.st_size else 0
+        self.log_offsets[chave] = {"dev": st.st_dev, "inode": st.st_ino, "offset": offset}
+        if offset == st.st_size:
+            return ""
+        with open(log_file, "rb") as f:
+            f.seek(offset)
+            dados = f.read(self.MAX_SCAN_BYTES)
+        fim = dados.rfind(b"\n") + 1  # linha parcial fica para o próximo ciclo
+        if fim == 0 and len(dados) < self.MAX_SCAN_BYTES:
+            return ""
+        fim = fim or len(dados)
+        self.log_offsets[chave]["offset"] = offset + fim
+        return dados[:fim].decode("utf-8", errors="replace")
+    
     def _register_birth(self):
         """Registra nascimento do organismo."""
         birth_data = {
@@ -90,33 +150,33 @@ class SelfHealingOrganism:
             "timestamp": datetime.now().isoformat()
         }
         
-        # Padrões de erro a detectar
-        error_patterns = {
-            "413": {
-                "name": "Payload Too Large",
-                "action": "increase_max_prompt_size"
-            },
-            "'content'": {
-                "name": "Content Attribute Missing",
-                "action": "normalize_content_extraction"
-            },
-            "timeout": {
-                "name": "Request Timeout",
-                "action": "retry_with_backoff"
-            }
-        }
-        
-        # Simula detecção de erros nos logs
+        # Detecção incremental: só os bytes novos desde o último checkpoint
         try:
-            # Buscar logs recentes
-            log_files = list(self.logs_dir.glob("*.log"))
+            # Buscar logs recentes (por mtime)
+            log_files = []
+            for path in self.logs_dir.glob("*.log"):
+                try:
+                    log_files.append((path.stat().st_mtime, path))
+                except OSError:
+                    continue
+            log_files = [path for _, path in sorted(log_files)]
+            
+            # Esquece checkpoints de arquivos que não existem mais
+            existentes = {str(path) for path in log_files}
+            for chave in [c for c in self.log_offsets if c not in existentes]:
+                del self.log_offsets[chave]
             
-            for log_file in log_files[-5:]:  # Últimos 5 arquivos
+            offsets_antes = json.dumps(self.log_offsets, sort_keys=True)
+            for log_file in log_files[-5:]:  # 5 modificados mais recentemente
                 try:
-                    content = log_file.read_text(errors='replace')
+                    content = self._read_new_bytes(log_file)
+                    if not content:
+                        continue
                     
-                    for pattern, error_config in error_patterns.items():
-                        if pattern.lower() in content.lower():
+                    # Uma varredura por arquivo devolve todos os tipos presentes
+                    presentes = self.motor.tipos_em(content)
+                    for pattern, error_config in self.ERROR_PATTERNS.items():
+                        if pattern in presentes:
                             # Erro detectado!
                             errors_healed["count"] += 1
                             
@@ -133,6 +193,9 @@ class SelfHealingOrganism:
                 
                 except Exception as e:
                     logger.debug(f"Erro ao ler log: {e}")
+            
+            if json.dumps(self.log_offsets, sort_keys=True) != offsets_antes:
+                await self._persist_state()
         
         except Exception as e:
             logger.error(f"Erro em detect_and_heal: {e}")
@@ -233,11 +296,14 @@ class SelfHealingOrganism:
             "uptime_seconds": (datetime.now() - self.birth_time).total_seconds(),
             "heartbeat_count": self.heartbeat_count,
             "errors_healed_count": len(self.errors_healed),
-            "birth_time": self.birth_time.isoformat()
+            "birth_time": self.birth_time.isoformat(),
+            "log_offsets": self.log_offsets
         }
         
-        state_file = self.logs_dir / "nexo_organism_state.json"
-        state_file.write_text(json.dumps(state, indent=2))
+        # tmp + rename: um crash no meio não corrompe os checkpoints
+        tmp = self.state_file.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(state, indent=2))
+        os.replace(tmp, self.state_file)
     
     async def activate(self) -> Dict:
         """
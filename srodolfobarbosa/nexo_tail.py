@@ -0,0 +1,313 @@
+"""
+NEXO Tail — segue arquivos de log por inode, sem perder linhas na rotação.
+
+O que faz:
+  • segue cada arquivo pelo inode (st_dev, st_ino), não pelo nome: a rotação
+    do loguru (`nexo.log` → `nexo.2026-01-01_….log` + novo `nexo.log`) não
+    causa releitura nem pulo
+  • o arquivo rotacionado/apagado é drenado até o EOF antes de ser fechado
+  • truncamento (tamanho < offset) volta ao início
+  • acorda por inotify (ctypes, Linux) quando disponível; senão faz polling
+    de stat adaptativo (min → max enquanto ocioso)
+  • lê em blocos grandes e entrega as linhas em lotes: o consumidor puxa o
+    próximo lote, então nunca há mais de um bloco por arquivo em memória
+
+Uso:
+    tailer = LogTailer("/tmp", "nexo*.log")
+    async for arquivo, linhas in tailer.lotes():
+        ...
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("NEXO-Tail")
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENTO = struct.Struct("iIII")
+# Eventos que mudam o conjunto de arquivos do diretório
+_MUDA_DIRETORIO = (
+    IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ATTRIB | IN_Q_OVERFLOW
+)
+
+
+class Inotify:
+    """inotify via ctypes. Levanta OSError se o kernel/libc não suportar."""
+
+    def __init__(self):
+        nome = ctypes.util.find_library("c")
+        if not hasattr(os, "O_NONBLOCK") or nome is None:
+            raise OSError(errno.ENOSYS, "inotify indisponível")
+        self._libc = ctypes.CDLL(nome, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify indisponível")
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+
+    def watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e), str(path))
+        return wd
+
+    def read(self) -> List[Tuple[int, int, str]]:
+        """Eventos pendentes: [(wd, mask, nome)]. Vazio se não houver."""
+        try:
+            dados = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        eventos, pos = [], 0
+        while pos + _EVENTO.size <= len(dados):
+            wd, mask, _, tamanho = _EVENTO.unpack_from(dados, pos)
+            pos += _EVENTO.size
+            nome = dados[pos : pos + tamanho].rstrip(b"\0").decode(errors="replace")
+            pos += tamanho
+            eventos.append((wd, mask, nome))
+        return eventos
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class _Seguidor:
+    """Um arquivo aberto, identificado pelo inode, com offset e linha parcial."""
+
+    def __init__(self, path: Path, inicio: int = 0):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+        st = os.fstat(self.fd)
+        self.chave = (st.st_dev, st.st_ino)
+        self.offset = min(inicio, st.st_size) if inicio >= 0 else st.st_size
+        self.parcial = b""
+
+    def ler(self, bloco: int, max_parcial: int) -> Tuple[List[str], bool]:
+        """Um bloco de linhas completas. Devolve (linhas, ainda_tem_dados)."""
+        tamanho = os.fstat(self.fd).st_size
+        if tamanho < self.offset:
+            logger.info(f"✂️ Truncado: {self.path.name} — relendo do início")
+            self.offset, self.parcial = 0, b""
+        if tamanho == self.offset:
+            return [], False
+        dados = os.pread(self.fd, bloco, self.offset)
+        self.offset += len(dados)
+        partes = (self.parcial + dados).split(b"\n")
+        self.parcial = partes.pop()
+        if len(self.parcial) > max_parcial:
+            # Linha gigante sem \n: entrega em pedaços em vez de crescer sem limite
+            partes.append(self.parcial)
+            self.parcial = b""
+        return [
+            p.decode("utf-8", errors="replace") for p in partes
+        ], self.offset < tamanho
+
+    def fechar(self) -> List[str]:
+        """Fecha; devolve a linha parcial pendente (o arquivo não cresce mais)."""
+        os.close(self.fd)
+        resto, self.parcial = self.parcial, b""
+        return [resto.decode("utf-8", errors="replace")] if resto else []
+
+
+class LogTailer:
+    """Segue os arquivos `padrao` de `diretorio` por inode, com rotação e truncamento."""
+
+    def __init__(
+        self,
+        diretorio,
+        padrao: str = "*.log",
+        bloco: int = 1 << 20,
+        intervalo_min: float = 0.05,
+        intervalo_max: float = 2.0,
+        do_inicio: bool = True,
+        usar_inotify: bool = True,
+    ):
+        self.diretorio = Path(diretorio)
+        self.padrao = padrao
+        self.bloco = bloco
+        self.intervalo_min = intervalo_min
+        self.intervalo_max = intervalo_max
+        self.do_inicio = do_inicio
+        self.usar_inotify = usar_inotify
+        self.seguidores: Dict[Tuple[int, int], _Seguidor] = {}
+        self.inotify: Optional[Inotify] = None
+        self._primeira_varredura = True
+        self.stats = {"bytes": 0, "linhas": 0, "rotacoes": 0, "acordadas": 0}
+
+    # ---- descoberta ------------------------------------------------------
+
+    def varrer(self) -> List[Tuple[str, List[str]]]:
+        """
+        Atualiza o conjunto de arquivos seguidos. Arquivos que saíram do
+        padrão (rotacionados com outro nome ou apagados) são drenados antes
+        de fechar; as linhas finais são devolvidas.
+        """
+        vistos = set()
+        for path in sorted(self.diretorio.glob(self.padrao)):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if not path.is_file():
+                continue
+            chave = (st.st_dev, st.st_ino)
+            vistos.add(chave)
+            seguidor = self.seguidores.get(chave)
+            if seguidor is not None:
+                if seguidor.path != path:
+                    logger.info(f"🔄 Rotação: {seguidor.path.name} → {path.name}")
+                    self.stats["rotacoes"] += 1
+                    seguidor.path = path
+                continue
+            inicio = 0 if (self.do_inicio or not self._primeira_varredura) else -1
+            try:
+                self.seguidores[chave] = _Seguidor(path, inicio)
+                logger.info(f"📋 Observando: {path.name}")
+            except OSError as e:
+                logger.warning(f"⚠️ Erro ao abrir {path.name}: {e}")
+        self._primeira_varredura = False
+
+        finais = []
+        for chave in [c for c in self.seguidores if c not in vistos]:
+            seguidor = self.seguidores.pop(chave)
+            linhas = self._drenar(seguidor) + seguidor.fechar()
+            if linhas:
+                finais.append((seguidor.path.name, linhas))
+            logger.info(f"📕 Fechado (rotacionado/removido): {seguidor.path.name}")
+        return finais
+
+    def _drenar(self, seguidor: _Seguidor) -> List[str]:
+        linhas, mais = [], True
+        while mais:
+            novas, mais = seguidor.ler(self.bloco, self.bloco * 4)
+            linhas.extend(novas)
+        return linhas
+
+    # ---- leitura ---------------------------------------------------------
+
+    def _contar(self, linhas: List[str]):
+        self.stats["linhas"] += len(linhas)
+        self.stats["bytes"] += sum(len(linha) + 1 for linha in linhas)
+
+    def ler_disponivel(self) -> List[Tuple[str, List[str]]]:
+        """Tudo que está disponível agora (síncrono; útil em testes e backfill)."""
+        lotes = self.varrer()
+        for seguidor in list(self.seguidores.values()):
+            linhas = self._drenar(seguidor)
+            if linhas:
+                lotes.append((seguidor.path.name, linhas))
+        for _, linhas in lotes:
+            self._contar(linhas)
+        return lotes
+
+    def _iniciar_inotify(self) -> Optional[asyncio.Event]:
+        if not self.usar_inotify:
+            return None
+        try:
+            self.inotify = Inotify()
+            self.inotify.watch(
+                self.diretorio,
+                IN_MODIFY
+                | IN_CLOSE_WRITE
+                | _MUDA_DIRETORIO
+                | IN_DELETE_SELF
+                | IN_MOVE_SELF,
+            )
+        except OSError as e:
+            logger.info(f"ℹ️ inotify indisponível ({e}); usando polling adaptativo")
+            if self.inotify:
+                self.inotify.close()
+            self.inotify = None
+            return None
+        evento = asyncio.Event()
+        asyncio.get_running_loop().add_reader(self.inotify.fd, evento.set)
+        logger.info("⚡ inotify ativo: leitura orientada a eventos")
+        return evento
+
+    async def lotes(self) -> AsyncIterator[Tuple[str, List[str]]]:
+        """
+        Gera (arquivo, linhas) para sempre. Cada lote é no máximo um bloco de
+        um arquivo; o próximo só é lido quando o consumidor pede (backpressure).
+        """
+        evento = self._iniciar_inotify()
+        intervalo = self.intervalo_min
+        varrer = True
+        try:
+            while True:
+                if varrer:
+                    for nome, linhas in self.varrer():
+                        self._contar(linhas)
+                        yield nome, linhas
+                teve_dados = False
+                for seguidor in list(self.seguidores.values()):
+                    mais = True
+                    while mais:
+                        linhas, mais = seguidor.ler(self.bloco, self.bloco * 4)
+                        if linhas:
+                            teve_dados = True
+                            self._contar(linhas)
+                            yield seguidor.path.name, linhas
+                if teve_dados:
+                    intervalo = self.intervalo_min
+                    varrer = evento is None  # no polling, varre a cada rodada
+                    await asyncio.sleep(0)
+                    continue
+
+                if evento is not None:
+                    # Ocioso: bloqueia até o kernel avisar (timeout só como rede de segurança)
+                    try:
+                        await asyncio.wait_for(
+                            evento.wait(), timeout=max(self.intervalo_max, 5.0)
+                        )
+                    except asyncio.TimeoutError:
+                        varrer = True
+                        continue
+                    evento.clear()
+                    self.stats["acordadas"] += 1
+                    varrer = any(
+                        mask & (_MUDA_DIRETORIO | IN_DELETE_SELF | IN_MOVE_SELF)
+                        for _, mask, _ in self.inotify.read()
+                    )
+                else:
+                    await asyncio.sleep(intervalo)
+                    intervalo = min(self.intervalo_max, intervalo * 2)
+                    varrer = True
+        finally:
+            self.fechar()
+
+    def fechar(self):
+        if self.inotify is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self.inotify.fd)
+            except (RuntimeError, ValueError):
+                pass
+            self.inotify.close()
+            self.inotify = None
+        for seguidor in self.seguidores.values():
+            try:
+                os.close(seguidor.fd)
+            except OSError:
+                pass
+        self.seguidores.clear()
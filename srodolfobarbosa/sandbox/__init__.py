@@ -2,6 +2,8 @@
 Sandbox validation package - ejecuta fixes en ambiente isolado.
 """
 
+from .history import HistoryStore
 from .runner import SandboxRunner, SandboxResult
+from .worktrees import Worktree, WorktreePool
 
-__all__ = ["SandboxRunner", "SandboxResult"]
+__all__ = ["HistoryStore", "SandboxRunner", "SandboxResult", "Worktree", "WorktreePool"]
@@ -0,0 +1,301 @@
+"""
+Sondeo in-process de endpoints ASGI con presupuesto de latencia.
+
+Carga la app (p.ej. `deus:app`) en este proceso, corre su lifespan y manda
+las requests directamente por la interfaz ASGI, sin servidor ni red. Cada
+endpoint recibe N requests concurrentes; se registran códigos, p50/p95/max
+y se compara el p95 contra el presupuesto del endpoint.
+
+Uso (desde la raíz del worktree):
+    python -m srodolfobarbosa.sandbox.asgi_probe --app deus:app \
+        --app-dir srodolfobarbosa --endpoints '[{"path": "/health"}]'
+
+La última línea de stdout es el reporte JSON.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Endpoints críticos a testar (path, método, presupuesto de p95 en ms)
+DEFAULT_ENDPOINTS = [
+    {"path": "/health", "method": "GET", "budget_ms": 500},
+    {"path": "/insights/pending", "method": "GET", "budget_ms": 300},
+]
+
+
+async def asgi_request(
+    app,
+    method: str,
+    path: str,
+    body: bytes = b"",
+    headers: Optional[List[Tuple[bytes, bytes]]] = None,
+) -> Tuple[int, bytes]:
+    """Una request HTTP por la interfaz ASGI. Devuelve (status, body)."""
+    url = urlsplit(path)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method.upper(),
+        "scheme": "http",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"sandbox")] + list(headers or []),
+        "client": ("127.0.0.1", 0),
+        "server": ("sandbox", 80),
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    status = 500
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    response_done.set()
+    return status, b"".join(chunks)
+
+
+class Lifespan:
+    """Corre los eventos startup/shutdown de la app (si los soporta)."""
+
+    def __init__(self, app, timeout: float = 60):
+        self.app = app
+        self.timeout = timeout
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._events: Dict[str, asyncio.Future] = {}
+        self._task = None
+        self.supported = True
+
+    async def _receive(self):
+        return await self._queue.get()
+
+    async def _send(self, message):
+        kind = message["type"].rsplit(".", 1)[0]  # lifespan.startup / lifespan.shutdown
+        future = self._events.get(kind)
+        if future and not future.done():
+            if message["type"].endswith(".failed"):
+                future.set_exception(RuntimeError(message.get("message", kind)))
+            else:
+                future.set_result(True)
+
+    async def _run(self):
+        try:
+            await self.app(
+                {"type": "lifespan", "asgi": {"version": "3.0"}},
+                self._receive,
+                self._send,
+            )
+        except Exception:
+            # App sin soporte de lifespan
+            self.supported = False
+        for future in self._events.values():
+            if not future.done():
+                future.set_result(False)
+
+    async def _event(self, name: str):
+        loop = asyncio.get_running_loop()
+        self._events[f"lifespan.{name}"] = loop.create_future()
+        await self._queue.put({"type": f"lifespan.{name}"})
+        await asyncio.wait_for(self._events[f"lifespan.{name}"], self.timeout)
+
+    async def __aenter__(self):
+        self._task = asyncio.ensure_future(self._run())
+        await self._event("startup")
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.supported and not self._task.done():
+            try:
+                await self._event("shutdown")
+            except Exception:
+                pass
+        self._task.cancel()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def probe(
+    app,
+    endpoints: List[Dict],
+    requests_per_endpoint: int = 10,
+    concurrency: int = 8,
+    lifespan: bool = True,
+) -> Dict:
+    """
+    Sondea `endpoints` contra `app` y devuelve el reporte.
+
+    Cada endpoint: {"path", "method"="GET", "budget_ms"=500, "body"=None,
+    "expect"=None (lista de status aceptados; default: cualquiera < 500)}.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    report = {
+        "mode": "asgi",
+        "endpoints_tested": 0,
+        "endpoints_ok": 0,
+        "endpoints_failed": [],
+        "endpoints": {},
+        "success": True,
+    }
+
+    async def one(ep: Dict) -> Tuple[Optional[int], float, str]:
+        body = ep.get("body")
+        data = json.dumps(body).encode() if body is not None else b""
+        headers = [(b"content-type", b"application/json")] if body is not None else []
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status, _ = await asgi_request(
+                    app, ep.get("method", "GET"), ep["path"], data, headers
+                )
+                error = ""
+            except Exception as e:
+                status, error = None, f"{type(e).__name__}: {e}"
+            return status, (time.perf_counter() - start) * 1000, error
+
+    async def run_all():
+        tasks = {
+            ep["path"]
+            + "|"
+            + ep.get("method", "GET"): [
+                asyncio.ensure_future(one(ep)) for _ in range(requests_per_endpoint)
+            ]
+            for ep in endpoints
+        }
+        return {key: await asyncio.gather(*futs) for key, futs in tasks.items()}
+
+    if lifespan:
+        async with Lifespan(app):
+            samples = await run_all()
+    else:
+        samples = await run_all()
+
+    for ep in endpoints:
+        method = ep.get("method", "GET").upper()
+        key = f"{ep['path']}|{ep.get('method', 'GET')}"
+        results = samples[key]
+        latencies = [ms for _, ms, _ in results]
+        codes: Dict[str, int] = {}
+        failures = []
+        for status, _, error in results:
+            codes[str(status)] = codes.get(str(status), 0) + 1
+            expected = ep.get("expect")
+            if status is None:
+                failures.append(error)
+            elif (expected and status not in expected) or (
+                not expected and status >= 500
+            ):
+                failures.append(f"status {status}")
+        budget = ep.get("budget_ms", 500)
+        p95 = percentile(latencies, 95)
+        if p95 > budget:
+            failures.append(f"p95 {p95:.1f}ms > presupuesto {budget}ms")
+        ok = not failures
+        report["endpoints_tested"] += 1
+        report["endpoints"][f"{method} {ep['path']}"] = {
+            "status_codes": codes,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(p95, 2),
+            "max_ms": round(max(latencies), 2) if latencies else 0.0,
+            "budget_ms": budget,
+            "ok": ok,
+            "failures": sorted(set(failures))[:5],
+        }
+        if ok:
+            report["endpoints_ok"] += 1
+        else:
+            report["endpoints_failed"].append(
+                f"{ep['path']} ({'; '.join(sorted(set(failures))[:2])})"
+            )
+            report["success"] = False
+    return report
+
+
+def load_app(spec: str, app_dir: Optional[str] = None):
+    """Importa `modulo:atributo` (con `app_dir` al frente de sys.path)."""
+    if app_dir:
+        sys.path.insert(0, os.path.abspath(app_dir))
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr or "app")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sondeo ASGI in-process de endpoints")
+    parser.add_argument(
+        "--app", default="deus:app", help="modulo:atributo de la app ASGI"
+    )
+    parser.add_argument(
+        "--app-dir", default=None, help="Directorio a agregar a sys.path"
+    )
+    parser.add_argument(
+        "--endpoints", default=None, help="JSON (o archivo JSON) con los endpoints"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=10, help="Requests por endpoint"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--no-lifespan", action="store_true")
+    args = parser.parse_args(argv)
+
+    endpoints = DEFAULT_ENDPOINTS
+    if args.endpoints:
+        raw = args.endpoints
+        if os.path.exists(raw):
+            with open(raw) as f:
+                raw = f.read()
+        endpoints = json.loads(raw)
+
+    try:
+        if args.app_dir:
+            os.chdir(args.app_dir)
+        app = load_app(args.app, ".")
+        report = asyncio.run(
+            probe(app, endpoints, args.requests, args.concurrency, not args.no_lifespan)
+        )
+    except Exception as e:
+        report = {
+            "mode": "asgi",
+            "success": False,
+            "endpoints_tested": 0,
+            "endpoints_ok": 0,
+            "endpoints_failed": [f"app ({type(e).__name__}: {e})"],
+            "endpoints": {},
+        }
+    print(json.dumps(report), flush=True)
+    return 0 if report["success"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Benchmarks de regresión de performance para el sandbox.
+
+Un benchmark corre en un proceso propio contra un árbol (baseline o
+patcheado) y mide:
+
+  • import_s:         tiempo de `import deus`
+  • startup_s:        tiempo del lifespan startup de la app
+  • executar_p50/p95: latencia de POST /executar con un LLM falso (sin red)
+  • rss_kb:           memoria residente después de N requests
+
+`compare` junta varias rondas por lado (mediana) y marca como regresión lo
+que empeora más que el umbral relativo y más que el piso absoluto de ruido.
+
+Uso (desde la raíz del worktree):
+    python -m srodolfobarbosa.sandbox.bench --app-dir srodolfobarbosa --requests 30
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from .asgi_probe import Lifespan, asgi_request, load_app, percentile
+
+# Empeoramiento relativo tolerado por métrica
+DEFAULT_THRESHOLDS = {
+    "import_s": 0.20,
+    "startup_s": 0.20,
+    "executar_p50_ms": 0.25,
+    "executar_p95_ms": 0.25,
+    "rss_kb": 0.15,
+}
+# Diferencias absolutas por debajo de esto son ruido
+NOISE_FLOORS = {
+    "import_s": 0.05,
+    "startup_s": 0.05,
+    "executar_p50_ms": 5.0,
+    "executar_p95_ms": 5.0,
+    "rss_kb": 4096,
+}
+
+ORDEM_BENCH = "analise o estado atual do sistema e resuma"
+
+
+class FakeBrain:
+    """LLM falso: respuesta fija e inmediata, para medir sólo el código del NEXO."""
+
+    RESPOSTA = json.dumps({"sintese": "ok (benchmark)", "debate": {}})
+
+    def invoke(self, prompt, **kwargs):
+        return self.RESPOSTA
+
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def _measure(app, module, requests: int) -> Dict:
+    t0 = time.perf_counter()
+    async with Lifespan(app):
+        startup_s = time.perf_counter() - t0
+        nexo = getattr(module, "nexo", None)
+        if nexo is not None:
+            brain = FakeBrain()
+            nexo.get_brain = lambda: brain
+        body = json.dumps({"ordem": ORDEM_BENCH}).encode()
+        headers = [(b"content-type", b"application/json")]
+        statuses: Dict[str, int] = {}
+        latencies: List[float] = []
+        for i in range(requests + 3):
+            start = time.perf_counter()
+            status, _ = await asgi_request(app, "POST", "/executar", body, headers)
+            if i >= 3:  # descarta el warmup
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+        rss = _rss_kb()
+    return {
+        "startup_s": round(startup_s, 4),
+        "executar_p50_ms": round(percentile(latencies, 50), 2),
+        "executar_p95_ms": round(percentile(latencies, 95), 2),
+        "rss_kb": rss,
+        "status_codes": statuses,
+    }
+
+
+def run_bench(
+    app_spec: str = "deus:app", app_dir: Optional[str] = None, requests: int = 30
+) -> Dict:
+    """Corre el benchmark en este proceso (debe ser un proceso nuevo)."""
+    if app_dir:
+        os.chdir(app_dir)
+    t0 = time.perf_counter()
+    app = load_app(app_spec, ".")
+    import_s = time.perf_counter() - t0
+    module = sys.modules[app_spec.partition(":")[0]]
+    return {
+        "import_s": round(import_s, 4),
+        **asyncio.run(_measure(app, module, requests)),
+    }
+
+
+def compare(
+    base_runs: List[Dict],
+    patched_runs: List[Dict],
+    thresholds: Optional[Dict[str, float]] = None,
+) -> Dict:
+    """
+    Mediana por métrica de cada lado, deltas y regresiones.
+
+    Returns:
+        {"base", "patched", "deltas": {métrica: %}, "regressions": [...]}
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    base_ok = [r for r in base_runs if "error" not in r]
+    patched_ok = [r for r in patched_runs if "error" not in r]
+    result = {"base": {}, "patched": {}, "deltas": {}, "regressions": []}
+    if not base_ok:
+        result["skipped"] = "baseline sin benchmark"
+        return result
+    if not patched_ok:
+        # El baseline corre y el patch no: eso es una regresión en sí
+        result["regressions"].append("bench_error")
+        result["error"] = (
+            patched_runs[-1].get("error") if patched_runs else "sin corridas"
+        )
+        return result
+    for metric, threshold in thresholds.items():
+        base = statistics.median(r[metric] for r in base_ok)
+        patched = statistics.median(r[metric] for r in patched_ok)
+        result["base"][metric] = base
+        result["patched"][metric] = patched
+        delta = (patched - base) / base if base else 0.0
+        result["deltas"][metric] = round(delta * 100, 1)
+        if delta > threshold and patched - base > NOISE_FLOORS.get(metric, 0):
+            result["regressions"].append(metric)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de regresión del NEXO")
+    parser.add_argument("--app", default="deus:app")
+    parser.add_argument("--app-dir", default=None)
+    parser.add_argument("--requests", type=int, default=30)
+    args = parser.parse_args(argv)
+    try:
+        report = run_bench(args.app, args.app_dir, args.requests)
+    except Exception as e:
+        report = {"error": f"{type(e).__name__}: {e}"}
+    print(json.dumps(report), flush=True)
+    return 0 if "error" not in report else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+"""
+Histórico indexado del sandbox y del auto-repair (SQLite en modo WAL).
+
+Reemplaza el escaneo de `.sandbox/history.jsonl` y
+`.nexo_repair_history.jsonl`: cada corrida se guarda en `runs` (con el JSON
+completo en `payload`), los tiempos por etapa en `stages` y el resultado de
+cada test en `tests`, todo indexado por timestamp. Las consultas de tendencia
+(tasa de decisiones, percentiles por etapa, tests flaky) leen sólo la
+ventana pedida por índice.
+
+WAL permite que el runner escriba mientras la API o el CLI leen.
+
+Uso:
+    python -m srodolfobarbosa.sandbox.history migrate
+    python -m srodolfobarbosa.sandbox.history rates --since 90d --bucket week
+    python -m srodolfobarbosa.sandbox.history stages --since 30d
+    python -m srodolfobarbosa.sandbox.history flaky --since 30d
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_DB = Path(__file__).resolve().parent.parent / ".sandbox" / "history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    branch TEXT,
+    commit_hash TEXT,
+    decision TEXT,
+    success INTEGER,
+    confidence REAL,
+    duration REAL,
+    payload TEXT NOT NULL,
+    UNIQUE (source, run_id, ts)
+);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts);
+CREATE INDEX IF NOT EXISTS runs_source_ts ON runs (source, ts);
+CREATE TABLE IF NOT EXISTS stages (
+    run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    ts TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stages_stage_ts ON stages (stage, ts);
+CREATE TABLE IF NOT EXISTS tests (
+    run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    ts TEXT NOT NULL,
+    nodeid TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    commit_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS tests_ts ON tests (ts);
+CREATE INDEX IF NOT EXISTS tests_nodeid_ts ON tests (nodeid, ts);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+BUCKETS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+
+# Línea de `pytest -v`: "path::test PASSED [ 50%]"
+_VERBOSE = re.compile(r"^(\S+::\S+) (PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)\b", re.M)
+_OUTCOMES = {
+    "PASSED": "passed",
+    "XPASS": "passed",
+    "FAILED": "failed",
+    "ERROR": "failed",
+}
+
+
+def parse_since(value: Optional[str], now: Optional[datetime] = None) -> Optional[str]:
+    """'30d', '12h', '4w' o un ISO timestamp -> ISO timestamp (UTC, como el runner)."""
+    if not value:
+        return None
+    m = re.fullmatch(r"(\d+)([hdw])", value.strip())
+    if not m:
+        return value
+    hours = int(m.group(1)) * {"h": 1, "d": 24, "w": 24 * 7}[m.group(2)]
+    return ((now or datetime.utcnow()) - timedelta(hours=hours)).isoformat()
+
+
+def parse_test_outcomes(test_results: Dict) -> Dict[str, str]:
+    """nodeid -> passed/failed de un `test_results` del runner (skips se ignoran)."""
+    outcomes = test_results.get("outcomes")
+    if outcomes:
+        return {n: o for n, o in outcomes.items() if o in ("passed", "failed")}
+    parsed = {}
+    for nodeid, status in _VERBOSE.findall(test_results.get("raw_output") or ""):
+        if status in _OUTCOMES:
+            parsed[nodeid] = _OUTCOMES[status]
+    return parsed
+
+
+def _percentiles(values: List[float]) -> Dict:
+    values = sorted(values)
+
+    def p(q):
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    return {
+        "n": len(values),
+        "p50": p(0.5),
+        "p95": p(0.95),
+        "p99": p(0.99),
+        "max": values[-1],
+    }
+
+
+class HistoryStore:
+    """Histórico de corridas en SQLite (WAL). Seguro entre threads y procesos."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.getenv("NEXO_HISTORY_DB") or DEFAULT_DB)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---- escritura -------------------------------------------------------
+
+    def _insert(self, conn, source: str, entry: Dict) -> Optional[int]:
+        ts = entry.get("timestamp") or datetime.utcnow().isoformat()
+        run_id = str(entry.get("sandbox_id") or entry.get("run_id") or ts)
+        success = entry.get("success", entry.get("sandbox_ok"))
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO runs (source, run_id, ts, branch, commit_hash, decision,"
+            " success, confidence, duration, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                source,
+                run_id,
+                ts,
+                entry.get("branch"),
+                entry.get("commit_hash"),
+                entry.get("decision"),
+                None if success is None else int(bool(success)),
+                entry.get("confidence"),
+                entry.get("duration"),
+                json.dumps(entry, default=str),
+            ),
+        )
+        if not cur.rowcount:
+            return None  # ya estaba (migración repetida)
+        run = cur.lastrowid
+        timings = entry.get("stage_timings") or {}
+        conn.executemany(
+            "INSERT INTO stages (run, ts, stage, duration) VALUES (?, ?, ?, ?)",
+            [
+                (run, ts, s, float(d))
+                for s, d in timings.items()
+                if isinstance(d, (int, float))
+            ],
+        )
+        outcomes = parse_test_outcomes(entry.get("test_results") or {})
+        conn.executemany(
+            "INSERT INTO tests (run, ts, nodeid, outcome, commit_hash) VALUES (?, ?, ?, ?, ?)",
+            [(run, ts, n, o, entry.get("commit_hash")) for n, o in outcomes.items()],
+        )
+        return run
+
+    def record(self, source: str, entry: Dict) -> Optional[int]:
+        """Guarda una corrida (`source`: 'sandbox' o 'repair'). Devuelve su id."""
+        conn = self._conn()
+        with conn:
+            return self._insert(conn, source, entry)
+
+    def migrate_jsonl(self, path: Path, source: str) -> int:
+        """Importa un histórico JSONL viejo. Idempotente; devuelve filas nuevas."""
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return 0
+        conn = self._conn()
+        key = f"migrated:{path.resolve()}"
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        mark = f"{stat.st_size}:{stat.st_mtime_ns}"
+        if row and row["value"] == mark:
+            return 0
+        inserted = 0
+        with conn, open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and self._insert(conn, source, entry):
+                    inserted += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, mark)
+            )
+        return inserted
+
+    # ---- consultas -------------------------------------------------------
+
+    @staticmethod
+    def _window(since: Optional[str], until: Optional[str]) -> Tuple[str, List]:
+        clauses, params = [], []
+        if since:
+            clauses.append("ts >= ?")
+            params.append(parse_since(since))
+        if until:
+            clauses.append("ts < ?")
+            params.append(parse_since(until))
+        return " AND ".join(clauses) or "1", params
+
+    def recent(self, limit: int = 50, source: Optional[str] = None) -> List[Dict]:
+        where, params = ("source = ?", [source]) if source else ("1", [])
+        rows = self._conn().execute(
+            f"SELECT payload FROM runs WHERE {where} ORDER BY ts DESC LIMIT ?",
+            params + [limit],
+        )
+        return [json.loads(r["payload"]) for r in rows]
+
+    def decision_rates(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        source: Optional[str] = None,
+        bucket: Optional[str] = None,
+    ) -> List[Dict]:
+        """Cantidad y fracción de cada decisión, total o por día/semana/mes."""
+        where, params = self._window(since, until)
+        if source:
+            where += " AND source = ?"
+            params.append(source)
+        period = f"strftime('{BUCKETS[bucket]}', ts)" if bucket else "'total'"
+        rows = self._conn().execute(
+            f"SELECT {period} AS period, COALESCE(decision, '?') AS decision, COUNT(*) AS n,"
+            f" AVG(confidence) AS confidence FROM runs WHERE {where}"
+            " GROUP BY period, decision ORDER BY period",
+            params,
+        )
+        periods: Dict[str, Dict] = {}
+        for r in rows:
+            p = periods.setdefault(
+                r["period"], {"period": r["period"], "runs": 0, "decisions": {}}
+            )
+            p["runs"] += r["n"]
+            p["decisions"][r["decision"]] = {
+                "n": r["n"],
+                "avg_confidence": round(r["confidence"], 3)
+                if r["confidence"] is not None
+                else None,
+            }
+        for p in periods.values():
+            for d in p["decisions"].values():
+                d["rate"] = round(d["n"] / p["runs"], 3)
+        return list(periods.values())
+
+    def stage_percentiles(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        stage: Optional[str] = None,
+    ) -> Dict[str, Dict]:
+        """p50/p95/p99/max de duración por etapa en la ventana."""
+        where, params = self._window(since, until)
+        if stage:
+            where += " AND stage = ?"
+            params.append(stage)
+        series: Dict[str, List[float]] = {}
+        for r in self._conn().execute(
+            f"SELECT stage, duration FROM stages WHERE {where}", params
+        ):
+            series.setdefault(r["stage"], []).append(r["duration"])
+        return {s: _percentiles(v) for s, v in sorted(series.items())}
+
+    def flaky_tests(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_runs: int = 3,
+        min_flips: int = 2,
+    ) -> List[Dict]:
+        """
+        Tests que alternan entre pasar y fallar en la ventana.
+
+        Flaky si cambió de resultado al menos `min_flips` veces, o si pasó y
+        falló sobre el mismo commit.
+        """
+        where, params = self._window(since, until)
+        rows = self._conn().execute(
+            f"SELECT nodeid, outcome, commit_hash FROM tests WHERE {where}"
+            " AND nodeid IN (SELECT nodeid FROM tests WHERE outcome = 'failed' AND "
+            f"{where}) ORDER BY nodeid, ts",
+            params + params,
+        )
+        history: Dict[str, List[sqlite3.Row]] = {}
+        for r in rows:
+            history.setdefault(r["nodeid"], []).append(r)
+        flaky = []
+        for nodeid, runs in history.items():
+            outcomes = [r["outcome"] for r in runs]
+            flips = sum(1 for a, b in zip(outcomes, outcomes[1:]) if a != b)
+            by_commit: Dict[str, set] = {}
+            for r in runs:
+                if r["commit_hash"]:
+                    by_commit.setdefault(r["commit_hash"], set()).add(r["outcome"])
+            same_commit = sum(1 for o in by_commit.values() if len(o) > 1)
+            if len(runs) >= min_runs and (flips >= min_flips or same_commit):
+                failed = outcomes.count("failed")
+                flaky.append(
+                    {
+                        "test": nodeid,
+                        "runs": len(runs),
+                        "failed": failed,
+                        "fail_rate": round(failed / len(runs), 3),
+                        "flips": flips,
+                        "same_commit_conflicts": same_commit,
+                    }
+                )
+        return sorted(flaky, key=lambda f: (f["flips"], f["fail_rate"]), reverse=True)
+
+
+def _migrate_defaults(store: HistoryStore, workspace: Path) -> Dict[str, int]:
+    return {
+        "sandbox": store.migrate_jsonl(
+            workspace / ".sandbox" / "history.jsonl", "sandbox"
+        ),
+        "repair": store.migrate_jsonl(
+            workspace / ".nexo_repair_history.jsonl", "repair"
+        ),
+    }
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Consultas sobre el histórico del sandbox"
+    )
+    parser.add_argument(
+        "command", choices=["migrate", "rates", "stages", "flaky", "recent"]
+    )
+    parser.add_argument(
+        "--db", default=None, help="Ruta de la base (default .sandbox/history.db)"
+    )
+    parser.add_argument("--workspace", default=str(DEFAULT_DB.parent.parent))
+    parser.add_argument("--since", default=None, help="'30d', '12h', '4w' o ISO")
+    parser.add_argument("--until", default=None)
+    parser.add_argument("--source", choices=["sandbox", "repair"], default=None)
+    parser.add_argument("--bucket", choices=sorted(BUCKETS), default=None)
+    parser.add_argument("--stage", default=None)
+    parser.add_argument("--min-runs", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.db)
+    if args.command == "migrate":
+        out = _migrate_defaults(store, Path(args.workspace))
+    elif args.command == "rates":
+        out = store.decision_rates(args.since, args.until, args.source, args.bucket)
+    elif args.command == "stages":
+        out = store.stage_percentiles(args.since, args.until, args.stage)
+    elif args.command == "flaky":
+        out = store.flaky_tests(args.since, args.until, args.min_runs)
+    else:
+        out = store.recent(args.limit, args.source)
+    print(json.dumps(out, indent=2, ensure_ascii=False, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
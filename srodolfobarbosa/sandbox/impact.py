@@ -0,0 +1,383 @@
+"""
+TestImpactMap: mapa archivo/función -> tests, derivado de coverage por test.
+
+Cada corrida de pytest con `--cov-context=test` deja en `.coverage` qué test
+ejecutó cada línea. Con eso se mantiene un mapa (JSON) que dice, para cada
+archivo fuente y cada función, qué tests la ejercitan. En la validación de
+un patch sólo corren los tests afectados por las funciones tocadas; cada
+`full_every` corridas (o si el mapa está viejo o no cubre el cambio) corre la
+suite completa, que además reconstruye el mapa.
+
+Las funciones se identifican por qualname (estable entre versiones), y las
+líneas cambiadas se resuelven contra la versión base del archivo.
+"""
+
+import ast
+import difflib
+import fcntl
+import importlib.util
+import json
+import logging
+import os
+import re
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cambios en estos archivos invalidan cualquier selección: corre todo
+FULL_RUN_FILES = (
+    "conftest.py",
+    "pytest.ini",
+    "setup.cfg",
+    "pyproject.toml",
+    "tox.ini",
+    "requirements.txt",
+)
+# Cambios que no pueden afectar tests
+IGNORED_SUFFIXES = (".md", ".rst", ".txt", ".jsonl", ".log")
+
+_HUNK = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,\d+)? @@")
+
+# path -> qualnames cambiados (None = cambio a nivel de módulo / archivo entero,
+# conjunto vacío = archivo .py nuevo)
+Changes = Dict[str, Optional[Set[str]]]
+
+
+def function_ranges(source: str) -> List[Tuple[str, int, int]]:
+    """
+    (qualname, primera, última) del cuerpo de cada función/método.
+
+    Sólo el cuerpo: las líneas `def`/decoradores corren al importar el
+    módulo y no dicen nada de qué test usa la función. Las funciones
+    anidadas se atribuyen a la más externa.
+    """
+    ranges: List[Tuple[str, int, int]] = []
+
+    def visit(node, prefix: str):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                start = child.body[0].lineno
+                end = getattr(child, "end_lineno", None) or start
+                ranges.append((f"{prefix}{child.name}", start, end))
+            elif isinstance(child, ast.ClassDef):
+                visit(child, f"{prefix}{child.name}.")
+
+    try:
+        visit(ast.parse(source), "")
+    except (SyntaxError, ValueError):
+        pass
+    return ranges
+
+
+def symbols_for_lines(
+    ranges: List[Tuple[str, int, int]], hunks: List[Tuple[int, int]]
+) -> Optional[Set[str]]:
+    """Qualnames tocados por los hunks (coordenadas de la versión base); None si hay cambio fuera de funciones."""
+    symbols: Set[str] = set()
+    for start, count in hunks:
+        # count == 0: inserción *después* de `start`
+        lines = range(start, start + count) if count else (start, start + 1)
+        for line in lines:
+            owner = next((q for q, a, b in ranges if a <= line <= b), None)
+            if owner is None:
+                return None
+            symbols.add(owner)
+    return symbols
+
+
+def diff_changes(cwd: Path, base_ref: str) -> Changes:
+    """Cambios del working tree de `cwd` contra `base_ref`, resueltos a funciones."""
+    diff = subprocess.run(
+        ["git", "diff", "-U0", "--no-renames", "--no-color", base_ref],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    hunks: Dict[str, List[Tuple[int, int]]] = {}
+    new_files: Set[str] = set()
+    old_path = None
+    for line in diff.splitlines():
+        if line.startswith("--- "):
+            old_path = None if line == "--- /dev/null" else line[6:]
+        elif line.startswith("+++ "):
+            path = line[6:] if line != "+++ /dev/null" else old_path
+            if old_path is None:
+                new_files.add(path)
+            hunks.setdefault(path, [])
+            current = path
+        else:
+            m = _HUNK.match(line)
+            if m:
+                hunks[current].append((int(m.group(1)), int(m.group(2) or 1)))
+
+    changes: Changes = {}
+    for path, file_hunks in hunks.items():
+        if not path.endswith(".py"):
+            changes[path] = None
+            continue
+        if path in new_files:
+            changes[path] = set()
+            continue
+        old = subprocess.run(
+            ["git", "show", f"{base_ref}:{path}"],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+        ).stdout
+        changes[path] = symbols_for_lines(function_ranges(old), file_hunks)
+    return changes
+
+
+def text_changes(old: str, new: str) -> Optional[Set[str]]:
+    """Como `diff_changes` para un solo archivo, a partir de dos textos."""
+    matcher = difflib.SequenceMatcher(None, old.splitlines(), new.splitlines())
+    hunks = [
+        (i1 + 1 if i2 > i1 else i1, i2 - i1)
+        for tag, i1, i2, _, _ in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+    return symbols_for_lines(function_ranges(old), hunks)
+
+
+def coverage_available() -> bool:
+    return importlib.util.find_spec("pytest_cov") is not None
+
+
+class TestImpactMap:
+    """Mapa persistente archivo/función -> tests, mantenido por las corridas previas."""
+
+    __test__ = False  # no es una clase de test de pytest
+
+    def __init__(
+        self,
+        path: Path,
+        full_every: Optional[int] = None,
+        max_age_hours: float = 24.0,
+    ):
+        """
+        Args:
+            path: JSON del mapa
+            full_every: Corridas selectivas entre corridas completas
+                (default: NEXO_TEST_IMPACT_FULL_EVERY o 10)
+            max_age_hours: Edad máxima del último full run antes de forzar otro
+        """
+        self.path = Path(path)
+        self.full_every = full_every or int(
+            os.getenv("NEXO_TEST_IMPACT_FULL_EVERY", "10")
+        )
+        self.max_age_hours = max_age_hours
+
+    # ========== PERSISTENCIA ==========
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def load(self) -> Dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"files": {}, "tests": [], "runs_since_full": 0, "last_full": 0}
+
+    def _save(self, data: Dict):
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, self.path)
+
+    # ========== SELECCIÓN ==========
+
+    def plan(self, changes: Optional[Changes]) -> Tuple[Optional[List[str]], str]:
+        """
+        Decide qué correr.
+
+        Nunca devuelve una selección vacía: un cambio que el mapa no sabe
+        asociar a ningún test (función sin cobertura, `.py` nuevo, config que
+        no es `.py`) corre la suite completa en vez de "pasar" sin tests.
+
+        Returns:
+            (None, motivo) para la suite completa, o (nodeids/archivos, "impact")
+        """
+        data = self.load()
+        if changes is None:
+            return None, "sin diff"
+        if not data["files"]:
+            return None, "mapa vacío"
+        if data["runs_since_full"] >= self.full_every:
+            return None, f"full cada {self.full_every} corridas"
+        if time.time() - data["last_full"] > self.max_age_hours * 3600:
+            return None, "mapa viejo"
+
+        known_tests = set(data["tests"])
+        selected: Set[str] = set()
+        for path, symbols in changes.items():
+            name = Path(path).name
+            if name in FULL_RUN_FILES:
+                return None, f"cambió {name}"
+            if path.endswith(IGNORED_SUFFIXES):
+                continue
+            if not path.endswith(".py"):
+                # json, yml, Dockerfile...: cualquier test puede depender de ellos
+                return None, f"cambió {name}"
+            if name.startswith("test_") or "/tests/" in f"/{path}":
+                in_file = {t for t in known_tests if t.split("::", 1)[0] == path}
+                selected |= in_file or {path}
+                continue
+            entry = data["files"].get(path)
+            if entry is None:
+                return (
+                    None,
+                    f"{path} nuevo" if symbols == set() else f"{path} fuera del mapa",
+                )
+            if symbols is None:
+                if not entry["module"]:
+                    return None, f"{path} sin tests en el mapa"
+                selected |= set(entry["module"])
+            else:
+                for symbol in symbols:
+                    tests = entry["functions"].get(symbol)
+                    if not tests:
+                        return None, f"{path}:{symbol} sin tests en el mapa"
+                    selected |= set(tests)
+        if not selected:
+            return None, "ningún test seleccionado"
+        return sorted(selected), "impact"
+
+    # ========== ACTUALIZACIÓN ==========
+
+    @staticmethod
+    def _test_name(context: str) -> str:
+        return context.rsplit("|", 1)[0]
+
+    def update_from_coverage(self, cov: Dict, full: bool, source_root: Path = None):
+        """
+        Incorpora un reporte `coverage json --show-contexts`.
+
+        En un full run el mapa se reemplaza; en uno selectivo sólo se
+        reemplazan las entradas de los tests que corrieron.
+        """
+        files: Dict[str, Dict] = {}
+        ran: Set[str] = set()
+        for path, fdata in cov.get("files", {}).items():
+            if source_root and os.path.isabs(path):
+                path = os.path.relpath(path, source_root)
+            by_line: Dict[int, Set[str]] = {}
+            for line, contexts in fdata.get("contexts", {}).items():
+                tests = {self._test_name(c) for c in contexts if c}
+                if tests:
+                    by_line[int(line)] = tests
+                    ran |= tests
+            try:
+                source = Path(source_root or ".", path).read_text(encoding="utf-8")
+            except OSError:
+                source = ""
+            functions: Dict[str, Set[str]] = {}
+            module: Set[str] = set()
+            for qualname, start, end in function_ranges(source):
+                tests = set().union(
+                    *(by_line.get(i, set()) for i in range(start, end + 1))
+                )
+                if tests:
+                    functions[qualname] = tests
+                    module |= tests
+            files[path] = {"module": module, "functions": functions}
+
+        with self._locked():
+            data = self.load()
+            if full:
+                merged = {}
+                data["runs_since_full"] = 0
+                data["last_full"] = time.time()
+                data["tests"] = sorted(ran)
+            else:
+                merged = data["files"]
+                for entry in merged.values():
+                    entry["module"] = [t for t in entry["module"] if t not in ran]
+                    entry["functions"] = {
+                        q: [t for t in ts if t not in ran]
+                        for q, ts in entry["functions"].items()
+                    }
+                data["runs_since_full"] = data.get("runs_since_full", 0) + 1
+                data["tests"] = sorted(set(data["tests"]) | ran)
+            for path, entry in files.items():
+                old = merged.get(path, {"module": [], "functions": {}})
+                functions = {q: set(ts) for q, ts in old["functions"].items()}
+                for q, ts in entry["functions"].items():
+                    functions.setdefault(q, set()).update(ts)
+                merged[path] = {
+                    "module": sorted(set(old["module"]) | entry["module"]),
+                    "functions": {q: sorted(ts) for q, ts in functions.items() if ts},
+                }
+            data["files"] = merged
+            self._save(data)
+        logger.info(
+            f"🗺 Mapa de impacto actualizado ({'full' if full else 'selectivo'}): "
+            f"{len(ran)} tests, {len(files)} archivos"
+        )
+
+    def refresh(self, cwd: Path, full: bool, data_file: str = ".coverage") -> bool:
+        """Exporta `.coverage` de `cwd` con contextos y actualiza el mapa."""
+        if not (Path(cwd) / data_file).exists():
+            return False
+        out = Path(cwd) / "coverage.json"
+        result = subprocess.run(
+            [
+                "python",
+                "-m",
+                "coverage",
+                "json",
+                "--show-contexts",
+                f"--data-file={data_file}",
+                "-o",
+                str(out),
+            ],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        if result.returncode != 0:
+            logger.warning(f"No se pudo exportar coverage: {result.stderr.strip()}")
+            return False
+        with open(out) as f:
+            self.update_from_coverage(json.load(f), full=full, source_root=Path(cwd))
+        return True
+
+    def status(self) -> Dict:
+        data = self.load()
+        return {
+            "files": len(data["files"]),
+            "tests": len(data["tests"]),
+            "runs_since_full": data["runs_since_full"],
+            "full_every": self.full_every,
+            "last_full": data["last_full"],
+        }
+
+
+def pytest_command(
+    targets: List[str], rootdir: Path, cov_source: Optional[str] = None
+) -> List[str]:
+    """Comando pytest; con pytest-cov instalado registra coverage por test."""
+    cmd = [
+        "python",
+        "-m",
+        "pytest",
+        *targets,
+        "-v",
+        "--tb=short",
+        f"--rootdir={rootdir}",
+    ]
+    if cov_source and coverage_available():
+        cmd += [f"--cov={cov_source}", "--cov-context=test", "--cov-report="]
+    return cmd
@@ -0,0 +1,194 @@
+"""
+Lint incremental con cache por contenido.
+
+Sólo se lintean los archivos .py cambiados contra la base, en modo check
+(ruff sin --fix, black --check). El resultado de cada archivo se guarda por
+sha256 del contenido + versiones de las herramientas, así un archivo que no
+cambió nunca se lintea dos veces, ni entre corridas ni entre worktrees.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .stages import run_cmd
+
+logger = logging.getLogger(__name__)
+
+RUFF_SELECT = "E,F,W"
+
+
+def changed_python_files(cwd: Path, base_ref: str) -> List[str]:
+    """Archivos .py agregados/modificados contra `base_ref` (incluye no trackeados)."""
+    diff = subprocess.run(
+        ["git", "diff", "--name-only", "--diff-filter=ACMR", base_ref, "--", "*.py"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    untracked = subprocess.run(
+        ["git", "ls-files", "--others", "--exclude-standard", "--", "*.py"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return sorted(set(diff) | set(untracked))
+
+
+@lru_cache(maxsize=None)
+def tool_version(tool: str) -> Optional[str]:
+    """Versión de la herramienta (parte de la clave del cache), None si no está."""
+    if not shutil.which(tool):
+        return None
+    try:
+        out = subprocess.run(
+            [tool, "--version"], capture_output=True, text=True, timeout=30
+        ).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out.strip().splitlines()[0] if out.strip() else tool
+
+
+class LintCache:
+    """sha256(contenido)+versiones -> resultado de lint del archivo, en JSON."""
+
+    def __init__(self, path: Path, max_entries: int = 20000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._data: Optional[Dict[str, Dict]] = None
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> Optional[Dict]:
+        if self._data is None:
+            self._data = self._load()
+        return self._data.get(key)
+
+    def put_many(self, entries: Dict[str, Dict]):
+        if not entries:
+            return
+        with self._locked():
+            data = self._load()
+            data.update(entries)
+            if len(data) > self.max_entries:
+                # descarta las entradas más viejas (orden de inserción)
+                data = dict(list(data.items())[-self.max_entries :])
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, self.path)
+        self._data = data
+
+
+def _ruff(files: List[str], cwd: Path) -> Dict[str, List[str]]:
+    """Issues de ruff por archivo (check, sin --fix)."""
+    issues: Dict[str, List[str]] = {f: [] for f in files}
+    base = ["ruff", "check", f"--select={RUFF_SELECT}", "--no-cache", "--exit-zero"]
+    result = run_cmd(base + ["--output-format=json", *files], cwd=cwd, timeout=60)
+    if result.returncode == 2:  # ruff viejo: --format
+        result = run_cmd(base + ["--format=json", *files], cwd=cwd, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(f"ruff falló: {result.stderr.strip()[-300:]}")
+    for item in json.loads(result.stdout or "[]"):
+        path = os.path.relpath(item["filename"], cwd)
+        loc = item.get("location") or {}
+        issues.setdefault(path, []).append(
+            f"{path}:{loc.get('row')}:{loc.get('column')}: {item.get('code')} {item.get('message')}"
+        )
+    return issues
+
+
+def _black(files: List[str], cwd: Path) -> Dict[str, bool]:
+    """True si el archivo ya está formateado (black --check)."""
+    result = run_cmd(["black", "--check", *files], cwd=cwd, timeout=60)
+    if result.returncode not in (0, 1):
+        raise RuntimeError(f"black falló: {result.stderr.strip()[-300:]}")
+    unformatted = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("would reformat "):
+            path = line[len("would reformat ") :].strip()
+            unformatted.add(os.path.relpath(path, cwd) if os.path.isabs(path) else path)
+    return {f: f not in unformatted for f in files}
+
+
+def lint_files(files: List[str], cwd: Path, cache: Optional[LintCache]) -> Dict:
+    """
+    Lintea `files` (relativos a `cwd`) en modo check, usando el cache.
+
+    Returns:
+        Resultados con el formato de `SandboxRunner.run_linters`
+    """
+    ruff_version, black_version = tool_version("ruff"), tool_version("black")
+    results = {
+        "ruff": {"errors": 0, "warnings": 0, "fixed": 0},
+        "black": {"checked": 0, "formatted": 0, "unformatted": 0},
+        "success": True,
+        "issues": [],
+        "files": len(files),
+        "cached": 0,
+    }
+    per_file: Dict[str, Dict] = {}
+    keys: Dict[str, str] = {}
+    pending: List[str] = []
+    for path in files:
+        try:
+            content = (Path(cwd) / path).read_bytes()
+        except OSError:
+            continue
+        key = hashlib.sha256(
+            content + f"|{ruff_version}|{black_version}|{RUFF_SELECT}".encode()
+        ).hexdigest()
+        keys[path] = key
+        hit = cache.get(key) if cache else None
+        if hit is not None:
+            per_file[path] = hit
+            results["cached"] += 1
+        else:
+            pending.append(path)
+
+    if pending:
+        ruff = _ruff(pending, cwd) if ruff_version else {}
+        black = _black(pending, cwd) if black_version else {}
+        fresh = {}
+        for path in pending:
+            entry = {"ruff": ruff.get(path, []), "black_ok": black.get(path, True)}
+            per_file[path] = entry
+            fresh[keys[path]] = entry
+        if cache and ruff_version and black_version:
+            cache.put_many(fresh)
+
+    for path, entry in per_file.items():
+        if entry["ruff"]:
+            results["ruff"]["errors"] += len(entry["ruff"])
+            results["issues"].extend(entry["ruff"][:20])
+        if entry["black_ok"]:
+            results["black"]["checked"] += 1
+        else:
+            results["black"]["unformatted"] += 1
+            results["issues"].append(f"black: {path}")
+    if results["ruff"]["errors"]:
+        results["success"] = False
+    return results
@@ -3,15 +3,17 @@ SandboxRunner: Ejecuta fixes en ambiente isolado y valida contra APIs reales.
 Sin mocks, sin tests fake. Solo realidad.
 
 Flujo:
-  1. Crea branch efêmero (sandbox-<timestamp>)
+  1. Crea branch efêmero (sandbox-<timestamp>) en un git worktree propio
+     (del pool de worktrees; el working copy principal no se toca)
   2. Aplica patches (git apply o commits)
-  3. Roda testes reales (pytest contra endpoints reales)
-  4. Roda linters (ruff, black) para sintaxis/estilo
+  3-4. En paralelo, con timeout por etapa: testes reales (pytest), linters
+     (ruff, black en modo check) y validación de endpoints
   5. Valida output (coverage, test results, lint status)
   6. Decide: merge a main, revert, o abrir PR para revisión
   7. Persiste resultado en histórico (Supabase/SQLite)
 """
 
+import os
 import sys
 import subprocess
 import json
@@ -21,7 +23,18 @@ from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import logging
 import hashlib
-from dataclasses import dataclass
+import secrets
+import tempfile
+from dataclasses import dataclass, field
+
+from .asgi_probe import DEFAULT_ENDPOINTS
+from .bench import compare as compare_bench
+from .history import HistoryStore
+from .impact import Changes, TestImpactMap, diff_changes, pytest_command
+from .lint import LintCache, lint_files
+from .sharding import DurationStore, run_sharded
+from .stages import StageOutcome, check_cancelled, run_cmd, run_stages
+from .worktrees import Worktree, WorktreePool
 
 # Logging
 logging.basicConfig(
@@ -29,6 +42,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Arranque de deus:app en el probe y el benchmark: sin cron, auto-expansión,
+# pip ni pool de workers
+APP_SANDBOX_ENV = {
+    "NEXO_ENABLE_CRON": "0",
+    "NEXO_AUTO_EXPAND": "false",
+    "AUTO_INSTALL": "false",
+    "NEXO_SANDBOX_POOL": "false",
+}
+# Credenciales de proveedores que la app del worktree nunca recibe
+CREDENTIAL_VARS = (
+    "GEMINI_API_KEY",
+    "GITHUB_TOKEN",
+    "GROQ_API_KEY",
+    "HF_TOKEN",
+    "HUGGINGFACE_API_TOKEN",
+    "MERCADOPAGO_TOKEN",
+    "OLLAMA_URL",
+    "OPENAI_API_KEY",
+    "SUPABASE_KEY",
+    "SUPABASE_URL",
+)
+_CREDENTIAL_MARKERS = ("TOKEN", "KEY", "SECRET", "PASSWORD")
+
+
+def sandbox_app_env(base: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Entorno para importar la app de un worktree sin efectos secundarios.
+
+    Las credenciales quedan vacías en vez de ausentes: load_dotenv no pisa
+    variables existentes, así que un `.env` en el worktree no las repone.
+    ADMIN_TOKEN no puede quedar vacío (un token vacío lo igualaría): recibe
+    uno aleatorio que nadie conoce.
+    """
+    env = dict(os.environ if base is None else base)
+    for name in list(env) + list(CREDENTIAL_VARS):
+        if name in CREDENTIAL_VARS or any(m in name.upper() for m in _CREDENTIAL_MARKERS):
+            env[name] = ""
+    env.update(APP_SANDBOX_ENV)
+    env["ADMIN_TOKEN"] = secrets.token_hex(16)
+    return env
+
 
 @dataclass
 class SandboxResult:
@@ -46,15 +100,29 @@ class SandboxResult:
     commit_hash: str
     decision: str  # 'merge', 'revert', 'review'
     confidence: float  # 0.0-1.0
+    worktree: str = ""
+    api_results: Dict = field(default_factory=dict)
+    stage_timings: Dict = field(default_factory=dict)  # etapa -> segundos
+    bench: Dict = field(default_factory=dict)  # baseline vs patch, deltas, regresiones
 
 
 class SandboxRunner:
     """Ejecutor de sandbox para validar fixes contra APIs reales."""
 
+    # Timeout por etapa de validación (segundos)
+    DEFAULT_STAGE_TIMEOUTS = {"tests": 90.0, "lint": 60.0, "api": 30.0}
+
     def __init__(
         self,
         repo_path: str = "/workspaces/dilma",
         api_base_url: str = "http://localhost:8000",
+        worktree_pool: Optional[WorktreePool] = None,
+        stage_timeouts: Optional[Dict[str, float]] = None,
+        test_shards: Optional[int] = None,
+        api_mode: Optional[str] = None,
+        api_endpoints: Optional[List[Dict]] = None,
+        bench_rounds: Optional[int] = None,
+        bench_thresholds: Optional[Dict[str, float]] = None,
     ):
         """
         Inicializa el runner.
@@ -62,52 +130,110 @@ class SandboxRunner:
         Args:
             repo_path: Ruta al repositorio
             api_base_url: URL base de la API para validaciones reales
+            worktree_pool: Pool de worktrees (compartible entre runners)
+            stage_timeouts: Timeouts por etapa (sobrescribe DEFAULT_STAGE_TIMEOUTS)
+            test_shards: Procesos pytest en paralelo (default: NEXO_SANDBOX_SHARDS
+                o núcleos disponibles; 1 = un solo proceso)
+            api_mode: "asgi" (in-process, default) o "live" (NEXO_SANDBOX_API_MODE)
+            api_endpoints: Endpoints a validar [{"path", "method", "budget_ms"}]
+            bench_rounds: Rondas de benchmark por lado (NEXO_SANDBOX_BENCH_ROUNDS,
+                default 3; 0 desactiva el gate de performance)
+            bench_thresholds: Empeoramiento relativo tolerado por métrica
         """
         self.repo_path = Path(repo_path)
         self.api_base_url = api_base_url
         self.workspace = self.repo_path / "srodolfobarbosa"
         self.sandbox_dir = self.workspace / ".sandbox"
         self.sandbox_dir.mkdir(exist_ok=True)
-        self.history_file = self.sandbox_dir / "history.jsonl"
-
-    def create_ephemeral_branch(self) -> str:
-        """Crea un branch efêmero para el sandbox."""
+        self.history_file = self.sandbox_dir / "history.jsonl"  # legado, migrado
+        self.history = HistoryStore(self.sandbox_dir / "history.db")
+        self.history.migrate_jsonl(self.history_file, "sandbox")
+        self.worktrees = worktree_pool or WorktreePool(self.repo_path)
+        self.stage_timeouts = {**self.DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+        self.test_paths = ["srodolfobarbosa/test_smoke.py"]
+        self.test_impact = TestImpactMap(self.sandbox_dir / "test_impact.json")
+        self.test_shards = test_shards or int(
+            os.getenv("NEXO_SANDBOX_SHARDS", str(os.cpu_count() or 1))
+        )
+        self.test_durations = DurationStore(self.sandbox_dir / "test_durations.json")
+        self.lint_cache = LintCache(self.sandbox_dir / "lint_cache.json")
+        self.api_mode = api_mode or os.getenv("NEXO_SANDBOX_API_MODE", "asgi")
+        self.api_endpoints = api_endpoints or DEFAULT_ENDPOINTS
+        self.bench_rounds = (
+            bench_rounds
+            if bench_rounds is not None
+            else int(os.getenv("NEXO_SANDBOX_BENCH_ROUNDS", "3"))
+        )
+        self.bench_thresholds = bench_thresholds or {}
+
+    def create_ephemeral_branch(self, base_ref: Optional[str] = None) -> Worktree:
+        """
+        Crea un branch efêmero para el sandbox en un worktree del pool, sobre
+        `base_ref` (default: la base del pool, <remote>/<main>).
+        """
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
         branch_name = f"sandbox-validate-{timestamp}"
 
         try:
-            # Checkout a main y crea branch nuevo
-            subprocess.run(
-                ["git", "checkout", "main"],
-                cwd=self.repo_path,
-                capture_output=True,
-                check=True,
-            )
-            subprocess.run(
-                ["git", "pull", "origin", "main"],
-                cwd=self.repo_path,
-                capture_output=True,
-                check=True,
-            )
-            subprocess.run(
-                ["git", "checkout", "-b", branch_name],
-                cwd=self.repo_path,
-                capture_output=True,
-                check=True,
-            )
-            logger.info(f"✓ Branch efêmero creado: {branch_name}")
-            return branch_name
+            wt = self.worktrees.acquire(branch_name, base_ref=base_ref)
+            logger.info(f"✓ Branch efêmero creado: {branch_name} ({wt.path})")
+            return wt
         except subprocess.CalledProcessError as e:
-            logger.error(f"✗ Error creando branch: {e}")
+            logger.error(f"✗ Error creando branch: {e} {e.stderr or ''}")
             raise
 
-    def apply_patches(self, patch_files: List[str]) -> bool:
-        """Aplica patches reales en el branch actual."""
+    def snapshot_local_changes(self) -> Optional[Tuple[str, str]]:
+        """
+        Guarda los cambios sin commitear del working copy como patch.
+
+        Antes el sandbox validaba el working copy en sitio; ahora esos cambios
+        se llevan al worktree como un patch más, sin tocar el working copy.
+        Incluye los archivos nuevos no ignorados (vía un índice temporal, el
+        índice del usuario no se toca) y el patch es relativo al HEAD local,
+        que es donde hay que aplicarlo.
+
+        Returns:
+            (ruta del patch, commit del HEAD local) o None si no hay cambios
+        """
+        head = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+        )
+        if head.returncode != 0:
+            return None
+        head_commit = head.stdout.strip()
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "GIT_INDEX_FILE": str(Path(tmp) / "index")}
+            for args in (["read-tree", head_commit], ["add", "-A"]):
+                staged = subprocess.run(
+                    ["git", *args], cwd=self.repo_path, capture_output=True, text=True, env=env
+                )
+                if staged.returncode != 0:
+                    logger.error(f"✗ Error capturando cambios locales: {staged.stderr}")
+                    return None
+            result = subprocess.run(
+                ["git", "diff", "--cached", "--binary", head_commit],
+                cwd=self.repo_path,
+                capture_output=True,
+                text=True,
+                env=env,
+            )
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+        digest = hashlib.md5(result.stdout.encode()).hexdigest()[:8]
+        patch_file = self.sandbox_dir / f"local-{digest}.patch"
+        patch_file.write_text(result.stdout)
+        return str(patch_file), head_commit
+
+    def apply_patches(self, patch_files: List[str], cwd: Optional[Path] = None) -> bool:
+        """Aplica patches reales en el branch actual (del worktree `cwd`)."""
         for patch_file in patch_files:
             try:
                 result = subprocess.run(
-                    ["git", "apply", patch_file],
-                    cwd=self.repo_path,
+                    ["git", "apply", str(Path(patch_file).resolve())],
+                    cwd=cwd or self.repo_path,
                     capture_output=True,
                     text=True,
                 )
@@ -122,10 +248,16 @@ class SandboxRunner:
                 return False
         return True
 
-    def run_tests(self) -> Tuple[bool, Dict]:
+    def run_tests(
+        self, cwd: Optional[Path] = None, changes: Optional[Changes] = None
+    ) -> Tuple[bool, Dict]:
         """
         Roda testes reales contra la API en vivo.
 
+        Con `changes` (diff resuelto a funciones) corren sólo los tests que
+        el mapa de impacto asocia a lo cambiado; periódicamente, o si el mapa
+        no alcanza, corre la suite completa y reconstruye el mapa.
+
         Returns:
             (success: bool, results: Dict con datos de test)
         """
@@ -140,48 +272,58 @@ class SandboxRunner:
             "duration": 0.0,
         }
 
+        cwd = cwd or self.repo_path
+
         try:
             start_time = time.time()
 
-            # Roda pytest con coverage real
-            cmd = [
-                "python",
-                "-m",
-                "pytest",
-                "srodolfobarbosa/test_smoke.py",
-                "-v",
-                "--tb=short",
-                "--cov=srodolfobarbosa",
-                "--cov-report=json",
-            ]
+            selection, reason = self.test_impact.plan(changes)
+            test_results["impact"] = {
+                "mode": "full" if selection is None else "impact",
+                "reason": reason,
+                "selected": None if selection is None else len(selection),
+            }
+            if selection is None:
+                logger.info(f"🧪 Suite completa ({reason})")
+            else:
+                logger.info(f"🎯 {len(selection)} tests afectados por el cambio")
 
-            result = subprocess.run(
-                cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=60,  # 60 segundos máximo
+            # Roda pytest con coverage real (por test, alimenta el mapa)
+            returncode, run_results = self._run_pytest(
+                selection or self.test_paths, cwd
             )
-
+            if selection is not None and run_results.pop("stale", False):
+                # Test del mapa renombrado/borrado: cae a la suite completa
+                logger.warning("⚠ Selección obsoleta, corriendo suite completa")
+                selection = None
+                test_results["impact"].update(mode="full", reason="selección obsoleta")
+                returncode, run_results = self._run_pytest(self.test_paths, cwd)
+            run_results.pop("stale", None)
+
+            test_results.update(run_results)
             test_results["duration"] = time.time() - start_time
-            test_results["raw_output"] = result.stdout
+            if test_results["success"] and not test_results.get("passed"):
+                # Cero tests ejecutados nunca cuenta como aprobado
+                test_results["success"] = False
+                test_results["errors"].append("ningún test ejecutado")
 
-            # Parsea pytest output
-            if result.returncode == 0:
-                test_results["passed"] = self._count_passed_tests(result.stdout)
-                test_results["success"] = True
+            if test_results["success"]:
                 logger.info(f"✓ Tests pasados: {test_results['passed']}")
             else:
-                test_results["failed"] = self._count_failed_tests(result.stdout)
-                test_results["errors"] = result.stdout.split("\n")[-10:]
-                test_results["success"] = False
                 logger.error(f"✗ Tests falharon: {test_results['failed']}")
 
-            # Carga coverage.json si existe
-            cov_file = self.repo_path / ".coverage"
+            # Actualiza el mapa de impacto y carga coverage.json si existe
+            # (no si la etapa ya fue cancelada: el worktree está por liberarse)
+            check_cancelled()
+            cov_file = cwd / ".coverage"
+            if cov_file.exists() and returncode in (0, 1):
+                try:
+                    self.test_impact.refresh(cwd, full=selection is None)
+                except Exception as e:
+                    logger.warning(f"No se pudo actualizar el mapa de impacto: {e}")
             if cov_file.exists():
                 try:
-                    cov_json = self.repo_path / "coverage.json"
+                    cov_json = cwd / "coverage.json"
                     if cov_json.exists():
                         with open(cov_json) as f:
                             cov_data = json.load(f)
@@ -203,28 +345,91 @@ class SandboxRunner:
             logger.error(f"✗ Exception en tests: {e}")
             return False, test_results
 
-    def run_linters(self) -> Tuple[bool, Dict]:
+    def _run_pytest(self, targets: List[str], cwd: Path) -> Tuple[int, Dict]:
+        """
+        Corre pytest sobre `targets`: repartido en shards si `test_shards` > 1,
+        si no en un solo proceso. Devuelve (returncode, resultados).
+        """
+        if self.test_shards > 1:
+            try:
+                report = run_sharded(
+                    targets,
+                    cwd,
+                    self.test_shards,
+                    self.test_durations,
+                    timeout=60,  # 60 segundos máximo por shard
+                    cov_source="srodolfobarbosa",
+                )
+            except RuntimeError as e:
+                return 4, {"success": False, "errors": [str(e)], "stale": "not found" in str(e)}
+            return (0 if report["success"] else 1), report
+
+        cmd = pytest_command(targets, rootdir=cwd, cov_source="srodolfobarbosa")
+        result = run_cmd(cmd, cwd=cwd, timeout=60)  # 60 segundos máximo
+        results = {
+            "raw_output": result.stdout,
+            "stale": result.returncode == 4
+            and "not found" in result.stdout + result.stderr,
+        }
+
+        # Parsea pytest output
+        if result.returncode == 0:
+            results["passed"] = self._count_passed_tests(result.stdout)
+            results["success"] = True
+        else:
+            results["failed"] = self._count_failed_tests(result.stdout)
+            results["errors"] = result.stdout.split("\n")[-10:]
+            results["success"] = False
+        return result.returncode, results
+
+    def run_linters(
+        self, cwd: Optional[Path] = None, files: Optional[List[str]] = None
+    ) -> Tuple[bool, Dict]:
         """
         Roda linters reales (ruff, black) en el código modificado.
 
+        Sólo check: durante la validación no se reescriben archivos (las
+        etapas corren en paralelo sobre el mismo worktree).
+
+        Args:
+            files: .py cambiados contra la base (relativos a `cwd`). Se
+                lintean sólo esos, con cache por contenido. None = todo
+                `srodolfobarbosa/` como antes.
+
         Returns:
             (success: bool, results: Dict)
         """
+        cwd = cwd or self.repo_path
+        if files is not None:
+            logger.info(f"🔍 Ejecutando linters en {len(files)} archivo(s) cambiado(s)...")
+            try:
+                lint_results = lint_files(files, cwd, self.lint_cache)
+            except subprocess.TimeoutExpired:
+                return False, {"success": False, "issues": ["Linters timeout"]}
+            except Exception as e:
+                logger.error(f"✗ Exception en linters: {e}")
+                return False, {"success": False, "issues": [str(e)]}
+            logger.info(
+                f"{'✓' if lint_results['success'] else '⚠'} Lint: "
+                f"{lint_results['ruff']['errors']} issue(s) ruff, "
+                f"{lint_results['black']['unformatted']} sin formato "
+                f"({lint_results['cached']}/{len(files)} desde cache)"
+            )
+            return lint_results["success"], lint_results
+
         logger.info("🔍 Ejecutando linters (ruff, black)...")
 
         lint_results = {
             "ruff": {"errors": 0, "warnings": 0, "fixed": 0},
-            "black": {"checked": 0, "formatted": 0},
+            "black": {"checked": 0, "formatted": 0, "unformatted": 0},
             "success": True,
             "issues": [],
         }
 
         try:
-            # Ruff: check y fix
-            ruff_cmd = ["ruff", "check", "--select=E,F,W", "srodolfobarbosa/", "--fix"]
-            result = subprocess.run(
-                ruff_cmd, cwd=self.repo_path, capture_output=True, text=True, timeout=30
-            )
+            # Ruff: check
+            ruff_cmd = ["ruff", "check", "--select=E,F,W", "srodolfobarbosa/"]
+            result = run_cmd(ruff_cmd, cwd=cwd, timeout=30)
 
             if "error" in result.stdout.lower() or result.returncode != 0:
                 lint_results["ruff"]["errors"] = self._count_lint_errors(result.stdout)
@@ -238,24 +443,20 @@ class SandboxRunner:
 
             # Black: check format
             black_cmd = ["black", "--check", "srodolfobarbosa/"]
-            result = subprocess.run(
-                black_cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                timeout=30,
-            )
+            result = run_cmd(black_cmd, cwd=cwd, timeout=30)
 
             if result.returncode != 0:
-                logger.warning("⚠ Black detectó archivos sin formato")
-                # Aplica black
-                subprocess.run(
-                    ["black", "srodolfobarbosa/"],
-                    cwd=self.repo_path,
-                    capture_output=True,
-                    timeout=30,
+                # Como antes, formato no bloquea; se reporta sin reformatear
+                unformatted = [
+                    line.split("would reformat ", 1)[1]
+                    for line in result.stderr.splitlines()
+                    if line.startswith("would reformat ")
+                ]
+                lint_results["black"]["unformatted"] = len(unformatted) or 1
+                lint_results["issues"].extend(
+                    f"black: {path}" for path in unformatted[:20]
                 )
-                lint_results["black"]["formatted"] = 1
+                logger.warning("⚠ Black detectó archivos sin formato")
             else:
                 lint_results["black"]["checked"] = 1
                 logger.info("✓ Black OK")
@@ -271,17 +472,25 @@ class SandboxRunner:
             logger.error(f"✗ Exception en linters: {e}")
             return False, lint_results
 
-    def validate_api_endpoints(self) -> Tuple[bool, Dict]:
+    def validate_api_endpoints(self, cwd: Optional[Path] = None) -> Tuple[bool, Dict]:
         """
         Valida que los endpoints críticos sigan funcionando.
-        Hace requests reales contra la API.
+
+        Modo "asgi" (default): carga `deus.app` del worktree en un proceso
+        aparte y lo sondea in-process, sin servidor, con presupuesto de
+        latencia y p50/p95 por endpoint. Modo "live": requests reales contra
+        `api_base_url`.
 
         Returns:
             (success: bool, results: Dict)
         """
+        if self.api_mode == "asgi":
+            return self._probe_asgi(cwd or self.repo_path)
+
         logger.info("🌐 Validando endpoints de API en vivo...")
 
         api_results = {
+            "mode": "live",
             "endpoints_tested": 0,
             "endpoints_ok": 0,
             "endpoints_failed": [],
@@ -294,13 +503,8 @@ class SandboxRunner:
             logger.warning("⚠ requests no disponible, saltando validación de API")
             return True, api_results
 
-        # Endpoints críticos a testar
-        critical_endpoints = [
-            ("/insights/pending", "GET"),
-            ("/admin/health", "GET"),
-        ]
-
-        for endpoint, method in critical_endpoints:
+        for ep in self.api_endpoints:
+            endpoint, method = ep["path"], ep.get("method", "GET")
             try:
                 url = f"{self.api_base_url}{endpoint}"
                 api_results["endpoints_tested"] += 1
@@ -308,7 +512,7 @@ class SandboxRunner:
                 if method == "GET":
                     resp = requests.get(url, timeout=5)
                 elif method == "POST":
-                    resp = requests.post(url, json={}, timeout=5)
+                    resp = requests.post(url, json=ep.get("body", {}), timeout=5)
 
                 if 200 <= resp.status_code < 400:
                     api_results["endpoints_ok"] += 1
@@ -321,18 +525,167 @@ class SandboxRunner:
                     logger.warning(f"⚠ {method} {endpoint} → {resp.status_code}")
 
             except requests.exceptions.ConnectionError:
+                # Sin servidor no hay validación: para eso está el modo "asgi"
                 logger.warning(
                     f"⚠ No se puede conectar a {self.api_base_url}{endpoint}"
                 )
-                # No falla, puede que API no esté en vivo
+                api_results["endpoints_failed"].append(f"{endpoint} (sin conexión)")
+                api_results["success"] = False
             except Exception as e:
                 logger.warning(f"⚠ Error validando {endpoint}: {e}")
                 api_results["endpoints_failed"].append(f"{endpoint} (exception)")
 
         return api_results["success"], api_results
 
+    def _probe_asgi(self, cwd: Path) -> Tuple[bool, Dict]:
+        """Sondea `deus:app` del worktree vía ASGI en un subproceso (imports aislados)."""
+        logger.info("🌐 Validando endpoints in-process (ASGI, sin servidor)...")
+        cmd = [
+            "python",
+            "-m",
+            "srodolfobarbosa.sandbox.asgi_probe",
+            "--app",
+            "deus:app",
+            "--app-dir",
+            "srodolfobarbosa",
+            "--endpoints",
+            json.dumps(self.api_endpoints),
+        ]
+        failed = {"mode": "asgi", "endpoints_tested": 0, "endpoints_ok": 0, "success": False}
+        try:
+            result = run_cmd(
+                cmd, cwd=cwd, timeout=self.stage_timeouts["api"], env=sandbox_app_env()
+            )
+        except subprocess.TimeoutExpired:
+            return False, {**failed, "endpoints_failed": ["probe timeout"]}
+        report = None
+        for line in reversed(result.stdout.splitlines()):
+            if line.startswith("{"):
+                try:
+                    report = json.loads(line)
+                    break
+                except ValueError:
+                    continue
+        if report is None:
+            return False, {
+                **failed,
+                "endpoints_failed": ["probe sin reporte"],
+                "stderr": result.stderr[-2000:],
+            }
+        for name, ep in report.get("endpoints", {}).items():
+            mark = "✓" if ep["ok"] else "⚠"
+            logger.info(
+                f"{mark} {name} → {ep['status_codes']} "
+                f"p50={ep['p50_ms']}ms p95={ep['p95_ms']}ms (presupuesto {ep['budget_ms']}ms)"
+            )
+        return report["success"], report
+
+    def run_validation_stages(
+        self, cwd: Optional[Path] = None, changes: Optional[Changes] = None
+    ) -> Dict[str, StageOutcome]:
+        """
+        Corre tests, linters y API en paralelo, cada uno con su timeout.
+
+        Si los tests fallan la decisión ya es 'revert', así que las etapas
+        que sigan corriendo se cancelan. El tiempo total tiende al de la
+        etapa más lenta en vez de a la suma.
+        """
+        logger.info("⚡ Ejecutando etapas de validación en paralelo...")
+        lint_targets = None
+        if changes is not None:
+            root = Path(cwd or self.repo_path)
+            lint_targets = sorted(
+                path
+                for path in changes
+                if path.endswith(".py") and (root / path).exists()
+            )
+        outcomes = run_stages(
+            {
+                "tests": lambda: self.run_tests(cwd=cwd, changes=changes),
+                "lint": lambda: self.run_linters(cwd=cwd, files=lint_targets),
+                "api": lambda: self.validate_api_endpoints(cwd=cwd),
+            },
+            timeouts=self.stage_timeouts,
+            fail_fast=("tests",),
+        )
+        for outcome in outcomes.values():
+            logger.info(
+                f"  ⏱ {outcome.name}: {outcome.status} ({outcome.duration:.1f}s)"
+            )
+        return outcomes
+
+    def _bench_once(self, cwd: Path) -> Dict:
+        cmd = [
+            "python",
+            "-m",
+            "srodolfobarbosa.sandbox.bench",
+            "--app-dir",
+            "srodolfobarbosa",
+        ]
+        try:
+            result = run_cmd(cmd, cwd=cwd, timeout=180, env=sandbox_app_env())
+        except subprocess.TimeoutExpired:
+            return {"error": "bench timeout"}
+        for line in reversed(result.stdout.splitlines()):
+            if line.startswith("{"):
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    continue
+        return {"error": "bench sin reporte", "stderr": result.stderr[-500:]}
+
+    def run_benchmarks(self, wt: Worktree) -> Dict:
+        """
+        Benchmarks del baseline (worktree detached en la base) y del patch.
+
+        Corren en secuencia, alternando lados ronda a ronda para que el
+        ruido de la máquina afecte a ambos por igual.
+
+        El baseline necesita un segundo slot mientras `wt` sigue reservado:
+        si no hay uno libre en el momento no se espera (otras validaciones
+        pueden estar haciendo lo mismo), el gate se omite con "skipped".
+        """
+        if self.bench_rounds <= 0:
+            return {}
+        logger.info(f"🏎 Benchmarks baseline vs patch ({self.bench_rounds} rondas)...")
+        try:
+            base_wt = self.worktrees.acquire(None, base_ref=wt.base_ref, timeout=0)
+        except Exception as e:
+            bench = self._bench_skipped(f"sin worktree para el baseline: {e}")
+            logger.warning(f"⚠ Benchmark omitido: {bench['skipped']}")
+            return bench
+        base_runs, patched_runs = [], []
+        try:
+            for _ in range(self.bench_rounds):
+                base_runs.append(self._bench_once(base_wt.path))
+                patched_runs.append(self._bench_once(wt.path))
+            bench = compare_bench(base_runs, patched_runs, self.bench_thresholds)
+        except Exception as e:
+            bench = self._bench_skipped(f"benchmark falló: {e}")
+        finally:
+            self.worktrees.release(base_wt)
+        if bench.get("skipped"):
+            logger.warning(f"⚠ Benchmark omitido: {bench['skipped']}")
+        for metric, delta in bench["deltas"].items():
+            mark = "⚠" if metric in bench["regressions"] else "✓"
+            logger.info(
+                f"  {mark} {metric}: {bench['base'][metric]} → "
+                f"{bench['patched'][metric]} ({delta:+.1f}%)"
+            )
+        return bench
+
+    @staticmethod
+    def _bench_skipped(reason: str) -> Dict:
+        """Resultado de un gate omitido, con la forma de `compare_bench`."""
+        return {"base": {}, "patched": {}, "deltas": {}, "regressions": [], "skipped": reason}
+
     def decide_merge(
-        self, test_success: bool, lint_success: bool, api_success: bool, coverage: float
+        self,
+        test_success: bool,
+        lint_success: bool,
+        api_success: bool,
+        coverage: float,
+        bench: Optional[Dict] = None,
     ) -> Tuple[str, float]:
         """
         Decide si mergear, revertir o abrir PR.
@@ -342,6 +695,7 @@ class SandboxRunner:
         - Linters deben pasar (o ser auto-fixables)
         - Coverage no debe bajar
         - API endpoints deben estar ok
+        - Sin regresiones de performance (si no, nunca merge automático)
 
         Returns:
             (decision: str, confidence: float)
@@ -376,11 +730,19 @@ class SandboxRunner:
             confidence += 0.1
             logger.info(f"  ✓ Coverage OK {coverage:.1%} (+0.1)")
 
+        regressions = (bench or {}).get("regressions", [])
+        if regressions:
+            confidence -= 0.15 * len(regressions)
+            logger.warning(
+                f"  ⚠ Regresiones de performance {regressions} "
+                f"(-{0.15 * len(regressions):.2f})"
+            )
+
         # Decisión basada en confianza
-        if confidence >= 0.85 and test_success and lint_success:
+        if confidence >= 0.85 and test_success and lint_success and not regressions:
             decision = "merge"
             logger.info(f"🟢 DECISIÓN: MERGE (confianza={confidence:.2f})")
-        elif confidence >= 0.70 and test_success:
+        elif (confidence >= 0.70 or regressions) and test_success:
             decision = "review"
             logger.info(f"🟡 DECISIÓN: REVIEW (confianza={confidence:.2f})")
         else:
@@ -389,24 +751,27 @@ class SandboxRunner:
 
         return decision, confidence
 
-    def commit_and_push(self, branch_name: str, message: str) -> bool:
-        """Commita cambios en el branch actual."""
+    def commit_and_push(
+        self, branch_name: str, message: str, cwd: Optional[Path] = None
+    ) -> bool:
+        """Commita cambios en el branch actual (del worktree `cwd`)."""
+        cwd = cwd or self.repo_path
         try:
             subprocess.run(
                 ["git", "add", "-A"],
-                cwd=self.repo_path,
+                cwd=cwd,
                 capture_output=True,
                 check=True,
             )
             subprocess.run(
                 ["git", "commit", "-m", message],
-                cwd=self.repo_path,
+                cwd=cwd,
                 capture_output=True,
                 check=True,
             )
             subprocess.run(
                 ["git", "push", "-u", "origin", branch_name],
-                cwd=self.repo_path,
+                cwd=cwd,
                 capture_output=True,
                 check=True,
             )
@@ -417,38 +782,32 @@ class SandboxRunner:
             return False
 
     def execute_decision(self, decision: str, branch_name: str) -> bool:
-        """Ejecuta la decisión tomada."""
+        """
+        Ejecuta la decisión tomada.
+
+        Se llama con el worktree ya liberado: opera sólo sobre refs, sin
+        checkout en el working copy principal.
+        """
         try:
             if decision == "merge":
-                # Merge al main
-                subprocess.run(
-                    ["git", "checkout", "main"],
-                    cwd=self.repo_path,
-                    capture_output=True,
-                    check=True,
-                )
+                # Fast-forward de main en el remoto (el push rechaza lo que no es ff)
                 subprocess.run(
-                    ["git", "merge", "--ff-only", branch_name],
+                    ["git", "push", "origin", f"{branch_name}:main"],
                     cwd=self.repo_path,
                     capture_output=True,
                     check=True,
                 )
+                # Actualiza main local si no está en checkout (best effort)
                 subprocess.run(
-                    ["git", "push", "origin", "main"],
+                    ["git", "fetch", ".", f"{branch_name}:main"],
                     cwd=self.repo_path,
                     capture_output=True,
-                    check=True,
+                    check=False,
                 )
                 logger.info(f"✓ Mergeado a main: {branch_name}")
 
             elif decision == "revert":
                 # Delete branch sin merge
-                subprocess.run(
-                    ["git", "checkout", "main"],
-                    cwd=self.repo_path,
-                    capture_output=True,
-                    check=True,
-                )
                 subprocess.run(
                     ["git", "branch", "-D", branch_name],
                     cwd=self.repo_path,
@@ -478,6 +837,7 @@ class SandboxRunner:
             "sandbox_id": result.sandbox_id,
             "timestamp": result.timestamp,
             "branch": result.branch_name,
+            "commit_hash": result.commit_hash,
             "success": result.success,
             "decision": result.decision,
             "confidence": result.confidence,
@@ -485,19 +845,28 @@ class SandboxRunner:
             "lint_results": result.lint_results,
             "coverage": result.coverage,
             "duration": result.duration_seconds,
+            "worktree": result.worktree,
+            "api_results": result.api_results,
+            "stage_timings": result.stage_timings,
+            "bench": result.bench,
         }
 
-        with open(self.history_file, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        self.history.record("sandbox", entry)
 
         logger.info("💾 Resultado guardado en histórico")
 
-    def run(self, patch_files: Optional[List[str]] = None) -> SandboxResult:
+    def run(
+        self,
+        patch_files: Optional[List[str]] = None,
+        include_local_changes: bool = True,
+    ) -> SandboxResult:
         """
-        Ejecuta el flujo completo de sandbox.
+        Ejecuta el flujo completo de sandbox en un worktree propio.
 
         Args:
             patch_files: Lista de archivos patch a aplicar (opcional)
+            include_local_changes: Sin patches, valida los cambios sin
+                commitear del working copy (comportamiento anterior)
 
         Returns:
             SandboxResult con datos de la ejecución
@@ -511,47 +880,89 @@ class SandboxRunner:
         logger.info(f"🏗 SANDBOX RUNNER - ID: {sandbox_id}")
         logger.info(f"{'='*60}\n")
 
-        try:
-            # 1. Crea branch efêmero
-            branch_name = self.create_ephemeral_branch()
-
-            # 2. Aplica patches si es necesario
-            if patch_files:
-                if not self.apply_patches(patch_files):
-                    logger.error("✗ Error aplicando patches")
-                    return SandboxResult(
-                        sandbox_id=sandbox_id,
-                        branch_name=branch_name,
-                        timestamp=timestamp,
-                        success=False,
-                        test_results={},
-                        lint_results={},
-                        coverage=None,
-                        error_logs=["Error aplicando patches"],
-                        duration_seconds=time.time() - start_time,
-                        commit_hash="",
-                        decision="revert",
-                        confidence=0.0,
-                    )
+        base_ref = None
+        if not patch_files and include_local_changes:
+            snapshot = self.snapshot_local_changes()
+            if snapshot:
+                # El patch del working copy aplica sobre el HEAD local, no sobre main
+                local_patch, base_ref = snapshot
+                patch_files = [local_patch]
 
-                if not self.commit_and_push(
-                    branch_name, "sandbox: aplicados patches para validación"
-                ):
-                    logger.warning("⚠ Error pusheando branch")
-
-            # 3. Roda testes reales
-            test_success, test_results = self.run_tests()
+        wt = None
+        try:
+            # 1. Crea branch efêmero en un worktree del pool
+            wt = self.create_ephemeral_branch(base_ref=base_ref)
+            branch_name = wt.branch
 
-            # 4. Roda linters
-            lint_success, lint_results = self.run_linters()
+            try:
+                # 2. Aplica patches si es necesario
+                if patch_files:
+                    if not self.apply_patches(patch_files, cwd=wt.path):
+                        logger.error("✗ Error aplicando patches")
+                        return SandboxResult(
+                            sandbox_id=sandbox_id,
+                            branch_name=branch_name,
+                            timestamp=timestamp,
+                            success=False,
+                            test_results={},
+                            lint_results={},
+                            coverage=None,
+                            error_logs=["Error aplicando patches"],
+                            duration_seconds=time.time() - start_time,
+                            commit_hash="",
+                            decision="revert",
+                            confidence=0.0,
+                            worktree=str(wt.path),
+                        )
+
+                    if not self.commit_and_push(
+                        branch_name,
+                        "sandbox: aplicados patches para validación",
+                        cwd=wt.path,
+                    ):
+                        logger.warning("⚠ Error pusheando branch")
+
+                commit_hash = subprocess.run(
+                    ["git", "rev-parse", "HEAD"],
+                    cwd=wt.path,
+                    capture_output=True,
+                    text=True,
+                ).stdout.strip()
 
-            # 5. Valida API endpoints
-            api_success, api_results = self.validate_api_endpoints()
+                # 3-5. Tests (sólo los afectados), linters y API en paralelo
+                try:
+                    changes = diff_changes(wt.path, wt.base_ref)
+                except subprocess.CalledProcessError as e:
+                    logger.warning(f"⚠ Sin diff para selección de tests: {e}")
+                    changes = None
+                stages = self.run_validation_stages(cwd=wt.path, changes=changes)
+                test_success, test_results = (
+                    stages["tests"].success,
+                    stages["tests"].results,
+                )
+                lint_success, lint_results = (
+                    stages["lint"].success,
+                    stages["lint"].results,
+                )
+                api_success, api_results = stages["api"].success, stages["api"].results
+                stage_timings = {
+                    name: round(outcome.duration, 3) for name, outcome in stages.items()
+                }
+
+                # 5b. Gate de performance: baseline vs patch (sólo si tiene chance de merge)
+                bench = {}
+                if test_success:
+                    bench_start = time.time()
+                    bench = self.run_benchmarks(wt)
+                    stage_timings["bench"] = round(time.time() - bench_start, 3)
+            finally:
+                # Libera el worktree (y la rama) antes de operar sobre refs
+                self.worktrees.release(wt)
 
             # 6. Toma decisión
             coverage = test_results.get("coverage", 0.0)
             decision, confidence = self.decide_merge(
-                test_success, lint_success, api_success, coverage
+                test_success, lint_success, api_success, coverage, bench=bench
             )
 
             # 7. Ejecuta decisión
@@ -568,9 +979,13 @@ class SandboxRunner:
                 coverage=coverage,
                 error_logs=[],
                 duration_seconds=time.time() - start_time,
-                commit_hash="",  # TODO: obtener hash real
+                commit_hash=commit_hash,
                 decision=decision,
                 confidence=confidence,
+                worktree=str(wt.path),
+                api_results=api_results,
+                stage_timings=stage_timings,
+                bench=bench,
             )
 
             self.save_result(result)
@@ -588,7 +1003,7 @@ class SandboxRunner:
             logger.error(f"\n✗ SANDBOX FAILED: {e}")
             return SandboxResult(
                 sandbox_id=sandbox_id,
-                branch_name="",
+                branch_name=wt.branch if wt else "",
                 timestamp=timestamp,
                 success=False,
                 test_results={},
@@ -599,6 +1014,7 @@ class SandboxRunner:
                 commit_hash="",
                 decision="review",
                 confidence=0.0,
+                worktree=str(wt.path) if wt else "",
             )
 
     def _count_passed_tests(self, output: str) -> int:
@@ -644,11 +1060,46 @@ def main():
         "--api-url", default="http://localhost:8000", help="URL base de la API"
     )
     parser.add_argument("--patch", nargs="*", help="Archivos patch a aplicar")
+    parser.add_argument(
+        "--api-mode",
+        choices=["asgi", "live"],
+        default=None,
+        help="asgi: sondeo in-process sin servidor; live: contra --api-url",
+    )
+    parser.add_argument(
+        "--endpoints", default=None, help="Archivo JSON con los endpoints a validar"
+    )
+    parser.add_argument(
+        "--no-local-changes",
+        action="store_true",
+        help="Sin patches, no llevar los cambios sin commitear al sandbox",
+    )
+    parser.add_argument(
+        "--cleanup-worktrees",
+        action="store_true",
+        help="Elimina los worktrees libres del pool y sale",
+    )
 
     args = parser.parse_args()
 
-    runner = SandboxRunner(repo_path=args.repo, api_base_url=args.api_url)
-    result = runner.run(patch_files=args.patch)
+    endpoints = None
+    if args.endpoints:
+        with open(args.endpoints) as f:
+            endpoints = json.load(f)
+
+    runner = SandboxRunner(
+        repo_path=args.repo,
+        api_base_url=args.api_url,
+        api_mode=args.api_mode,
+        api_endpoints=endpoints,
+    )
+    if args.cleanup_worktrees:
+        runner.worktrees.cleanup()
+        sys.exit(0)
+
+    result = runner.run(
+        patch_files=args.patch, include_local_changes=not args.no_local_changes
+    )
 
     # Retorna exit code basado en decisión
     sys.exit(0 if result.decision in ["merge", "review"] else 1)
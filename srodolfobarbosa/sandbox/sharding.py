@@ -0,0 +1,245 @@
+"""
+Sharding de pytest entre procesos, balanceado por duraciones históricas.
+
+Los tests recolectados (`pytest --collect-only`) se reparten en N shards con
+LPT (el más lento primero, al shard menos cargado). Cada shard es un pytest
+propio con su JUnit XML y, si hay pytest-cov, su propio `COVERAGE_FILE`; al
+final se combinan coverage y resultados en un único reporte. Las duraciones
+de cada test se guardan (media móvil) para balancear las próximas corridas.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import statistics
+import subprocess
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .impact import coverage_available
+from .stages import run_cmd, stage_cancelled, stage_procs
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DURATION = 1.0  # segundos, para tests sin historial
+
+
+class DurationStore:
+    """Duraciones por nodeid (media móvil exponencial), persistidas en JSON."""
+
+    def __init__(self, path: Path, alpha: float = 0.5):
+        self.path = Path(path)
+        self.alpha = alpha
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def load(self) -> Dict[str, float]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def update(self, durations: Dict[str, float]):
+        if not durations:
+            return
+        with self._locked():
+            data = self.load()
+            for nodeid, seconds in durations.items():
+                old = data.get(nodeid)
+                data[nodeid] = round(
+                    seconds if old is None else old + self.alpha * (seconds - old), 4
+                )
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, self.path)
+
+
+def collect(targets: List[str], cwd: Path, timeout: float = 60) -> List[str]:
+    """Nodeids que pytest recolecta para `targets` (vacío si la colección falla)."""
+    result = run_cmd(
+        [
+            "python",
+            "-m",
+            "pytest",
+            "--collect-only",
+            "-q",
+            f"--rootdir={cwd}",
+            *targets,
+        ],
+        cwd=cwd,
+        timeout=timeout,
+    )
+    if result.returncode not in (0, 5):  # 5: no se recolectó nada
+        raise RuntimeError(
+            f"pytest --collect-only falló ({result.returncode}): "
+            + (result.stdout + result.stderr).strip()[-500:]
+        )
+    return [line.strip() for line in result.stdout.splitlines() if "::" in line]
+
+
+def plan_shards(
+    nodeids: List[str], durations: Dict[str, float], shards: int
+) -> List[List[str]]:
+    """Reparte los tests en `shards` grupos de duración total parecida (LPT)."""
+    known = [durations[n] for n in nodeids if n in durations]
+    default = statistics.median(known) if known else DEFAULT_DURATION
+    weighted = sorted(nodeids, key=lambda n: durations.get(n, default), reverse=True)
+    shards = max(1, min(shards, len(nodeids)))
+    groups: List[List[str]] = [[] for _ in range(shards)]
+    loads = [0.0] * shards
+    for nodeid in weighted:
+        i = loads.index(min(loads))
+        groups[i].append(nodeid)
+        loads[i] += durations.get(nodeid, default)
+    return groups
+
+
+def _junit_key(nodeid: str) -> Tuple[str, str]:
+    """(classname, name) que pytest escribe en el JUnit XML para un nodeid."""
+    parts = nodeid.split("::")
+    module = parts[0][:-3] if parts[0].endswith(".py") else parts[0]
+    classname = ".".join([module.replace("/", "."), *parts[1:-1]])
+    return classname, parts[-1]
+
+
+def parse_junit(path: Path, nodeids: List[str]) -> Dict[str, Dict]:
+    """nodeid -> {"outcome", "duration", "message"} a partir del JUnit XML."""
+    by_key = {_junit_key(n): n for n in nodeids}
+    results: Dict[str, Dict] = {}
+    for case in ET.parse(path).getroot().iter("testcase"):
+        key = (case.get("classname", ""), case.get("name", ""))
+        nodeid = by_key.get(key, "::".join(k for k in key if k))
+        outcome, message = "passed", ""
+        for child in case:
+            if child.tag in ("failure", "error"):
+                outcome, message = "failed", child.get("message", "")
+                break
+            if child.tag == "skipped":
+                outcome, message = "skipped", child.get("message", "")
+        results[nodeid] = {
+            "outcome": outcome,
+            "duration": float(case.get("time") or 0.0),
+            "message": message[:500],
+        }
+    return results
+
+
+def run_sharded(
+    targets: List[str],
+    cwd: Path,
+    shards: int,
+    durations: DurationStore,
+    timeout: float,
+    cov_source: Optional[str] = None,
+) -> Dict:
+    """
+    Corre `targets` repartidos en `shards` procesos pytest en paralelo.
+
+    Returns:
+        Reporte combinado: total/passed/failed/skipped, failures, shards,
+        slowest y success
+    """
+    start = time.time()
+    nodeids = collect(targets, cwd)
+    history = durations.load()
+    groups = plan_shards(nodeids, history, shards) if nodeids else []
+    shard_dir = Path(cwd) / ".pytest_shards"
+    shard_dir.mkdir(exist_ok=True)
+    use_cov = bool(cov_source) and coverage_available()
+    procs, cancelled = stage_procs(), stage_cancelled()
+
+    logger.info(
+        f"🧩 {len(nodeids)} tests en {len(groups)} shards "
+        f"({', '.join(str(len(g)) for g in groups)})"
+    )
+
+    def run_shard(i: int, group: List[str]) -> Dict:
+        xml = shard_dir / f"shard-{i}.xml"
+        cmd = [
+            "python",
+            "-m",
+            "pytest",
+            "-q",
+            "--tb=short",
+            "-p",
+            "no:cacheprovider",
+            f"--rootdir={cwd}",
+            f"--junitxml={xml}",
+            *group,
+        ]
+        env = dict(os.environ)
+        if use_cov:
+            cmd += [f"--cov={cov_source}", "--cov-context=test", "--cov-report="]
+            env["COVERAGE_FILE"] = str(Path(cwd) / f".coverage.shard{i}")
+        shard_start = time.time()
+        try:
+            result = run_cmd(
+                cmd, cwd=cwd, timeout=timeout, env=env, procs=procs, cancelled=cancelled
+            )
+            returncode, output = result.returncode, result.stdout
+        except subprocess.TimeoutExpired:
+            returncode, output = None, f"shard {i} timeout (>{timeout}s)"
+        tests = parse_junit(xml, group) if xml.exists() else {}
+        return {
+            "shard": i,
+            "tests": len(group),
+            "returncode": returncode,
+            "duration": round(time.time() - shard_start, 3),
+            "results": tests,
+            "tail": output.splitlines()[-10:],
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, len(groups))) as pool:
+        shard_reports = list(pool.map(lambda a: run_shard(*a), enumerate(groups)))
+
+    report = {
+        "total": len(nodeids),
+        "passed": 0,
+        "failed": 0,
+        "skipped": 0,
+        "failures": [],
+        "errors": [],
+        "outcomes": {},
+        "shards": [],
+        "success": bool(groups) or not nodeids,
+    }
+    measured: Dict[str, float] = {}
+    for shard in shard_reports:
+        for nodeid, res in shard.pop("results").items():
+            report[res["outcome"]] += 1
+            report["outcomes"][nodeid] = res["outcome"]
+            measured[nodeid] = res["duration"]
+            if res["outcome"] == "failed":
+                report["failures"].append({"test": nodeid, "message": res["message"]})
+        tail = shard.pop("tail")
+        if shard["returncode"] not in (0, 5):
+            report["success"] = False
+            report["errors"].extend(tail)
+        report["shards"].append(shard)
+
+    durations.update(measured)
+    report["slowest"] = sorted(measured.items(), key=lambda x: x[1], reverse=True)[:10]
+    report["duration"] = round(time.time() - start, 3)
+
+    if use_cov:
+        run_cmd(
+            ["python", "-m", "coverage", "combine", "--keep", "-q"]
+            + [f".coverage.shard{i}" for i in range(len(groups))],
+            cwd=cwd,
+            timeout=60,
+        )
+    return report
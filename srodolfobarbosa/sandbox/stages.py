@@ -0,0 +1,211 @@
+"""
+Ejecución concurrente de etapas de validación con timeout y cancelación.
+
+Cada etapa (tests, linters, API) corre en su propio thread. Los comandos
+lanzados con `run_cmd` desde una etapa quedan registrados en ella, así que
+al vencer su timeout (o al cancelarse por fail-fast) se mata el grupo de
+procesos entero (pytest y sus hijos incluidos) en vez de esperar a que
+termine solo.
+
+Una etapa cancelada queda marcada: `run_cmd` se niega a lanzar procesos
+nuevos en ella (p.ej. `coverage combine` tras matar pytest) y `run_stages`
+espera a que sus threads terminen antes de volver, así el worktree no se
+libera con una etapa todavía escribiendo en él.
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+@dataclass
+class StageOutcome:
+    """Resultado de una etapa: éxito, datos y tiempos."""
+
+    name: str
+    success: bool
+    results: Dict
+    duration: float
+    status: str = "ok"  # 'ok', 'failed', 'timeout', 'cancelled', 'error'
+    _procs: List[subprocess.Popen] = field(default_factory=list, repr=False)
+    _cancelled: threading.Event = field(default_factory=threading.Event, repr=False)
+
+
+class StageCancelled(Exception):
+    """La etapa fue cancelada (timeout o fail-fast): no se lanzan más procesos."""
+
+
+def _kill(proc: subprocess.Popen):
+    """Mata el grupo de procesos del comando (best effort)."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, OSError):
+        try:
+            proc.kill()
+        except OSError:
+            pass
+
+
+def stage_procs() -> Optional[List[subprocess.Popen]]:
+    """Lista de procesos de la etapa actual, para pasarla a threads auxiliares."""
+    return getattr(_local, "procs", None)
+
+
+def stage_cancelled() -> Optional[threading.Event]:
+    """Marca de cancelación de la etapa actual, para pasarla a threads auxiliares."""
+    return getattr(_local, "cancelled", None)
+
+
+def check_cancelled(cancelled: Optional[threading.Event] = None):
+    """Levanta StageCancelled si la etapa (actual o `cancelled`) fue cancelada."""
+    cancelled = cancelled or stage_cancelled()
+    if cancelled is not None and cancelled.is_set():
+        raise StageCancelled("etapa cancelada")
+
+
+def run_cmd(
+    cmd: List[str],
+    cwd=None,
+    timeout: Optional[float] = None,
+    env: Optional[Dict[str, str]] = None,
+    procs: Optional[List[subprocess.Popen]] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> subprocess.CompletedProcess:
+    """
+    Equivalente a `subprocess.run(capture_output=True, text=True)`, pero
+    cancelable: el proceso se registra en la etapa actual (si la hay) o en
+    `procs`/`cancelled`, cuando se lanza desde un thread auxiliar de la etapa.
+
+    Raises:
+        StageCancelled: la etapa ya fue cancelada (antes o durante el arranque)
+    """
+    cancelled = cancelled or stage_cancelled()
+    check_cancelled(cancelled)
+    proc = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        start_new_session=True,
+        env=env,
+    )
+    if procs is None:
+        procs = stage_procs()
+    if procs is not None:
+        procs.append(proc)
+    try:
+        if cancelled is not None and cancelled.is_set():
+            # Cancelada entre el check y el registro: _cancel no lo vio
+            _kill(proc)
+            proc.communicate()
+            raise StageCancelled("etapa cancelada")
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill(proc)
+        proc.communicate()
+        raise
+    finally:
+        if procs is not None and proc in procs:
+            procs.remove(proc)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
+def run_stages(
+    stages: Dict[str, Callable[[], Tuple[bool, Dict]]],
+    timeouts: Dict[str, float],
+    fail_fast: Iterable[str] = (),
+) -> Dict[str, StageOutcome]:
+    """
+    Corre las etapas en paralelo y devuelve un StageOutcome por etapa.
+
+    Args:
+        stages: nombre -> callable que devuelve (success, results)
+        timeouts: nombre -> segundos máximos de la etapa
+        fail_fast: etapas cuyo fallo cancela las que sigan corriendo
+    """
+    fail_fast = set(fail_fast)
+    outcomes: Dict[str, StageOutcome] = {
+        name: StageOutcome(name, False, {}, 0.0, "cancelled") for name in stages
+    }
+    started: Dict[str, float] = {}
+
+    def _wrap(name: str, fn: Callable[[], Tuple[bool, Dict]]):
+        _local.procs = outcomes[name]._procs
+        _local.cancelled = outcomes[name]._cancelled
+        started[name] = time.monotonic()
+        try:
+            return fn()
+        finally:
+            _local.procs = None
+            _local.cancelled = None
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, len(stages)), thread_name_prefix="sandbox-stage"
+    )
+    t0 = time.monotonic()
+    futures = {executor.submit(_wrap, name, fn): name for name, fn in stages.items()}
+    pending = set(futures)
+
+    def _cancel(name: str, status: str, reason: str):
+        outcome = outcomes[name]
+        outcome._cancelled.set()
+        for proc in list(outcome._procs):
+            _kill(proc)
+        outcome.success = False
+        outcome.status = status
+        outcome.results = {"success": False, "errors": [reason], status: True}
+        outcome.duration = time.monotonic() - started.get(name, t0)
+
+    try:
+        while pending:
+            now = time.monotonic()
+            deadlines = {
+                f: started.get(futures[f], t0) + timeouts.get(futures[f], 60)
+                for f in pending
+            }
+            wait_for = max(0.0, min(deadlines.values()) - now)
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            stop = False
+            for f in done:
+                name = futures[f]
+                outcome = outcomes[name]
+                outcome.duration = time.monotonic() - started.get(name, t0)
+                try:
+                    outcome.success, outcome.results = f.result()
+                    outcome.status = "ok" if outcome.success else "failed"
+                except Exception as e:
+                    outcome.success, outcome.status = False, "error"
+                    outcome.results = {"success": False, "errors": [str(e)]}
+                if not outcome.success and name in fail_fast:
+                    stop = True
+
+            now = time.monotonic()
+            for f in list(pending):
+                name = futures[f]
+                if stop:
+                    f.cancel()
+                    _cancel(name, "cancelled", f"cancelada: falló {sorted(fail_fast)}")
+                    pending.discard(f)
+                elif now >= deadlines[f]:
+                    _cancel(name, "timeout", f"timeout (>{timeouts.get(name, 60)}s)")
+                    pending.discard(f)
+                    logger.warning(f"⏱ Etapa {name} cancelada por timeout")
+    finally:
+        # Etapas canceladas: sus procesos ya murieron y no pueden lanzar
+        # otros, así que sus threads terminan enseguida; se esperan para que
+        # nada siga tocando el worktree después de volver
+        executor.shutdown(wait=True)
+
+    return outcomes
@@ -0,0 +1,222 @@
+"""
+WorktreePool: pool reutilizable de `git worktree` para sandboxes concurrentes.
+
+Cada validación corre en su propio worktree (checkout independiente que
+comparte el object store del repositorio), así el working copy del que corre
+el servidor nunca se toca y varias validaciones pueden correr en paralelo.
+
+Los slots se reservan con `flock` sobre un archivo de lock por slot, así que
+el pool es seguro entre threads y entre procesos (varios `SandboxRunner.run`
+en la misma máquina). Al liberar, el worktree se limpia (reset + clean) y
+queda detached para el próximo uso.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Worktree:
+    """Worktree reservado por una validación."""
+
+    slot: int
+    path: Path
+    branch: str
+    base_ref: str
+    _lock_fd: int = -1
+
+
+class WorktreePool:
+    """Pool de worktrees con reserva por flock y limpieza al liberar."""
+
+    def __init__(
+        self,
+        repo_path: Path,
+        root: Optional[Path] = None,
+        max_worktrees: Optional[int] = None,
+        remote: str = "origin",
+        main_branch: str = "main",
+    ):
+        """
+        Args:
+            repo_path: Repositorio principal (nunca se hace checkout en él)
+            root: Directorio de los worktrees (default: NEXO_SANDBOX_WORKTREES
+                o <tmp>/nexo-worktrees/<hash del repo>)
+            max_worktrees: Slots simultáneos (default: NEXO_SANDBOX_MAX_WORKTREES o 4)
+            remote: Remoto del que se toma la base
+            main_branch: Rama base de las validaciones
+        """
+        self.repo_path = Path(repo_path).resolve()
+        if root is None:
+            root = os.getenv("NEXO_SANDBOX_WORKTREES")
+        if root is None:
+            repo_hash = hashlib.md5(str(self.repo_path).encode()).hexdigest()[:8]
+            root = Path(tempfile.gettempdir()) / "nexo-worktrees" / repo_hash
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_worktrees = max_worktrees or int(
+            os.getenv("NEXO_SANDBOX_MAX_WORKTREES", "4")
+        )
+        self.remote = remote
+        self.main_branch = main_branch
+
+    # ========== GIT ==========
+
+    def _git(self, args: List[str], cwd: Optional[Path] = None, check: bool = True):
+        return subprocess.run(
+            ["git", *args],
+            cwd=cwd or self.repo_path,
+            capture_output=True,
+            text=True,
+            check=check,
+        )
+
+    @contextmanager
+    def _admin_lock(self) -> Iterator[None]:
+        """Serializa operaciones sobre .git compartido (worktree add/remove, fetch)."""
+        with open(self.root / ".admin.lock", "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def resolve_base(self) -> str:
+        """Actualiza y devuelve la base: <remote>/<main> si existe, si no <main> local."""
+        with self._admin_lock():
+            fetch = self._git(["fetch", self.remote, self.main_branch], check=False)
+        if fetch.returncode == 0:
+            ref = f"{self.remote}/{self.main_branch}"
+            if (
+                self._git(["rev-parse", "--verify", "-q", ref], check=False).returncode
+                == 0
+            ):
+                return ref
+        logger.warning(
+            f"⚠ Sin {self.remote}/{self.main_branch}, usando {self.main_branch} local"
+        )
+        return self.main_branch
+
+    # ========== SLOTS ==========
+
+    def _slot_path(self, slot: int) -> Path:
+        return self.root / f"wt-{slot}"
+
+    def _try_lock(self, slot: int) -> int:
+        fd = os.open(str(self.root / f"wt-{slot}.lock"), os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except OSError:
+            os.close(fd)
+            return -1
+
+    def _reserve_slot(self, timeout: float) -> Tuple[int, int]:
+        deadline = time.monotonic() + timeout
+        while True:
+            for slot in range(self.max_worktrees):
+                fd = self._try_lock(slot)
+                if fd >= 0:
+                    return slot, fd
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Sin worktrees libres ({self.max_worktrees} en uso) tras {timeout}s"
+                )
+            time.sleep(0.5)
+
+    def _prepare(self, slot: int, base_ref: str) -> Path:
+        """Crea el worktree del slot o limpia el existente, detached en base_ref."""
+        path = self._slot_path(slot)
+        if not (path / ".git").exists():
+            if path.exists():
+                shutil.rmtree(path, ignore_errors=True)
+            with self._admin_lock():
+                self._git(["worktree", "prune"], check=False)
+                self._git(["worktree", "add", "--detach", str(path), base_ref])
+            logger.info(f"✓ Worktree creado: {path}")
+        else:
+            self._git(["checkout", "--detach", "--force", base_ref], cwd=path)
+            self._git(["reset", "--hard", base_ref], cwd=path)
+            self._git(["clean", "-fdx", "-q"], cwd=path)
+            logger.info(f"♻ Worktree reutilizado: {path}")
+        return path
+
+    def acquire(
+        self,
+        branch_name: Optional[str],
+        base_ref: Optional[str] = None,
+        timeout: float = 300,
+    ) -> Worktree:
+        """
+        Reserva un slot y crea `branch_name` sobre la base en su worktree
+        (sin rama, el worktree queda detached en la base: p.ej. el baseline
+        de los benchmarks).
+        """
+        base_ref = base_ref or self.resolve_base()
+        slot, fd = self._reserve_slot(timeout)
+        try:
+            path = self._prepare(slot, base_ref)
+            if branch_name:
+                self._git(["checkout", "-B", branch_name, base_ref], cwd=path)
+        except Exception:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+            raise
+        return Worktree(slot, path, branch_name or "", base_ref, fd)
+
+    def release(self, wt: Worktree):
+        """Limpia el worktree, lo deja detached (libera la rama) y suelta el slot."""
+        try:
+            self._git(["checkout", "--detach", "--force"], cwd=wt.path, check=False)
+            self._git(["clean", "-fdx", "-q"], cwd=wt.path, check=False)
+        finally:
+            if wt._lock_fd >= 0:
+                fcntl.flock(wt._lock_fd, fcntl.LOCK_UN)
+                os.close(wt._lock_fd)
+                wt._lock_fd = -1
+
+    @contextmanager
+    def worktree(
+        self, branch_name: str, base_ref: Optional[str] = None
+    ) -> Iterator[Worktree]:
+        wt = self.acquire(branch_name, base_ref)
+        try:
+            yield wt
+        finally:
+            self.release(wt)
+
+    def cleanup(self) -> int:
+        """Elimina los worktrees libres del pool. Devuelve cuántos se eliminaron."""
+        removed = 0
+        for slot in range(self.max_worktrees):
+            fd = self._try_lock(slot)
+            if fd < 0:
+                continue  # en uso
+            try:
+                path = self._slot_path(slot)
+                if path.exists():
+                    with self._admin_lock():
+                        self._git(
+                            ["worktree", "remove", "--force", str(path)], check=False
+                        )
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+        with self._admin_lock():
+            self._git(["worktree", "prune"], check=False)
+        logger.info(f"🧹 Worktrees eliminados: {removed}")
+        return removed
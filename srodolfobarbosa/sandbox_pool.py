@@ -0,0 +1,669 @@
+"""
+Pool de workers de sandbox pré-forkados para executar ações pendentes.
+
+Em vez de subir um ``python sandbox_runner.py`` por execução (startup do
+interpretador + rlimits a cada vez), mantemos N processos quentes, já com
+``RLIMIT_AS`` aplicado, que recebem o código por um Pipe e executam num
+namespace restrito novo a cada chamada.
+
+  • isolamento: cada execução roda num fork do worker quente, descartado no
+    fim; o que o código alcançar (globais do worker, ``run_code``) morre com ele
+  • limite de CPU por execução: RLIMIT_CPU do filho (SIGXCPU -> motivo "cpu_limit")
+  • limite de memória: RLIMIT_AS do worker, herdado (MemoryError -> motivo "mem_limit")
+  • reciclagem: worker substituído após N execuções
+  • timeout de parede: worker travado é morto (com o filho) e substituído
+  • streaming: o ``print`` do código chega ao cliente em lotes enquanto roda,
+    com backpressure pelo Pipe e só a cauda da saída guardada em memória
+
+Os workers nascem de um forkserver que só pré-carrega este módulo, então
+não herdam o espaço de endereçamento do servidor. O ``__main__`` do pai
+(``python deus.py``) não é reexecutado como ``__mp_main__`` nos workers: o
+processo é iniciado com um ``__main__`` neutro no lugar (ver ``_main_neutro``).
+
+Uso:
+    from sandbox_pool import SandboxPool
+    pool = SandboxPool(workers=4)
+    pool.executar("resultado = 1 + 2")   # {"status": "ok", "resultado": "3", ...}
+    for frame in pool.executar_stream(codigo):
+        ...                               # {"tipo": "saida", ...} ... {"tipo": "resultado", ...}
+"""
+
+import asyncio
+import collections
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import signal
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+try:
+    from .sandbox_runner import SAFE_BUILTINS, run_code
+except ImportError:
+    from sandbox_runner import SAFE_BUILTINS, run_code
+
+MAX_SAIDA_CHARS = 64 * 1024
+# Streaming: envia a saída acumulada ao atingir o lote ou o intervalo
+LOTE_STREAM_CHARS = 4096
+INTERVALO_STREAM_S = 0.05
+
+
+# Serializa a troca de __main__ entre threads que iniciam workers
+_LOCK_MAIN = threading.Lock()
+
+
+@contextmanager
+def _main_neutro():
+    """
+    Troca ``sys.modules['__main__']`` por um módulo vazio enquanto o worker
+    (e o forkserver, na primeira vez) é iniciado.
+
+    forkserver/spawn mandam ao filho o nome/caminho do ``__main__`` do pai,
+    e o filho o reimporta como ``__mp_main__`` antes de rodar o alvo. Com
+    ``python deus.py`` isso reexecutaria o boot inteiro (pip, NexoSwarm,
+    Supabase, sinks do loguru) em cada worker, antes do RLIMIT_AS. Sem
+    ``__spec__`` nem ``__file__`` o filho não importa main nenhum; o alvo
+    (``_worker_main``) é resolvido pelo nome deste módulo.
+    """
+    with _LOCK_MAIN:
+        original = sys.modules.get("__main__")
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            if original is not None:
+                sys.modules["__main__"] = original
+
+
+class _LimiteCPU(BaseException):
+    """Levantada pelo handler de SIGXCPU; BaseException para escapar de ``except Exception``."""
+
+
+class _SaidaLimitada:
+    """Captura o ``print`` do código executado guardando só a cauda (memória limitada)."""
+
+    def __init__(self, limite: int = MAX_SAIDA_CHARS, emitir=None):
+        self.limite = limite
+        self.partes = collections.deque()
+        self.tamanho = 0
+        self.truncado = False
+        # Modo streaming: callback que recebe os lotes de saída
+        self.emitir = emitir
+        self._pendente = []
+        self._pendente_tam = 0
+        self._ultimo_envio = time.monotonic()
+
+    def escrever(self, texto: str):
+        self.partes.append(texto)
+        self.tamanho += len(texto)
+        while self.tamanho > self.limite and len(self.partes) > 1:
+            self.tamanho -= len(self.partes.popleft())
+            self.truncado = True
+        if self.emitir is not None:
+            self._pendente.append(texto)
+            self._pendente_tam += len(texto)
+            if (
+                self._pendente_tam >= LOTE_STREAM_CHARS
+                or time.monotonic() - self._ultimo_envio >= INTERVALO_STREAM_S
+            ):
+                self.descarregar()
+
+    def descarregar(self):
+        """Envia o que estiver pendente (bloqueia se o cliente estiver lento: backpressure)."""
+        if self.emitir is not None and self._pendente:
+            texto = "".join(self._pendente)
+            self._pendente, self._pendente_tam = [], 0
+            self._ultimo_envio = time.monotonic()
+            self.emitir(texto)
+
+    def funcao_print(self):
+        """
+        ``print`` para o código executado: função simples, não método ligado,
+        para não expor ``__self__``/``__func__``. Ainda tem ``__globals__`` (os
+        do módulo): quem barra o acesso é a regra de dunders do analisador, e o
+        fork por execução impede que o alcançado chegue à próxima ação.
+        """
+        escrever = self.escrever
+
+        def print(*args, sep=" ", end="\n", **_):
+            escrever(sep.join(str(a) for a in args) + end)
+
+        return print
+
+    def valor(self) -> str:
+        texto = "".join(self.partes)
+        if len(texto) > self.limite:
+            texto, self.truncado = texto[-self.limite :], True
+        return texto
+
+
+def _resetar_pico_rss():
+    """Zera o pico de RSS do processo (Linux >= 4.0) para medir cada execução isoladamente."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _pico_rss_kb() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _consumo(uso) -> Dict:
+    cpu_user_ms = round(uso.ru_utime * 1000, 2)
+    cpu_sys_ms = round(uso.ru_stime * 1000, 2)
+    return {
+        "cpu_user_ms": cpu_user_ms,
+        "cpu_sys_ms": cpu_sys_ms,
+        "cpu_ms": round(cpu_user_ms + cpu_sys_ms, 2),
+    }
+
+
+def _executar_no_filho(conn, codigo: str, stream: bool, cpu_seconds: int) -> int:
+    """
+    Roda uma execução num filho recém-forkado do worker e responde pelo Pipe.
+
+    Devolve o código de saída do filho: 0 se a resposta foi entregue.
+    """
+    estado = {"cpu": False}
+
+    def _sigxcpu(signum, frame):
+        estado["cpu"] = True
+        raise _LimiteCPU()
+
+    signal.signal(signal.SIGXCPU, _sigxcpu)
+    # O tempo de CPU do filho começa do zero: soft = limite, hard logo acima (SIGKILL)
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    except (ValueError, OSError):
+        pass
+    saida = _SaidaLimitada(
+        emitir=(lambda texto: conn.send(("saida", texto))) if stream else None
+    )
+    builtins = dict(SAFE_BUILTINS, print=saida.funcao_print())
+    _resetar_pico_rss()
+    try:
+        resposta = run_code(codigo, builtins)
+        resposta["motivo"] = "ok"
+    except _LimiteCPU:
+        resposta = {
+            "status": "error",
+            "detail": f"limite de CPU ({cpu_seconds}s) excedido",
+        }
+    except MemoryError:
+        resposta = {
+            "status": "error",
+            "detail": "limite de memória excedido",
+            "motivo": "mem_limit",
+        }
+    except BaseException as e:
+        resposta = {
+            "status": "error",
+            "detail": f"{type(e).__name__}: {e}",
+            "motivo": "exception",
+        }
+    if estado["cpu"]:
+        # Também cobre código que engoliu o sinal com um except genérico
+        resposta["status"] = "error"
+        resposta["motivo"] = "cpu_limit"
+        resposta.setdefault("detail", f"limite de CPU ({cpu_seconds}s) excedido")
+    resposta.update(_consumo(resource.getrusage(resource.RUSAGE_SELF)))
+    resposta["peak_rss_kb"] = _pico_rss_kb()
+    try:
+        saida.descarregar()
+        resposta["saida"] = saida.valor()
+        resposta["saida_truncada"] = saida.truncado
+        conn.send(("fim", resposta))
+    except (OSError, ValueError, MemoryError, _LimiteCPU):
+        return 1
+    return 0
+
+
+def _worker_main(conn, cpu_seconds: int, mem_bytes: int):
+    """
+    Loop do worker: recebe código e o executa num filho forkado, com limites.
+
+    O worker em si nunca roda código da ação: cada execução acontece num
+    fork descartável, então nada do que ela alcance (globais do módulo,
+    ``run_code``, builtins) sobrevive para a próxima.
+    """
+    # Grupo próprio: o pool mata o worker e o filho da execução em curso de uma vez
+    try:
+        os.setpgid(0, 0)
+    except OSError:
+        pass
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (mem_bytes, mem_bytes))
+    except (ValueError, OSError):
+        pass
+
+    while True:
+        try:
+            mensagem = conn.recv()
+        except (EOFError, OSError):
+            break
+        if mensagem is None:
+            break
+        codigo, stream = mensagem if isinstance(mensagem, tuple) else (mensagem, False)
+        pid = os.fork()
+        if pid == 0:
+            codigo_saida = 1
+            try:
+                codigo_saida = _executar_no_filho(conn, codigo, stream, cpu_seconds)
+            finally:
+                os._exit(codigo_saida)
+        _, status, uso = os.wait4(pid, 0)
+        codigo_saida = os.waitstatus_to_exitcode(status)
+        if codigo_saida == 0:
+            continue
+        # O filho morreu sem responder: SIGKILL no hard de CPU, OOM ou crash
+        if codigo_saida in (-signal.SIGXCPU, -signal.SIGKILL):
+            resposta = {
+                "status": "error",
+                "motivo": "cpu_limit",
+                "detail": f"limite de CPU ({cpu_seconds}s) excedido",
+            }
+        else:
+            resposta = {
+                "status": "error",
+                "motivo": "worker_crash",
+                "detail": f"execução encerrou (exitcode {codigo_saida})",
+            }
+        resposta.update(
+            _consumo(uso), peak_rss_kb=uso.ru_maxrss, saida="", saida_truncada=False
+        )
+        try:
+            conn.send(("fim", resposta))
+        except (OSError, ValueError):
+            break
+    conn.close()
+
+
+def _matar_grupo(processo):
+    """SIGKILL no worker e no filho da execução em curso (mesmo grupo de processos)."""
+    try:
+        os.killpg(processo.pid, signal.SIGKILL)
+    except OSError:
+        processo.kill()
+
+
+class _Worker:
+    def __init__(self, processo, conn):
+        self.processo = processo
+        self.conn = conn
+        self.execucoes = 0
+        self.criado_em = time.time()
+
+
+class SandboxPool:
+    """Pool de processos sandbox quentes, com rlimits e reciclagem."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_execucoes: Optional[int] = None,
+        cpu_seconds: int = 5,
+        mem_bytes: int = 150 * 1024 * 1024,
+        timeout: float = 10.0,
+    ):
+        """
+        Args:
+            workers: processos no pool (padrão: NEXO_SANDBOX_WORKERS ou nº de CPUs)
+            max_execucoes: execuções antes de reciclar um worker (padrão: NEXO_SANDBOX_MAX_EXEC ou 50)
+            cpu_seconds: limite de CPU por execução
+            mem_bytes: RLIMIT_AS de cada worker
+            timeout: tempo de parede máximo por execução
+        """
+        self.workers = (
+            workers
+            or int(os.getenv("NEXO_SANDBOX_WORKERS", "0"))
+            or os.cpu_count()
+            or 2
+        )
+        self.max_execucoes = max_execucoes or int(
+            os.getenv("NEXO_SANDBOX_MAX_EXEC", "50")
+        )
+        self.cpu_seconds = cpu_seconds
+        self.mem_bytes = mem_bytes
+        self.timeout = timeout
+        metodos = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context(
+            "forkserver" if "forkserver" in metodos else "spawn"
+        )
+        if self._ctx.get_start_method() == "forkserver":
+            self._ctx.set_forkserver_preload([__name__])
+        self._ociosos: "queue.LifoQueue[_Worker]" = queue.LifoQueue()
+        self._todos = set()
+        self._lock = threading.Lock()
+        self._iniciado = False
+        self.stats = collections.Counter()
+
+    # ========== CICLO DE VIDA ==========
+
+    def _novo_worker(self) -> _Worker:
+        pai, filho = self._ctx.Pipe(duplex=True)
+        processo = self._ctx.Process(
+            target=_worker_main,
+            args=(filho, self.cpu_seconds, self.mem_bytes),
+            daemon=True,
+            name="nexo-sandbox",
+        )
+        with _main_neutro():
+            processo.start()
+        filho.close()
+        worker = _Worker(processo, pai)
+        with self._lock:
+            self._todos.add(worker)
+        self.stats["workers_criados"] += 1
+        return worker
+
+    def _descartar(self, worker: _Worker, matar: bool = False):
+        with self._lock:
+            self._todos.discard(worker)
+        try:
+            if matar:
+                _matar_grupo(worker.processo)
+            else:
+                worker.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        worker.conn.close()
+        worker.processo.join(timeout=1)
+        if worker.processo.is_alive():
+            worker.processo.kill()
+            worker.processo.join(timeout=1)
+        self.stats["workers_reciclados"] += 1
+
+    def _reciclar(self, worker: _Worker, matar: bool = False):
+        """Descarta o worker e põe um novo no lugar (roda fora do caminho da requisição)."""
+        self._descartar(worker, matar=matar)
+        with self._lock:
+            ativo = self._iniciado
+        if ativo:
+            self._ociosos.put(self._novo_worker())
+
+    def iniciar(self):
+        """Pré-forka todos os workers (idempotente)."""
+        with self._lock:
+            if self._iniciado:
+                return
+            self._iniciado = True
+        for _ in range(self.workers):
+            self._ociosos.put(self._novo_worker())
+
+    def encerrar(self):
+        """Finaliza todos os workers."""
+        with self._lock:
+            todos = list(self._todos)
+            self._iniciado = False
+        while not self._ociosos.empty():
+            try:
+                self._ociosos.get_nowait()
+            except queue.Empty:
+                break
+        for worker in todos:
+            self._descartar(worker)
+
+    # ========== EXECUÇÃO ==========
+
+    def executar(self, codigo: str, timeout: Optional[float] = None) -> Dict:
+        """
+        Executa ``codigo`` num worker livre (bloqueante).
+
+        Retorna {"status", "resultado"|"detail", "motivo", "saida", "wall_ms", "cpu_ms",
+        "cpu_user_ms", "cpu_sys_ms", "peak_rss_kb"}; motivo
+        é ok, exception, cpu_limit, mem_limit, timeout, worker_crash ou pool_ocupado.
+        """
+        resposta = {}
+        for frame in self._executar(codigo, timeout, stream=False):
+            resposta = frame
+        resposta.pop("tipo", None)
+        return resposta
+
+    def executar_stream(
+        self, codigo: str, timeout: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """
+        Executa ``codigo`` emitindo frames conforme a saída é produzida.
+
+        Frames: {"tipo": "saida", "texto"} ... e por último {"tipo": "resultado", ...}
+        com os mesmos campos de ``executar`` (a saída ali é só a cauda limitada).
+        Fechar o gerador antes do fim mata o worker e o substitui.
+        """
+        return self._executar(codigo, timeout, stream=True)
+
+    def _executar(
+        self, codigo: str, timeout: Optional[float], stream: bool
+    ) -> Iterator[Dict]:
+        self.iniciar()
+        timeout = timeout or self.timeout
+        inicio = time.perf_counter()
+        try:
+            worker = self._ociosos.get(timeout=timeout)
+        except queue.Empty:
+            self.stats["pool_ocupado"] += 1
+            yield {
+                "tipo": "resultado",
+                "status": "error",
+                "motivo": "pool_ocupado",
+                "detail": "nenhum worker livre",
+                "wall_ms": round(timeout * 1000, 2),
+            }
+            return
+
+        resposta = None
+        matar = False
+        try:
+            worker.conn.send((codigo, stream))
+            while resposta is None:
+                restante = timeout - (time.perf_counter() - inicio)
+                if restante <= 0 or not worker.conn.poll(restante):
+                    resposta = {
+                        "status": "timeout",
+                        "motivo": "timeout",
+                        "detail": f"excedeu {timeout}s",
+                    }
+                    matar = True
+                    break
+                tipo, dado = worker.conn.recv()
+                if tipo == "saida":
+                    yield {"tipo": "saida", "texto": dado}
+                else:
+                    resposta = dado
+        except (EOFError, OSError, ValueError, TypeError):
+            # Morto pelo kernel (SIGKILL no teto de CPU, OOM) ou pipe quebrado
+            resposta = {
+                "status": "error",
+                "motivo": "worker_crash",
+                "detail": f"worker encerrou (exitcode {worker.processo.exitcode})",
+            }
+            matar = True
+        finally:
+            if resposta is None:
+                # Consumidor abandonou o stream no meio da execução
+                resposta = {
+                    "status": "error",
+                    "motivo": "cancelado",
+                    "detail": "stream encerrado pelo cliente",
+                }
+                matar = True
+            resposta["wall_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+            worker.execucoes += 1
+            if matar or worker.execucoes >= self.max_execucoes:
+                threading.Thread(
+                    target=self._reciclar, args=(worker, matar), daemon=True
+                ).start()
+            else:
+                self._ociosos.put(worker)
+            self.stats["execucoes"] += 1
+            self.stats[f"motivo_{resposta.get('motivo', 'ok')}"] += 1
+        yield {"tipo": "resultado", **resposta}
+
+    async def executar_async(
+        self, codigo: str, timeout: Optional[float] = None
+    ) -> Dict:
+        """Versão assíncrona: a espera no Pipe acontece fora do event loop."""
+        return await asyncio.to_thread(self.executar, codigo, timeout)
+
+    async def executar_stream_async(
+        self, codigo: str, timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict]:
+        """Versão assíncrona de ``executar_stream`` (cada espera roda numa thread)."""
+        frames = self.executar_stream(codigo, timeout)
+        fim = object()
+        try:
+            while True:
+                frame = await asyncio.to_thread(next, frames, fim)
+                if frame is fim:
+                    break
+                yield frame
+        finally:
+            await asyncio.to_thread(frames.close)
+
+    def status(self) -> Dict:
+        with self._lock:
+            vivos = sum(1 for w in self._todos if w.processo.is_alive())
+        return {
+            "workers": self.workers,
+            "vivos": vivos,
+            "ociosos": self._ociosos.qsize(),
+            "max_execucoes": self.max_execucoes,
+            "metodo": self._ctx.get_start_method(),
+            "stats": dict(self.stats),
+        }
+
+
+class HistoricoExecucoes:
+    """
+    Histórico de consumo por execução (JSONL em disco + janela em memória).
+
+    Serve para dimensionar limites e o pool a partir de dados: percentis de
+    CPU, RSS e parede, e quantas execuções chegaram perto dos limites.
+    O arquivo é rotacionado ao passar de `max_bytes` (guarda um `.1`).
+    """
+
+    CAMPOS = (
+        "filename",
+        "status",
+        "motivo",
+        "wall_ms",
+        "cpu_ms",
+        "cpu_user_ms",
+        "cpu_sys_ms",
+        "peak_rss_kb",
+    )
+
+    def __init__(
+        self,
+        caminho: Path,
+        janela: int = 2000,
+        limite_cpu_ms: float = None,
+        limite_rss_kb: int = None,
+        max_bytes: int = 5 * 1024 * 1024,
+    ):
+        self.caminho = Path(caminho)
+        self.rotacionado = self.caminho.with_name(self.caminho.name + ".1")
+        self.max_bytes = max_bytes
+        self.limite_cpu_ms = limite_cpu_ms
+        self.limite_rss_kb = limite_rss_kb
+        self._lock = threading.Lock()
+        self._recentes = collections.deque(maxlen=janela)
+        self._carregar()
+
+    def _carregar(self):
+        # Logo após uma rotação o arquivo atual tem poucas linhas: completa com o .1
+        for caminho in (self.rotacionado, self.caminho):
+            try:
+                with open(caminho, encoding="utf-8") as f:
+                    for linha in collections.deque(f, maxlen=self._recentes.maxlen):
+                        try:
+                            self._recentes.append(json.loads(linha))
+                        except ValueError:
+                            continue
+            except OSError:
+                pass
+
+    def registrar(self, filename: str, resultado: Dict) -> Dict:
+        item = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "filename": filename}
+        item.update({k: resultado.get(k) for k in self.CAMPOS if k != "filename"})
+        linha = json.dumps(item, ensure_ascii=False)
+        with self._lock:
+            self._recentes.append(item)
+            try:
+                self.caminho.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.caminho, "a", encoding="utf-8") as f:
+                    f.write(linha + "\n")
+                    cheio = f.tell() >= self.max_bytes
+                if cheio:
+                    os.replace(self.caminho, self.rotacionado)
+            except OSError:
+                pass
+        return item
+
+    def consultar(
+        self,
+        limite: int = 100,
+        motivo: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> List[Dict]:
+        with self._lock:
+            itens = list(self._recentes)
+        if motivo:
+            itens = [i for i in itens if i.get("motivo") == motivo]
+        if filename:
+            itens = [i for i in itens if i.get("filename") == filename]
+        return itens[-limite:][::-1]
+
+    @staticmethod
+    def _percentis(valores: List[float]) -> Dict:
+        if not valores:
+            return {}
+        valores = sorted(valores)
+
+        def p(q):
+            return valores[min(len(valores) - 1, int(q * len(valores)))]
+
+        return {"p50": p(0.5), "p95": p(0.95), "p99": p(0.99), "max": valores[-1]}
+
+    def resumo(self) -> Dict:
+        with self._lock:
+            itens = list(self._recentes)
+
+        def serie(campo):
+            return [i[campo] for i in itens if isinstance(i.get(campo), (int, float))]
+
+        cpu = serie("cpu_ms")
+        rss = serie("peak_rss_kb")
+        resumo = {
+            "execucoes": len(itens),
+            "motivos": dict(collections.Counter(i.get("motivo") for i in itens)),
+            "wall_ms": self._percentis(serie("wall_ms")),
+            "cpu_ms": self._percentis(cpu),
+            "peak_rss_kb": self._percentis(rss),
+        }
+        # Execuções que passaram de 80% do limite: sinal para revisar limites/pool
+        if self.limite_cpu_ms:
+            resumo["perto_limite_cpu"] = sum(
+                1 for c in cpu if c >= 0.8 * self.limite_cpu_ms
+            )
+        if self.limite_rss_kb:
+            resumo["perto_limite_rss"] = sum(
+                1 for r in rss if r >= 0.8 * self.limite_rss_kb
+            )
+        return resumo
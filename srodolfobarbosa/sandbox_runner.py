@@ -1,27 +1,18 @@
 import sys
+import os
 import json
 import resource
+import signal
+import subprocess
+import threading
 import traceback
 from pathlib import Path
 
-# Limits
-CPU_SECONDS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
-MEM_BYTES = int(sys.argv[3]) if len(sys.argv) > 3 else 100 * 1024 * 1024  # 100MB
-
-code_path = Path(sys.argv[1])
-if not code_path.exists():
-    print(json.dumps({"error": "file_not_found"}))
-    sys.exit(2)
-
-# Apply resource limits
-try:
-    resource.setrlimit(resource.RLIMIT_CPU, (CPU_SECONDS, CPU_SECONDS))
-    resource.setrlimit(resource.RLIMIT_AS, (MEM_BYTES, MEM_BYTES))
-except Exception:
-    pass
+DEFAULT_CPU_SECONDS = 5
+DEFAULT_MEM_BYTES = 100 * 1024 * 1024  # 100MB
 
 # Minimal safe builtins
-safe_builtins = {
+SAFE_BUILTINS = {
     "print": print,
     "len": len,
     "range": range,
@@ -31,18 +22,115 @@ safe_builtins = {
     "enumerate": enumerate,
 }
 
-ns = {"__builtins__": safe_builtins}
 
-try:
-    code = code_path.read_text(encoding="utf-8")
-    # Execute code
+def apply_limits(cpu_seconds, mem_bytes):
+    """Apply resource limits to the current process (best effort)."""
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+        resource.setrlimit(resource.RLIMIT_AS, (mem_bytes, mem_bytes))
+    except Exception:
+        pass
+
+
+def usage_dict(usage):
+    """CPU user/sys time (ms) and peak RSS (KB) from a struct_rusage."""
+    return {
+        "cpu_user_ms": round(usage.ru_utime * 1000, 2),
+        "cpu_sys_ms": round(usage.ru_stime * 1000, 2),
+        "peak_rss_kb": usage.ru_maxrss,
+    }
+
+
+class ChildRun:
+    """
+    Runs the sandbox runner as a child process and reaps it with wait4, so
+    CPU and peak RSS come from the child's own rusage, also when a limit or
+    the wall timeout kills it before it can print anything.
+    """
+
+    def __init__(self, cmd, timeout):
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.timed_out = False
+        self.usage = {}
+        self._timer = threading.Timer(timeout, self._expire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _expire(self):
+        if self.proc.returncode is None:
+            self.timed_out = True
+            self.proc.kill()
+
+    def readline(self, limit=64 * 1024):
+        """Next stdout line (bytes, at most `limit`); b"" once the child exits."""
+        return self.proc.stdout.readline(limit)
+
+    def read(self):
+        return self.proc.stdout.read()
+
+    def kill(self):
+        if self.proc.returncode is None:
+            self.proc.kill()
+
+    def wait(self):
+        """Block until the child exits, record its rusage and return the exit code."""
+        if self.proc.returncode is None:
+            try:
+                _, status, usage = os.wait4(self.proc.pid, 0)
+            finally:
+                self._timer.cancel()
+            self.proc.returncode = os.waitstatus_to_exitcode(status)
+            self.usage = usage_dict(usage)
+        self.proc.stdout.close()
+        return self.proc.returncode
+
+
+def exit_reason(returncode):
+    """Map a runner exit code to an exit reason (killed by SIGXCPU/SIGKILL means a limit was hit)."""
+    if returncode == 0:
+        return "ok"
+    if returncode == -signal.SIGXCPU:
+        return "cpu_limit"
+    if returncode == -signal.SIGKILL:
+        return "killed"
+    return "exception"
+
+
+def run_code(code, builtins=None):
+    """Execute code in a fresh restricted namespace and return the status dict."""
+    ns = {"__builtins__": dict(builtins or SAFE_BUILTINS)}
     exec(code, ns, ns)
-    out = ns.get("resultado", None)
-    print(json.dumps({"status": "ok", "resultado": str(out)}))
-except SystemExit as e:
-    print(json.dumps({"status": "error", "detail": f"system exit {e}"}))
-    sys.exit(1)
-except Exception as e:
-    tb = traceback.format_exc()
-    print(json.dumps({"status": "error", "detail": str(e), "trace": tb}))
-    sys.exit(1)
+    return {"status": "ok", "resultado": str(ns.get("resultado", None))}
+
+
+def main(argv):
+    # Limits
+    cpu_seconds = int(argv[2]) if len(argv) > 2 else DEFAULT_CPU_SECONDS
+    mem_bytes = int(argv[3]) if len(argv) > 3 else DEFAULT_MEM_BYTES
+
+    code_path = Path(argv[1])
+    if not code_path.exists():
+        print(json.dumps({"error": "file_not_found"}))
+        return 2
+
+    apply_limits(cpu_seconds, mem_bytes)
+
+    try:
+        code = code_path.read_text(encoding="utf-8")
+        # Execute code
+        print(json.dumps({**run_code(code), "motivo": "ok"}))
+        return 0
+    except SystemExit as e:
+        print(json.dumps({"status": "error", "detail": f"system exit {e}", "motivo": "exception"}))
+        return 1
+    except MemoryError:
+        print(json.dumps({"status": "error", "detail": "memory limit exceeded", "motivo": "mem_limit"}))
+        return 1
+    except Exception as e:
+        tb = traceback.format_exc()
+        print(json.dumps({"status": "error", "detail": str(e), "trace": tb, "motivo": "exception"}))
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
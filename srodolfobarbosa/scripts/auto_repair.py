@@ -15,6 +15,8 @@ import subprocess
 import re
 import os
 import argparse
+import shlex
+import shutil
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
@@ -55,14 +57,40 @@ def run(cmd, check=False, cwd=None):
     return r
 
 
-def fix_style(unsafe=False):
-    """Aplica fixes de estilo reales: ruff + black."""
-    run("python -m pip install --no-cache-dir ruff black", check=False)
+def ensure_tools(*tools):
+    """Instala (una vez) sólo las herramientas que faltan en el PATH."""
+    missing = [t for t in tools if not shutil.which(t)]
+    if missing:
+        run(f"python -m pip install --no-cache-dir {' '.join(missing)}", check=False)
+
+
+def changed_py_files(base=None):
+    """Arquivos .py alterados contra a base (default origin/main) + não trackeados."""
+    base = base or os.environ.get("NEXO_LINT_BASE", "origin/main")
+    r = run(f"git diff --name-only --diff-filter=ACMR {base} -- '*.py'")
+    if r.returncode != 0:
+        r = run("git diff --name-only --diff-filter=ACMR HEAD -- '*.py'")
+    untracked = run("git ls-files --others --exclude-standard -- '*.py'")
+    files = set(r.stdout.split()) | set(untracked.stdout.split())
+    return sorted(f for f in files if f.startswith("srodolfobarbosa/"))
+
+
+def fix_style(unsafe=False, all_files=False):
+    """Aplica fixes de estilo reales: ruff + black (só nos arquivos alterados)."""
+    ensure_tools("ruff", "black")
+    if all_files:
+        targets = "srodolfobarbosa/"
+    else:
+        files = changed_py_files()
+        if not files:
+            print("✓ Nenhum .py alterado — estilo OK")
+            return
+        targets = " ".join(shlex.quote(f) for f in files)
     if unsafe:
-        run("ruff check --fix --unsafe-fixes srodolfobarbosa/ || true")
+        run(f"ruff check --fix --unsafe-fixes {targets} || true")
     else:
-        run("ruff check --fix srodolfobarbosa/ || true")
-    run("black srodolfobarbosa/ || true")
+        run(f"ruff check --fix {targets} || true")
+    run(f"black {targets} || true")
 
 
 def run_tests_and_autofix_imports():
@@ -73,9 +101,12 @@ def run_tests_and_autofix_imports():
     if missing:
         print(f"⚠ Pacotes faltando detectados: {missing}")
         if AUTO_INSTALL:
-            for pkg in missing:
-                print(f"  Instalando {pkg}...")
-                run(f"python -m pip install --no-cache-dir {pkg}")
+            # Uma única resolução do pip para todos os pacotes faltantes
+            pkgs = " ".join(sorted(missing))
+            print(f"  Instalando {pkgs}...")
+            wheelhouse = os.environ.get("NEXO_WHEELHOUSE")
+            find_links = f"--find-links {wheelhouse} " if wheelhouse else ""
+            run(f"python -m pip install --no-cache-dir {find_links}{pkgs}")
             print("  Reexecutando testes...")
             run("python -m pytest srodolfobarbosa/test_smoke.py -v", check=False)
     return out
@@ -140,6 +171,11 @@ if __name__ == "__main__":
         action="store_true",
         help="Habilita ruff --unsafe-fixes (mais agressivo)",
     )
+    parser.add_argument(
+        "--all-files",
+        action="store_true",
+        help="Aplica ruff/black em todo srodolfobarbosa/ (default: só alterados)",
+    )
     parser.add_argument(
         "--api-url",
         default="http://localhost:8000",
@@ -159,7 +195,7 @@ if __name__ == "__main__":
 
     # Fase 1: Detecta e aplica fixes
     print("\n✏ Fase 1: Aplicando fixes de estilo...")
-    fix_style(unsafe=args.unsafe_fixes)
+    fix_style(unsafe=args.unsafe_fixes, all_files=args.all_files)
 
     print("\n🧪 Fase 2: Detectando erros en testes...")
     results = run_tests_and_autofix_imports()
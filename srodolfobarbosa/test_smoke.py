@@ -36,3 +36,225 @@ def test_admin_exec_pending_sandbox(tmp_path, monkeypatch):
     assert res.status_code == 200
     assert res.json().get("status") == "ok"
     assert res.json().get("resultado") == "3"
+
+
+def _frames_stream_subprocess(path):
+    import asyncio
+    import time
+
+    from srodolfobarbosa import deus
+
+    async def coletar():
+        inicio, frames = time.perf_counter(), []
+        async for frame in deus._stream_subprocess(path):
+            frames.append((time.perf_counter() - inicio, frame))
+        return frames
+
+    return asyncio.run(coletar())
+
+
+def test_stream_subprocess_fallback_entrega_linhas_durante_a_execucao(tmp_path, monkeypatch):
+    # Sem PYTHONUNBUFFERED herdado: o fallback precisa forçar o filho sem buffer
+    monkeypatch.delenv("PYTHONUNBUFFERED", raising=False)
+    codigo = tmp_path / "acao.py"
+    codigo.write_text("for i in range(3):\n    print('linha', i)\n    x = sum(range(8 * 10 ** 6))\nresultado = 'fim'")
+    frames = _frames_stream_subprocess(codigo)
+    saidas = [(t, f) for t, f in frames if f["tipo"] == "saida"]
+    assert [f["texto"] for _, f in saidas] == ["linha 0\n", "linha 1\n", "linha 2\n"]
+    fim, resultado = frames[-1]
+    assert resultado["tipo"] == "resultado" and resultado["resultado"] == "fim"
+    assert saidas[0][0] < fim - 0.05  # a primeira linha chegou antes do fim
+
+
+def test_stream_subprocess_fallback_timeout_colhe_o_processo(tmp_path, monkeypatch):
+    from srodolfobarbosa import deus
+
+    monkeypatch.setattr(deus, "SANDBOX_TIMEOUT", 0.5)
+    codigo = tmp_path / "trava.py"
+    codigo.write_text("while True:\n    pass")
+    _, resultado = _frames_stream_subprocess(codigo)[-1]
+    assert resultado["status"] == "timeout" and resultado["motivo"] == "timeout"
+
+
+def test_rota_rapida_registra_a_decisao_sem_treinar_o_roteador(tmp_path, monkeypatch):
+    from srodolfobarbosa import deus
+    from srodolfobarbosa.nexo_intencoes import Rota
+
+    monkeypatch.chdir(tmp_path)  # sabedoria_acumulada.json
+    nexo = deus.nexo
+    nexo.habilidades.registrar("eco", lambda texto: f"eco: {texto}", somente_leitura=True)
+    monkeypatch.setattr(nexo.habilidades, "permitidas_llm", {"eco"})
+    aprendidas = []
+    monkeypatch.setattr(nexo.intencoes, "aprender", lambda ordem, habilidade: aprendidas.append(habilidade))
+    monkeypatch.setattr(
+        nexo.intencoes,
+        "rotear",
+        lambda ordem, disponiveis=None: Rota("eco", 1.0, "gatilho", ("oi",)) if "eco" in disponiveis else None,
+    )
+
+    res = client.post("/executar", json={"ordem": "eco oi"})
+    assert res.json()["rota_rapida"]["habilidade"] == "eco"
+    assert res.json()["sintese"] == "eco: oi"
+    assert aprendidas == [] and nexo.memoria_sabedoria[-1]["via"] == "gatilho"
+
+
+def test_admin_startup_profile(monkeypatch):
+    import builtins
+
+    from srodolfobarbosa import deus
+
+    monkeypatch.setenv("ADMIN_TOKEN", "secrettoken")
+    assert client.get("/admin/startup_profile", params={"token": "errado"}).status_code == 403
+
+    res = client.get("/admin/startup_profile", params={"token": "secrettoken"})
+    assert res.status_code == 200
+    perfil = res.json()["profile"]
+    assert perfil["modo"] == "eager"
+    fases = {f["fase"] for f in perfil["fases"]}
+    assert {"boot_critical_repair", "imports_nucleo", "logger", "sdks_opcionais", "nexo_swarm"} <= fases
+    assert isinstance(perfil["imports_boot"], list) and perfil["imports_boot_total_ms"] >= 0
+    # Fim do boot: o hook de import já saiu de cena
+    assert deus.boot_profile._import_original is None
+    assert builtins.__import__.__name__ == "__import__"
+
+
+def test_modo_lazy_adia_sdks_e_swarm():
+    import os
+    import subprocess
+    import sys
+    import textwrap
+    from pathlib import Path
+
+    script = textwrap.dedent(
+        """
+        import builtins
+        from srodolfobarbosa import deus
+
+        assert deus.LAZY_INIT and deus.boot_profile.modo == "lazy"
+        assert deus.nexo is None  # nasce no evento 'startup'
+        assert all(s._valor is deus._SDKOpcional._PENDENTE for s in deus._SDKS.values())
+        assert "sdks_opcionais" not in {f["fase"] for f in deus.boot_profile.fases}
+
+        deus.DDGS  # __getattr__ do módulo: import no primeiro uso
+        assert deus._SDKS["DDGS"]._valor is not deus._SDKOpcional._PENDENTE
+        assert "duckduckgo_search" in deus.boot_profile.imports_sdk
+        try:
+            deus.nao_existe
+        except AttributeError:
+            pass
+        else:
+            raise AssertionError("atributo inexistente deveria falhar")
+        assert builtins.__import__.__name__ == "__import__"
+        """
+    )
+    repo_root = Path(__file__).resolve().parent.parent
+    env = {**os.environ, "NEXO_LAZY_INIT": "true"}
+    res = subprocess.run([sys.executable, "-c", script], cwd=repo_root, env=env, capture_output=True, text=True, timeout=120)
+    assert res.returncode == 0, res.stderr[-2000:]
+
+
+def test_admin_exec_pending_batch(tmp_path, monkeypatch):
+    from srodolfobarbosa import deus
+
+    monkeypatch.setattr(deus, "BASE_DIR", tmp_path)
+    monkeypatch.setenv("ADMIN_TOKEN", "secrettoken")
+    pending = tmp_path / "pending_actions"
+    pending.mkdir()
+    (pending / "lote_a.py").write_text("resultado = 1 + 2")
+    (pending / "lote_b.py").write_text("print('oi')\nresultado = 'b'")
+    (pending / "lote_erro.py").write_text("resultado = 1 / 0")
+    (pending / "inseguro.py").write_text("import os\nresultado = os.getcwd()")
+    (tmp_path / "fora.py").write_text("resultado = 'escapou'")
+
+    def lote(**dados):
+        return client.post("/admin/exec_pending_batch", json={"token": "secrettoken", **dados})
+
+    assert client.post("/admin/exec_pending_batch", json={"token": "errado", "glob": "*.py"}).status_code == 403
+    assert lote().status_code == 400
+    assert lote(glob="nada_*.py").status_code == 400
+
+    res = lote(filenames=["lote_a.py", "inseguro.py", "../fora.py", "sumiu.py"], glob="lote_*.py")
+    assert res.status_code == 200
+    corpo = res.json()
+    # filenames primeiro, depois o glob em ordem, sem repetir lote_a.py
+    nomes = ["lote_a.py", "inseguro.py", "../fora.py", "sumiu.py", "lote_b.py", "lote_erro.py"]
+    assert [r["filename"] for r in corpo["resultados"]] == nomes
+    assert corpo["total"] == 6 and corpo["ok"] == 2 and corpo["concorrencia"] >= 1
+    por_nome = {r["filename"]: r for r in corpo["resultados"]}
+
+    a = por_nome["lote_a.py"]
+    assert a["status"] == "ok" and a["resultado"] == "3" and a["motivo"] == "ok"
+    assert {"wall_ms", "cpu_ms", "peak_rss_kb", "saida"} <= set(a)
+    assert por_nome["lote_b.py"]["resultado"] == "b" and isinstance(por_nome["lote_b.py"]["saida"], str)
+    assert por_nome["inseguro.py"] == {"filename": "inseguro.py", "status": "unsafe_code"}
+    assert por_nome["../fora.py"]["status"] == "not_found"
+    assert por_nome["sumiu.py"]["status"] == "not_found"
+    erro = por_nome["lote_erro.py"]
+    assert erro["status"] == "error" and erro["detail"] and "resultado" not in erro
+
+
+def test_admin_skills_invoke_exige_admin_token(monkeypatch):
+    from srodolfobarbosa import deus
+
+    deus.nexo.habilidades.registrar("eco_admin", lambda texto: texto)
+    chamada = {"chamadas": [{"habilidade": "eco_admin", "args": ["oi"]}]}
+
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.post("/admin/skills/invoke", json=chamada).status_code == 403
+    assert client.post("/admin/skills/invoke", json={**chamada, "token": None}).status_code == 403
+
+    monkeypatch.setenv("ADMIN_TOKEN", "secrettoken")
+    assert client.post("/admin/skills/invoke", json={**chamada, "token": "errado"}).status_code == 403
+    res = client.post("/admin/skills/invoke", json={**chamada, "token": "secrettoken"})
+    assert res.status_code == 200 and res.json()["resultados"][0]["resultado"] == "oi"
+
+
+class _RequisicaoJSON:
+    """Só o que os endpoints usam de Request, para chamá-los juntos no mesmo event loop."""
+
+    headers = {"content-type": "application/json"}
+
+    def __init__(self, dados):
+        self._dados = dados
+
+    async def json(self):
+        return self._dados
+
+
+def test_teto_de_concorrencia_do_sandbox_vale_entre_requisicoes(tmp_path, monkeypatch):
+    import asyncio
+
+    from srodolfobarbosa import deus
+
+    monkeypatch.setattr(deus, "BASE_DIR", tmp_path)
+    monkeypatch.setenv("ADMIN_TOKEN", "secrettoken")
+    monkeypatch.setenv("NEXO_SANDBOX_CONCORRENCIA", "2")
+    pending = tmp_path / "pending_actions"
+    pending.mkdir()
+    for i in range(3):
+        (pending / f"lote_{i}.py").write_text(f"resultado = {i}")
+    simultaneas = {"agora": 0, "pico": 0}
+
+    async def sandbox_lento(code, path):
+        simultaneas["agora"] += 1
+        simultaneas["pico"] = max(simultaneas["pico"], simultaneas["agora"])
+        await asyncio.sleep(0.05)
+        simultaneas["agora"] -= 1
+        return {"status": "ok", "motivo": "ok", "resultado": path.stem}
+
+    monkeypatch.setattr(deus, "_executar_em_sandbox", sandbox_lento)
+
+    async def juntas():
+        lote = _RequisicaoJSON({"token": "secrettoken", "glob": "lote_*.py"})
+        unico = _RequisicaoJSON({"token": "secrettoken", "filename": "lote_0.py"})
+        return await asyncio.gather(
+            deus.admin_exec_pending_batch(lote),
+            deus.admin_exec_pending_batch(lote),
+            deus.admin_exec_pending(unico),
+        )
+
+    lote_a, lote_b, unico = asyncio.run(juntas())
+    # 7 execuções em três requisições sobrepostas, nunca mais de 2 ao mesmo tempo
+    assert simultaneas["pico"] == 2
+    assert lote_a["ok"] == lote_b["ok"] == 3 and lote_a["concorrencia"] == 2
+    assert unico["status"] == "ok" and unico["resultado"] == "lote_0"
@@ -7,7 +7,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..",
 from srodolfobarbosa.auto_repair.llm_log_analyst import LLMLogAnalyst
 
 
-def test_mock_importerror():
+def test_mock_importerror(tmp_path, monkeypatch):
+    # cache fora da árvore do repositório
+    monkeypatch.setattr("srodolfobarbosa.auto_repair.llm_log_analyst.CACHE_DIR", tmp_path)
     analyst = LLMLogAnalyst(provider="mock")
     log = "Traceback (most recent call last):\n  File \"/app/foo.py\", line 1, in <module>\nImportError: No module named 'pinecone'\n"
     res = analyst.analyze(log)
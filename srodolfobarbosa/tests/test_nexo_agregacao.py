@@ -0,0 +1,95 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.nexo_agregacao import AgregadorErros, fingerprint, normalizar
+from srodolfobarbosa.nexo_realtime_monitor import NEXORealtimeMonitor
+
+
+def test_fingerprint_ignora_numeros_ids_e_timestamps():
+    a = "2026-01-01 12:00:00.123 | ERROR | req 8f3a9c2e11 user_42 - Error code: 413 after 812ms"
+    b = "2026-03-09T08:15:59Z | ERROR | req 0badcafe99 user_7 - Error code: 413 after 9ms"
+    assert normalizar(a).endswith("Error code: <n> after <n>")
+    assert fingerprint("error_413", a) == fingerprint("error_413", b)
+    assert fingerprint("error_413", a) != fingerprint("error_timeout", a)
+    assert fingerprint("x", "timeout em groq") != fingerprint("x", "timeout em openai")
+
+
+def test_rate_limit_por_fingerprint_e_janela():
+    agregador = AgregadorErros(janela=10, intervalo_fix=30)
+    primeira = agregador.registrar("error_timeout", "timed out after 30s", agora=100.0)
+    assert primeira.aplicar_fix and primeira.nova
+    for t in range(1, 5):
+        decisao = agregador.registrar(
+            "error_timeout", f"timed out after {t}s", agora=100.0 + t
+        )
+        assert not decisao.aplicar_fix
+    assert decisao.na_janela == 5 and decisao.suprimidos == 4
+    assert (
+        agregador.registrar(
+            "error_timeout", "timed out after 1s", agora=112.0
+        ).na_janela
+        == 3
+    )  # 103, 104 e 112
+    assert agregador.registrar(
+        "error_timeout", "timed out after 1s", agora=131.0
+    ).aplicar_fix
+    assert agregador.expirar(agora=1000.0) == 1 and not agregador.entradas
+
+
+def test_amostragem_e_memoria_limitada():
+    agregador = AgregadorErros(limite_por_segundo=10, max_fingerprints=5)
+    pesos = []
+    for _ in range(100):
+        pesos.append(agregador.amostrar("fp", agora=50.5))
+        if pesos[-1]:
+            agregador.registrar("t", "repetido", pesos[-1], agora=50.5, fp="fp")
+    assert pesos.count(0) > 50
+    # taxa normalizou: a próxima passa e leva as repetições ainda não contadas
+    assert sum(pesos) + agregador.amostrar("fp", agora=52.0) == 101
+    for i in range(20):
+        agregador.registrar(
+            "t", f"erro distinto {'abcdefghijklmnopqrst'[i]}", agora=1.0
+        )
+    assert (
+        len(agregador.entradas) == 5 and agregador.stats["despejadas"] == 16
+    )  # + "fp"
+
+
+def test_tempestade_nao_descarta_a_primeira_linha_de_um_erro_novo():
+    agregador = AgregadorErros(janela=10, limite_por_segundo=10)
+
+    def linha(fp, tipo, texto, agora):
+        peso = agregador.amostrar(fp, agora=agora)
+        if peso:
+            agregador.registrar(tipo, texto, peso, agora=agora, fp=fp)
+        return peso
+
+    ruido = [linha("413", "error_413", "Error code: 413", 100.5) for _ in range(300)]
+    assert ruido.count(0) > 250
+    assert (
+        linha("critico", "db", "database corrupted", 100.5) == 1
+    )  # novo: sempre passa
+    assert (
+        linha("critico", "db", "database corrupted", 100.6) == 0
+    )  # repetição: afinada
+    # saiu da janela: volta a passar e conta a repetição descartada
+    assert linha("critico", "db", "database corrupted", 115.0) == 2
+    assert agregador.entradas["critico"].total == 3
+    assert agregador.stats["amostradas"] + agregador.stats["descartadas"] == 303
+
+
+def test_monitor_tempestade_um_fix_por_fingerprint(tmp_path):
+    monitor = NEXORealtimeMonitor(str(tmp_path))
+
+    async def tempestade():
+        for i in range(500):
+            await monitor._process_log_line(f"Error code: 413 request {i}", "nexo.log")
+        await monitor._process_log_line("429 rate limit exceeded", "nexo.log")
+
+    asyncio.run(tempestade())
+    assert monitor.stats["total_errors"] == 501
+    assert monitor.stats["total_fixes"] == 2 and len(monitor.fixer.fixes_log) == 2
+    assert monitor.stats["suppressed_fixes"] == 499
@@ -0,0 +1,129 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports when running tests in CI
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+import json
+
+from srodolfobarbosa.nexo_analise import (
+    VERSAO_ANALISE,
+    AnalisadorCodigo,
+    analisar_codigo,
+)
+
+CODIGO = """
+import requests
+from os import path
+
+def baixar(urls):
+    for u in urls:
+        requests.get(u)
+    try:
+        pass
+    except Exception:
+        pass
+
+async def rapido():
+    return open("x")
+"""
+
+
+def test_single_pass_facts():
+    a = analisar_codigo(CODIGO)
+    assert a.imports == ("requests", "os")
+    assert not a.seguro
+    assert a.funcoes_io_sincrono == ("baixar",)
+    assert a.loops_com_io == 1
+    assert a.excepts_genericos == 1
+    assert dict(a.funcoes)["baixar"] == 7
+    assert "requests" in a.tokens
+
+
+def test_is_code_safe_semantics():
+    assert analisar_codigo("resultado = 1 + 2").seguro
+    assert not analisar_codigo("__import__('os')").seguro
+    assert not analisar_codigo("os.system('ls')").seguro
+    assert not analisar_codigo("def (").seguro
+
+
+def test_bloqueia_introspeccao_privada():
+    # print.__func__.__globals__ chegava aos globais do worker do pool
+    a = analisar_codigo("g = print.__func__.__globals__\ng['run_code'] = None")
+    assert not a.seguro and set(a.acessos_privados) == {"__func__", "__globals__"}
+    assert not analisar_codigo("resultado = (1).__class__").seguro
+    assert not analisar_codigo("x = obj._estado").seguro
+    assert not analisar_codigo("b = __builtins__").seguro
+    assert analisar_codigo("resultado = [x.real for x in range(3)]").seguro
+
+
+def test_bloqueia_introspeccao_de_frames_e_codigo():
+    # g().gi_frame.f_back.f_globals sobe até os globais de quem executa
+    a = analisar_codigo(
+        "def g():\n    yield 1\nglobais = g().gi_frame.f_back.f_globals"
+    )
+    assert not a.seguro and set(a.acessos_privados) == {
+        "gi_frame",
+        "f_back",
+        "f_globals",
+    }
+    assert not analisar_codigo("c = corrotina.cr_frame.f_locals").seguro
+    assert not analisar_codigo("b = erro.__traceback__.tb_frame.f_builtins").seguro
+    assert not analisar_codigo("nomes = f.gi_code.co_names").seguro
+    assert analisar_codigo("frame = 1\nresultado = frame + 1").seguro
+
+
+def test_cache_parses_each_content_once(tmp_path):
+    analisador = AnalisadorCodigo(max_itens=2, dir_cache=tmp_path / "cache")
+    arq = tmp_path / "mod.py"
+    arq.write_text(CODIGO)
+    assert analisador.analisar(CODIGO) is analisador.analisar_arquivo(arq)
+    analisador.analisar_arquivo(arq)
+    assert analisador.stats["parses"] == 1
+
+    # novo processo (LRU vazio) reaproveita o cache em disco
+    outro = AnalisadorCodigo(dir_cache=tmp_path / "cache")
+    assert outro.analisar(CODIGO).imports == ("requests", "os")
+    assert outro.stats == {"hits": 0, "disco": 1, "parses": 0}
+
+
+def test_cache_em_disco_versionado_e_sem_poder_de_aprovar(tmp_path):
+    cache = tmp_path / "cache"
+    AnalisadorCodigo(dir_cache=cache).analisar("os.system('ls')")
+    (arquivo,) = cache.glob("*.json")
+    assert arquivo.name.endswith(f".{VERSAO_ANALISE}.json")
+
+    # Veredito forjado no disco: fatos "limpos" para código perigoso
+    dados = json.loads(arquivo.read_text())
+    dados["chamadas_perigosas"] = []
+    arquivo.write_text(json.dumps(dados))
+    analisador = AnalisadorCodigo(dir_cache=cache)
+    assert analisador.analisar(
+        "os.system('ls')"
+    ).seguro  # caminho de inspeção comum lê o disco
+    assert not analisador.analisar("os.system('ls')", usar_disco=False).seguro
+
+    # Entrada de outra versão das regras é ignorada
+    antigo = cache / arquivo.name.replace(VERSAO_ANALISE, "versao-velha")
+    dados["versao"] = "versao-velha"
+    antigo.write_text(json.dumps(dados))
+    arquivo.unlink()
+    outro = AnalisadorCodigo(dir_cache=cache)
+    assert not outro.analisar("os.system('ls')").seguro
+    assert outro.stats["parses"] == 1
+
+
+def test_cache_em_disco_limitado_e_sem_versoes_antigas(tmp_path):
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    velho = cache / f"{'a' * 64}.versao-velha.json"
+    velho.write_text("{}")
+    AnalisadorCodigo(dir_cache=cache)  # ao subir, apaga o que é de outra versão
+    assert not velho.exists()
+
+    analisador = AnalisadorCodigo(dir_cache=cache, max_disco=8)
+    for i in range(20):
+        analisador.analisar(f"resultado = {i}")
+    assert len(list(cache.glob("*.json"))) <= 8
+    # a entrada mais recente sobrevive à poda
+    outro = AnalisadorCodigo(dir_cache=cache, max_disco=8)
+    assert outro.analisar("resultado = 19").ok and outro.stats["disco"] == 1
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.nexo_backfill import backfill, dividir_em_blocos
+from srodolfobarbosa.nexo_realtime_monitor import NEXORealtimeMonitor
+
+
+def _log(path, horas=3, por_hora=40):
+    linhas = []
+    for h in range(horas):
+        for i in range(por_hora):
+            ts = f"2026-01-01 1{h}:00:{i % 60:02d}.000"
+            if i % 10 == 0:
+                linhas.append(
+                    f"{ts} | ERROR | deus:executar - Error code: 413 request {i}"
+                )
+            elif i % 10 == 5:
+                linhas.append(
+                    f"{ts} | WARNING | deus:groq - Request timed out after {i}s"
+                )
+            else:
+                linhas.append(
+                    f"{ts} | INFO | deus:pensar - contexto montado com {i} itens"
+                )
+    path.write_text("\n".join(linhas) + "\n")
+
+
+def test_blocos_cortam_em_linhas_e_cobrem_o_arquivo(tmp_path):
+    log = tmp_path / "nexo_lucro.log"
+    _log(log)
+    dados = log.read_bytes()
+    blocos = dividir_em_blocos(log, tamanho_bloco=500)
+    assert len(blocos) > 5
+    assert blocos[0][1] == 0 and blocos[-1][2] == len(dados)
+    for (_, _, fim), (_, inicio, _) in zip(blocos, blocos[1:]):
+        assert fim == inicio and dados[fim - 1 : fim] == b"\n"
+    (tmp_path / "vazio.log").touch()
+    assert dividir_em_blocos(tmp_path / "vazio.log") == []
+
+
+def test_backfill_paralelo_igual_ao_sequencial(tmp_path):
+    for nome in ("nexo_lucro.log", "nexo_seguranca.log"):
+        _log(tmp_path / nome)
+    arquivos = sorted(tmp_path.glob("*.log"))
+    sequencial = backfill(arquivos, workers=1, tamanho_bloco=700)
+    paralelo = backfill(arquivos, workers=2, tamanho_bloco=700)
+    for chave in (
+        "linhas",
+        "linhas_com_erro",
+        "por_tipo",
+        "por_hora",
+        "por_arquivo",
+        "top_fingerprints",
+    ):
+        assert sequencial[chave] == paralelo[chave]
+    assert paralelo["linhas"] == 240 and paralelo["linhas_com_erro"] == 48
+    assert paralelo["por_hora"]["2026-01-01T10"]["error_413"] == 8
+    assert paralelo["top_fingerprints"][0]["ocorrencias"] == 24
+
+
+def test_monitor_modo_backfill(tmp_path):
+    _log(tmp_path / "nexo_lucro.log")
+    relatorio = asyncio.run(NEXORealtimeMonitor(str(tmp_path)).backfill_mode(workers=1))
+    salvo = json.loads((tmp_path / "backfill_report.json").read_text())
+    assert salvo["por_tipo"] == relatorio["por_tipo"]
+    assert set(salvo["por_tipo"]) >= {"error_413", "error_timeout"}
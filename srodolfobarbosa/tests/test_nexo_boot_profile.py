@@ -0,0 +1,78 @@
+import builtins
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.nexo_boot_profile import StartupProfiler
+
+
+def _modulo_lento(tmp_path, monkeypatch, nome, segundos=0.05):
+    (tmp_path / f"{nome}.py").write_text(f"import time\ntime.sleep({segundos})\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, nome, raising=False)
+
+
+def test_fases_e_imports_sdk_no_relatorio():
+    profiler = StartupProfiler(modo="lazy")
+    with profiler.fase("logger"):
+        time.sleep(0.02)
+    with profiler.medir_import("sdk_x"):
+        time.sleep(0.01)
+    profiler.marcar_pronto()
+
+    relatorio = profiler.relatorio()
+    assert relatorio["modo"] == "lazy"
+    assert [f["fase"] for f in relatorio["fases"]] == ["logger"]
+    assert relatorio["fases"][0]["duracao_ms"] >= 15
+    assert relatorio["imports_sdk"][0]["modulo"] == "sdk_x"
+    assert relatorio["pronto_ms"] >= relatorio["fases"][0]["duracao_ms"]
+
+
+def test_fase_registrada_mesmo_quando_falha():
+    profiler = StartupProfiler()
+    with pytest.raises(RuntimeError):
+        with profiler.fase("quebra"):
+            raise RuntimeError("boom")
+    assert profiler.fases[0]["fase"] == "quebra"
+
+
+def test_hook_mede_import_novo_e_restaura_o_import_original(tmp_path, monkeypatch):
+    _modulo_lento(tmp_path, monkeypatch, "modulo_lento_boot")
+    original = builtins.__import__
+    profiler = StartupProfiler()
+    profiler.instalar_hook_import()
+    try:
+        assert builtins.__import__ is not original
+        import modulo_lento_boot  # noqa: F401
+        import os.path  # noqa: F401 — já carregado: não entra no relatório
+    finally:
+        profiler.remover_hook_import()
+
+    assert builtins.__import__ is original
+    assert profiler.imports["modulo_lento_boot"] >= 40
+    assert "os" not in profiler.imports
+    assert profiler.relatorio()["imports_boot"][0]["modulo"] == "modulo_lento_boot"
+
+
+def test_hook_sai_sozinho_se_o_import_do_dono_falhar(tmp_path, monkeypatch):
+    _modulo_lento(tmp_path, monkeypatch, "modulo_depois_da_falha", segundos=0)
+    (tmp_path / "dono_quebrado.py").write_text(
+        "from srodolfobarbosa.nexo_boot_profile import StartupProfiler\n"
+        "perfil = StartupProfiler()\n"
+        "perfil.instalar_hook_import(dono=__name__)\n"
+        "raise RuntimeError('boot falhou')\n"
+    )
+    original = builtins.__import__
+    with pytest.raises(RuntimeError):
+        import dono_quebrado  # noqa: F401
+    assert "dono_quebrado" not in sys.modules
+    try:
+        import modulo_depois_da_falha  # noqa: F401 — o hook vê o dono fora de sys.modules e se remove
+
+        assert builtins.__import__ is original
+    finally:
+        builtins.__import__ = original
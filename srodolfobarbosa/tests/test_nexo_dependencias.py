@@ -0,0 +1,116 @@
+import sys
+import os
+
+# ensure repo root is on sys.path for imports when running tests in CI
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from srodolfobarbosa.nexo_dependencias import (
+    DependencyService,
+    comandos_pip,
+    instalar_com_relatorio,
+    normalizar_nome,
+)
+
+
+def test_normalizar_nome():
+    assert normalizar_nome("Python_Dotenv") == "python-dotenv"
+    assert normalizar_nome("zope.interface") == "zope-interface"
+
+
+def test_snapshot_cached_between_checks():
+    deps = DependencyService()
+    assert deps.is_installed("pytest")
+    assert deps.is_installed("json")
+    assert not deps.is_installed("pacote-que-nao-existe-nexo")
+    for _ in range(100):
+        deps.is_installed("pytest")
+    assert deps.stats["snapshots"] == 1
+
+
+def test_garantir_installs_only_missing():
+    chamados = []
+
+    def instalador(pkgs):
+        chamados.append(pkgs)
+        return False
+
+    deps = DependencyService(instalador=instalador)
+    res = deps.garantir(["pytest", "pacote-que-nao-existe-nexo"])
+    assert res == {"pytest": True, "pacote-que-nao-existe-nexo": False}
+    assert chamados == [["pacote-que-nao-existe-nexo"]]
+
+    # sem instalação: apenas consulta, nada de instalador
+    res = deps.garantir(["pytest"], instalar=False)
+    assert res == {"pytest": True}
+    assert chamados == [["pacote-que-nao-existe-nexo"]]
+
+
+def test_garantir_batches_missing_into_one_install():
+    chamados = []
+    deps = DependencyService(instalador=lambda pkgs: chamados.append(list(pkgs)))
+    deps.garantir(["nexo-falta-a", "pytest", "nexo-falta-b", "nexo-falta-c"])
+    assert chamados == [["nexo-falta-a", "nexo-falta-b", "nexo-falta-c"]]
+
+
+def test_comandos_pip_wheelhouse_first():
+    assert len(comandos_pip(["a", "b"])) == 1
+    offline, online = comandos_pip(["a", "b"], wheelhouse="/wh")
+    assert "--no-index" in offline and offline[-2:] == ["a", "b"]
+    assert "--no-index" not in online and "/wh" in online
+
+
+def test_lote_com_nome_invalido_isola_a_falha():
+    lotes = []
+    ruins = {"PIL", "fastapii"}
+
+    def pip(lote):
+        lotes.append(list(lote))
+        return not ruins & set(lote)
+
+    res = instalar_com_relatorio(
+        ["loguru", "PIL", "httpx", "fastapii", "yaml-x"], instalar=pip
+    )
+    assert res == {
+        "loguru": True,
+        "PIL": False,
+        "httpx": True,
+        "fastapii": False,
+        "yaml-x": True,
+    }
+    assert lotes[0] == ["loguru", "PIL", "httpx", "fastapii", "yaml-x"]
+    # lote bom: uma única chamada
+    lotes.clear()
+    assert instalar_com_relatorio(["a", "b", "c"], instalar=pip) == {
+        "a": True,
+        "b": True,
+        "c": True,
+    }
+    assert lotes == [["a", "b", "c"]]
+
+
+def test_falha_do_pip_loga_cauda_do_stderr(caplog, monkeypatch):
+    import logging
+    import subprocess
+
+    from srodolfobarbosa import nexo_dependencias
+
+    # pip de mentira: nada de rede nem de processo
+    stderr = (
+        "\n".join(f"linha {i}" for i in range(40))
+        + "\nERROR: No matching distribution found"
+    )
+    chamadas = []
+
+    def run(cmd, **kwargs):
+        chamadas.append(cmd)
+        return subprocess.CompletedProcess(cmd, 1, stdout="", stderr=stderr)
+
+    monkeypatch.setattr(nexo_dependencias.subprocess, "run", run)
+    with caplog.at_level(logging.WARNING, logger="NEXO-Dependencias"):
+        res = instalar_com_relatorio(
+            ["nexo-pacote-inexistente-xyz"], wheelhouse="/wheels", timeout=60
+        )
+    assert res == {"nexo-pacote-inexistente-xyz": False}
+    assert len(chamadas) == 2 and "--no-index" in chamadas[0]  # offline, depois online
+    assert "falhou (rc=1)" in caplog.text
+    assert "No matching distribution found" in caplog.text and "linha 39" in caplog.text
+    assert "linha 20\n" not in caplog.text  # só a cauda
@@ -0,0 +1,63 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.nexo_deteccao import (
+    MotorDeteccao,
+    Padrao,
+    benchmark,
+    literais_do_padrao,
+    padroes_de_literais,
+)
+from srodolfobarbosa.nexo_error_repair import NEXOErrorRepair
+from srodolfobarbosa.nexo_realtime_monitor import ErrorDetector
+
+
+def test_literais_obrigatorios():
+    assert literais_do_padrao(r"413|too large") == ["413", "too large"]
+    assert literais_do_padrao(r"rate.?limit|429") == ["limit", "429"]
+    assert literais_do_padrao(r"NexoSwarm\.pensar\(\) x") == ["nexoswarm.pensar() x"]
+    assert literais_do_padrao(r"(a|b)c") is None
+    assert literais_do_padrao(r"\d+|erro") is None
+
+
+def test_todos_os_tipos_por_linha_e_offsets():
+    motor = MotorDeteccao(ErrorDetector.padroes())
+    linha = "AttributeError: 'NoneType' object has no attribute 'content'"
+    assert motor.detectar(linha) == ["error_content", "error_missing_method"]
+    assert (
+        ErrorDetector().detect(linha)[0] == "error_content"
+    )  # prioridade antiga mantida
+
+    texto = "ok\nRequest TIMED OUT\nnada\n429 Too Many requests\n"
+    achados = list(motor.varrer(texto))
+    assert [(o, tipos) for o, _, tipos in achados] == [
+        (3, ["error_timeout"]),
+        (26, ["error_rate_limit"]),
+    ]
+    assert texto[26:].startswith("429")
+    assert motor.tipos_em(texto) == {"error_timeout", "error_rate_limit"}
+
+
+def test_motor_sem_literais_usa_a_alternacao():
+    motor = MotorDeteccao([Padrao("num", r"\d{3}"), Padrao("x", "falha")])
+    assert motor.prefiltro == "regex"
+    assert [t for _, _, t in motor.varrer("a\nerro 500\nFALHA\n")] == [["num"], ["x"]]
+
+
+def test_monitores_compartilham_o_motor():
+    substr = MotorDeteccao(padroes_de_literais({"'content'": {}, "timeout": {}}))
+    assert substr.primeiro("Read TIMEOUT on 'content'") == "'content'"
+
+    repair = NEXOErrorRepair()
+    issues = repair.scan_logs(
+        "x\nobject NoneType can't be used in 'await' expression\nCould not find the 'model' column\n"
+    )
+    assert [i["type"] for i in issues] == ["supabase_schema", "async_none"]
+    assert repair.detect_pensar_signature_error("nada") is False
+
+
+def test_benchmark_confere_com_o_laco_antigo():
+    rel = benchmark(linhas=2000)
+    assert rel["mesmas_linhas"] and rel["linhas_com_erro"] == 20
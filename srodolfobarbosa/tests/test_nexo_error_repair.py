@@ -0,0 +1,77 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.nexo_error_repair import NEXOErrorRepair, PatchPlan
+
+DEUS = """class NexoSwarm:
+    def pensar(self, ordem, extra, outro):
+        return ordem
+
+# extrair sabedoria
+def extrair_sabedoria(texto):
+    return texto
+"""
+
+
+def test_todos_os_fixes_numa_escrita(tmp_path):
+    (tmp_path / "deus.py").write_text(DEUS)
+    repair = NEXOErrorRepair(tmp_path)
+    repair.issues = [{"type": "pensar_signature"}, {"type": "async_none"}]
+
+    resultados = repair.apply_all_fixes()
+    assert resultados["pensar_signature"] and resultados["async_none"]
+    assert repair.last_plan.applied == ["pensar_signature", "async_none"]
+    assert (
+        repair.last_plan.changed_functions() is None
+    )  # assinaturas mudaram: suíte completa
+    novo = (tmp_path / "deus.py").read_text()
+    assert "def pensar(self, ordem)" in novo and "async def extrair_sabedoria(" in novo
+    assert [p.name for p in tmp_path.iterdir()] == ["deus.py"]  # sem .tmp sobrando
+
+
+def test_plano_invalido_nao_grava(tmp_path):
+    alvo = tmp_path / "deus.py"
+    alvo.write_text(DEUS)
+    plano = PatchPlan(alvo)
+    assert plano.add("quebra", lambda c: c.replace("return ordem", "return ordem)"))
+    assert not plano.commit() and "SyntaxError" in plano.error
+    assert alvo.read_text() == DEUS
+
+    plano = PatchPlan(alvo)
+    plano.add("corpo", lambda c: c.replace("return texto", "return texto.strip()"))
+    assert plano.changed_functions() == {"extrair_sabedoria"}
+
+    plano = PatchPlan(alvo)
+    plano.add(
+        "remove",
+        lambda c: c.replace(
+            "def extrair_sabedoria", "extrair_sabedoria = None\ndef _x"
+        ),
+    )
+    assert not plano.verify() and "extrair_sabedoria" in plano.error
+
+
+def test_sem_mudanca_nao_roda_testes(tmp_path):
+    (tmp_path / "deus.py").write_text("def pensar(self, ordem):\n    return ordem\n")
+    repair = NEXOErrorRepair(tmp_path)
+    repair.issues = [{"type": "pensar_signature"}]
+    assert repair.apply_all_fixes()["pensar_signature"]
+    assert not repair.last_plan.changed
+    assert repair.validate_fixes()
+
+
+def test_plano_rejeitado_nao_passa_na_validacao(tmp_path, monkeypatch):
+    (tmp_path / "deus.py").write_text(DEUS)
+    repair = NEXOErrorRepair(tmp_path)
+    repair.issues = [{"type": "pensar_signature"}]
+    monkeypatch.setattr(PatchPlan, "verify", lambda self: False)
+    resultados = repair.apply_all_fixes()
+    assert not resultados["pensar_signature"]
+    assert repair.last_plan.changed and not repair.last_plan.committed
+    assert (tmp_path / "deus.py").read_text() == DEUS
+    # não roda os testes contra o deus.py intacto
+    chamadas = []
+    monkeypatch.setattr(repair, "_tests_command", lambda: chamadas.append(1))
+    assert not repair.validate_fixes() and chamadas == []
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import sys
+import time
+
+# ensure repo root is on sys.path for imports when running tests in CI
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from srodolfobarbosa.nexo_habilidades import SkillRegistry
+
+
+def test_registrar_arquivo_is_lazy(tmp_path):
+    skill = tmp_path / "eco.py"
+    skill.write_text(
+        "CARREGADO = True\n\ndef executar(texto, vezes=1):\n    return texto * vezes\n"
+    )
+    carregados = []
+
+    def carregador(nome, caminho):
+        carregados.append(nome)
+        from srodolfobarbosa.nexo_habilidades import _importar_arquivo
+
+        return _importar_arquivo(nome, caminho)
+
+    reg = SkillRegistry(carregador=carregador)
+    reg.registrar_arquivo("eco", skill)
+    assert reg.descrever() == {"eco": "executar(texto, vezes=1)"}
+    assert carregados == []
+
+    res = reg.invocar("eco", "ab", vezes=2)
+    assert res["status"] == "ok" and res["resultado"] == "abab"
+    assert carregados == ["eco"]
+    assert reg.metricas()["eco"]["chamadas"] == 1
+
+
+def test_invocar_timeout_and_bad_args():
+    reg = SkillRegistry(max_workers=2)
+    reg.registrar("lenta", lambda: time.sleep(0.5))
+    reg.registrar("soma", lambda a, b: a + b)
+
+    assert reg.invocar("lenta", timeout=0.05)["status"] == "timeout"
+    assert reg.invocar("soma", 1)["status"] == "erro"
+    assert reg.invocar("nao_existe")["status"] == "negado"
+    assert reg.metricas()["lenta"]["timeouts"] == 1
+
+
+def test_invocar_varios_runs_concurrently_and_respects_llm_allow_list():
+    reg = SkillRegistry(max_workers=4, permitidas_llm=["dorme"])
+    reg.registrar("dorme", lambda s: time.sleep(s) or s)
+    reg.registrar("shell", lambda cmd: cmd)
+
+    inicio = time.perf_counter()
+    res = asyncio.run(
+        reg.invocar_varios(
+            [{"habilidade": "dorme", "args": {"s": 0.2}} for _ in range(4)]
+        )
+    )
+    assert time.perf_counter() - inicio < 0.6
+    assert [r["status"] for r in res] == ["ok"] * 4
+
+    negado = asyncio.run(reg.invocar_varios([{"habilidade": "shell", "args": ["ls"]}]))
+    assert negado[0]["status"] == "negado"
+    assert "shell" not in reg.descrever(para_llm=True)
+    assert reg.invocar("shell", "ls")["status"] == "ok"  # admin continua podendo
+
+
+def test_invocar_varios_args_timeout_e_origem_e_chamada_invalida():
+    reg = SkillRegistry(max_workers=2)
+    reg.registrar("agenda", lambda timeout, origem: f"{origem}:{timeout}")
+    reg.registrar("soma", lambda a, b: a + b)
+
+    res = asyncio.run(
+        reg.invocar_varios(
+            [
+                {"habilidade": "agenda", "args": {"timeout": 3, "origem": "cron"}},
+                {"habilidade": "soma", "args": "1, 2"},
+                {"habilidade": "soma", "args": [1, 2], "timeout": "rapido"},
+                {"habilidade": "soma", "args": [1, 2]},
+            ],
+            origem="admin",
+        )
+    )
+    # "timeout"/"origem" nos args chegam à habilidade; o lote não quebra
+    assert res[0]["status"] == "ok" and res[0]["resultado"] == "cron:3"
+    assert res[1]["status"] == "erro" and "args" in res[1]["erro"]
+    assert res[2]["status"] == "erro"
+    assert res[3]["status"] == "ok" and res[3]["resultado"] == 3
+
+
+def test_llm_sem_lista_nao_aciona_nada(monkeypatch):
+    monkeypatch.delenv("NEXO_SKILLS_LLM", raising=False)
+    reg = SkillRegistry()
+    reg.registrar("huggingface_sync", lambda acao, caminho_local=None: acao)
+    negado = reg.invocar("huggingface_sync", "upload", origem="llm")
+    assert negado["status"] == "negado"
+    assert reg.descrever(para_llm=True) == {} and reg.roteaveis() == []
+    monkeypatch.setenv("NEXO_SKILLS_LLM", "busca_web, huggingface_sync")
+    assert SkillRegistry().permitidas_llm == {"busca_web", "huggingface_sync"}
+
+
+def test_rota_rapida_so_alcanca_habilidades_somente_leitura():
+    reg = SkillRegistry(permitidas_llm=["busca_web", "huggingface_sync", "sem_texto"])
+    reg.registrar("busca_web", lambda query: query, somente_leitura=True)
+    reg.registrar("huggingface_sync", lambda acao, caminho_local=None: acao)
+    reg.registrar("sem_texto", lambda: "ok", somente_leitura=True)
+    assert reg.roteaveis() == ["busca_web"]
+    # o LLM ainda pode pedir a habilidade com efeitos; só a rota rápida não
+    assert reg.invocar("huggingface_sync", "download", origem="llm")["status"] == "ok"
+
+
+def test_carregamento_lento_nao_trava_o_registro(tmp_path):
+    import threading
+
+    skill = tmp_path / "lenta.py"
+    skill.write_text("def executar(x):\n    return x\n")
+    liberar = threading.Event()
+
+    def carregador(nome, caminho):
+        liberar.wait(2)
+        from srodolfobarbosa.nexo_habilidades import _importar_arquivo
+
+        return _importar_arquivo(nome, caminho)
+
+    reg = SkillRegistry(carregador=carregador)
+    reg.registrar_arquivo("lenta", skill)
+    thread = threading.Thread(target=reg.invocar, args=("lenta", 1))
+    thread.start()
+    time.sleep(0.05)
+    inicio = time.perf_counter()
+    reg.registrar("rapida", lambda x: x)  # não espera o import da outra
+    assert time.perf_counter() - inicio < 0.5
+    liberar.set()
+    thread.join()
@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.nexo_integrated_repair import NEXOSandboxIntegration
+
+LOG = """
+INFO boot ok
+ERROR NexoSwarm.pensar() takes 2 positional arguments but 3 were given
+ERROR object NoneType can't be used in 'await' expression
+"""
+
+
+def _integracao(tmp_path):
+    workspace = tmp_path / "srodolfobarbosa"
+    workspace.mkdir()
+    (workspace / "deus.py").write_text(
+        "class NexoSwarm:\n    def pensar(self, ordem, extra, outro):\n        return ordem\n"
+    )
+    (workspace / "nexo.log").write_text(LOG)
+    return NEXOSandboxIntegration(repo_root=str(tmp_path)), workspace
+
+
+def test_deteccao_e_fix_sem_subprocess(tmp_path):
+    integracao, workspace = _integracao(tmp_path)
+
+    deteccao = integracao.detect("nexo.log")  # relativo ao workspace
+    assert deteccao.errors_found and deteccao.bytes_read == len(LOG)
+    assert [i["type"] for i in deteccao.issues] == ["pensar_signature", "async_none"]
+
+    fixes = integracao.fix(deteccao)
+    assert fixes.results == {"pensar_signature": True, "async_none": True} and fixes.ok
+    assert "def pensar(self, ordem)" in (workspace / "deus.py").read_text()
+
+
+def test_ciclo_sem_erros_nao_chama_sandbox(tmp_path):
+    integracao, workspace = _integracao(tmp_path)
+    (workspace / "limpo.log").write_text("INFO tudo certo\n")
+
+    ciclo = integracao.run_cycle(str(workspace / "limpo.log"))
+    assert not ciclo.detection.errors_found
+    assert ciclo.fixes is None and ciclo.validation is None
+    assert integracao.run_nexo_detection("inexistente.log") == (False, [])
@@ -0,0 +1,57 @@
+import os
+import sys
+
+# ensure repo root is on sys.path for imports when running tests in CI
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from srodolfobarbosa.nexo_intencoes import IntentRouter, embedding, cosseno
+
+
+def test_embedding_is_normalized_and_accent_insensitive():
+    a = embedding("Qual é a cotação do dólar?")
+    b = embedding("qual e a cotacao do dolar")
+    assert abs(cosseno(a, a) - 1.0) < 1e-9
+    assert cosseno(a, b) > 0.99
+
+
+def test_gatilho_routes_and_strips_keyword():
+    router = IntentRouter()
+    rota = router.rotear("Pesquise sobre o preço do bitcoin")
+    assert rota.habilidade == "busca_web" and rota.via == "gatilho"
+    assert rota.args == ("o preço do bitcoin",)
+    # habilidade indisponível: segue para o LLM
+    assert router.rotear("pesquise algo", disponiveis=[]) is None
+
+
+def test_learned_intent_from_memory_and_llm_fallback():
+    memoria = [
+        {"ordem": "cotação do dólar hoje", "habilidade": "cambio"},
+        {"ordem": "qual a cotação do euro", "habilidade": "cambio"},
+        {"ordem": "cotação da libra agora", "habilidade": "cambio"},
+        {"ordem": "cotação do iene", "habilidade": "cambio", "sucesso": False},
+        {"insight": "sem ordem"},
+    ]
+    router = IntentRouter(gatilhos={}, limiar=0.5)
+    assert router.treinar(memoria) == 3
+
+    rota = router.rotear("cotação do dólar")
+    assert rota is not None and rota.habilidade == "cambio" and rota.via == "embedding"
+    assert router.rotear("escreva um poema sobre o mar") is None
+    assert router.status()["stats"] == {
+        "roteadas_gatilho": 0,
+        "roteadas_embedding": 1,
+        "para_llm": 1,
+    }
+
+
+def test_rota_rapida_nao_treina_com_as_proprias_decisoes():
+    memoria = [
+        {"ordem": f"cotação {moeda}", "habilidade": "cambio", "via": via}
+        for moeda, via in (
+            ("do dólar", "llm"),
+            ("do euro", "embedding"),
+            ("da libra", "gatilho"),
+        )
+    ]
+    router = IntentRouter(gatilhos={}, limiar=0.5)
+    assert router.treinar(memoria) == 1
+    assert router.status()["intencoes"] == {"cambio": 1}
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.nexo_self_healing_organism import SelfHealingOrganism
+
+
+def _varrer(organismo):
+    return asyncio.run(organismo.detect_and_heal_errors())
+
+
+def test_varredura_le_so_bytes_novos(tmp_path):
+    log = tmp_path / "nexo.log"
+    log.write_text("ok\nError code: 413\n")
+    organismo = SelfHealingOrganism(logs_dir=str(tmp_path))
+
+    assert _varrer(organismo)["by_type"] == {"Payload Too Large": 1}
+    assert _varrer(organismo)["count"] == 0  # nada novo: não cura de novo
+
+    with open(log, "a") as f:
+        f.write("request timeout\nlinha parcial 'content'")
+    resultado = _varrer(organismo)
+    assert resultado["by_type"] == {"Request Timeout": 1}  # parcial espera o \n
+
+    with open(log, "a") as f:
+        f.write("\n")
+    assert _varrer(organismo)["by_type"] == {"Content Attribute Missing": 1}
+    assert organismo.log_offsets[str(log)]["offset"] == log.stat().st_size
+
+
+def test_checkpoint_sobrevive_restart_e_rotacao(tmp_path):
+    log = tmp_path / "nexo.log"
+    log.write_text("timeout\n")
+    _varrer(SelfHealingOrganism(logs_dir=str(tmp_path)))
+    estado = json.loads((tmp_path / "nexo_organism_state.json").read_text())
+    assert estado["log_offsets"][str(log)]["offset"] == len("timeout\n")
+
+    # Novo processo: continua do checkpoint
+    organismo = SelfHealingOrganism(logs_dir=str(tmp_path))
+    assert _varrer(organismo)["count"] == 0
+
+    # Rotação (novo inode no mesmo nome) e truncamento relêem do início
+    os.rename(log, tmp_path / "nexo.1.old")
+    log.write_text("413\n")
+    assert _varrer(organismo)["by_type"] == {"Payload Too Large": 1}
+    log.write_text("")
+    _varrer(organismo)
+    log.write_text("timeout\n")
+    assert _varrer(organismo)["by_type"] == {"Request Timeout": 1}
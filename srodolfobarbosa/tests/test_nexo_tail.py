@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.nexo_tail import LogTailer
+
+
+def _linhas(lotes):
+    return [linha for _, linhas in lotes for linha in linhas]
+
+
+def test_rotacao_sem_perder_nem_repetir(tmp_path):
+    log = tmp_path / "nexo.log"
+    log.write_text("a1\na2\n")
+    tailer = LogTailer(tmp_path, "nexo*.log", bloco=4)  # bloco pequeno: várias leituras
+    assert _linhas(tailer.ler_disponivel()) == ["a1", "a2"]
+
+    with open(log, "a") as f:
+        f.write("a3\nparc")
+    # rotação estilo loguru: renomeia (ainda casa o padrão) e cria um novo
+    os.rename(log, tmp_path / "nexo.2026-01-01.log")
+    with open(tmp_path / "nexo.2026-01-01.log", "a") as f:
+        f.write("ial\n")
+    log.write_text("b1\n")
+    assert sorted(_linhas(tailer.ler_disponivel())) == ["a3", "b1", "parcial"]
+    assert tailer.stats["rotacoes"] == 1
+
+    # rotacionado saindo do padrão / apagado: drenado antes de fechar
+    with open(log, "a") as f:
+        f.write("b2\nb3")
+    os.rename(log, tmp_path / "velho.txt")
+    assert _linhas(tailer.ler_disponivel()) == ["b2", "b3"]
+    assert len(tailer.seguidores) == 1
+    tailer.fechar()
+
+
+def test_truncamento_volta_ao_inicio(tmp_path):
+    log = tmp_path / "nexo.log"
+    log.write_text("x" * 10 + "\n")
+    tailer = LogTailer(tmp_path, "nexo.log")
+    tailer.ler_disponivel()
+    log.write_text("novo\n")
+    assert _linhas(tailer.ler_disponivel()) == ["novo"]
+    tailer.fechar()
+
+
+def test_lotes_async_inotify_e_polling(tmp_path):
+    async def coletar(usar_inotify):
+        log = tmp_path / f"nexo-{usar_inotify}.log"
+        log.write_text("")
+        tailer = LogTailer(
+            tmp_path, log.name, intervalo_max=0.2, usar_inotify=usar_inotify
+        )
+        vistas = []
+
+        async def consumir():
+            async for _, linhas in tailer.lotes():
+                vistas.extend(linhas)
+                if len(vistas) >= 3:
+                    return
+
+        tarefa = asyncio.ensure_future(consumir())
+        await asyncio.sleep(0.1)
+        for i in range(3):
+            with open(log, "a") as f:
+                f.write(f"l{i}\n")
+            await asyncio.sleep(0.05)
+        await asyncio.wait_for(tarefa, 5)
+        return vistas
+
+    assert asyncio.run(coletar(True)) == ["l0", "l1", "l2"]
+    assert asyncio.run(coletar(False)) == ["l0", "l1", "l2"]
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.sandbox.asgi_probe import probe
+
+APP = """
+import asyncio, json
+
+estado = {"iniciado": False}
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            msg = await receive()
+            if msg["type"] == "lifespan.startup":
+                estado["iniciado"] = True
+                await send({"type": "lifespan.startup.complete"})
+            else:
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    await receive()
+    if scope["path"] == "/lento":
+        await asyncio.sleep(0.05)
+    status = {"/health": 200 if estado["iniciado"] else 503, "/quebra": 500}.get(scope["path"], 200)
+    await send({"type": "http.response.start", "status": status, "headers": []})
+    await send({"type": "http.response.body", "body": json.dumps({"q": scope["query_string"].decode()}).encode()})
+"""
+
+
+def _carregar(tmp_path):
+    (tmp_path / "app_fake.py").write_text(APP)
+    sys.path.insert(0, str(tmp_path))
+    try:
+        import app_fake
+
+        return app_fake.app
+    finally:
+        sys.path.remove(str(tmp_path))
+        sys.modules.pop("app_fake", None)
+
+
+def test_probe_latencia_e_5xx(tmp_path):
+    app = _carregar(tmp_path)
+    endpoints = [
+        {"path": "/health", "budget_ms": 200},
+        {"path": "/lento", "budget_ms": 10},
+        {"path": "/quebra", "method": "POST", "body": {}},
+    ]
+    rel = asyncio.run(probe(app, endpoints, requests_per_endpoint=5))
+
+    saude = rel["endpoints"]["GET /health"]
+    assert saude["ok"] and saude["status_codes"] == {"200": 5}  # lifespan rodou
+    assert saude["p50_ms"] <= saude["p95_ms"] <= saude["max_ms"]
+    assert not rel["endpoints"]["GET /lento"]["ok"]
+    assert "presupuesto" in rel["endpoints"]["GET /lento"]["failures"][0]
+    assert rel["endpoints"]["POST /quebra"]["failures"] == ["status 500"]
+    assert not rel["success"] and rel["endpoints_ok"] == 1
+
+
+def test_cli_imprime_relatorio_json(tmp_path):
+    (tmp_path / "app_fake.py").write_text(APP)
+    raiz = os.path.join(os.path.dirname(__file__), "..", "..")
+    res = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "srodolfobarbosa.sandbox.asgi_probe",
+            "--app",
+            "app_fake:app",
+            "--app-dir",
+            str(tmp_path),
+            "--endpoints",
+            json.dumps([{"path": "/health?x=1"}]),
+            "--requests",
+            "3",
+        ],
+        cwd=raiz,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    rel = json.loads(res.stdout.strip().splitlines()[-1])
+    assert res.returncode == 0 and rel["success"]
+    assert rel["endpoints"]["GET /health?x=1"]["status_codes"] == {"200": 3}
+
+
+def test_probe_e_bench_arrancam_a_app_sem_cron_nem_credenciais(tmp_path, monkeypatch):
+    from srodolfobarbosa.sandbox import runner as runner_mod
+
+    monkeypatch.setenv("GROQ_API_KEY", "gsk-real")
+    monkeypatch.setenv("MEU_PROVEDOR_SECRET", "s3")
+    monkeypatch.setenv("ADMIN_TOKEN", "admin-real")
+    monkeypatch.setenv("NEXO_ENABLE_CRON", "1")
+    ambientes = []
+
+    def run_cmd(cmd, cwd=None, timeout=None, env=None):
+        ambientes.append(env)
+        return subprocess.CompletedProcess(
+            cmd, 0, '{"success": true, "endpoints": {}}\n', ""
+        )
+
+    monkeypatch.setattr(runner_mod, "run_cmd", run_cmd)
+    (tmp_path / "srodolfobarbosa").mkdir()
+    runner = runner_mod.SandboxRunner(repo_path=str(tmp_path), test_shards=1)
+    assert runner._probe_asgi(tmp_path)[0]
+    assert runner._bench_once(tmp_path) == {"success": True, "endpoints": {}}
+
+    for env in ambientes:
+        assert env["NEXO_ENABLE_CRON"] == "0" and env["AUTO_INSTALL"] == "false"
+        assert (
+            env["NEXO_AUTO_EXPAND"] == "false" and env["NEXO_SANDBOX_POOL"] == "false"
+        )
+        assert (
+            env["GROQ_API_KEY"]
+            == env["MEU_PROVEDOR_SECRET"]
+            == env["SUPABASE_URL"]
+            == ""
+        )
+        assert env["ADMIN_TOKEN"] not in ("", "admin-real")
+        assert env["PATH"] == os.environ["PATH"]
@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.sandbox.bench import compare
+
+BASE = {
+    "import_s": 1.0,
+    "startup_s": 0.5,
+    "executar_p50_ms": 10.0,
+    "executar_p95_ms": 20.0,
+    "rss_kb": 100_000,
+}
+
+
+def test_compare_marca_regressao_acima_do_limiar_e_do_ruido():
+    lento = dict(BASE, executar_p95_ms=40.0, import_s=1.02, rss_kb=101_000)
+    rel = compare([BASE, BASE, BASE], [lento, BASE, lento])
+    assert rel["regressions"] == ["executar_p95_ms"]  # import +2% e rss +1% são ruído
+    assert rel["deltas"]["executar_p95_ms"] == 100.0
+    assert (
+        compare([BASE], [dict(BASE, executar_p95_ms=40.0)], {"executar_p95_ms": 2.0})[
+            "regressions"
+        ]
+        == []
+    )
+
+
+def test_compare_sem_baseline_ou_patch_quebrado():
+    assert compare([{"error": "x"}], [BASE])["skipped"]
+    assert compare([BASE], [{"error": "ImportError"}])["regressions"] == ["bench_error"]
+
+
+APP = """
+import json
+
+class Nexo:
+    def get_brain(self):
+        raise RuntimeError("LLM real no benchmark")
+
+nexo = Nexo()
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            msg = await receive()
+            await send({"type": msg["type"] + ".complete"})
+            if msg["type"] == "lifespan.shutdown":
+                return
+    await receive()
+    resposta = nexo.get_brain().invoke("ordem")
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": resposta.encode()})
+"""
+
+
+def test_bench_cli_usa_llm_falso(tmp_path):
+    (tmp_path / "app_fake.py").write_text(APP)
+    raiz = os.path.join(os.path.dirname(__file__), "..", "..")
+    res = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "srodolfobarbosa.sandbox.bench",
+            "--app",
+            "app_fake:app",
+            "--app-dir",
+            str(tmp_path),
+            "--requests",
+            "5",
+        ],
+        cwd=raiz,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    rel = json.loads(res.stdout.strip().splitlines()[-1])
+    assert res.returncode == 0, rel
+    assert rel["status_codes"] == {"200": 5}
+    assert rel["rss_kb"] > 0 and rel["import_s"] >= 0
+    assert 0 < rel["executar_p50_ms"] <= rel["executar_p95_ms"]
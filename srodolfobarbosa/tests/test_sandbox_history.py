@@ -0,0 +1,87 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.sandbox.history import HistoryStore, main, parse_test_outcomes
+
+
+def _run(i, decision, ts, outcome="passed", commit=None):
+    return {
+        "sandbox_id": f"s{i}",
+        "timestamp": ts,
+        "decision": decision,
+        "success": decision == "merge",
+        "confidence": 0.9 if decision == "merge" else 0.3,
+        "commit_hash": commit or f"c{i}",
+        "stage_timings": {"tests": 10.0 + i, "lint": 1.0},
+        "test_results": {
+            "outcomes": {"t.py::test_estavel": "passed", "t.py::test_instavel": outcome}
+        },
+    }
+
+
+def test_migra_jsonl_e_consulta(tmp_path):
+    legado = tmp_path / "history.jsonl"
+    outcomes = ["passed", "failed", "passed", "failed"]
+    with open(legado, "w") as f:
+        for i, o in enumerate(outcomes):
+            f.write(
+                json.dumps(
+                    _run(
+                        i,
+                        "merge" if o == "passed" else "revert",
+                        f"2026-01-0{i + 1}T00:00:00",
+                        o,
+                    )
+                )
+                + "\n"
+            )
+        f.write("lixo\n")
+    store = HistoryStore(tmp_path / "h.db")
+    assert store.migrate_jsonl(legado, "sandbox") == 4
+    assert store.migrate_jsonl(legado, "sandbox") == 0  # idempotente
+    store.record(
+        "repair",
+        {"timestamp": "2026-01-03T00:00:00", "decision": "review", "sandbox_ok": False},
+    )
+
+    total = store.decision_rates(source="sandbox")[0]
+    assert total["runs"] == 4 and total["decisions"]["merge"]["rate"] == 0.5
+    assert [
+        p["period"] for p in store.decision_rates(bucket="day", until="2026-01-03")
+    ] == ["2026-01-01", "2026-01-02"]
+
+    stages = store.stage_percentiles(since="2026-01-01")
+    assert stages["tests"]["n"] == 4 and stages["tests"]["max"] == 13.0
+    assert stages["lint"]["p95"] == 1.0
+
+    flaky = store.flaky_tests()
+    assert [f["test"] for f in flaky] == ["t.py::test_instavel"]
+    assert flaky[0]["flips"] == 3 and flaky[0]["fail_rate"] == 0.5
+    assert store.recent(1)[0]["sandbox_id"] == "s3"
+
+
+def test_flaky_mesmo_commit_e_pytest_verbose(tmp_path, capsys):
+    saida = (
+        "t.py::test_a PASSED [ 50%]\nt.py::test_b FAILED [100%]\nt.py::test_c SKIPPED\n"
+    )
+    assert parse_test_outcomes({"raw_output": saida}) == {
+        "t.py::test_a": "passed",
+        "t.py::test_b": "failed",
+    }
+
+    db = tmp_path / "h.db"
+    store = HistoryStore(db)
+    for i, o in enumerate(["passed", "passed", "failed"]):
+        store.record(
+            "sandbox", _run(i, "merge", f"2026-02-0{i + 1}T00:00:00", o, commit="mesmo")
+        )
+    assert store.flaky_tests()[0]["same_commit_conflicts"] == 1
+    assert store.flaky_tests(min_runs=4) == []
+
+    main(["stages", "--db", str(db), "--stage", "lint"])
+    assert json.loads(capsys.readouterr().out) == {
+        "lint": {"n": 3, "p50": 1.0, "p95": 1.0, "p99": 1.0, "max": 1.0}
+    }
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.sandbox.impact import TestImpactMap, diff_changes, text_changes
+
+FONTE = """\
+import os
+
+LIMITE = 3
+
+
+def soma(a, b):
+    return a + b
+
+
+class Conta:
+    def saldo(self):
+        total = 0
+        return total
+"""
+
+
+def _cobertura(tmp_path):
+    (tmp_path / "app.py").write_text(FONTE)
+    # linhas 7 (soma) e 12-13 (Conta.saldo); linha 3 roda no import, sem teste
+    return {
+        "files": {
+            "app.py": {
+                "contexts": {
+                    "3": [""],
+                    "7": ["tests/test_app.py::test_soma|run"],
+                    "12": ["tests/test_app.py::test_saldo|run"],
+                    "13": [
+                        "tests/test_app.py::test_saldo|run",
+                        "tests/test_app.py::test_tudo|run",
+                    ],
+                }
+            }
+        }
+    }
+
+
+def test_text_changes_resolve_funcoes():
+    novo = FONTE.replace("return a + b", "return b + a")
+    assert text_changes(FONTE, novo) == {"soma"}
+    assert text_changes(FONTE, FONTE.replace("total = 0", "total = 1")) == {
+        "Conta.saldo"
+    }
+    assert text_changes(FONTE, FONTE.replace("LIMITE = 3", "LIMITE = 4")) is None
+
+
+def test_selecao_por_funcao_e_full_periodico(tmp_path):
+    mapa = TestImpactMap(tmp_path / "impact.json", full_every=2)
+    assert mapa.plan({"app.py": {"soma"}}) == (None, "mapa vacío")
+
+    mapa.update_from_coverage(_cobertura(tmp_path), full=True, source_root=tmp_path)
+    assert mapa.plan({"app.py": {"soma"}}) == (
+        ["tests/test_app.py::test_soma"],
+        "impact",
+    )
+    assert mapa.plan({"app.py": {"Conta.saldo"}})[0] == [
+        "tests/test_app.py::test_saldo",
+        "tests/test_app.py::test_tudo",
+    ]
+    # mudança fora de funções: todos os testes que tocam o arquivo
+    assert len(mapa.plan({"app.py": None})[0]) == 3
+    # nada que o mapa saiba associar a um test: suite completa, nunca selección vacía
+    assert mapa.plan({"README.md": None}) == (None, "ningún test seleccionado")
+    assert mapa.plan({"app.py": {"soma"}, "nuevo.py": set()}) == (
+        None,
+        "nuevo.py nuevo",
+    )
+    assert mapa.plan({"app.py": {"soma", "sin_tests"}})[0] is None
+    assert mapa.plan({"config.json": None})[0] is None
+    assert mapa.plan({"Dockerfile": None})[0] is None
+    assert mapa.plan({})[0] is None
+    assert mapa.plan({"outro.py": {"f"}})[0] is None
+    assert mapa.plan({"conftest.py": None})[0] is None
+
+    mapa.update_from_coverage(_cobertura(tmp_path), full=False, source_root=tmp_path)
+    mapa.update_from_coverage(_cobertura(tmp_path), full=False, source_root=tmp_path)
+    assert mapa.plan({"app.py": {"soma"}}) == (None, "full cada 2 corridas")
+
+
+def test_diff_changes_contra_base(tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "user.email", "t@t")
+    git("config", "user.name", "t")
+    (tmp_path / "app.py").write_text(FONTE)
+    git("add", "app.py")
+    git("commit", "-q", "-m", "base")
+
+    (tmp_path / "app.py").write_text(FONTE.replace("total = 0", "total = 1"))
+    (tmp_path / "novo.py").write_text("x = 1\n")
+    git("add", "novo.py")
+    assert diff_changes(tmp_path, "HEAD") == {
+        "app.py": {"Conta.saldo"},
+        "novo.py": set(),
+    }
+
+
+def test_zero_tests_ejecutados_no_es_aprobado(tmp_path):
+    from srodolfobarbosa.sandbox.runner import SandboxRunner
+
+    (tmp_path / "srodolfobarbosa").mkdir()
+    runner = SandboxRunner(repo_path=str(tmp_path), test_shards=1)
+    runner._run_pytest = lambda targets, cwd: (0, {"success": True, "passed": 0})
+    ok, resultado = runner.run_tests(cwd=tmp_path, changes={"deus.py": {"sin_tests"}})
+    assert not ok and "ningún test ejecutado" in resultado["errors"]
+    assert resultado["impact"]["mode"] == "full"
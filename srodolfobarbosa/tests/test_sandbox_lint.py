@@ -0,0 +1,90 @@
+import json
+import os
+import stat
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.sandbox import lint
+from srodolfobarbosa.sandbox.lint import LintCache, changed_python_files, lint_files
+
+# ruff/black de mentira: registram a chamada e reportam problema em "ruim.py"
+RUFF = """#!/bin/sh
+echo "$@" >> "$LOG_CHAMADAS"
+case "$1" in --version) echo "ruff 0.0-falso"; exit 0;; esac
+for f in "$@"; do
+  if [ "$f" = "ruim.py" ]; then
+    echo '[{"filename": "'"$PWD"'/ruim.py", "code": "F401", "message": "x", "location": {"row": 1, "column": 1}}]'
+    exit 0
+  fi
+done
+echo '[]'
+"""
+BLACK = """#!/bin/sh
+echo "black $@" >> "$LOG_CHAMADAS"
+case "$1" in --version) echo "black 0.0-falso"; exit 0;; esac
+for f in "$@"; do
+  if [ "$f" = "feio.py" ]; then echo "would reformat feio.py" >&2; exit 1; fi
+done
+"""
+
+
+def _ferramentas(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for nome, script in (("ruff", RUFF), ("black", BLACK)):
+        exe = bin_dir / nome
+        exe.write_text(script)
+        exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "chamadas.log"
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("LOG_CHAMADAS", str(log))
+    lint.tool_version.cache_clear()
+    return log
+
+
+def test_lint_so_arquivos_novos_e_usa_cache(tmp_path, monkeypatch):
+    log = _ferramentas(tmp_path, monkeypatch)
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    for nome in ("ok.py", "ruim.py", "feio.py"):
+        (repo / nome).write_text(f"# {nome}\n")
+    cache = LintCache(tmp_path / "lint_cache.json")
+
+    rel = lint_files(["ok.py", "ruim.py", "feio.py"], repo, cache)
+    assert not rel["success"] and rel["ruff"]["errors"] == 1
+    assert rel["black"]["unformatted"] == 1 and "black: feio.py" in rel["issues"]
+    assert rel["cached"] == 0
+
+    log.write_text("")
+    rel = lint_files(
+        ["ok.py", "ruim.py", "feio.py"], repo, LintCache(tmp_path / "lint_cache.json")
+    )
+    assert rel["cached"] == 3 and rel["ruff"]["errors"] == 1
+    assert "check" not in log.read_text()  # nada relintado
+
+    (repo / "ok.py").write_text("# mudou\n")
+    rel = lint_files(["ok.py", "ruim.py"], repo, cache)
+    assert rel["cached"] == 1
+    chamadas = [linha for linha in log.read_text().splitlines() if "check" in linha]
+    assert all("ruim.py" not in c and "ok.py" in c for c in chamadas)
+    assert json.loads((tmp_path / "lint_cache.json").read_text())
+
+
+def test_changed_python_files(tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "user.email", "t@t")
+    git("config", "user.name", "t")
+    (tmp_path / "a.py").write_text("a = 1\n")
+    (tmp_path / "b.py").write_text("b = 1\n")
+    git("add", ".")
+    git("commit", "-qm", "base")
+    (tmp_path / "a.py").write_text("a = 2\n")
+    (tmp_path / "c.py").write_text("c = 1\n")
+    (tmp_path / "notas.txt").write_text("x\n")
+    os.remove(tmp_path / "b.py")
+    assert changed_python_files(tmp_path, "HEAD") == ["a.py", "c.py"]
@@ -0,0 +1,193 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# ensure repo root is on sys.path for imports when running tests in CI
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from srodolfobarbosa.sandbox_pool import HistoricoExecucoes, SandboxPool, _SaidaLimitada
+
+
+@pytest.fixture(scope="module")
+def pool():
+    p = SandboxPool(workers=2, max_execucoes=3, cpu_seconds=1, timeout=5)
+    p.iniciar()
+    yield p
+    p.encerrar()
+
+
+def test_executa_em_namespace_novo(pool):
+    assert pool.executar("x = 40\nresultado = x + 2\nprint('oi')")["resultado"] == "42"
+    # nada vaza entre execuções
+    r = pool.executar("resultado = x")
+    assert r["status"] == "error" and r["motivo"] == "exception"
+    assert pool.executar("resultado = 1 + 2")["saida"] == ""
+
+
+def test_limites_por_execucao(pool):
+    cpu = pool.executar("while True:\n    pass")
+    assert cpu["motivo"] == "cpu_limit"
+    assert cpu["cpu_ms"] >= 500
+    assert cpu["cpu_ms"] == round(cpu["cpu_user_ms"] + cpu["cpu_sys_ms"], 2)
+    mem = pool.executar("x = [0] * (10 ** 9)")
+    assert mem["motivo"] == "mem_limit"
+    assert pool.executar("resultado = sum(range(10))")["resultado"] == "45"
+
+
+def test_timeout_de_parede():
+    p = SandboxPool(workers=1, cpu_seconds=5, timeout=0.3)
+    try:
+        r = p.executar("while True:\n    pass")
+        assert r["status"] == "timeout"
+        assert p.executar("resultado = 7", timeout=5)["resultado"] == "7"
+    finally:
+        p.encerrar()
+
+
+def test_pico_rss_por_execucao(pool):
+    grande = pool.executar("x = [0] * (5 * 10 ** 6)\nresultado = len(x)")
+    pequena = pool.executar("resultado = 1")
+    assert grande["peak_rss_kb"] > pequena["peak_rss_kb"] + 20000
+
+
+def test_historico_execucoes(tmp_path):
+    caminho = tmp_path / "exec_history.jsonl"
+    hist = HistoricoExecucoes(caminho, limite_cpu_ms=1000)
+    hist.registrar(
+        "a.py",
+        {
+            "status": "ok",
+            "motivo": "ok",
+            "cpu_ms": 10.0,
+            "wall_ms": 12.0,
+            "peak_rss_kb": 9000,
+        },
+    )
+    hist.registrar(
+        "b.py",
+        {
+            "status": "error",
+            "motivo": "cpu_limit",
+            "cpu_ms": 1000.0,
+            "wall_ms": 1010.0,
+            "peak_rss_kb": 9100,
+        },
+    )
+
+    assert [i["filename"] for i in hist.consultar()] == ["b.py", "a.py"]
+    assert hist.consultar(motivo="cpu_limit")[0]["filename"] == "b.py"
+    resumo = hist.resumo()
+    assert resumo["motivos"] == {"ok": 1, "cpu_limit": 1}
+    assert resumo["perto_limite_cpu"] == 1
+    # recarrega do disco
+    assert len(HistoricoExecucoes(caminho).consultar()) == 2
+
+
+def test_stream_entrega_saida_antes_do_fim(pool):
+    # cada volta leva várias vezes INTERVALO_STREAM_S (e tudo cabe em cpu_seconds)
+    codigo = "for i in range(3):\n    print('linha', i)\n    x = sum(range(6 * 10 ** 6))\nresultado = 'fim'"
+    frames = list(pool.executar_stream(codigo))
+    saidas = [f for f in frames if f["tipo"] == "saida"]
+    assert len(saidas) >= 2
+    assert "".join(f["texto"] for f in saidas) == "linha 0\nlinha 1\nlinha 2\n"
+    assert frames[-1]["tipo"] == "resultado" and frames[-1]["resultado"] == "fim"
+
+
+def test_stream_cauda_limitada_e_cancelamento(pool):
+    frames = list(pool.executar_stream("for i in range(20000):\n    print('x' * 50)"))
+    final = frames[-1]
+    assert final["saida_truncada"] and len(final["saida"]) <= 64 * 1024
+    stream = pool.executar_stream("for i in range(10 ** 7):\n    print(i)")
+    assert next(stream)["tipo"] == "saida"
+    stream.close()
+    assert pool.executar("resultado = 5")["resultado"] == "5"
+
+
+def test_print_nao_expoe_metodo_ligado():
+    saida = _SaidaLimitada()
+    funcao = saida.funcao_print()
+    assert not hasattr(funcao, "__self__") and not hasattr(funcao, "__func__")
+    funcao("a", 1, sep="-")
+    assert saida.valor() == "a-1\n"
+
+
+# Sobe pelos frames a partir de um gerador até os globais do worker (sem passar pelo analisador)
+SEQUESTRO = """
+def g():
+    fr = gen.gi_frame.f_back
+    while fr is not None:
+        if 'run_code' in fr.f_globals:
+            fr.f_globals['run_code'] = lambda c, b=None: {'status': 'ok', 'resultado': 'HIJACKED'}
+        fr = fr.f_back
+    yield 1
+gen = g()
+for _ in gen:
+    pass
+resultado = 'feito'
+"""
+
+
+def test_execucao_nao_altera_o_worker_para_as_seguintes():
+    p = SandboxPool(workers=1, max_execucoes=50, timeout=5)
+    try:
+        assert p.executar(SEQUESTRO)["resultado"] == "feito"
+        assert p.executar("raise ValueError('x')")["motivo"] == "exception"
+        # mesmo worker (nada reciclado), namespace intacto
+        assert p.executar("resultado = 1 + 2")["resultado"] == "3"
+        assert p.status()["stats"]["workers_criados"] == 1
+    finally:
+        p.encerrar()
+
+
+def test_workers_nao_reimportam_o_main_do_servidor(tmp_path):
+    # Como `python deus.py`: o __main__ do pai não pode rodar de novo em cada worker
+    marca = tmp_path / "reimportado"
+    script = tmp_path / "servidor.py"
+    script.write_text(
+        "import sys\n"
+        f"sys.path.insert(0, {os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))!r})\n"
+        "if __name__ != '__main__':\n"
+        f"    open({str(marca)!r}, 'a').write(__name__)\n"
+        "from srodolfobarbosa.sandbox_pool import SandboxPool\n"
+        "if __name__ == '__main__':\n"
+        "    p = SandboxPool(workers=2, timeout=10)\n"
+        "    print(p.executar('resultado = 6 * 7')['resultado'])\n"
+        "    p.encerrar()\n"
+    )
+    saida = subprocess.run(
+        [sys.executable, str(script)], capture_output=True, text=True, timeout=60
+    )
+    assert saida.stdout.strip() == "42", saida.stderr
+    assert not marca.exists()
+
+
+def test_historico_rotaciona_ao_passar_do_limite(tmp_path):
+    caminho = tmp_path / "exec_history.jsonl"
+    hist = HistoricoExecucoes(caminho, max_bytes=2000)
+    for i in range(40):
+        hist.registrar(f"{i}.py", {"status": "ok", "motivo": "ok", "cpu_ms": 1.0})
+    assert (
+        caminho.stat().st_size < 2000 and (tmp_path / "exec_history.jsonl.1").exists()
+    )
+    assert len(hist.consultar(limite=100)) == 40  # janela em memória intacta
+    # ao reiniciar, o .1 completa o que o arquivo atual ainda não tem
+    recarregado = HistoricoExecucoes(caminho, max_bytes=2000).consultar(limite=100)
+    assert recarregado[0]["filename"] == "39.py" and len(recarregado) > 10
+
+
+def test_fallback_mede_o_rusage_do_filho_mesmo_morto_por_limite(tmp_path):
+    from srodolfobarbosa.sandbox_runner import ChildRun, exit_reason
+
+    runner = os.path.join(os.path.dirname(__file__), "..", "sandbox_runner.py")
+    codigo = tmp_path / "trava.py"
+    codigo.write_text("while True:\n    pass")
+    filho = ChildRun([sys.executable, runner, str(codigo), "1"], timeout=10)
+    assert filho.read() == b""  # morto por SIGXCPU antes de imprimir
+    assert exit_reason(filho.wait()) in ("cpu_limit", "killed") and not filho.timed_out
+    assert filho.usage["cpu_user_ms"] + filho.usage["cpu_sys_ms"] >= 900
+    assert filho.usage["peak_rss_kb"] > 0
+
+    filho = ChildRun([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.3)
+    assert filho.read() == b"" and filho.wait() < 0 and filho.timed_out
+    assert "cpu_user_ms" in filho.usage
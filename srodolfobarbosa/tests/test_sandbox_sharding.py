@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.sandbox.sharding import DurationStore, plan_shards, run_sharded
+
+
+def test_plan_shards_balanceia_por_duracao():
+    duracoes = {"a": 4.0, "b": 3.0, "c": 2.0, "d": 1.0, "e": 1.0}
+    grupos = plan_shards(list("abcdef"), duracoes, 2)
+    cargas = [sum(duracoes.get(n, 1.0) for n in g) for g in grupos]
+    assert sorted(n for g in grupos for n in g) == list("abcdef")
+    assert abs(cargas[0] - cargas[1]) <= 1.0
+    assert plan_shards(["a"], {}, 8) == [["a"]]
+
+
+def test_run_sharded_combina_relatorio(tmp_path):
+    (tmp_path / "test_a.py").write_text(
+        "import time\n"
+        "def test_lento():\n    time.sleep(0.3)\n"
+        "def test_falha():\n    assert 1 == 2, 'quebrou'\n"
+    )
+    (tmp_path / "test_b.py").write_text(
+        "import pytest\n"
+        "class TestB:\n"
+        "    @pytest.mark.parametrize('x', [1, 2])\n"
+        "    def test_param(self, x):\n        assert x\n"
+        "    @pytest.mark.skip('nao')\n"
+        "    def test_pulado(self):\n        pass\n"
+    )
+    duracoes = DurationStore(tmp_path / "dur.json")
+
+    rel = run_sharded(["test_a.py", "test_b.py"], tmp_path, 2, duracoes, timeout=60)
+
+    assert (rel["total"], rel["passed"], rel["failed"], rel["skipped"]) == (5, 3, 1, 1)
+    assert not rel["success"]
+    assert rel["failures"][0]["test"] == "test_a.py::test_falha"
+    assert "quebrou" in rel["failures"][0]["message"]
+    assert len(rel["shards"]) == 2 and sum(s["tests"] for s in rel["shards"]) == 5
+    assert rel["slowest"][0][0] == "test_a.py::test_lento"
+    assert "test_b.py::TestB::test_param[1]" in duracoes.load()
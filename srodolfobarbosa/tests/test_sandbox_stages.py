@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.sandbox.stages import run_cmd, run_stages
+
+
+def _sleep(segundos, ok=True):
+    def etapa():
+        run_cmd(
+            [sys.executable, "-c", f"import time; time.sleep({segundos})"], timeout=30
+        )
+        return ok, {"success": ok}
+
+    return etapa
+
+
+def test_etapas_em_paralelo_levam_o_tempo_da_mais_lenta():
+    t0 = time.monotonic()
+    outcomes = run_stages(
+        {"a": _sleep(0.5), "b": _sleep(0.5), "c": _sleep(0.5)}, timeouts={}
+    )
+    assert time.monotonic() - t0 < 1.2
+    assert all(o.success and o.status == "ok" for o in outcomes.values())
+    assert all(o.duration >= 0.4 for o in outcomes.values())
+
+
+def test_timeout_mata_o_processo_da_etapa():
+    t0 = time.monotonic()
+    outcomes = run_stages(
+        {"lenta": _sleep(30), "rapida": _sleep(0.1)}, timeouts={"lenta": 0.5}
+    )
+    assert time.monotonic() - t0 < 5
+    assert outcomes["lenta"].status == "timeout" and not outcomes["lenta"].success
+    assert outcomes["rapida"].status == "ok"
+
+
+def test_fail_fast_cancela_as_demais():
+    t0 = time.monotonic()
+    outcomes = run_stages(
+        {"tests": _sleep(0.1, ok=False), "lint": _sleep(30)},
+        timeouts={},
+        fail_fast=("tests",),
+    )
+    assert time.monotonic() - t0 < 5
+    assert outcomes["tests"].status == "failed"
+    assert outcomes["lint"].status == "cancelled"
+
+
+def test_etapa_cancelada_nao_lanca_processos_e_termina_antes_do_retorno(tmp_path):
+    marca = tmp_path / "combine"
+    fim = []
+
+    def lenta():
+        try:
+            run_cmd([sys.executable, "-c", "import time; time.sleep(30)"], timeout=60)
+            time.sleep(0.3)  # o thread segue vivo depois do kill (p.ex. lendo o junit)
+            # como o `coverage combine` depois do pytest: não pode rodar
+            run_cmd([sys.executable, "-c", f"open({str(marca)!r}, 'w')"], timeout=30)
+        finally:
+            fim.append(time.monotonic())
+        return True, {"success": True}
+
+    outcomes = run_stages(
+        {"tests": _sleep(0.1, ok=False), "lint": lenta},
+        timeouts={},
+        fail_fast=("tests",),
+    )
+    retorno = time.monotonic()
+    assert outcomes["lint"].status == "cancelled"
+    assert fim and fim[0] <= retorno  # o thread terminou antes de run_stages voltar
+    time.sleep(0.3)
+    assert not marca.exists()
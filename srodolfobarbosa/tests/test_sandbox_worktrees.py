@@ -0,0 +1,122 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from srodolfobarbosa.sandbox.worktrees import WorktreePool
+
+
+def _git(cwd, *args):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    _git(repo, "config", "user.email", "t@t")
+    _git(repo, "config", "user.name", "t")
+    (repo / "a.txt").write_text("base\n")
+    _git(repo, "add", "a.txt")
+    _git(repo, "commit", "-q", "-m", "base")
+    return repo
+
+
+def test_worktrees_concorrentes_nao_tocam_o_repo(repo, tmp_path):
+    pool = WorktreePool(repo, root=tmp_path / "wts", max_worktrees=2)
+    caminhos = []
+    barreira = threading.Barrier(2)
+
+    def validar(i):
+        with pool.worktree(f"sandbox-{i}", base_ref="main") as wt:
+            (wt.path / "a.txt").write_text(f"patch {i}\n")
+            barreira.wait(timeout=10)  # os dois worktrees em uso ao mesmo tempo
+            caminhos.append(wt.path)
+            assert _git(wt.path, "rev-parse", "--abbrev-ref", "HEAD") == f"sandbox-{i}"
+
+    threads = [threading.Thread(target=validar, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(caminhos)) == 2
+    assert (repo / "a.txt").read_text() == "base\n"
+    assert _git(repo, "rev-parse", "--abbrev-ref", "HEAD") == "main"
+
+    # reutiliza o slot limpo; a branch anterior foi liberada e pode ser apagada
+    wt = pool.acquire("sandbox-2", base_ref="main")
+    assert wt.path in caminhos
+    assert (wt.path / "a.txt").read_text() == "base\n"
+    pool.release(wt)
+    _git(repo, "branch", "-D", "sandbox-0", "sandbox-1", "sandbox-2")
+
+    assert pool.cleanup() == 2
+    assert "wt-" not in _git(repo, "worktree", "list")
+
+
+def test_bench_sem_segundo_slot_e_omitido_sem_esperar(repo, tmp_path):
+    from srodolfobarbosa.sandbox.runner import SandboxRunner
+
+    pool = WorktreePool(repo, root=tmp_path / "wts", max_worktrees=1)
+    (repo / "srodolfobarbosa").mkdir()
+    runner = SandboxRunner(
+        repo_path=str(repo), worktree_pool=pool, test_shards=1, bench_rounds=1
+    )
+    runner._bench_once = lambda path: {"import_s": 0.1}
+
+    wt = pool.acquire("sandbox-bench", base_ref="main")
+    try:
+        bench = runner.run_benchmarks(wt)  # único slot ocupado pelo próprio wt
+        assert "sin worktree" in bench["skipped"] and bench["regressions"] == []
+
+        pool.max_worktrees = 2
+
+        def falha(path):
+            raise RuntimeError("uvicorn caiu")
+
+        runner._bench_once = falha
+        bench = runner.run_benchmarks(wt)
+        assert "uvicorn caiu" in bench["skipped"]
+        assert runner.decide_merge(True, True, True, 0.9, bench=bench)[0] == "merge"
+        # o slot do baseline foi devolvido
+        pool.release(pool.acquire(None, base_ref="main", timeout=0))
+    finally:
+        pool.release(wt)
+    _git(repo, "branch", "-D", "sandbox-bench")
+
+
+def test_snapshot_inclui_arquivos_novos_e_aplica_sobre_o_head_local(repo, tmp_path):
+    from srodolfobarbosa.sandbox.runner import SandboxRunner
+
+    (repo / ".gitignore").write_text("srodolfobarbosa/.sandbox/\n*.log\n")
+    _git(repo, "checkout", "-q", "-b", "local")
+    _git(repo, "add", ".gitignore")
+    _git(repo, "commit", "-q", "-m", "commit local, fora da main")
+    (repo / "srodolfobarbosa").mkdir()
+    runner = SandboxRunner(repo_path=str(repo), test_shards=1)
+
+    (repo / "a.txt").write_text("editado\n")
+    (repo / "novo.py").write_text("x = 1\n")
+    (repo / "ruido.log").write_text("ignorado\n")
+    patch, base = runner.snapshot_local_changes()
+    assert base == _git(repo, "rev-parse", "HEAD")
+    assert (
+        _git(repo, "diff", "--cached", "--name-only") == ""
+    )  # índice do usuário intacto
+    assert _git(repo, "status", "--porcelain", "--", "novo.py") == "?? novo.py"
+
+    pool = WorktreePool(repo, root=tmp_path / "wts", max_worktrees=1)
+    with pool.worktree("sandbox-local", base_ref=base) as wt:
+        assert runner.apply_patches([patch], cwd=wt.path)
+        assert (wt.path / "a.txt").read_text() == "editado\n"
+        assert (wt.path / "novo.py").read_text() == "x = 1\n"
+        assert not (wt.path / "ruido.log").exists()
+    _git(repo, "branch", "-D", "sandbox-local")